@@ -1,17 +1,36 @@
 import re
-from typing import Callable
+import uuid
+from typing import Callable, Iterator, Optional
 
 import awswrangler as wr
-from awswrangler.exceptions import QueryFailed
+import boto3
+from awswrangler.exceptions import EmptyDataFrame, InvalidArgumentValue, QueryFailed
 from botocore.exceptions import ClientError
 from pandas import DataFrame
 
-from api.common.config.aws import ATHENA_DATABASE, OUTPUT_QUERY_BUCKET, ATHENA_WORKGROUP
+from api.common.config.aws import (
+    ATHENA_DATABASE,
+    OUTPUT_QUERY_BUCKET,
+    ATHENA_WORKGROUP,
+    AWS_REGION,
+    QUERY_UNLOAD_RESULTS,
+)
+from api.common.config.constants import QUERY_ROWS_PER_CHUNK
 from api.common.custom_exceptions import UserError
+from api.common.logger import AppLogger
+from api.common.utilities import BaseEnum
+from api.domain.data_types import DataTypes
+from api.domain.query_job import QueryExecution, QueryResultsPage
 from api.domain.sql_query import SQLQuery
 from api.domain.storage_metadata import StorageMetaData
 
 
+class QueryUnloadMode(BaseEnum):
+    ALWAYS = "ALWAYS"
+    REQUEST = "REQUEST"
+    NEVER = "NEVER"
+
+
 class AthenaAdapter:
     def __init__(
         self,
@@ -21,28 +40,167 @@ class AthenaAdapter:
         athena_read_sql_query: Callable[
             [str, str], DataFrame
         ] = wr.athena.read_sql_query,
+        athena_start_query_execution: Callable[
+            ..., str
+        ] = wr.athena.start_query_execution,
+        athena_client=boto3.client("athena", region_name=AWS_REGION),
+        get_table_types: Callable[..., dict] = wr.catalog.get_table_types,
+        unload_results: str = QUERY_UNLOAD_RESULTS,
     ):
         self.__database = database
         self.__workgroup = workgroup
         self.__s3_output = s3_output
         self.__athena_read_sql_query = athena_read_sql_query
+        self.__athena_start_query_execution = athena_start_query_execution
+        self.__athena_client = athena_client
+        self.__get_table_types = get_table_types
+        self.__unload_mode = QueryUnloadMode.from_string(unload_results)
         self.__default_end_date = "9999-12-01"
 
-    def query(self, domain: str, dataset: str, query: SQLQuery) -> DataFrame:
+    def query(
+        self, domain: str, dataset: str, query: SQLQuery, unload: bool = False
+    ) -> DataFrame:
+        return self._read_sql_query(domain, dataset, query, unload)
+
+    def query_chunks(
+        self, domain: str, dataset: str, query: SQLQuery, unload: bool = False
+    ) -> Iterator[DataFrame]:
+        # The query runs to completion before the first chunk is read, so that query
+        # errors are raised before any rows are returned
+        return self._read_sql_query(
+            domain, dataset, query, unload, chunksize=QUERY_ROWS_PER_CHUNK
+        )
+
+    def start_query(self, domain: str, dataset: str, query: SQLQuery) -> str:
         table_name = StorageMetaData(domain, dataset).glue_table_name()
         try:
-            return self.__athena_read_sql_query(
+            return self.__athena_start_query_execution(
                 sql=query.to_sql(table_name),
                 database=self.__database,
+                workgroup=self.__workgroup,
+                s3_output=self.__s3_output,
+            )
+        except ClientError as error:
+            self._handle_client_error(error)
+            raise error
+
+    def get_query_execution(self, query_id: str) -> QueryExecution:
+        execution = self.__athena_client.get_query_execution(QueryExecutionId=query_id)[
+            "QueryExecution"
+        ]
+        statistics = execution.get("Statistics", {})
+        return QueryExecution(
+            query_id=query_id,
+            status=execution["Status"]["State"],
+            scanned_bytes=statistics.get("DataScannedInBytes", 0),
+            execution_time_ms=statistics.get("EngineExecutionTimeInMillis"),
+            error=execution["Status"].get("StateChangeReason"),
+        )
+
+    def get_query_results(
+        self, query_id: str, page_size: int, page_token: Optional[str] = None
+    ) -> QueryResultsPage:
+        page_arguments = {"NextToken": page_token} if page_token else {}
+        try:
+            response = self.__athena_client.get_query_results(
+                QueryExecutionId=query_id, MaxResults=page_size, **page_arguments
+            )
+        except ClientError as error:
+            self._handle_client_error(error)
+            raise error
+        result_set = response["ResultSet"]
+        columns = [
+            column["Name"] for column in result_set["ResultSetMetadata"]["ColumnInfo"]
+        ]
+        rows = [
+            [value.get("VarCharValue") for value in row["Data"]]
+            for row in result_set["Rows"]
+        ]
+        # The first row of the first page holds the column names
+        data_rows = rows if page_token else rows[1:]
+        return QueryResultsPage(
+            columns=columns,
+            rows=[dict(zip(columns, row)) for row in data_rows],
+            next_page_token=response.get("NextToken"),
+        )
+
+    def _read_sql_query(
+        self, domain: str, dataset: str, query: SQLQuery, unload: bool, **kwargs
+    ):
+        table_name = StorageMetaData(domain, dataset).glue_table_name()
+        sql = query.to_sql(table_name)
+        try:
+            if self._unloads_result(query, unload):
+                return self._read_unloaded_result(table_name, query, sql, **kwargs)
+            return self.__athena_read_sql_query(
+                sql=sql,
+                database=self.__database,
                 ctas_approach=False,
                 workgroup=self.__workgroup,
                 s3_output=self.__s3_output,
+                **kwargs,
             )
         except QueryFailed as error:
             self._handle_query_error(error, table_name)
         except ClientError as error:
             self._handle_client_error(error)
 
+    def _unloads_result(self, query: SQLQuery, unload: bool) -> bool:
+        # Unloading only pays off for large results, whose size is only known once the
+        # query has run, so it is requested by the caller unless enabled for every query.
+        # Unloaded files are written in parallel, which loses the order of sorted results,
+        # and Athena cannot unload columns without a name
+        if self.__unload_mode == QueryUnloadMode.NEVER:
+            return False
+        if self.__unload_mode == QueryUnloadMode.REQUEST and not unload:
+            return False
+        if query.order_by_columns:
+            AppLogger.info("Reading the sorted query result as CSV to keep its order")
+            return False
+        if query.has_unnamed_columns():
+            AppLogger.info("Reading the query result as CSV as it has unnamed columns")
+            return False
+        return True
+
+    def _read_unloaded_result(
+        self, table_name: str, query: SQLQuery, sql: str, **kwargs
+    ):
+        # The result is unloaded as Parquet to an empty location of its own, read with
+        # multithreaded Arrow and then deleted
+        try:
+            return self.__athena_read_sql_query(
+                sql=sql,
+                database=self.__database,
+                ctas_approach=False,
+                unload_approach=True,
+                keep_files=False,
+                workgroup=self.__workgroup,
+                s3_output=f"s3://{self.__s3_output}/unload/{uuid.uuid4()}/",
+                **kwargs,
+            )
+        except EmptyDataFrame:
+            empty_result = self._empty_result(table_name, query)
+            return iter([empty_result]) if "chunksize" in kwargs else empty_result
+        except InvalidArgumentValue as error:
+            raise UserError(f"Query failed to execute: {error}")
+
+    def _empty_result(self, table_name: str, query: SQLQuery) -> DataFrame:
+        # Athena writes no files for an empty result, so its columns are named from the
+        # query and typed from the columns of the table rather than running the query
+        # again. Columns computed by the query are left untyped
+        table_types = (
+            self.__get_table_types(database=self.__database, table=table_name) or {}
+        )
+        data_types = DataTypes.data_types_of_glue_types()
+        column_names = query.result_column_names(list(table_types))
+        return DataFrame(columns=column_names).astype(
+            {
+                name: data_types.get(table_types[name], DataTypes.OBJECT)
+                for name in column_names
+                if name in table_types
+            }
+        )
+
     def _handle_client_error(self, error):
         if error.response["Error"]["Code"] == "InvalidRequestException":
             raise UserError(f'Failed to execute query: {error.response["Message"]}')
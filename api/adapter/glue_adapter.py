@@ -1,6 +1,6 @@
 import threading
 from time import sleep
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 import boto3
 from botocore.exceptions import ClientError
@@ -12,9 +12,18 @@ from api.common.config.aws import (
     GLUE_CONNECTION_NAME,
     GLUE_QUOTE_CHAR,
     GLUE_CSV_CLASSIFIER,
+    GLUE_CRAWLER_CONFIGURATION,
     GLUE_CSV_SERIALISATION_LIBRARY,
+    GLUE_CSV_SEPARATOR_CHAR,
+    GLUE_CSV_INPUT_FORMAT,
+    GLUE_CSV_OUTPUT_FORMAT,
+    GLUE_PARQUET_SERIALISATION_LIBRARY,
+    GLUE_PARQUET_INPUT_FORMAT,
+    GLUE_PARQUET_OUTPUT_FORMAT,
     GLUE_TABLE_PRESENCE_CHECK_RETRY_COUNT,
     GLUE_TABLE_PRESENCE_CHECK_INTERVAL,
+    GLUE_MAX_PARTITIONS_PER_BATCH,
+    GLUE_MAX_PARTITIONS_PER_DELETE_BATCH,
 )
 from api.common.custom_exceptions import (
     CrawlerCreateFailsError,
@@ -22,12 +31,34 @@ from api.common.custom_exceptions import (
     CrawlerDeleteFailsError,
     GetCrawlerError,
     CrawlerIsNotReadyError,
+    PartitionCreateFailsError,
+    TableCreateFailsError,
     TableDoesNotExistError,
     TableNotCreatedError,
+    TableUpdateFailsError,
 )
 from api.common.logger import AppLogger
+from api.domain.data_types import DataTypes
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import StorageFormat
 from api.domain.storage_metadata import StorageMetaData
 
+GLUE_TABLE_INPUT_KEYS = (
+    "Name",
+    "Description",
+    "Owner",
+    "LastAccessTime",
+    "LastAnalyzedTime",
+    "Retention",
+    "StorageDescriptor",
+    "PartitionKeys",
+    "ViewOriginalText",
+    "ViewExpandedText",
+    "TableType",
+    "Parameters",
+    "TargetTable",
+)
+
 
 class GlueAdapter:
     def __init__(
@@ -64,10 +95,30 @@ class GlueAdapter:
                     ]
                 },
                 Tags=tags,
+                # Tables are defined from the schema, the crawler only adds partitions
+                SchemaChangePolicy={
+                    "UpdateBehavior": "LOG",
+                    "DeleteBehavior": "LOG",
+                },
+                Configuration=GLUE_CRAWLER_CONFIGURATION,
             )
         except ClientError as error:
             self._handle_crawler_create_error(error)
 
+    def create_table(self, schema: Schema):
+        table_input = self._generate_table_input(schema)
+        try:
+            self.glue_client.create_table(
+                DatabaseName=self.glue_catalogue_db_name, TableInput=table_input
+            )
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "AlreadyExistsException":
+                raise TableCreateFailsError(
+                    f"Failed to create table [{table_input['Name']}]"
+                )
+            self._replace_table(table_input)
+        AppLogger.info(f"Glue table [{table_input['Name']}] created from schema")
+
     def start_crawler(self, resource_prefix: str, domain: str, dataset: str):
         try:
             self.glue_client.start_crawler(
@@ -117,6 +168,96 @@ class GlueAdapter:
             f"[{table_name}] was not created after {GLUE_TABLE_PRESENCE_CHECK_RETRY_COUNT * GLUE_TABLE_PRESENCE_CHECK_INTERVAL}s"
         )  # noqa: E501
 
+    def table_exists(self, domain: str, dataset: str) -> bool:
+        try:
+            return (
+                self._get_table(StorageMetaData(domain, dataset).glue_table_name())
+                is not None
+            )
+        except TableDoesNotExistError:
+            return False
+
+    def match_table_column_order(self, schema: Schema) -> Schema:
+        # CSV columns are mapped by position. Tables created by the crawler, before
+        # tables were created from the schema, keep the order of the first file crawled
+        if schema.get_storage_format() != StorageFormat.CSV.value:
+            return schema
+        table_name = StorageMetaData(
+            schema.get_domain(), schema.get_dataset()
+        ).glue_table_name()
+        try:
+            table = self._get_table(table_name)["Table"]
+        except TableDoesNotExistError:
+            return schema
+        return schema.with_column_order(
+            [column["Name"] for column in table["StorageDescriptor"]["Columns"]]
+        )
+
+    def create_partitions(self, domain: str, dataset: str, partition_paths: List[str]):
+        if not partition_paths:
+            return
+        table_name = StorageMetaData(domain, dataset).glue_table_name()
+        try:
+            table = self._get_table(table_name)["Table"]
+            partition_keys = [key["Name"] for key in table["PartitionKeys"]]
+            partition_inputs = [
+                self._generate_partition_input(
+                    path, partition_keys, table["StorageDescriptor"]
+                )
+                for path in partition_paths
+            ]
+        except (TableDoesNotExistError, KeyError, TypeError, ValueError) as error:
+            raise PartitionCreateFailsError(
+                f"Failed to generate partitions for table [{table_name}]: {error}"
+            )
+
+        for start in range(0, len(partition_inputs), GLUE_MAX_PARTITIONS_PER_BATCH):
+            end = start + GLUE_MAX_PARTITIONS_PER_BATCH
+            self._batch_create_partitions(table_name, partition_inputs[start:end])
+        AppLogger.info(
+            f"Registered {len(partition_inputs)} partitions for table [{table_name}]"
+        )
+
+    def replace_table_data(
+        self, domain: str, dataset: str, generation: str, partition_paths: List[str]
+    ) -> Optional[str]:
+        # Returns the generation the table read from before, if any
+        storage_metadata = StorageMetaData(domain, dataset)
+        table_name = storage_metadata.glue_table_name()
+        try:
+            table = self._get_table(table_name)["Table"]
+        except TableDoesNotExistError as error:
+            raise TableUpdateFailsError(error.args[0])
+        storage_descriptor = {
+            **table["StorageDescriptor"],
+            "Location": storage_metadata.generation_s3_path(generation),
+        }
+        partition_keys = [key["Name"] for key in table["PartitionKeys"]]
+        if partition_keys:
+            self._replace_partitions(
+                table_name,
+                [
+                    self._generate_partition_input(
+                        path, partition_keys, storage_descriptor
+                    )
+                    for path in partition_paths
+                ],
+            )
+        try:
+            self.glue_client.update_table(
+                DatabaseName=self.glue_catalogue_db_name,
+                TableInput={
+                    **self._generate_table_input_from_table(table),
+                    "StorageDescriptor": storage_descriptor,
+                },
+            )
+        except ClientError as error:
+            raise TableUpdateFailsError(
+                f"Failed to update location of table [{table_name}]: {error}"
+            )
+        AppLogger.info(f"Glue table [{table_name}] now reads from [{generation}]")
+        return storage_metadata.generation_of(table["StorageDescriptor"]["Location"])
+
     def get_table_last_updated_date(self, table_name) -> str:
         table = self._get_table(table_name)
         return str(table["Table"]["UpdateTime"])
@@ -167,6 +308,208 @@ class GlueAdapter:
         else:
             raise CrawlerCreateFailsError("Crawler creation error")
 
+    def _generate_partition_input(
+        self, partition_path: str, partition_keys: List[str], storage_descriptor: Dict
+    ) -> Dict:
+        partition_values = dict(
+            segment.split("=", 1) for segment in partition_path.split("/")
+        )
+        return {
+            "Values": [partition_values[key] for key in partition_keys],
+            "StorageDescriptor": {
+                **storage_descriptor,
+                "Location": f"{storage_descriptor['Location'].rstrip('/')}/{partition_path}/",
+            },
+        }
+
+    def _replace_table(self, table_input: Dict):
+        try:
+            self.glue_client.update_table(
+                DatabaseName=self.glue_catalogue_db_name, TableInput=table_input
+            )
+        except ClientError:
+            raise TableCreateFailsError(
+                f"Failed to update existing table [{table_input['Name']}]"
+            )
+
+    def _generate_table_input(self, schema: Schema) -> Dict:
+        storage_format = StorageFormat(schema.get_storage_format())
+        storage_metadata = StorageMetaData(schema.get_domain(), schema.get_dataset())
+        return {
+            "Name": storage_metadata.glue_table_name(),
+            "TableType": "EXTERNAL_TABLE",
+            "Parameters": self._generate_table_parameters(storage_format),
+            "PartitionKeys": [
+                {"Name": column.name, "Type": "string"}
+                for column in schema.get_partition_columns()
+            ],
+            "StorageDescriptor": {
+                "Columns": [
+                    {
+                        "Name": column.name,
+                        "Type": self._glue_data_type(column, storage_format),
+                    }
+                    for column in schema.get_non_partition_columns()
+                ],
+                "Location": storage_metadata.s3_path(),
+                **self._generate_storage_format_config(storage_format),
+            },
+        }
+
+    def _generate_table_parameters(self, storage_format: StorageFormat) -> Dict:
+        if storage_format == StorageFormat.PARQUET:
+            return {"classification": "parquet"}
+        return {"classification": "csv", "skip.header.line.count": "1"}
+
+    def _generate_storage_format_config(self, storage_format: StorageFormat) -> Dict:
+        if storage_format == StorageFormat.PARQUET:
+            return {
+                "InputFormat": GLUE_PARQUET_INPUT_FORMAT,
+                "OutputFormat": GLUE_PARQUET_OUTPUT_FORMAT,
+                "SerdeInfo": {
+                    "SerializationLibrary": GLUE_PARQUET_SERIALISATION_LIBRARY,
+                    "Parameters": {"serialization.format": "1"},
+                },
+            }
+        return {
+            "InputFormat": GLUE_CSV_INPUT_FORMAT,
+            "OutputFormat": GLUE_CSV_OUTPUT_FORMAT,
+            "SerdeInfo": {
+                "SerializationLibrary": GLUE_CSV_SERIALISATION_LIBRARY,
+                "Parameters": {
+                    "separatorChar": GLUE_CSV_SEPARATOR_CHAR,
+                    "quoteChar": GLUE_QUOTE_CHAR,
+                },
+            },
+        }
+
+    def _glue_data_type(self, column: Column, storage_format: StorageFormat) -> str:
+        # CSV dates are stored as YYYY-MM-DD text, which the CSV serde cannot read as a date
+        if column.data_type == DataTypes.DATE and storage_format == StorageFormat.CSV:
+            return "string"
+        return DataTypes.glue_data_types()[column.data_type]
+
+    def _batch_create_partitions(self, table_name: str, partition_inputs: List[Dict]):
+        try:
+            response = self.glue_client.batch_create_partition(
+                DatabaseName=self.glue_catalogue_db_name,
+                TableName=table_name,
+                PartitionInputList=partition_inputs,
+            )
+        except ClientError as error:
+            raise PartitionCreateFailsError(
+                f"Failed to create partitions for table [{table_name}]: {error}"
+            )
+        errors = [
+            error
+            for error in response.get("Errors", [])
+            if error["ErrorDetail"]["ErrorCode"] != "AlreadyExistsException"
+        ]
+        if errors:
+            raise PartitionCreateFailsError(
+                f"Failed to create partitions for table [{table_name}]: {errors}"
+            )
+
+    def _replace_partitions(self, table_name: str, partition_inputs: List[Dict]):
+        # Glue has no call to swap partitions at once, so queries running meanwhile can
+        # read a mix of generations. New partitions are created first, before existing
+        # ones are repointed and stale ones dropped, so that the mix only holds whole
+        # partitions of either generation and no partition is ever missing
+        existing_values = set(self._get_partition_values(table_name))
+        new_values = {tuple(partition["Values"]) for partition in partition_inputs}
+        partitions_to_update = [
+            partition
+            for partition in partition_inputs
+            if tuple(partition["Values"]) in existing_values
+        ]
+        partitions_to_create = [
+            partition
+            for partition in partition_inputs
+            if tuple(partition["Values"]) not in existing_values
+        ]
+        partitions_to_delete = [
+            list(values) for values in existing_values if values not in new_values
+        ]
+
+        for start in range(0, len(partitions_to_create), GLUE_MAX_PARTITIONS_PER_BATCH):
+            end = start + GLUE_MAX_PARTITIONS_PER_BATCH
+            try:
+                self._batch_create_partitions(
+                    table_name, partitions_to_create[start:end]
+                )
+            except PartitionCreateFailsError as error:
+                raise TableUpdateFailsError(error.args[0])
+        for start in range(0, len(partitions_to_update), GLUE_MAX_PARTITIONS_PER_BATCH):
+            end = start + GLUE_MAX_PARTITIONS_PER_BATCH
+            self._batch_update_partitions(table_name, partitions_to_update[start:end])
+        for start in range(
+            0, len(partitions_to_delete), GLUE_MAX_PARTITIONS_PER_DELETE_BATCH
+        ):
+            end = start + GLUE_MAX_PARTITIONS_PER_DELETE_BATCH
+            self._batch_delete_partitions(table_name, partitions_to_delete[start:end])
+        AppLogger.info(
+            f"Replaced partitions for table [{table_name}]: {len(partitions_to_create)} created, "
+            f"{len(partitions_to_update)} updated, {len(partitions_to_delete)} deleted"
+        )
+
+    def _get_partition_values(self, table_name: str) -> List[Tuple[str, ...]]:
+        try:
+            paginator = self.glue_client.get_paginator("get_partitions")
+            return [
+                tuple(partition["Values"])
+                for page in paginator.paginate(
+                    DatabaseName=self.glue_catalogue_db_name, TableName=table_name
+                )
+                for partition in page["Partitions"]
+            ]
+        except ClientError as error:
+            raise TableUpdateFailsError(
+                f"Failed to list partitions for table [{table_name}]: {error}"
+            )
+
+    def _batch_update_partitions(self, table_name: str, partition_inputs: List[Dict]):
+        try:
+            response = self.glue_client.batch_update_partition(
+                DatabaseName=self.glue_catalogue_db_name,
+                TableName=table_name,
+                Entries=[
+                    {
+                        "PartitionValueList": partition["Values"],
+                        "PartitionInput": partition,
+                    }
+                    for partition in partition_inputs
+                ],
+            )
+        except ClientError as error:
+            raise TableUpdateFailsError(
+                f"Failed to update partitions for table [{table_name}]: {error}"
+            )
+        if response.get("Errors"):
+            raise TableUpdateFailsError(
+                f"Failed to update partitions for table [{table_name}]: {response['Errors']}"
+            )
+
+    def _batch_delete_partitions(
+        self, table_name: str, partition_values: List[List[str]]
+    ):
+        try:
+            response = self.glue_client.batch_delete_partition(
+                DatabaseName=self.glue_catalogue_db_name,
+                TableName=table_name,
+                PartitionsToDelete=[{"Values": values} for values in partition_values],
+            )
+        except ClientError as error:
+            raise TableUpdateFailsError(
+                f"Failed to delete partitions for table [{table_name}]: {error}"
+            )
+        if response.get("Errors"):
+            raise TableUpdateFailsError(
+                f"Failed to delete partitions for table [{table_name}]: {response['Errors']}"
+            )
+
+    def _generate_table_input_from_table(self, table: Dict) -> Dict:
+        return {key: table[key] for key in GLUE_TABLE_INPUT_KEYS if key in table}
+
     def _table_needs_reconfiguration(self, table_name: str) -> bool:
         try:
             table_config = self._get_table(table_name)
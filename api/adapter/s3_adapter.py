@@ -1,25 +1,78 @@
+import io
 import os
-from typing import Union, Optional, List, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Optional, List, Tuple, Dict, BinaryIO, Callable, Iterable
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from botocore.exceptions import ClientError
 from botocore.response import StreamingBody
 
 from api.common.config.auth import SensitivityLevel
-from api.common.config.aws import DATA_BUCKET, SCHEMAS_LOCATION
-from api.common.config.constants import CONTENT_ENCODING
+from api.common.config.aws import (
+    DATA_BUCKET,
+    SCHEMAS_LOCATION,
+    PARTITION_UPLOAD_CONCURRENCY,
+    MULTIPART_UPLOAD_PART_SIZE,
+    MULTIPART_UPLOAD_CONCURRENCY,
+    S3_MAX_KEYS_PER_DELETE_BATCH,
+    COMPACTION_MANIFESTS_LOCATION,
+    UPSERT_MANIFESTS_LOCATION,
+    RAW_DATA_COMPRESSION,
+)
+from api.adapter.s3_multipart_writer import S3MultipartWriter
+from api.common.compression import compress, decompress
+from api.common.config.constants import CONTENT_ENCODING, PARQUET_COMPRESSION
 from api.common.custom_exceptions import SchemaNotFoundError, UserError, AWSServiceError
 from api.common.logger import AppLogger
+from api.domain.compaction_manifest import CompactionManifest
+from api.domain.data_types import DataTypes
+from api.domain.key_index import KEY_INDEX_COLUMNS, empty_key_index, key_index_path
+from api.domain.query_job import QueryJob, query_job_path
 from api.domain.schema import Schema
-from api.domain.schema_metadata import SchemaMetadata, SchemaMetadatas
-from api.domain.storage_metadata import StorageMetaData
+from api.domain.schema_metadata import SchemaMetadata, SchemaMetadatas, StorageFormat
+from api.domain.storage_metadata import StorageMetaData, data_filenames
+from api.domain.upload_format import Compression, UploadFormat, uncompressed_filename
+from api.domain.upload_job import UploadJob, upload_job_path
+from api.domain.upload_record import (
+    UploadClaim,
+    UploadRecord,
+    upload_claim_path,
+    upload_record_path,
+)
+from api.domain.upsert_manifest import UpsertManifest
 
 
 class S3Adapter:
-    def __init__(self, s3_client=boto3.client("s3"), s3_bucket=DATA_BUCKET):
+    def __init__(
+        self,
+        s3_client=boto3.client(
+            "s3",
+            config=Config(
+                max_pool_connections=PARTITION_UPLOAD_CONCURRENCY
+                * MULTIPART_UPLOAD_CONCURRENCY
+            ),
+        ),
+        s3_bucket=DATA_BUCKET,
+        upload_concurrency: int = PARTITION_UPLOAD_CONCURRENCY,
+        multipart_part_size: int = MULTIPART_UPLOAD_PART_SIZE,
+        multipart_concurrency: int = MULTIPART_UPLOAD_CONCURRENCY,
+        raw_data_compression: str = RAW_DATA_COMPRESSION,
+    ):
         self.__s3_client = s3_client
         self.__s3_bucket = s3_bucket
+        self.__upload_concurrency = upload_concurrency
+        self.__multipart_part_size = multipart_part_size
+        self.__multipart_concurrency = multipart_concurrency
+        self.__raw_data_compression = (
+            None
+            if raw_data_compression == "none"
+            else Compression.from_string(raw_data_compression)
+        )
 
     def store_data(self, object_full_path: str, object_content: bytes):
         self._validate_file(object_content, object_full_path)
@@ -28,6 +81,29 @@ class S3Adapter:
             Bucket=self.__s3_bucket, Key=object_full_path, Body=object_content
         )
 
+    def store_file(self, object_full_path: str, file: BinaryIO):
+        if not self._valid_object_name(object_full_path):
+            raise UserError("File path is invalid")
+
+        self.__s3_client.upload_fileobj(
+            Fileobj=file,
+            Bucket=self.__s3_bucket,
+            Key=object_full_path,
+            Config=self._transfer_config(),
+        )
+
+    def stream_data(self, object_full_path: str) -> S3MultipartWriter:
+        if not self._valid_object_name(object_full_path):
+            raise UserError("File path is invalid")
+
+        return S3MultipartWriter(
+            self.__s3_client,
+            self.__s3_bucket,
+            object_full_path,
+            part_size=self.__multipart_part_size,
+            max_concurrency=self.__multipart_concurrency,
+        )
+
     def retrieve_data(self, key: str) -> StreamingBody:
         response: Dict = self.__s3_client.get_object(Bucket=self.__s3_bucket, Key=key)
         return response.get("Body")
@@ -45,6 +121,88 @@ class S3Adapter:
             if error.response["Error"]["Code"] == "NoSuchKey":
                 return None
 
+    def save_upload_job(self, job: UploadJob):
+        self.store_data(
+            object_full_path=job.job_path(),
+            object_content=self._convert_to_bytes(job.json()),
+        )
+
+    def find_upload_job(
+        self, domain: str, dataset: str, job_id: str
+    ) -> Optional[UploadJob]:
+        try:
+            job = self.retrieve_data(upload_job_path(domain, dataset, job_id))
+            return UploadJob.parse_raw(job.read())
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "NoSuchKey":
+                return None
+            raise error
+
+    def save_query_job(self, job: QueryJob):
+        self.store_data(
+            object_full_path=job.job_path(),
+            object_content=self._convert_to_bytes(job.json()),
+        )
+
+    def find_query_job(
+        self, domain: str, dataset: str, query_id: str
+    ) -> Optional[QueryJob]:
+        try:
+            job = self.retrieve_data(query_job_path(domain, dataset, query_id))
+            return QueryJob.parse_raw(job.read())
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "NoSuchKey":
+                return None
+            raise error
+
+    def save_upload_record(self, record: UploadRecord):
+        record_content = self._convert_to_bytes(record.json())
+        for record_path in record.record_paths():
+            self.store_data(object_full_path=record_path, object_content=record_content)
+
+    def find_upload_record(
+        self, domain: str, dataset: str, index_key: str
+    ) -> Optional[UploadRecord]:
+        try:
+            record = self.retrieve_data(upload_record_path(domain, dataset, index_key))
+            return UploadRecord.parse_raw(record.read())
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "NoSuchKey":
+                return None
+            raise error
+
+    def create_upload_claim(self, claim: UploadClaim) -> bool:
+        # The claim is only written when there is none, so that a single upload holds it
+        try:
+            self.__s3_client.put_object(
+                Bucket=self.__s3_bucket,
+                Key=claim.claim_path(),
+                Body=self._convert_to_bytes(claim.json()),
+                IfNoneMatch="*",
+            )
+            return True
+        except ClientError as error:
+            if error.response["Error"]["Code"] in (
+                "PreconditionFailed",
+                "ConditionalRequestConflict",
+            ):
+                return False
+            raise error
+
+    def find_upload_claim(
+        self, domain: str, dataset: str, index_key: str
+    ) -> Optional[UploadClaim]:
+        try:
+            claim = self.retrieve_data(upload_claim_path(domain, dataset, index_key))
+            return UploadClaim.parse_raw(claim.read())
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "NoSuchKey":
+                return None
+            raise error
+
+    def delete_upload_claim(self, claim: UploadClaim):
+        self.__s3_client.delete_object(Bucket=self.__s3_bucket, Key=claim.claim_path())
+
     def find_raw_file(self, domain: str, dataset: str, filename: str):
         try:
             self.retrieve_data(StorageMetaData(domain, dataset).raw_data_path(filename))
@@ -78,29 +236,228 @@ class S3Adapter:
         schema_metadata = self._retrieve_schema_metadata(domain, dataset)
         return SensitivityLevel.from_string(schema_metadata.get_sensitivity())
 
+    def list_schemas(self) -> List[SchemaMetadata]:
+        return self._list_all_schemas().metadatas
+
     def upload_partitioned_data(
         self,
-        domain: str,
-        dataset: str,
+        schema: Schema,
         filename: str,
         partitioned_data: List[Tuple[str, pd.DataFrame]],
+        generation: Optional[str] = None,
     ):
-
-        for index, (partition_path, data) in enumerate(partitioned_data):
+        def upload_partition(indexed_partition: Tuple[int, Tuple[str, pd.DataFrame]]):
+            index, (partition_path, data) = indexed_partition
             AppLogger.info(
-                f"Uploading partition {index + 1}/{len(partitioned_data)} for {domain}/{dataset}"
+                f"Uploading partition {index + 1}/{len(partitioned_data)} for {schema.get_domain()}/{schema.get_dataset()}"
             )
             upload_path = self._construct_partitioned_data_path(
-                partition_path, filename, domain, dataset
+                partition_path,
+                filename,
+                schema.get_domain(),
+                schema.get_dataset(),
+                generation,
             )
-            data_content = self._convert_to_bytes(data.to_csv(index=False))
-            self.store_data(upload_path, data_content)
+            with self.stream_data(upload_path) as writer:
+                self._serialise_partition(schema, data, writer)
+
+        # Serialisation and upload of each partition run in the same worker so that
+        # CPU work on one partition overlaps with network I/O on others
+        self._run_concurrently(upload_partition, enumerate(partitioned_data))
+
+    def read_partitioned_data(
+        self, schema: Schema, partition_paths: List[str]
+    ) -> List[Tuple[str, pd.DataFrame, List[str]]]:
+        location = StorageMetaData(schema.get_domain(), schema.get_dataset()).location()
+
+        def read_partition(partition_path: str) -> Tuple[str, pd.DataFrame, List[str]]:
+            prefix = "/".join(filter(None, [location, partition_path])) + "/"
+            keys = [file["Key"] for file in self._list_all_files_from_path(prefix)]
+            frames = [self._read_data_file(schema, key) for key in keys]
+            data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            return partition_path, data, keys
 
-    def upload_raw_data(
-        self, domain: str, dataset: str, filename: str, file_contents: Union[bytes, str]
+        return self._run_concurrently(read_partition, partition_paths)
+
+    def read_data_files(self, schema: Schema, keys: List[str]) -> List[pd.DataFrame]:
+        return self._run_concurrently(
+            lambda key: self._read_data_file(schema, key), keys
+        )
+
+    def list_dataset_files(self, domain: str, dataset: str) -> List[Dict]:
+        location = StorageMetaData(domain, dataset).location()
+        return self._list_all_files_from_path(f"{location}/")
+
+    def save_compaction_manifest(self, manifest: CompactionManifest):
+        self.store_data(
+            object_full_path=manifest.manifest_path(),
+            object_content=self._convert_to_bytes(manifest.json()),
+        )
+
+    def list_compaction_manifests(
+        self, domain: str, dataset: str
+    ) -> List[CompactionManifest]:
+        keys = [
+            file["Key"]
+            for file in self._list_all_files_from_path(
+                f"{COMPACTION_MANIFESTS_LOCATION}/{domain}/{dataset}/"
+            )
+            if file["Key"].endswith(".json")
+        ]
+        return self._run_concurrently(
+            lambda key: CompactionManifest.parse_raw(self.retrieve_data(key).read()),
+            keys,
+        )
+
+    def delete_compaction_manifests(
+        self, domain: str, dataset: str, manifests: List[CompactionManifest]
     ):
+        self._delete_keys_in_batches(
+            [manifest.manifest_path() for manifest in manifests], f"{domain}/{dataset}"
+        )
+
+    def save_upsert_manifest(self, manifest: UpsertManifest):
+        self.store_data(
+            object_full_path=manifest.manifest_path(),
+            object_content=self._convert_to_bytes(manifest.json()),
+        )
+
+    def list_upsert_manifests(self, domain: str, dataset: str) -> List[UpsertManifest]:
+        keys = [
+            file["Key"]
+            for file in self._list_all_files_from_path(
+                f"{UPSERT_MANIFESTS_LOCATION}/{domain}/{dataset}/"
+            )
+            if file["Key"].endswith(".json")
+        ]
+        return self._run_concurrently(
+            lambda key: UpsertManifest.parse_raw(self.retrieve_data(key).read()),
+            keys,
+        )
+
+    def delete_upsert_manifest(self, manifest: UpsertManifest):
+        self._delete_keys_in_batches(
+            [manifest.manifest_path()], f"{manifest.domain}/{manifest.dataset}"
+        )
+
+    def partitioned_data_paths(
+        self, schema: Schema, filename: str, partition_paths: List[str]
+    ) -> List[str]:
+        return [
+            self._construct_partitioned_data_path(
+                partition_path, filename, schema.get_domain(), schema.get_dataset()
+            )
+            for partition_path in partition_paths
+        ]
+
+    def delete_partition_files(self, domain: str, dataset: str, keys: List[str]):
+        self._delete_keys_in_batches(keys, f"{domain}/{dataset}")
+
+    def find_key_index(
+        self, domain: str, dataset: str, buckets: List[int]
+    ) -> pd.DataFrame:
+        def read_bucket(bucket: int) -> pd.DataFrame:
+            try:
+                content = self.retrieve_data(key_index_path(domain, dataset, bucket))
+                return pq.read_table(io.BytesIO(content.read())).to_pandas()
+            except ClientError as error:
+                if error.response["Error"]["Code"] == "NoSuchKey":
+                    return empty_key_index()
+                raise error
+
+        return pd.concat(
+            [empty_key_index(), *self._run_concurrently(read_bucket, buckets)],
+            ignore_index=True,
+        )
+
+    def save_key_index(
+        self, domain: str, dataset: str, key_index: List[Tuple[int, pd.DataFrame]]
+    ):
+        def write_bucket(indexed_bucket: Tuple[int, pd.DataFrame]):
+            bucket, data = indexed_bucket
+            table = pa.Table.from_pandas(data[KEY_INDEX_COLUMNS], preserve_index=False)
+            with self.stream_data(key_index_path(domain, dataset, bucket)) as writer:
+                pq.write_table(table, writer, compression=PARQUET_COMPRESSION)
+
+        self._run_concurrently(write_bucket, key_index)
+
+    def upload_raw_data(self, domain: str, dataset: str, filename: str, file: BinaryIO):
         raw_data_path = StorageMetaData(domain, dataset).raw_data_path(filename)
-        self.store_data(raw_data_path, file_contents)
+        compression = self._raw_data_compression(filename)
+        if compression:
+            self.store_compressed_file(raw_data_path, file, compression)
+        else:
+            self.store_file(raw_data_path, file)
+
+    def store_compressed_file(
+        self, object_full_path: str, file: BinaryIO, compression: Compression
+    ):
+        # The file is compressed in a background thread while the compressed bytes are
+        # uploaded, so compression overlaps with the upload rather than preceding it.
+        # The object keeps its key and records the codec as its content encoding
+        if not self._valid_object_name(object_full_path):
+            raise UserError("File path is invalid")
+
+        read_descriptor, write_descriptor = os.pipe()
+
+        def compress_file():
+            # Closing the pipe ends the upload
+            with open(write_descriptor, "wb") as compressed_output:
+                compress(file, compressed_output, compression.value)
+
+        with open(read_descriptor, "rb") as compressed_file, ThreadPoolExecutor(
+            max_workers=1
+        ) as executor:
+            compression_task = executor.submit(compress_file)
+            try:
+                self.__s3_client.upload_fileobj(
+                    Fileobj=compressed_file,
+                    Bucket=self.__s3_bucket,
+                    Key=object_full_path,
+                    ExtraArgs={"ContentEncoding": compression.value},
+                    Config=self._transfer_config(),
+                )
+            finally:
+                # Stops the compression of a file whose upload failed
+                compressed_file.close()
+        try:
+            compression_task.result()
+        except Exception:
+            # The upload ends early when compression fails, so the object is incomplete
+            self._delete_data(object_full_path)
+            raise
+
+    def generate_raw_data_upload_url(
+        self, domain: str, dataset: str, filename: str, expires_in: int
+    ) -> str:
+        return self.__s3_client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.__s3_bucket,
+                "Key": StorageMetaData(domain, dataset).raw_data_path(filename),
+            },
+            ExpiresIn=expires_in,
+        )
+
+    def download_raw_data(
+        self, domain: str, dataset: str, filename: str, file: BinaryIO
+    ):
+        raw_data_path = StorageMetaData(domain, dataset).raw_data_path(filename)
+        content_encoding = self.__s3_client.head_object(
+            Bucket=self.__s3_bucket, Key=raw_data_path
+        ).get("ContentEncoding")
+        if content_encoding in Compression.values():
+            decompress(self.retrieve_data(raw_data_path), file, content_encoding)
+        else:
+            self.__s3_client.download_fileobj(
+                Bucket=self.__s3_bucket,
+                Key=raw_data_path,
+                Fileobj=file,
+                Config=self._transfer_config(),
+            )
+
+    def delete_raw_data(self, domain: str, dataset: str, filename: str):
+        self._delete_data(StorageMetaData(domain, dataset).raw_data_path(filename))
 
     def list_raw_files(self, domain: str, dataset: str):
         object_list = self._list_files_from_path(
@@ -112,16 +469,84 @@ class S3Adapter:
         dataset_metadata = StorageMetaData(domain, dataset)
         files = self._list_files_from_path(dataset_metadata.location())
         files_to_delete = [
-            {"Key": file["Key"]} for file in files if file["Key"].endswith(filename)
+            {"Key": file["Key"]}
+            for file in files
+            if file["Key"].endswith(data_filenames(filename))
         ]
         files_to_delete.append({"Key": dataset_metadata.raw_data_path(filename)})
         self._delete_objects(files_to_delete, filename)
 
+    def delete_superseded_data(
+        self,
+        domain: str,
+        dataset: str,
+        generation: str,
+        previous_generation: Optional[str],
+    ):
+        # The data read before the switch is kept until the next overwrite, so that
+        # queries already running against it, e.g.: asynchronous queries, can finish
+        dataset_metadata = StorageMetaData(domain, dataset)
+        kept_generations = (generation, previous_generation)
+        keys = [
+            file["Key"]
+            for file in self._list_all_files_from_path(
+                f"{dataset_metadata.location()}/"
+            )
+            if dataset_metadata.generation_of(file["Key"]) not in kept_generations
+        ]
+        self._delete_keys_in_batches(keys, f"{domain}/{dataset}")
+
+    def delete_staged_data(self, domain: str, dataset: str, generation: str):
+        generation_location = StorageMetaData(domain, dataset).generation_location(
+            generation
+        )
+        keys = [
+            file["Key"]
+            for file in self._list_all_files_from_path(f"{generation_location}/")
+        ]
+        self._delete_keys_in_batches(keys, generation_location)
+
     def _construct_partitioned_data_path(
-        self, partition_path: str, filename: str, domain: str, dataset: str
+        self,
+        partition_path: str,
+        filename: str,
+        domain: str,
+        dataset: str,
+        generation: Optional[str] = None,
     ) -> str:
-        dataset_meta_data = StorageMetaData(domain, dataset)
-        return os.path.join(dataset_meta_data.location(), partition_path, filename)
+        dataset_metadata = StorageMetaData(domain, dataset)
+        location = (
+            dataset_metadata.generation_location(generation)
+            if generation
+            else dataset_metadata.location()
+        )
+        return os.path.join(location, partition_path, filename)
+
+    def _delete_keys_in_batches(self, keys: List[str], description: str):
+        objects = [{"Key": key} for key in keys]
+        batches = []
+        for start in range(0, len(objects), S3_MAX_KEYS_PER_DELETE_BATCH):
+            end = start + S3_MAX_KEYS_PER_DELETE_BATCH
+            batches.append(objects[start:end])
+        self._run_concurrently(
+            lambda batch: self._delete_objects(batch, description), batches
+        )
+
+    def _raw_data_compression(self, filename: str) -> Optional[Compression]:
+        # Compressed uploads and Parquet files, whose pages are compressed, are stored as they are
+        if (
+            Compression.from_filename(filename)
+            or UploadFormat.from_filename(filename) == UploadFormat.PARQUET
+        ):
+            return None
+        return self.__raw_data_compression
+
+    def _run_concurrently(self, function: Callable, items: Iterable) -> List:
+        executor = ThreadPoolExecutor(max_workers=self.__upload_concurrency)
+        try:
+            return list(executor.map(function, items))
+        finally:
+            executor.shutdown(cancel_futures=True)
 
     def _delete_objects(self, files_to_delete: List[Dict], filename: str):
         response = self.__s3_client.delete_objects(
@@ -141,6 +566,14 @@ class S3Adapter:
                 f"The file [{filename}] could not be deleted. Please contact your administrator."
             )
 
+    def _list_all_files_from_path(self, file_path: str) -> List[Dict]:
+        paginator = self.__s3_client.get_paginator("list_objects_v2")
+        return [
+            file
+            for page in paginator.paginate(Bucket=self.__s3_bucket, Prefix=file_path)
+            for file in page.get("Contents", [])
+        ]
+
     def _list_files_from_path(self, file_path: str) -> List[Dict]:
         try:
             response = self.__s3_client.list_objects(
@@ -156,16 +589,83 @@ class S3Adapter:
             return [
                 self._extract_filename(item["Key"])
                 for item in object_list
-                if item["Key"].endswith(".csv")
+                if uncompressed_filename(item["Key"]).endswith(
+                    UploadFormat.file_extensions()
+                )
             ]
         return object_list
 
     def _extract_filename(self, item: str) -> str:
         return item.rsplit("/", 1)[-1]
 
+    def _read_data_file(self, schema: Schema, key: str) -> pd.DataFrame:
+        return self._deserialise_partition(schema, self.retrieve_data(key).read())
+
+    def _transfer_config(self) -> TransferConfig:
+        return TransferConfig(
+            multipart_threshold=self.__multipart_part_size,
+            multipart_chunksize=self.__multipart_part_size,
+            max_concurrency=self.__multipart_concurrency,
+        )
+
     def _convert_to_bytes(self, data: str):
         return bytes(data.encode(CONTENT_ENCODING))
 
+    def _serialise_partition(self, schema: Schema, data: pd.DataFrame, file: BinaryIO):
+        if schema.get_storage_format() == StorageFormat.PARQUET.value:
+            self._write_parquet(schema, data, file)
+        else:
+            self._write_csv(schema, data, file)
+
+    def _deserialise_partition(self, schema: Schema, content: bytes) -> pd.DataFrame:
+        if schema.get_storage_format() == StorageFormat.PARQUET.value:
+            return self._read_parquet(content)
+        # Values are kept as the text they were stored as, so that they are
+        # written back unchanged
+        return pd.read_csv(
+            io.BytesIO(content),
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""],
+            encoding=CONTENT_ENCODING,
+        )
+
+    def _read_parquet(self, content: bytes) -> pd.DataFrame:
+        table = pq.read_table(io.BytesIO(content))
+        # Dates are handled as YYYY-MM-DD text, as they are after validation
+        for index, field in enumerate(table.schema):
+            if pa.types.is_date(field.type):
+                table = table.set_column(
+                    index, field.name, table.column(index).cast(pa.string())
+                )
+        return table.to_pandas(types_mapper=DataTypes.pandas_data_types().get)
+
+    def _write_csv(self, schema: Schema, data: pd.DataFrame, file: BinaryIO):
+        # The Glue table maps CSV columns by position, so they follow the schema order
+        columns = [name for name in schema.get_column_names() if name in data.columns]
+        text_file = io.TextIOWrapper(file, encoding=CONTENT_ENCODING, newline="")
+        data.to_csv(text_file, index=False, columns=columns)
+        # Flushes the encoded text without closing the underlying writer
+        text_file.detach()
+
+    def _write_parquet(self, schema: Schema, data: pd.DataFrame, file: BinaryIO):
+        columns = [column for column in schema.columns if column.name in data.columns]
+        arrow_schema = pa.schema(
+            [
+                (column.name, DataTypes.arrow_data_types()[column.data_type])
+                for column in columns
+            ]
+        )
+        date_columns = {
+            column.name: pd.to_datetime(data[column.name], format="%Y-%m-%d")
+            for column in columns
+            if column.data_type == DataTypes.DATE
+        }
+        table = pa.Table.from_pandas(
+            data.assign(**date_columns), schema=arrow_schema, preserve_index=False
+        )
+        pq.write_table(table, file, compression=PARQUET_COMPRESSION)
+
     def _validate_file(self, object_content, object_full_path):
         if not self._valid_object_name(object_full_path):
             raise UserError("File path is invalid")
@@ -0,0 +1,131 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Optional, Dict
+
+from api.common.config.aws import (
+    MULTIPART_UPLOAD_PART_SIZE,
+    MULTIPART_UPLOAD_CONCURRENCY,
+)
+from api.common.logger import AppLogger
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    Streams written bytes to S3 as a multipart upload of fixed-size parts, uploaded in parallel.
+    Objects smaller than one part are sent with a single PutObject when the writer is closed.
+    Exiting the context with an exception aborts the upload instead of completing it.
+    """
+
+    def __init__(
+        self,
+        s3_client,
+        bucket: str,
+        key: str,
+        part_size: int = MULTIPART_UPLOAD_PART_SIZE,
+        max_concurrency: int = MULTIPART_UPLOAD_CONCURRENCY,
+    ):
+        super().__init__()
+        self.__s3_client = s3_client
+        self.__bucket = bucket
+        self.__key = key
+        self.__part_size = part_size
+        self.__max_concurrency = max_concurrency
+        self.__buffer = bytearray()
+        self.__bytes_written = 0
+        self.__upload_id: Optional[str] = None
+        self.__parts: List[Future] = []
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__parts_in_flight = threading.BoundedSemaphore(max_concurrency)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.__buffer.extend(data)
+        self.__bytes_written += len(data)
+        while len(self.__buffer) >= self.__part_size:
+            part = bytes(self.__buffer[: self.__part_size])
+            del self.__buffer[: self.__part_size]
+            self._upload_part(part)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.__bytes_written
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.__upload_id is None:
+                self.__s3_client.put_object(
+                    Bucket=self.__bucket, Key=self.__key, Body=bytes(self.__buffer)
+                )
+            else:
+                if self.__buffer:
+                    self._upload_part(bytes(self.__buffer))
+                self._complete_multipart_upload()
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self.__buffer = bytearray()
+            self._shutdown_executor()
+            super().close()
+
+    def abort(self):
+        if self.__upload_id is not None:
+            AppLogger.info(f"Aborting multipart upload of [{self.__key}]")
+            self._shutdown_executor()
+            self.__s3_client.abort_multipart_upload(
+                Bucket=self.__bucket, Key=self.__key, UploadId=self.__upload_id
+            )
+            self.__upload_id = None
+        self.__buffer = bytearray()
+        super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _upload_part(self, part: bytes):
+        if self.__upload_id is None:
+            response = self.__s3_client.create_multipart_upload(
+                Bucket=self.__bucket, Key=self.__key
+            )
+            self.__upload_id = response["UploadId"]
+            self.__executor = ThreadPoolExecutor(max_workers=self.__max_concurrency)
+
+        part_number = len(self.__parts) + 1
+        # Bounds the number of parts held in memory while they are being uploaded
+        self.__parts_in_flight.acquire()
+        future = self.__executor.submit(self._send_part, part_number, part)
+        future.add_done_callback(lambda _: self.__parts_in_flight.release())
+        self.__parts.append(future)
+
+    def _send_part(self, part_number: int, part: bytes) -> Dict:
+        response = self.__s3_client.upload_part(
+            Bucket=self.__bucket,
+            Key=self.__key,
+            UploadId=self.__upload_id,
+            PartNumber=part_number,
+            Body=part,
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def _complete_multipart_upload(self):
+        parts = [future.result() for future in self.__parts]
+        self.__s3_client.complete_multipart_upload(
+            Bucket=self.__bucket,
+            Key=self.__key,
+            UploadId=self.__upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        self.__upload_id = None
+
+    def _shutdown_executor(self):
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True, cancel_futures=True)
+            self.__executor = None
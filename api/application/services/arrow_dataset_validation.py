@@ -0,0 +1,305 @@
+import csv
+import io
+from functools import reduce
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from api.common.config.constants import CONTENT_ENCODING
+from api.common.custom_exceptions import DatasetError
+from api.common.value_transformers import clean_column_name
+from api.domain.data_types import DataTypes
+from api.domain.schema import Schema, Column
+from api.domain.validation_context import ValidationContext
+
+PANDAS_DATA_TYPES = DataTypes.pandas_data_types()
+
+
+def supports_arrow_ingest(schema: Schema) -> bool:
+    # Dates without a format are inferred, which only the pandas engine supports
+    return all(column.format for column in schema.get_columns_by_type(DataTypes.DATE))
+
+
+def construct_arrow_chunks(
+    schema: Schema, file: BinaryIO, rows_per_chunk: int
+) -> Iterator[pa.Table]:
+    raw_column_names = read_column_names(file)
+    column_names = [clean_column_name(name) for name in raw_column_names]
+    dataset_has_correct_columns(column_names, schema)
+    reader = pacsv.open_csv(
+        file,
+        read_options=pacsv.ReadOptions(use_threads=True, encoding=CONTENT_ENCODING),
+        convert_options=pacsv.ConvertOptions(
+            column_types=arrow_column_types(
+                dict(zip(column_names, raw_column_names)), schema
+            ),
+            strings_can_be_null=True,
+        ),
+    )
+    for table in rechunk_batches(reader, reader.schema, rows_per_chunk):
+        yield table.rename_columns(column_names)
+
+
+def construct_parquet_chunks(
+    schema: Schema, file: BinaryIO, rows_per_chunk: int
+) -> Iterator[pa.Table]:
+    parquet_file = pq.ParquetFile(file)
+    column_names = validate_file_schema(
+        parquet_file.schema_arrow,
+        schema,
+        parquet_statistics_errors(parquet_file.metadata, schema),
+    )
+    batches = parquet_file.iter_batches(batch_size=rows_per_chunk)
+    for table in rechunk_batches(batches, parquet_file.schema_arrow, rows_per_chunk):
+        yield table.rename_columns(column_names)
+
+
+def construct_arrow_stream_chunks(
+    schema: Schema, file: BinaryIO, rows_per_chunk: int
+) -> Iterator[pa.Table]:
+    reader = pa.ipc.open_stream(file)
+    column_names = validate_file_schema(reader.schema, schema)
+    for table in rechunk_batches(reader, reader.schema, rows_per_chunk):
+        yield table.rename_columns(column_names)
+
+
+def rechunk_batches(
+    batches: Iterable[pa.RecordBatch], arrow_schema: pa.Schema, rows_per_chunk: int
+) -> Iterator[pa.Table]:
+    buffered, row_count = [], 0
+    for batch in batches:
+        buffered.append(batch)
+        row_count += batch.num_rows
+        while row_count >= rows_per_chunk:
+            table = pa.Table.from_batches(buffered, schema=arrow_schema)
+            yield table.slice(0, rows_per_chunk)
+            remainder = table.slice(rows_per_chunk)
+            buffered, row_count = remainder.to_batches(), remainder.num_rows
+    if row_count:
+        yield pa.Table.from_batches(buffered, schema=arrow_schema)
+
+
+def validate_file_schema(
+    arrow_schema: pa.Schema, schema: Schema, data_errors: Optional[List[str]] = None
+) -> List[str]:
+    # Typed files are checked against the schema from their metadata before any row is read
+    column_names = [clean_column_name(name) for name in arrow_schema.names]
+    dataset_has_correct_columns(column_names, schema)
+    data_types = dict(zip(column_names, arrow_schema.types))
+    error_list = [
+        *[
+            f"Column [{column.name}] has an incorrect data type. Expected {column.data_type}, received {data_types[column.name]}"
+            for column in schema.columns
+            if not is_compatible_type(data_types[column.name], column)
+        ],
+        *(data_errors or []),
+    ]
+    if error_list:
+        raise DatasetError(error_list)
+    return column_names
+
+
+def is_compatible_type(data_type: pa.DataType, column: Column) -> bool:
+    if pa.types.is_dictionary(data_type):
+        data_type = data_type.value_type
+    is_string = pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+    if pa.types.is_null(data_type):
+        return True
+    if column.data_type == DataTypes.DATE:
+        # Dates held as strings can only be read with a format
+        return (
+            pa.types.is_date(data_type)
+            or pa.types.is_timestamp(data_type)
+            or (is_string and column.format is not None)
+        )
+    return {
+        DataTypes.INT: pa.types.is_integer(data_type),
+        DataTypes.FLOAT: pa.types.is_floating(data_type)
+        or pa.types.is_integer(data_type),
+        DataTypes.BOOLEAN: pa.types.is_boolean(data_type),
+        DataTypes.STRING: is_string,
+    }[column.data_type]
+
+
+def parquet_statistics_errors(metadata: pq.FileMetaData, schema: Schema) -> List[str]:
+    non_nullable_columns = {
+        column.name for column in schema.columns if not column.allow_null
+    }
+    error_list = []
+    for row_group_index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(row_group_index)
+        null_counts = {}
+        for column_index in range(row_group.num_columns):
+            column = row_group.column(column_index)
+            if column.statistics is not None and column.statistics.has_null_count:
+                null_counts[
+                    clean_column_name(column.path_in_schema)
+                ] = column.statistics.null_count
+        # Rows that are entirely empty are dropped, so nulls are only known to be
+        # invalid when another column has a value in every row of the row group
+        if 0 not in null_counts.values():
+            continue
+        error_list.extend(
+            f"Column [{name}] does not allow null values"
+            for name, null_count in null_counts.items()
+            if name in non_nullable_columns and null_count > 0
+        )
+    return list(dict.fromkeys(error_list))
+
+
+def read_column_names(file: BinaryIO) -> List[str]:
+    header = file.readline().decode(CONTENT_ENCODING)
+    file.seek(0)
+    return next(csv.reader(io.StringIO(header)), [])
+
+
+def arrow_column_types(
+    raw_column_names: Dict[str, str], schema: Schema
+) -> Dict[str, pa.DataType]:
+    data_types = {
+        **DataTypes.arrow_data_types(),
+        # Dates are parsed after reading with the format defined in the schema
+        DataTypes.DATE: pa.string(),
+    }
+    return {
+        raw_column_names[column.name]: data_types[column.data_type]
+        for column in schema.columns
+    }
+
+
+def dataset_has_correct_columns(column_names: List[str], schema: Schema):
+    expected_columns = schema.get_column_names()
+    actual_columns = column_names
+    has_expected_columns = all(
+        [expected_column in actual_columns for expected_column in expected_columns]
+    )
+
+    if not has_expected_columns or len(actual_columns) != len(expected_columns):
+        raise DatasetError(
+            f"Expected columns: {expected_columns}, received: {actual_columns}"
+        )
+
+
+def transform_and_validate_table(schema: Schema, table: pa.Table) -> pd.DataFrame:
+    validation_context = (
+        ValidationContext(table)
+        .pipe(cast_to_schema_types, schema)
+        .pipe(remove_empty_rows)
+        .pipe(convert_dates_to_ymd, schema)
+        .pipe(dataset_has_acceptable_null_values, schema)
+        .pipe(dataset_has_no_illegal_characters_in_partition_columns, schema)
+    )
+
+    if validation_context.has_errors():
+        raise DatasetError(validation_context.errors())
+
+    return validation_context.get_dataframe().to_pandas(
+        types_mapper=PANDAS_DATA_TYPES.get
+    )
+
+
+def cast_to_schema_types(table: pa.Table, schema: Schema) -> Tuple[pa.Table, List[str]]:
+    # Only columns of typed files can differ from the types CSV files are read as
+    data_types = DataTypes.arrow_data_types()
+    error_list = []
+    for column in schema.columns:
+        index = table.schema.get_field_index(column.name)
+        data_type = table.schema.field(index).type
+        expected_type = data_types[column.data_type]
+        if column.data_type == DataTypes.DATE:
+            expected_type = (
+                data_type.value_type if pa.types.is_dictionary(data_type) else data_type
+            )
+        if data_type == expected_type:
+            continue
+        try:
+            table = table.set_column(
+                index, column.name, pc.cast(table.column(index), expected_type)
+            )
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            error_list.append(
+                f"Failed to convert column [{column.name}] to type [{column.data_type}]"
+            )
+    return table, error_list
+
+
+def remove_empty_rows(table: pa.Table) -> Tuple[pa.Table, List[str]]:
+    all_null = reduce(
+        pc.and_, [pc.is_null(column) for column in table.columns], pa.scalar(True)
+    )
+    return table.filter(pc.invert(all_null)), []
+
+
+def convert_dates_to_ymd(table: pa.Table, schema: Schema) -> Tuple[pa.Table, List[str]]:
+    error_list = []
+    for column in schema.get_columns_by_type(DataTypes.DATE):
+        index = table.schema.get_field_index(column.name)
+        try:
+            dates = convert_date_column_to_ymd(table.column(index), column.format)
+            table = table.set_column(index, column.name, dates)
+        except pa.ArrowInvalid:
+            error_list.append(
+                f"Column [{column.name}] does not match specified date format in at least one row"
+            )
+    return table, error_list
+
+
+def convert_date_column_to_ymd(values: pa.ChunkedArray, date_format: str):
+    if pa.types.is_date(values.type) or pa.types.is_timestamp(values.type):
+        # Typed files hold dates as values, which need no format to be read
+        return pc.cast(pc.cast(values, pa.date32(), safe=False), pa.string())
+    if pa.types.is_null(values.type):
+        return pc.cast(values, pa.string())
+    try:
+        timestamps = parse_dates(values, date_format)
+    except pa.ArrowInvalid:
+        # Values have to match the format as a whole to be parsed by Arrow, while pandas
+        # also reads values with a time after the date, e.g.: 2020-01-01 10:00:00 as %Y-%m-%d
+        timestamps = parse_dates_with_pandas(values, date_format)
+    return pc.cast(pc.cast(timestamps, pa.date32(), safe=False), pa.string())
+
+
+def parse_dates(values: pa.ChunkedArray, date_format: str):
+    if "%d" not in date_format:
+        # Formats without a day default to the first day of the month. The day is
+        # appended after a separator of its own, as the format may have none, e.g.: %Y%m
+        values = pc.binary_join_element_wise(values, "01", "-")
+        date_format = f"{date_format}-%d"
+    return pc.strptime(values, format=date_format, unit="s")
+
+
+def parse_dates_with_pandas(values: pa.ChunkedArray, date_format: str):
+    try:
+        timestamps = pd.to_datetime(values.to_pandas(), format=date_format)
+    except ValueError as error:
+        raise pa.ArrowInvalid(str(error))
+    return pa.array(timestamps, from_pandas=True)
+
+
+def dataset_has_acceptable_null_values(
+    table: pa.Table, schema: Schema
+) -> Tuple[pa.Table, List[str]]:
+    error_list = [
+        f"Column [{column.name}] does not allow null values"
+        for column in schema.columns
+        if not column.allow_null and table.column(column.name).null_count > 0
+    ]
+    return table, error_list
+
+
+def dataset_has_no_illegal_characters_in_partition_columns(
+    table: pa.Table, schema: Schema
+) -> Tuple[pa.Table, List[str]]:
+    error_list = []
+    for column in schema.get_partition_columns():
+        values = table.column(column.name)
+        if column.data_type != DataTypes.DATE and pa.types.is_string(values.type):
+            if pc.any(pc.match_substring(values, "/")).as_py():
+                error_list.append(
+                    f"Partition column [{column.name}] has values with illegal characters '/'"
+                )
+    return table, error_list
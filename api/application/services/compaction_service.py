@@ -0,0 +1,271 @@
+import os
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List
+
+import pandas as pd
+
+from api.adapter.glue_adapter import GlueAdapter
+from api.adapter.s3_adapter import S3Adapter
+from api.common.config.aws import COMPACTION_TARGET_FILE_SIZE
+from api.common.config.constants import COMPACTED_FILE_PREFIX
+from api.common.custom_exceptions import (
+    ConflictError,
+    SchemaNotFoundError,
+    UserError,
+)
+from api.common.logger import AppLogger
+from api.domain.compaction_manifest import CompactedSource, CompactionManifest
+from api.domain.schema import Schema
+from api.domain.schema_metadata import StorageFormat, UpdateBehaviour
+from api.domain.storage_metadata import StorageMetaData, data_filenames
+
+
+class CompactionService:
+    def __init__(
+        self,
+        persistence_adapter=S3Adapter(),
+        executor=ThreadPoolExecutor(max_workers=1, thread_name_prefix="compaction"),
+        target_file_size: int = COMPACTION_TARGET_FILE_SIZE,
+        glue_adapter=GlueAdapter(),
+    ):
+        self.persistence_adapter = persistence_adapter
+        self.glue_adapter = glue_adapter
+        self.executor = executor
+        self.target_file_size = target_file_size
+        self.dataset_locks = defaultdict(threading.Lock)
+        self.schedule_stopped = threading.Event()
+
+    def compact_dataset_async(self, domain: str, dataset: str) -> Future:
+        schema = self._get_appended_schema(domain, dataset)
+        lock = self.dataset_locks[(domain, dataset)]
+        if not lock.acquire(blocking=False):
+            raise ConflictError(f"The dataset [{domain}/{dataset}] is being compacted")
+        try:
+            return self.executor.submit(self._compact_locked_dataset, schema, lock)
+        except Exception:
+            lock.release()
+            raise
+
+    def compact_all_datasets(self):
+        for metadata in self.persistence_adapter.list_schemas():
+            schema = self.persistence_adapter.find_schema(
+                metadata.get_domain(), metadata.get_dataset()
+            )
+            if (
+                not schema
+                or schema.get_update_behaviour() != UpdateBehaviour.APPEND.value
+            ):
+                continue
+            try:
+                with self.dataset_locks[(schema.get_domain(), schema.get_dataset())]:
+                    self.compact_dataset(schema)
+            except Exception as error:
+                AppLogger.error(
+                    f"Compaction of {schema.get_domain()}/{schema.get_dataset()} failed: {error}"
+                )
+
+    def schedule_compaction(self, interval: int) -> threading.Thread:
+        def compact_periodically():
+            while not self.schedule_stopped.wait(interval):
+                try:
+                    self.compact_all_datasets()
+                except Exception as error:
+                    AppLogger.error(f"Scheduled compaction failed: {error}")
+
+        thread = threading.Thread(
+            target=compact_periodically, name="compaction-schedule", daemon=True
+        )
+        thread.start()
+        AppLogger.info(f"Scheduled compaction of all datasets every {interval}s")
+        return thread
+
+    def stop_scheduled_compaction(self):
+        self.schedule_stopped.set()
+
+    def compact_dataset(self, schema: Schema) -> int:
+        schema = self.glue_adapter.match_table_column_order(schema)
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        manifests = {
+            manifest.data_path(): manifest
+            for manifest in self.persistence_adapter.list_compaction_manifests(
+                domain, dataset
+            )
+        }
+        partitions = self._group_files_by_partition(
+            self.persistence_adapter.list_dataset_files(domain, dataset),
+            StorageMetaData(domain, dataset).location(),
+        )
+        groups = [
+            (partition_path, group)
+            for partition_path, partition_files in partitions.items()
+            for group in self._group_small_files(partition_files)
+        ]
+        for partition_path, files in groups:
+            self._compact_files(schema, partition_path, files, manifests)
+        AppLogger.info(f"Compacted {len(groups)} groups of files in {domain}/{dataset}")
+        return len(groups)
+
+    @contextmanager
+    def dataset_lock(self, domain: str, dataset: str):
+        lock = self.dataset_locks[(domain, dataset)]
+        if not lock.acquire(blocking=False):
+            raise ConflictError(
+                f"The dataset [{domain}/{dataset}] is being compacted. Please try again later."
+            )
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def remove_compacted_rows(self, schema: Schema, filename: str):
+        # Compacted files hold the rows of many uploads, so the rows of a deleted
+        # upload are removed by rewriting the files they were compacted into
+        filenames = data_filenames(filename)
+        schema = self.glue_adapter.match_table_column_order(schema)
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        # Manifests saved by a compaction that stopped before writing its file are skipped
+        data_files = {
+            file["Key"]
+            for file in self.persistence_adapter.list_dataset_files(domain, dataset)
+        }
+        manifests = self.persistence_adapter.list_compaction_manifests(domain, dataset)
+        for manifest in manifests:
+            if manifest.data_path() in data_files and any(
+                source.filename.endswith(filenames) for source in manifest.sources
+            ):
+                self._remove_sources(schema, manifest, filenames)
+
+    def _compact_locked_dataset(self, schema: Schema, lock: threading.Lock):
+        try:
+            self.compact_dataset(schema)
+        except Exception as error:
+            AppLogger.error(
+                f"Compaction of {schema.get_domain()}/{schema.get_dataset()} failed: {error}"
+            )
+        finally:
+            lock.release()
+
+    def _get_appended_schema(self, domain: str, dataset: str) -> Schema:
+        schema = self.persistence_adapter.find_schema(domain, dataset)
+        if not schema:
+            raise SchemaNotFoundError(
+                f"Could not find schema related to the dataset [{dataset}]"
+            )
+        if schema.get_update_behaviour() != UpdateBehaviour.APPEND.value:
+            raise UserError(
+                f"Only datasets with the {UpdateBehaviour.APPEND.value} update behaviour can be compacted"
+            )
+        return schema
+
+    def _group_files_by_partition(
+        self, files: List[Dict], location: str
+    ) -> Dict[str, List[Dict]]:
+        partitions = defaultdict(list)
+        start = len(location) + 1
+        for file in files:
+            partitions[os.path.dirname(file["Key"][start:])].append(file)
+        return partitions
+
+    def _group_small_files(self, files: List[Dict]) -> List[List[str]]:
+        # Files are grouped in the order they are listed in, so that their rows
+        # keep the order of the uploads they came from
+        groups, group, group_size = [], [], 0
+        for file in files:
+            if file["Size"] >= self.target_file_size:
+                continue
+            if group and group_size + file["Size"] > self.target_file_size:
+                groups.append(group)
+                group, group_size = [], 0
+            group.append(file["Key"])
+            group_size += file["Size"]
+        groups.append(group)
+        return [group for group in groups if len(group) > 1]
+
+    def _compact_files(
+        self,
+        schema: Schema,
+        partition_path: str,
+        keys: List[str],
+        manifests: Dict[str, CompactionManifest],
+    ):
+        frames = self.persistence_adapter.read_data_files(schema, keys)
+        sources = []
+        for key, frame in zip(keys, frames):
+            # Files that were compacted before contribute the uploads they came from
+            if key in manifests:
+                sources.extend(manifests[key].sources)
+            else:
+                sources.append(
+                    CompactedSource(filename=os.path.basename(key), rows=len(frame))
+                )
+        self._replace_files(
+            schema,
+            partition_path,
+            pd.concat(frames, ignore_index=True),
+            sources,
+            keys,
+            [manifests[key] for key in keys if key in manifests],
+        )
+
+    def _remove_sources(
+        self, schema: Schema, manifest: CompactionManifest, filenames: tuple
+    ):
+        data_path = manifest.data_path()
+        (data,) = self.persistence_adapter.read_data_files(schema, [data_path])
+        retained_sources, retained_frames = [], []
+        for source, start, end in manifest.source_row_ranges():
+            if not source.filename.endswith(filenames):
+                retained_sources.append(source)
+                retained_frames.append(data.iloc[start:end])
+        if retained_sources:
+            self._replace_files(
+                schema,
+                manifest.partition_path,
+                pd.concat(retained_frames, ignore_index=True),
+                retained_sources,
+                [data_path],
+                [manifest],
+            )
+        else:
+            self._delete_files(schema, [data_path], [manifest])
+
+    def _replace_files(
+        self,
+        schema: Schema,
+        partition_path: str,
+        data: pd.DataFrame,
+        sources: List[CompactedSource],
+        replaced_keys: List[str],
+        replaced_manifests: List[CompactionManifest],
+    ):
+        manifest = CompactionManifest(
+            domain=schema.get_domain(),
+            dataset=schema.get_dataset(),
+            partition_path=partition_path,
+            filename=self._generate_compacted_filename(schema),
+            sources=sources,
+        )
+        # The manifest is saved first so that the compacted file is never visible
+        # without it. If the process stops before the replaced files are deleted,
+        # their rows are duplicated until the files are deleted by hand.
+        self.persistence_adapter.save_compaction_manifest(manifest)
+        self.persistence_adapter.upload_partitioned_data(
+            schema, manifest.filename, [(partition_path, data)]
+        )
+        self._delete_files(schema, replaced_keys, replaced_manifests)
+
+    def _delete_files(
+        self, schema: Schema, keys: List[str], manifests: List[CompactionManifest]
+    ):
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        self.persistence_adapter.delete_partition_files(domain, dataset, keys)
+        self.persistence_adapter.delete_compaction_manifests(domain, dataset, manifests)
+
+    def _generate_compacted_filename(self, schema: Schema) -> str:
+        # Unlike raw file names, this never ends in a timestamped upload name
+        extension = StorageFormat(schema.get_storage_format()).file_extension()
+        return f"{COMPACTED_FILE_PREFIX}{uuid.uuid4().hex}.{extension}"
@@ -1,5 +1,12 @@
+import re
+import shutil
+import tempfile
+import threading
 import time
-from typing import List, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Iterator, List, Tuple, BinaryIO, Optional
 
 import pandas as pd
 
@@ -7,29 +14,69 @@ from api.adapter.athena_adapter import AthenaAdapter
 from api.adapter.cognito_adapter import CognitoAdapter
 from api.adapter.glue_adapter import GlueAdapter
 from api.adapter.s3_adapter import S3Adapter
-from api.application.services.dataset_validation import get_validated_dataframe
+from api.application.services.dataset_validation import (
+    validate_dataframe_chunks,
+    get_validated_dataframe_chunks,
+    IngestEngine,
+)
 from api.application.services.partitioning_service import generate_partitioned_data
 from api.application.services.protected_domain_service import ProtectedDomainService
+from api.application.services.query_cache import QueryCache
 from api.application.services.schema_validation import validate_schema_for_upload
+from api.application.services.upload_admission_service import (
+    UploadAdmissionService,
+)
+from api.application.services.upload_compression import decompressed_upload
+from api.application.services.upload_index_service import (
+    UploadIndexService,
+    compute_content_hash,
+)
+from api.application.services.upload_job_service import UploadJobService
+from api.application.services.upsert_service import UpsertService
 from api.common.config.auth import SensitivityLevel
-from api.common.config.aws import RESOURCE_PREFIX
+from api.common.config.aws import (
+    RESOURCE_PREFIX,
+    GLUE_CRAWLER_READY_CHECK_RETRY_COUNT,
+    GLUE_CRAWLER_READY_CHECK_INTERVAL,
+    PRESIGNED_UPLOAD_URL_EXPIRY,
+    BATCH_UPLOAD_CONCURRENCY,
+)
+from api.common.config.constants import FILENAME_WITH_TIMESTAMP_REGEX
 from api.common.custom_exceptions import (
+    BaseAppException,
     SchemaNotFoundError,
     ConflictError,
+    DatasetError,
     UserError,
     ProtectedDomainDoesNotExistError,
+    CrawlerIsNotReadyError,
+    CrawlerStartFailsError,
+    PartitionCreateFailsError,
 )
 from api.common.logger import AppLogger
+from api.domain.batch_upload import BatchUploadResult
 from api.domain.data_types import DataTypes
 from api.domain.enriched_schema import (
     EnrichedSchema,
     EnrichedSchemaMetadata,
     EnrichedColumn,
 )
+from api.domain.presigned_upload import PresignedUpload
 from api.domain.schema import Schema
-from api.domain.schema_metadata import UpdateBehaviour
+from api.domain.schema_metadata import UpdateBehaviour, StorageFormat
 from api.domain.sql_query import SQLQuery
-from api.domain.storage_metadata import StorageMetaData
+from api.domain.storage_metadata import (
+    StorageMetaData,
+    filename_with_extension,
+    generate_generation_id,
+)
+from api.domain.upload_format import (
+    Compression,
+    UploadFormat,
+    uncompressed_filename,
+)
+from api.domain.upload_job import UploadJob, UploadJobStage
+from api.domain.upload_record import UploadRecord
 
 
 class DataService:
@@ -40,12 +87,25 @@ class DataService:
         athena_adapter=AthenaAdapter(),
         protected_domain_service=ProtectedDomainService(),
         cognito_adapter=CognitoAdapter(),
+        upload_job_service=UploadJobService(),
+        upload_index_service=UploadIndexService(),
+        upload_admission_service=UploadAdmissionService(),
+        upsert_service=UpsertService(),
+        batch_upload_concurrency: int = BATCH_UPLOAD_CONCURRENCY,
+        query_cache=QueryCache(),
     ):
         self.persistence_adapter = persistence_adapter
         self.glue_adapter = glue_adapter
         self.athena_adapter = athena_adapter
         self.protected_domain_service = protected_domain_service
         self.cognito_adapter = cognito_adapter
+        self.upload_job_service = upload_job_service
+        self.upload_index_service = upload_index_service
+        self.upload_admission_service = upload_admission_service
+        self.upsert_service = upsert_service
+        self.batch_upload_concurrency = batch_upload_concurrency
+        self.query_cache = query_cache
+        self.dataset_write_locks = defaultdict(threading.Lock)
 
     def list_raw_files(self, domain: str, dataset: str) -> list[str]:
         raw_files = self.persistence_adapter.list_raw_files(domain, dataset)
@@ -62,15 +122,31 @@ class DataService:
     def generate_raw_and_permanent_filenames(
         self, schema: Schema, filename: str
     ) -> Tuple[str, str]:
-        behaviour = schema.get_update_behaviour()
-
         raw_filename = self.generate_raw_filename(filename)
+        return raw_filename, self.generate_permanent_filename(schema, raw_filename)
+
+    def generate_permanent_filename(self, schema: Schema, raw_filename: str) -> str:
+        behaviour = schema.get_update_behaviour()
         converter = {
             UpdateBehaviour.APPEND.value: raw_filename,
             UpdateBehaviour.OVERWRITE.value: f"{schema.get_domain()}.csv",
+            UpdateBehaviour.UPSERT.value: raw_filename,
         }
         permanent_filename = converter[behaviour]
-        return raw_filename, permanent_filename
+        # Data is stored uncompressed in the format of the schema, whatever format it was uploaded in
+        if (
+            schema.get_storage_format() != StorageFormat.CSV.value
+            or UploadFormat.from_filename(raw_filename) != UploadFormat.CSV
+            or Compression.from_filename(raw_filename)
+        ):
+            permanent_filename = filename_with_extension(
+                uncompressed_filename(permanent_filename),
+                StorageFormat(schema.get_storage_format()).file_extension(),
+            )
+        return permanent_filename
+
+    def generate_chunk_filename(self, filename: str, chunk_index: int) -> str:
+        return filename if chunk_index == 0 else f"{chunk_index}-{filename}"
 
     def upload_dataset(
         self,
@@ -78,7 +154,9 @@ class DataService:
         domain: str,
         dataset: str,
         filename: str,
-        file_contents: bytes,
+        file: BinaryIO,
+        job: Optional[UploadJob] = None,
+        idempotency_key: Optional[str] = None,
     ) -> str:
         schema = self._get_schema(domain, dataset)
         if not schema:
@@ -86,21 +164,144 @@ class DataService:
                 f"Could not find schema related to the dataset [{dataset}]"
             )
         else:
-            self.glue_adapter.check_crawler_is_ready(resource_prefix, domain, dataset)
-            validated_dataframe = get_validated_dataframe(schema, file_contents)
-            raw_filname, permanent_filename = self.generate_raw_and_permanent_filenames(
-                schema, filename
+            return self._upload_file(
+                resource_prefix, schema, filename, file, job, idempotency_key
             )
-            self.persistence_adapter.upload_raw_data(
-                schema.get_domain(),
-                schema.get_dataset(),
-                raw_filname,
-                file_contents,
+
+    def upload_datasets(
+        self,
+        resource_prefix: str,
+        domain: str,
+        dataset: str,
+        files: List[Tuple[str, BinaryIO]],
+    ) -> List[BatchUploadResult]:
+        schema = self._get_schema(domain, dataset)
+        if not schema:
+            raise SchemaNotFoundError(
+                f"Could not find schema related to the dataset [{dataset}]"
             )
-            self._upload_data(schema, validated_dataframe, permanent_filename)
-            self.glue_adapter.start_crawler(resource_prefix, domain, dataset)
-            self.glue_adapter.update_catalog_table_config(domain, dataset)
-            return permanent_filename
+        self._validate_batch(schema, [filename for filename, _ in files])
+        table_exists = self.glue_adapter.table_exists(domain, dataset)
+        schema = self.glue_adapter.match_table_column_order(schema)
+        if not table_exists:
+            self._check_crawler_is_ready(resource_prefix, domain, dataset, None)
+        executor = ThreadPoolExecutor(max_workers=self.batch_upload_concurrency)
+        try:
+            uploads = list(
+                executor.map(
+                    lambda upload: self._upload_batch_file(schema, *upload), files
+                )
+            )
+        finally:
+            executor.shutdown(cancel_futures=True)
+        # The catalogue is updated once with the partitions of every stored file
+        partition_paths = {}
+        for _, file_partition_paths in uploads:
+            partition_paths.update(dict.fromkeys(file_partition_paths))
+        if partition_paths:
+            try:
+                self._update_catalogue(
+                    resource_prefix, schema, list(partition_paths), table_exists
+                )
+            except CrawlerStartFailsError as error:
+                AppLogger.warning("Failed to start crawler: %s", error.args[0])
+        return [result for result, _ in uploads]
+
+    def generate_upload_url(
+        self, domain: str, dataset: str, filename: str
+    ) -> PresignedUpload:
+        if not self._get_schema(domain, dataset):
+            raise SchemaNotFoundError(
+                f"Could not find schema related to the dataset [{dataset}]"
+            )
+        raw_filename = self.generate_raw_filename(filename)
+        self._validate_raw_filename(raw_filename)
+        upload_url = self.persistence_adapter.generate_raw_data_upload_url(
+            domain, dataset, raw_filename, PRESIGNED_UPLOAD_URL_EXPIRY
+        )
+        return PresignedUpload(
+            filename=raw_filename,
+            upload_url=upload_url,
+            expires_in=PRESIGNED_UPLOAD_URL_EXPIRY,
+        )
+
+    def process_uploaded_file(
+        self,
+        resource_prefix: str,
+        domain: str,
+        dataset: str,
+        raw_filename: str,
+        job: Optional[UploadJob] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        schema = self._get_uploaded_file_schema(domain, dataset, raw_filename)
+        # The file is read from S3 to local disk, so it never passes through the request
+        with tempfile.TemporaryFile() as file:
+            self.persistence_adapter.download_raw_data(
+                domain, dataset, raw_filename, file
+            )
+            file.seek(0)
+            try:
+                return self._upload_file(
+                    resource_prefix,
+                    schema,
+                    raw_filename,
+                    file,
+                    job,
+                    idempotency_key,
+                    raw_file_stored=True,
+                )
+            except DatasetError:
+                # Files that fail validation are not kept, as with uploads via the API
+                self.persistence_adapter.delete_raw_data(domain, dataset, raw_filename)
+                raise
+
+    def process_uploaded_file_async(
+        self,
+        resource_prefix: str,
+        domain: str,
+        dataset: str,
+        raw_filename: str,
+        idempotency_key: Optional[str] = None,
+    ) -> UploadJob:
+        self._get_uploaded_file_schema(domain, dataset, raw_filename)
+        job = self.upload_job_service.create_job(domain, dataset, raw_filename)
+        self.upload_job_service.submit_job(
+            job,
+            lambda: self._process_uploaded_file_job(
+                resource_prefix, job, idempotency_key
+            ),
+        )
+        return job
+
+    def upload_dataset_async(
+        self,
+        resource_prefix: str,
+        domain: str,
+        dataset: str,
+        filename: str,
+        file: BinaryIO,
+        idempotency_key: Optional[str] = None,
+    ) -> UploadJob:
+        if not self._get_schema(domain, dataset):
+            raise SchemaNotFoundError(
+                f"Could not find schema related to the dataset [{dataset}]"
+            )
+        # The request's file is closed once the response is sent, so the job works on its own copy
+        job_file = tempfile.TemporaryFile()
+        shutil.copyfileobj(file, job_file)
+        job_file.seek(0)
+        job = self.upload_job_service.create_job(domain, dataset, filename)
+        self.upload_job_service.submit_job(
+            job,
+            lambda: self._process_upload_job(
+                resource_prefix, job, job_file, idempotency_key
+            ),
+        )
+        return job
+
+    def get_upload_job(self, domain: str, dataset: str, job_id: str) -> UploadJob:
+        return self.upload_job_service.get_job(domain, dataset, job_id)
 
     def upload_schema(self, schema: Schema) -> str:
         if self._get_schema(schema.get_domain(), schema.get_dataset()) is not None:
@@ -119,6 +320,7 @@ class DataService:
         self.cognito_adapter.create_user_groups(
             schema.get_domain(), schema.get_dataset()
         )
+        self.glue_adapter.create_table(schema)
         self.glue_adapter.create_crawler(
             RESOURCE_PREFIX,
             schema.get_domain(),
@@ -155,13 +357,450 @@ class DataService:
             columns=self._enrich_columns(schema, statistics_dataframe),
         )
 
-    def _upload_data(
-        self, schema: Schema, validated_dataframe: pd.DataFrame, filename: str
+    def _process_upload_job(
+        self,
+        resource_prefix: str,
+        job: UploadJob,
+        file: BinaryIO,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        try:
+            return self.upload_dataset(
+                resource_prefix,
+                job.domain,
+                job.dataset,
+                job.filename,
+                file,
+                job,
+                idempotency_key,
+            )
+        except CrawlerStartFailsError as error:
+            AppLogger.warning("Failed to start crawler: %s", error.args[0])
+            return job.uploaded_filename
+        finally:
+            file.close()
+
+    def _process_uploaded_file_job(
+        self,
+        resource_prefix: str,
+        job: UploadJob,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        try:
+            return self.process_uploaded_file(
+                resource_prefix,
+                job.domain,
+                job.dataset,
+                job.filename,
+                job,
+                idempotency_key,
+            )
+        except CrawlerStartFailsError as error:
+            AppLogger.warning("Failed to start crawler: %s", error.args[0])
+            return job.uploaded_filename
+
+    def _get_uploaded_file_schema(
+        self, domain: str, dataset: str, raw_filename: str
+    ) -> Schema:
+        schema = self._get_schema(domain, dataset)
+        if not schema:
+            raise SchemaNotFoundError(
+                f"Could not find schema related to the dataset [{dataset}]"
+            )
+        self._validate_raw_filename(raw_filename)
+        self.persistence_adapter.find_raw_file(domain, dataset, raw_filename)
+        return schema
+
+    def _validate_raw_filename(self, raw_filename: str):
+        if not re.match(FILENAME_WITH_TIMESTAMP_REGEX, raw_filename):
+            raise UserError(f"Invalid file name [{raw_filename}]")
+
+    def _validate_batch(self, schema: Schema, filenames: List[str]):
+        if schema.get_update_behaviour() == UpdateBehaviour.OVERWRITE.value:
+            raise UserError(
+                f"Files cannot be uploaded in batches to datasets with the {UpdateBehaviour.OVERWRITE.value} update behaviour"
+            )
+        if len(set(filenames)) != len(filenames):
+            raise UserError("The files of a batch must have different names")
+
+    def _upload_batch_file(
+        self, schema: Schema, filename: str, file: BinaryIO
+    ) -> Tuple[BatchUploadResult, List[str]]:
+        try:
+            content_hash = compute_content_hash(file)
+            with self.upload_index_service.claim_upload(schema, content_hash, None):
+                previous_upload = self.upload_index_service.find_previous_upload(
+                    schema, content_hash, None
+                )
+                if previous_upload:
+                    return (
+                        BatchUploadResult(
+                            filename=filename,
+                            uploaded=previous_upload.uploaded_filename,
+                            status_code=200,
+                        ),
+                        [],
+                    )
+                # The files of a batch wait for capacity rather than failing the batch
+                with self._admit_upload(schema, filename, file, wait=True) as data_file:
+                    (
+                        ingest_engine,
+                        raw_filename,
+                        permanent_filename,
+                    ) = self._validate_and_store_raw_file(
+                        schema, filename, file, data_file, None
+                    )
+                    with self._dataset_write_lock(schema):
+                        partition_paths = self._store_data(
+                            schema,
+                            data_file,
+                            ingest_engine,
+                            raw_filename,
+                            permanent_filename,
+                            content_hash,
+                            None,
+                            None,
+                            None,
+                        )
+                return (
+                    BatchUploadResult(
+                        filename=filename, uploaded=permanent_filename, status_code=201
+                    ),
+                    partition_paths,
+                )
+        except BaseAppException as error:
+            return (
+                BatchUploadResult(
+                    filename=filename,
+                    details=error.message,
+                    status_code=error.status_code,
+                ),
+                [],
+            )
+        except Exception as error:
+            AppLogger.error(f"Upload of [{filename}] in a batch failed: {error}")
+            return (
+                BatchUploadResult(
+                    filename=filename,
+                    details="Something went wrong. Contact your administrator.",
+                    status_code=500,
+                ),
+                [],
+            )
+
+    def _upload_file(
+        self,
+        resource_prefix: str,
+        schema: Schema,
+        filename: str,
+        file: BinaryIO,
+        job: Optional[UploadJob],
+        idempotency_key: Optional[str],
+        raw_file_stored: bool = False,
+    ) -> str:
+        content_hash = compute_content_hash(file)
+        with self.upload_index_service.claim_upload(
+            schema, content_hash, idempotency_key
+        ):
+            previous_upload = self.upload_index_service.find_previous_upload(
+                schema, content_hash, idempotency_key
+            )
+            if previous_upload:
+                AppLogger.info(
+                    f"File [{filename}] was already uploaded as [{previous_upload.uploaded_filename}]"
+                )
+                if raw_file_stored and previous_upload.raw_filename != filename:
+                    self.persistence_adapter.delete_raw_data(
+                        schema.get_domain(), schema.get_dataset(), filename
+                    )
+                return previous_upload.uploaded_filename
+            # Sync uploads are rejected when over the memory budget, background jobs wait for capacity
+            with self._admit_upload(
+                schema, filename, file, wait=job is not None
+            ) as data_file:
+                return self._process_dataset(
+                    resource_prefix,
+                    schema,
+                    filename,
+                    file,
+                    data_file,
+                    content_hash,
+                    idempotency_key,
+                    job,
+                    raw_file_stored,
+                )
+
+    @contextmanager
+    def _admit_upload(
+        self, schema: Schema, filename: str, file: BinaryIO, wait: bool
+    ) -> Iterator[BinaryIO]:
+        # Memory is estimated from the size of the data rather than of the compressed upload
+        with decompressed_upload(filename, file) as data_file:
+            with self.upload_admission_service.admit(schema, data_file, wait=wait):
+                yield data_file
+
+    def _process_dataset(
+        self,
+        resource_prefix: str,
+        schema: Schema,
+        filename: str,
+        file: BinaryIO,
+        data_file: BinaryIO,
+        content_hash: str,
+        idempotency_key: Optional[str],
+        job: Optional[UploadJob],
+        raw_file_stored: bool = False,
+    ) -> str:
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        table_exists = self.glue_adapter.table_exists(domain, dataset)
+        if not table_exists:
+            self._check_crawler_is_ready(resource_prefix, domain, dataset, job)
+        schema = self.glue_adapter.match_table_column_order(schema)
+        (
+            ingest_engine,
+            raw_filename,
+            permanent_filename,
+        ) = self._validate_and_store_raw_file(
+            schema, filename, file, data_file, job, raw_file_stored
+        )
+        with self._dataset_write_lock(schema):
+            generation = self._generate_generation(schema)
+            partition_paths = self._store_data(
+                schema,
+                data_file,
+                ingest_engine,
+                raw_filename,
+                permanent_filename,
+                content_hash,
+                idempotency_key,
+                job,
+                generation,
+            )
+            self._set_job_stage(job, UploadJobStage.CATALOGUE_UPDATE)
+            self._update_catalogue(
+                resource_prefix, schema, partition_paths, table_exists, generation
+            )
+        return permanent_filename
+
+    def _validate_and_store_raw_file(
+        self,
+        schema: Schema,
+        filename: str,
+        file: BinaryIO,
+        data_file: BinaryIO,
+        job: Optional[UploadJob],
+        raw_file_stored: bool = False,
+    ) -> Tuple[IngestEngine, str, str]:
+        self._set_job_stage(job, UploadJobStage.VALIDATION)
+        ingest_engine = validate_dataframe_chunks(
+            schema, data_file, UploadFormat.from_filename(filename)
+        )
+        if raw_file_stored:
+            raw_filename = filename
+            permanent_filename = self.generate_permanent_filename(schema, filename)
+        else:
+            (
+                raw_filename,
+                permanent_filename,
+            ) = self.generate_raw_and_permanent_filenames(schema, filename)
+            self._set_job_stage(job, UploadJobStage.RAW_FILE_UPLOAD)
+            file.seek(0)
+            self.persistence_adapter.upload_raw_data(
+                schema.get_domain(),
+                schema.get_dataset(),
+                raw_filename,
+                file,
+            )
+        return ingest_engine, raw_filename, permanent_filename
+
+    def _store_data(
+        self,
+        schema: Schema,
+        file: BinaryIO,
+        ingest_engine: IngestEngine,
+        raw_filename: str,
+        permanent_filename: str,
+        content_hash: str,
+        idempotency_key: Optional[str],
+        job: Optional[UploadJob],
+        generation: Optional[str],
+    ) -> List[str]:
+        self._set_job_stage(job, UploadJobStage.DATA_UPLOAD)
+        file.seek(0)
+        try:
+            partition_paths = self._upload_data_in_chunks(
+                schema, file, permanent_filename, ingest_engine, job, generation
+            )
+        finally:
+            # Rows appended to existing partitions can be queried straight away
+            self.query_cache.invalidate(schema.get_domain(), schema.get_dataset())
+        if job:
+            job.uploaded_filename = permanent_filename
+        self.upload_index_service.record_upload(
+            UploadRecord(
+                domain=schema.get_domain(),
+                dataset=schema.get_dataset(),
+                content_hash=content_hash,
+                idempotency_key=idempotency_key,
+                raw_filename=raw_filename,
+                uploaded_filename=permanent_filename,
+            )
+        )
+        return partition_paths
+
+    def _dataset_write_lock(self, schema: Schema):
+        # Overwrites remove every generation but their own once it is visible and
+        # upserts rewrite the partitions they read, so neither can interleave
+        if schema.get_update_behaviour() in (
+            UpdateBehaviour.OVERWRITE.value,
+            UpdateBehaviour.UPSERT.value,
+        ):
+            return self.dataset_write_locks[(schema.get_domain(), schema.get_dataset())]
+        return nullcontext()
+
+    def _generate_generation(self, schema: Schema) -> Optional[str]:
+        if schema.get_update_behaviour() == UpdateBehaviour.OVERWRITE.value:
+            return generate_generation_id()
+        return None
+
+    def _check_crawler_is_ready(
+        self,
+        resource_prefix: str,
+        domain: str,
+        dataset: str,
+        job: Optional[UploadJob],
+    ):
+        if job:
+            self._wait_for_crawler_to_be_ready(resource_prefix, domain, dataset)
+        else:
+            self.glue_adapter.check_crawler_is_ready(resource_prefix, domain, dataset)
+
+    def _wait_for_crawler_to_be_ready(
+        self, resource_prefix: str, domain: str, dataset: str
+    ):
+        # Queued jobs for the same dataset wait for the crawler started by the previous one
+        for _ in range(GLUE_CRAWLER_READY_CHECK_RETRY_COUNT):
+            try:
+                self.glue_adapter.check_crawler_is_ready(
+                    resource_prefix, domain, dataset
+                )
+                return
+            except CrawlerIsNotReadyError:
+                time.sleep(GLUE_CRAWLER_READY_CHECK_INTERVAL)
+        self.glue_adapter.check_crawler_is_ready(resource_prefix, domain, dataset)
+
+    def _update_catalogue(
+        self,
+        resource_prefix: str,
+        schema: Schema,
+        partition_paths: List[str],
+        table_exists: bool,
+        generation: Optional[str] = None,
+    ):
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        try:
+            self._register_data(
+                resource_prefix, schema, partition_paths, table_exists, generation
+            )
+        finally:
+            self.query_cache.invalidate(domain, dataset)
+
+    def _register_data(
+        self,
+        resource_prefix: str,
+        schema: Schema,
+        partition_paths: List[str],
+        table_exists: bool,
+        generation: Optional[str],
     ):
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        if generation:
+            self._replace_data(schema, partition_paths, table_exists, generation)
+            return
+        if table_exists:
+            try:
+                self.glue_adapter.create_partitions(domain, dataset, partition_paths)
+                return
+            except PartitionCreateFailsError as error:
+                AppLogger.warning(
+                    "Falling back to crawler to register partitions: %s", error.args[0]
+                )
+        self.glue_adapter.start_crawler(resource_prefix, domain, dataset)
+        if schema.get_storage_format() == StorageFormat.CSV.value:
+            self.glue_adapter.update_catalog_table_config(domain, dataset)
+
+    def _replace_data(
+        self,
+        schema: Schema,
+        partition_paths: List[str],
+        table_exists: bool,
+        generation: str,
+    ):
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        if not table_exists:
+            self.glue_adapter.create_table(schema)
+        previous_generation = self.glue_adapter.replace_table_data(
+            domain, dataset, generation, partition_paths
+        )
+        self.persistence_adapter.delete_superseded_data(
+            domain, dataset, generation, previous_generation
+        )
+
+    def _set_job_stage(self, job: Optional[UploadJob], stage: UploadJobStage):
+        if job:
+            job.set_stage(stage)
+            self.upload_job_service.update_job(job)
+
+    def _upload_data_in_chunks(
+        self,
+        schema: Schema,
+        file: BinaryIO,
+        filename: str,
+        ingest_engine: IngestEngine,
+        job: Optional[UploadJob] = None,
+        generation: Optional[str] = None,
+    ) -> List[str]:
+        partition_paths = {}
+        try:
+            for index, validated_chunk in enumerate(
+                get_validated_dataframe_chunks(schema, file, ingest_engine)
+            ):
+                chunk_partition_paths = self._upload_data(
+                    schema,
+                    validated_chunk,
+                    self.generate_chunk_filename(filename, index),
+                    generation,
+                )
+                partition_paths.update(dict.fromkeys(chunk_partition_paths))
+                if job:
+                    job.record_chunk(len(validated_chunk))
+                    self.upload_job_service.update_job(job)
+        except Exception:
+            if generation:
+                self.persistence_adapter.delete_staged_data(
+                    schema.get_domain(), schema.get_dataset(), generation
+                )
+            raise
+        return list(partition_paths)
+
+    def _upload_data(
+        self,
+        schema: Schema,
+        validated_dataframe: pd.DataFrame,
+        filename: str,
+        generation: Optional[str] = None,
+    ) -> List[str]:
+        if schema.get_update_behaviour() == UpdateBehaviour.UPSERT.value:
+            return self.upsert_service.upsert_data(
+                schema, validated_dataframe, filename
+            )
         partitioned_data = generate_partitioned_data(schema, validated_dataframe)
         self.persistence_adapter.upload_partitioned_data(
-            schema.get_domain(), schema.get_dataset(), filename, partitioned_data
+            schema, filename, partitioned_data, generation
         )
+        return [
+            partition_path for partition_path, _ in partitioned_data if partition_path
+        ]
 
     def _get_schema(self, domain: str, dataset: str) -> Schema:
         return self.persistence_adapter.find_schema(domain, dataset)
@@ -1,23 +1,224 @@
+import io
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import StringIO
-from typing import Tuple
+from typing import (
+    Tuple,
+    BinaryIO,
+    Iterator,
+    Union,
+    Callable,
+    List,
+    TypeVar,
+    Optional,
+    Dict,
+)
 
 import pandas as pd
+import pyarrow as pa
 from pandas import Timestamp
-
-from api.common.config.constants import CONTENT_ENCODING
+from pandas.io.parsers import TextFileReader
+
+from api.application.services.arrow_dataset_validation import (
+    construct_arrow_chunks,
+    construct_arrow_stream_chunks,
+    construct_parquet_chunks,
+    supports_arrow_ingest,
+    transform_and_validate_table,
+)
+from api.common.config.aws import (
+    DATASET_INGEST_ENGINE,
+    VALIDATION_WORKERS,
+    PARALLEL_VALIDATION_THRESHOLD,
+)
+from api.common.config.constants import CONTENT_ENCODING, DATASET_ROWS_PER_CHUNK
 from api.common.custom_exceptions import DatasetError
+from api.common.logger import AppLogger
+from api.common.utilities import BaseEnum
 from api.common.value_transformers import clean_column_name
 from api.domain.data_types import DataTypes
 from api.domain.schema import Schema
+from api.domain.upload_format import UploadFormat
 from api.domain.validation_context import ValidationContext
 
 
+T = TypeVar("T")
+
+_validation_pool: Optional[ProcessPoolExecutor] = None
+_validation_pool_lock = threading.Lock()
+
+
+class IngestEngine(BaseEnum):
+    ARROW = "ARROW"
+    PANDAS = "PANDAS"
+    # Typed files are read without parsing any text
+    PARQUET = "PARQUET"
+    ARROW_STREAM = "ARROW_STREAM"
+
+
 def get_validated_dataframe(schema: Schema, file_contents: bytes) -> pd.DataFrame:
     df = construct_dataframe(file_contents)
     df = transform_and_validate(schema, df)
     return df
 
 
+def validate_dataframe_chunks(
+    schema: Schema, file: BinaryIO, upload_format: UploadFormat = UploadFormat.CSV
+) -> IngestEngine:
+    engine = select_ingest_engine(schema, upload_format)
+    if engine in (IngestEngine.PARQUET, IngestEngine.ARROW_STREAM):
+        try:
+            validate_chunks(schema, file, engine)
+            return engine
+        except pa.ArrowInvalid as error:
+            raise DatasetError(
+                f"The file could not be read as {upload_format.value}: {error}"
+            )
+    if engine == IngestEngine.ARROW:
+        try:
+            validate_chunks(schema, file, engine)
+            return engine
+        except pa.ArrowInvalid as error:
+            # The pandas engine is more lenient when parsing values and reports errors per column
+            AppLogger.info(f"Falling back to pandas ingest engine: {error}")
+            file.seek(0)
+    validate_chunks(schema, file, IngestEngine.PANDAS)
+    return IngestEngine.PANDAS
+
+
+def select_ingest_engine(
+    schema: Schema, upload_format: UploadFormat = UploadFormat.CSV
+) -> IngestEngine:
+    if upload_format == UploadFormat.PARQUET:
+        return IngestEngine.PARQUET
+    if upload_format == UploadFormat.ARROW:
+        return IngestEngine.ARROW_STREAM
+    engine = IngestEngine.from_string(DATASET_INGEST_ENGINE)
+    if engine == IngestEngine.ARROW and not supports_arrow_ingest(schema):
+        return IngestEngine.PANDAS
+    return engine
+
+
+def validate_chunks(schema: Schema, file: BinaryIO, engine: IngestEngine) -> None:
+    error_list = []
+    parallel = use_parallel_validation(file)
+    for chunk_errors in process_chunks(
+        validate_chunk, schema, construct_chunks(schema, file, engine), engine, parallel
+    ):
+        error_list.extend(chunk_errors)
+
+    if error_list:
+        raise DatasetError(list(dict.fromkeys(error_list)))
+
+
+def validate_chunk(
+    schema: Schema, chunk: Union[pd.DataFrame, pa.Table], engine: IngestEngine
+) -> List[str]:
+    try:
+        transform_and_validate_chunk(schema, chunk, engine)
+        return []
+    except DatasetError as error:
+        # Structural errors (e.g.: wrong columns) are raised as a single message and apply to every chunk
+        if not isinstance(error.message, list):
+            raise error
+        return error.message
+
+
+def get_validated_dataframe_chunks(
+    schema: Schema, file: BinaryIO, engine: IngestEngine = IngestEngine.PANDAS
+) -> Iterator[pd.DataFrame]:
+    parallel = use_parallel_validation(file)
+    return process_chunks(
+        transform_and_validate_chunk,
+        schema,
+        construct_chunks(schema, file, engine),
+        engine,
+        parallel,
+    )
+
+
+def use_parallel_validation(file: BinaryIO) -> bool:
+    if VALIDATION_WORKERS < 2:
+        return False
+    position = file.tell()
+    file_size = file.seek(0, io.SEEK_END)
+    file.seek(position)
+    return file_size >= PARALLEL_VALIDATION_THRESHOLD
+
+
+def process_chunks(
+    function: Callable[[Schema, Union[pd.DataFrame, pa.Table], IngestEngine], T],
+    schema: Schema,
+    chunks: Iterator[Union[pd.DataFrame, pa.Table]],
+    engine: IngestEngine,
+    parallel: bool,
+) -> Iterator[T]:
+    if not parallel:
+        for chunk in chunks:
+            yield function(schema, chunk, engine)
+        return
+
+    pool = validation_process_pool()
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(function, schema, chunk, engine))
+            # Bounds the number of chunks held in memory while workers are busy
+            if len(pending) >= VALIDATION_WORKERS * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        reset_validation_process_pool()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def validation_process_pool() -> ProcessPoolExecutor:
+    global _validation_pool
+    with _validation_pool_lock:
+        if _validation_pool is None:
+            # Workers are spawned rather than forked as the API process runs threads
+            _validation_pool = ProcessPoolExecutor(
+                max_workers=VALIDATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _validation_pool
+
+
+def reset_validation_process_pool():
+    global _validation_pool
+    with _validation_pool_lock:
+        if _validation_pool is not None:
+            _validation_pool.shutdown(wait=False)
+        _validation_pool = None
+
+
+def construct_chunks(
+    schema: Schema, file: BinaryIO, engine: IngestEngine
+) -> Iterator[Union[pd.DataFrame, pa.Table]]:
+    if engine == IngestEngine.ARROW:
+        return construct_arrow_chunks(schema, file, DATASET_ROWS_PER_CHUNK)
+    if engine == IngestEngine.PARQUET:
+        return construct_parquet_chunks(schema, file, DATASET_ROWS_PER_CHUNK)
+    if engine == IngestEngine.ARROW_STREAM:
+        return construct_arrow_stream_chunks(schema, file, DATASET_ROWS_PER_CHUNK)
+    return construct_chunked_dataframe(file, schema)
+
+
+def transform_and_validate_chunk(
+    schema: Schema, chunk: Union[pd.DataFrame, pa.Table], engine: IngestEngine
+) -> pd.DataFrame:
+    if engine == IngestEngine.PANDAS:
+        return transform_and_validate(schema, chunk)
+    return transform_and_validate_table(schema, chunk)
+
+
 def transform_and_validate(schema: Schema, data: pd.DataFrame) -> pd.DataFrame:
     validation_context = (
         ValidationContext(data)
@@ -42,6 +243,34 @@ def construct_dataframe(file_contents: bytes) -> pd.DataFrame:
     return pd.read_csv(parsed_contents, encoding=CONTENT_ENCODING, sep=",")
 
 
+def construct_chunked_dataframe(
+    file: BinaryIO, schema: Optional[Schema] = None
+) -> TextFileReader:
+    return pd.read_csv(
+        file,
+        encoding=CONTENT_ENCODING,
+        sep=",",
+        chunksize=DATASET_ROWS_PER_CHUNK,
+        dtype=text_column_dtypes(file, schema),
+    )
+
+
+def text_column_dtypes(file: BinaryIO, schema: Optional[Schema]) -> Dict[str, type]:
+    # Data types are inferred for each chunk on its own, so text columns are read as text,
+    # otherwise a chunk holding only numeric looking values would be read as numbers
+    if schema is None:
+        return {}
+    text_columns = schema.get_column_names_by_type(
+        DataTypes.STRING
+    ) + schema.get_column_names_by_type(DataTypes.DATE)
+    position = file.tell()
+    header = pd.read_csv(file, encoding=CONTENT_ENCODING, sep=",", nrows=0).columns
+    file.seek(position)
+    return {
+        column: str for column in header if clean_column_name(column) in text_columns
+    }
+
+
 def set_data_types(df: pd.DataFrame, schema: Schema) -> Tuple[pd.DataFrame, list[str]]:
     error_list = []
     columns_to_cast = schema.get_column_dtypes_to_cast()
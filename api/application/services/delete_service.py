@@ -2,14 +2,26 @@ import re
 
 from api.adapter.glue_adapter import GlueAdapter
 from api.adapter.s3_adapter import S3Adapter
+from api.application.services.compaction_service import CompactionService
+from api.application.services.query_cache import QueryCache
 from api.common.config.constants import FILENAME_WITH_TIMESTAMP_REGEX
 from api.common.custom_exceptions import UserError
+from api.domain.schema import Schema
+from api.domain.schema_metadata import UpdateBehaviour
 
 
 class DeleteService:
-    def __init__(self, persistence_adapter=S3Adapter(), glue_adapter=GlueAdapter()):
+    def __init__(
+        self,
+        persistence_adapter=S3Adapter(),
+        glue_adapter=GlueAdapter(),
+        compaction_service=CompactionService(),
+        query_cache=QueryCache(),
+    ):
         self.persistence_adapter = persistence_adapter
         self.glue_adapter = glue_adapter
+        self.compaction_service = compaction_service
+        self.query_cache = query_cache
 
     def delete_schema(self, domain: str, dataset: str, sensitivity: str):
         self.persistence_adapter.delete_schema(domain, dataset, sensitivity)
@@ -18,11 +30,26 @@ class DeleteService:
         self, resource_prefix: str, domain: str, dataset: str, filename: str
     ):
         self._validate_filename(filename)
+        schema = self.persistence_adapter.find_schema(domain, dataset)
+        self._validate_update_behaviour(schema)
         self.persistence_adapter.find_raw_file(domain, dataset, filename)
         self.glue_adapter.check_crawler_is_ready(resource_prefix, domain, dataset)
-        self.persistence_adapter.delete_dataset_files(domain, dataset, filename)
+        with self.compaction_service.dataset_lock(domain, dataset):
+            try:
+                if schema:
+                    self.compaction_service.remove_compacted_rows(schema, filename)
+                self.persistence_adapter.delete_dataset_files(domain, dataset, filename)
+            finally:
+                self.query_cache.invalidate(domain, dataset)
         self.glue_adapter.start_crawler(resource_prefix, domain, dataset)
 
+    def _validate_update_behaviour(self, schema: Schema):
+        # Upserted rows are merged into the files of later uploads
+        if schema and schema.get_update_behaviour() == UpdateBehaviour.UPSERT.value:
+            raise UserError(
+                f"Files cannot be deleted from datasets with the {UpdateBehaviour.UPSERT.value} update behaviour"
+            )
+
     def _validate_filename(self, filename: str):
         if not re.match(FILENAME_WITH_TIMESTAMP_REGEX, filename):
             raise UserError(f"Invalid file name [{filename}]")
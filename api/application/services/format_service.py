@@ -1,4 +1,10 @@
 import csv
+import io
+from typing import Iterable, Iterator, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pandas import DataFrame
 
 from api.domain.mime_type import MimeType
@@ -9,5 +15,62 @@ class FormatService:
     def from_df_to_mimetype(df: DataFrame, mime_type: MimeType):
         if mime_type == MimeType.TEXT_CSV:
             return df.to_csv(quoting=csv.QUOTE_NONNUMERIC)
+        elif mime_type.is_columnar():
+            return b"".join(FormatService._from_chunks_to_columnar([df], mime_type))
         else:
             return df.to_dict(orient="index")
+
+    @staticmethod
+    def from_chunks_to_mimetype(
+        chunks: Iterable[DataFrame], mime_type: MimeType
+    ) -> Iterator[Union[str, bytes]]:
+        if mime_type.is_columnar():
+            yield from FormatService._from_chunks_to_columnar(chunks, mime_type)
+            return
+        # Rows are numbered across chunks, so streamed CSV matches the CSV of the whole result
+        row_count = 0
+        for chunk_index, chunk in enumerate(chunks):
+            chunk.index = pd.RangeIndex(row_count, row_count + len(chunk))
+            if mime_type == MimeType.TEXT_CSV:
+                yield chunk.to_csv(
+                    quoting=csv.QUOTE_NONNUMERIC, header=chunk_index == 0
+                )
+            elif len(chunk):
+                yield chunk.to_json(orient="records", lines=True).rstrip("\n") + "\n"
+            row_count += len(chunk)
+
+    @staticmethod
+    def _from_chunks_to_columnar(
+        chunks: Iterable[DataFrame], mime_type: MimeType
+    ) -> Iterator[bytes]:
+        # Each chunk is written as an Arrow record batch, or a Parquet row group, and the
+        # bytes written so far are sent on, so the whole result is never held as a file.
+        # Later chunks are cast to the schema of the first, so the columns keep one type
+        sink = io.BytesIO()
+        writer = None
+        schema = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = _columnar_writer(sink, schema, mime_type)
+            writer.write_table(table)
+            yield from _drain(sink)
+        if writer is None:
+            writer = _columnar_writer(sink, pa.schema([]), mime_type)
+        writer.close()
+        yield from _drain(sink)
+
+
+def _columnar_writer(sink: io.BytesIO, schema: pa.Schema, mime_type: MimeType):
+    if mime_type == MimeType.APPLICATION_PARQUET:
+        return pq.ParquetWriter(sink, schema)
+    return pa.ipc.new_stream(sink, schema)
+
+
+def _drain(sink: io.BytesIO) -> Iterator[bytes]:
+    written = sink.getvalue()
+    if written:
+        sink.seek(0)
+        sink.truncate()
+        yield written
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Hashable
 
+import numpy as np
 import pandas as pd
 
 from api.domain.schema import Schema
@@ -29,20 +30,46 @@ def generate_partitioned_data(
 def partitioned_dataframe(
     df: pd.DataFrame, partitions: List[str]
 ) -> List[Tuple[str, pd.DataFrame]]:
-    partitioned_data = []
-    grouped = df.groupby(by=partitions)
-    for group_spec, group_data in grouped:
-        group_spec = (group_spec,) if len(partitions) == 1 else group_spec
+    factorized_columns = [pd.factorize(df[column], sort=True) for column in partitions]
+    # Rows without a value for every partition column have no partition to go to
+    (rows,) = np.nonzero(
+        np.all([codes >= 0 for codes, _ in factorized_columns], axis=0)
+    )
+    group_codes = partition_group_codes(
+        [codes[rows] for codes, _ in factorized_columns]
+    )
+    # The data is sorted by partition once, so that each partition is a slice of it
+    # rather than a copy. The sort is stable to keep the order of rows within them,
+    # and uses a radix sort when the codes are narrowed to 16 bits or less.
+    narrowed_codes = group_codes.astype(np.min_scalar_type(group_codes.max(initial=0)))
+    order = np.argsort(narrowed_codes, kind="stable")
+    starts = np.flatnonzero(np.diff(group_codes[order], prepend=-1))
+    ends = [*starts[1:], len(order)]
+    first_rows = rows[order[starts]]
+    partition_values = zip(
+        *[uniques.take(codes[first_rows]) for codes, uniques in factorized_columns]
+    )
 
-        cleaned_dataframe = drop_columns(df=group_data, columns=partitions).reset_index(
-            drop=True
-        )
+    data = drop_columns(df=df, columns=partitions).take(rows[order])
+    data.index = pd.RangeIndex(len(data))
 
-        partitioned_data.append(
-            (generate_path(partitions, group_spec), cleaned_dataframe)
-        )
+    partitioned_data = []
+    for start, end, group_spec in zip(starts.tolist(), ends, partition_values):
+        partition_data = data.iloc[start:end]
+        partition_data.index = pd.RangeIndex(end - start)
+        partitioned_data.append((generate_path(partitions, group_spec), partition_data))
     return partitioned_data
 
 
+def partition_group_codes(column_codes: List[np.ndarray]) -> np.ndarray:
+    # Numbers the combinations of values in the order they sort in, renumbering
+    # after each column so that the numbers stay below the number of rows
+    group_codes = column_codes[0].astype(np.int64)
+    for codes in column_codes[1:]:
+        group_codes = group_codes * (codes.max(initial=0) + 1) + codes
+        group_codes, _ = pd.factorize(group_codes, sort=True)
+    return group_codes
+
+
 def non_partitioned_dataframe(df: pd.DataFrame) -> List[Tuple[str, pd.DataFrame]]:
     return [("", df)]
@@ -0,0 +1,102 @@
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from pandas import DataFrame
+
+from api.common.config.aws import QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+
+# Quoted literals and identifiers are kept as they are, any other run of whitespace is
+# collapsed to a single space
+SQL_WHITESPACE_OUTSIDE_QUOTES = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+")
+
+
+class QueryCacheKey(NamedTuple):
+    domain: str
+    dataset: str
+    version: int
+    sql: str
+
+
+class QueryCache:
+    """
+    Keeps query results in memory, least recently used first out once their total size exceeds
+    the limit, for at most `ttl` seconds. Each dataset has a version that is incremented
+    whenever its data changes, so results computed before a change are never returned after it.
+    """
+
+    def __init__(
+        self,
+        max_size: int = QUERY_CACHE_SIZE,
+        ttl: int = QUERY_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._results: OrderedDict[
+            QueryCacheKey, Tuple[DataFrame, int, float]
+        ] = OrderedDict()
+        self._size = 0
+        self._versions = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def key(self, domain: str, dataset: str, sql: str) -> QueryCacheKey:
+        with self._lock:
+            version = self._versions[(domain, dataset)]
+        return QueryCacheKey(domain, dataset, version, normalise_sql(sql))
+
+    def get(self, key: QueryCacheKey) -> Optional[DataFrame]:
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            result, _, expires_at = entry
+            if expires_at <= self.clock():
+                self._remove(key)
+                return None
+            self._results.move_to_end(key)
+            return result
+
+    def put(self, key: QueryCacheKey, result: DataFrame):
+        if not self.enabled:
+            return
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        if size > self.max_size:
+            return
+        with self._lock:
+            # Results of queries that ran while the dataset changed are already stale
+            if key.version != self._versions[(key.domain, key.dataset)]:
+                return
+            if key in self._results:
+                self._remove(key)
+            self._results[key] = (result, size, self.clock() + self.ttl)
+            self._size += size
+            while self._size > self.max_size:
+                self._remove(next(iter(self._results)))
+
+    def invalidate(self, domain: str, dataset: str):
+        with self._lock:
+            self._versions[(domain, dataset)] += 1
+            for key in [
+                key
+                for key in self._results
+                if key.domain == domain and key.dataset == dataset
+            ]:
+                self._remove(key)
+
+    def _remove(self, key: QueryCacheKey):
+        _, size, _ = self._results.pop(key)
+        self._size -= size
+
+
+def normalise_sql(sql: str) -> str:
+    return SQL_WHITESPACE_OUTSIDE_QUOTES.sub(
+        lambda match: match.group(1) or " ", sql
+    ).strip()
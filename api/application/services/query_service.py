@@ -0,0 +1,101 @@
+from typing import Iterator, Optional
+
+from pandas import DataFrame
+
+from api.adapter.athena_adapter import AthenaAdapter
+from api.adapter.s3_adapter import S3Adapter
+from api.application.services.query_cache import QueryCache
+from api.common.config.constants import QUERY_RESULTS_MAX_PAGE_SIZE
+from api.common.custom_exceptions import (
+    ConflictError,
+    QueryJobNotFoundError,
+    UserError,
+)
+from api.domain.query_job import (
+    QueryExecution,
+    QueryJob,
+    QueryJobStatus,
+    QueryResultsPage,
+)
+from api.domain.sql_query import SQLQuery
+from api.domain.storage_metadata import StorageMetaData
+
+
+class QueryService:
+    def __init__(
+        self,
+        athena_adapter=AthenaAdapter(),
+        query_cache=QueryCache(),
+        persistence_adapter=S3Adapter(),
+    ):
+        self.athena_adapter = athena_adapter
+        self.query_cache = query_cache
+        self.persistence_adapter = persistence_adapter
+
+    def query(
+        self, domain: str, dataset: str, query: SQLQuery, unload: bool = False
+    ) -> DataFrame:
+        # Cached results are shared between requests, so they must not be modified.
+        # Unloaded results keep the column types of the Parquet files, so they are
+        # cached apart from the same query read as CSV
+        table_name = StorageMetaData(domain, dataset).glue_table_name()
+        sql = query.to_sql(table_name)
+        key = self.query_cache.key(
+            domain, dataset, f"UNLOAD ({sql})" if unload else sql
+        )
+        result = self.query_cache.get(key)
+        if result is None:
+            result = self.athena_adapter.query(domain, dataset, query, unload)
+            if result is not None:
+                self.query_cache.put(key, result)
+        return result
+
+    def query_chunks(
+        self, domain: str, dataset: str, query: SQLQuery, unload: bool = False
+    ) -> Iterator[DataFrame]:
+        # Streamed results are too large to be cached
+        return self.athena_adapter.query_chunks(domain, dataset, query, unload)
+
+    def submit_query(
+        self, domain: str, dataset: str, query: SQLQuery
+    ) -> QueryExecution:
+        query_id = self.athena_adapter.start_query(domain, dataset, query)
+        # The job ties the query to its dataset, so that it is only available to
+        # those allowed to read the dataset
+        self.persistence_adapter.save_query_job(
+            QueryJob(query_id=query_id, domain=domain, dataset=dataset)
+        )
+        return QueryExecution(query_id=query_id, status=QueryJobStatus.QUEUED.value)
+
+    def get_query_execution(
+        self, domain: str, dataset: str, query_id: str
+    ) -> QueryExecution:
+        self._get_query_job(domain, dataset, query_id)
+        return self.athena_adapter.get_query_execution(query_id)
+
+    def get_query_results(
+        self,
+        domain: str,
+        dataset: str,
+        query_id: str,
+        page_size: int,
+        page_token: Optional[str] = None,
+    ) -> QueryResultsPage:
+        if not 1 <= page_size <= QUERY_RESULTS_MAX_PAGE_SIZE:
+            raise UserError(
+                f"The page size must be between 1 and {QUERY_RESULTS_MAX_PAGE_SIZE}"
+            )
+        execution = self.get_query_execution(domain, dataset, query_id)
+        if execution.status != QueryJobStatus.SUCCEEDED.value:
+            raise ConflictError(
+                f"The results of query [{query_id}] are not available, its status is [{execution.status}]"
+            )
+        return self.athena_adapter.get_query_results(query_id, page_size, page_token)
+
+    def _get_query_job(self, domain: str, dataset: str, query_id: str) -> QueryJob:
+        job = self.persistence_adapter.find_query_job(domain, dataset, query_id)
+        if not job:
+            raise QueryJobNotFoundError(
+                f"Could not find query [{query_id}] for domain [{domain}] and dataset [{dataset}]"
+            )
+        return job
@@ -12,7 +12,7 @@ from api.common.config.constants import (
 from api.common.custom_exceptions import SchemaError
 from api.domain.data_types import DataTypes
 from api.domain.schema import Schema
-from api.domain.schema_metadata import UpdateBehaviour, Owner
+from api.domain.schema_metadata import UpdateBehaviour, Owner, StorageFormat
 
 
 def validate_schema_for_upload(schema: Schema):
@@ -36,6 +36,7 @@ def schema_has_valid_column_definitions(schema: Schema):
     has_valid_partition_index_values(schema)
     has_only_accepted_data_types(schema)
     has_valid_date_column_definition(schema)
+    has_valid_key_columns(schema)
 
 
 def has_columns(schema: Schema):
@@ -95,6 +96,7 @@ def schema_has_valid_metadata_values(schema: Schema):
         )
     has_valid_sensitivity_level(schema)
     has_valid_update_behaviour(schema)
+    has_valid_storage_format(schema)
 
 
 def schema_has_valid_tag_set(schema: Schema):
@@ -149,6 +151,19 @@ def has_valid_date_column_definition(schema: Schema):
             __has_valid_date_format(column.format)
 
 
+def has_valid_key_columns(schema: Schema):
+    key_columns = schema.get_key_columns()
+    if (
+        schema.get_update_behaviour() == UpdateBehaviour.UPSERT.value
+        and not key_columns
+    ):
+        raise SchemaError(
+            f"You must specify at least one key column for the {UpdateBehaviour.UPSERT.value} update behaviour"
+        )
+    if any(column.allow_null for column in key_columns):
+        raise SchemaError("Key columns can not allow null values")
+
+
 def has_valid_sensitivity_level(schema: Schema):
     if schema.get_sensitivity() not in SensitivityLevel.values():
         raise SchemaError(
@@ -177,6 +192,13 @@ def has_valid_update_behaviour(schema: Schema):
         )
 
 
+def has_valid_storage_format(schema: Schema):
+    if schema.get_storage_format() not in StorageFormat.values():
+        raise SchemaError(
+            f"You must specify a valid storage format. Accepted values: {StorageFormat.values()}"
+        )
+
+
 def __has_unique_value(
     set_to_compare: List[Union[str, int]], actual_value: List[Any], field_name: str
 ):
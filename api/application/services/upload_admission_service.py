@@ -0,0 +1,121 @@
+import io
+import resource
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from api.common.config.aws import (
+    UPLOAD_MEMORY_BUDGET,
+    UPLOAD_RETRY_AFTER,
+    UPLOAD_MEMORY_TRACING,
+    VALIDATION_WORKERS,
+    PARALLEL_VALIDATION_THRESHOLD,
+)
+from api.common.config.constants import (
+    DATASET_ROWS_PER_CHUNK,
+    CSV_BYTES_PER_VALUE_ESTIMATE,
+    MEMORY_BYTES_PER_VALUE_ESTIMATE,
+)
+from api.common.custom_exceptions import UploadCapacityExceededError
+from api.common.logger import AppLogger
+from api.domain.schema import Schema
+
+
+class UploadAdmissionService:
+    def __init__(
+        self,
+        memory_budget: int = UPLOAD_MEMORY_BUDGET,
+        retry_after: int = UPLOAD_RETRY_AFTER,
+        trace_memory: bool = UPLOAD_MEMORY_TRACING,
+    ):
+        self.memory_budget = memory_budget
+        self.retry_after = retry_after
+        self.trace_memory = trace_memory
+        self._reserved_memory = 0
+        self._active_uploads = 0
+        self._condition = threading.Condition()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def estimate_memory(self, schema: Schema, file_size: int) -> int:
+        width = max(len(schema.columns), 1)
+        estimated_rows = file_size // (width * CSV_BYTES_PER_VALUE_ESTIMATE)
+        chunk_rows = min(estimated_rows, DATASET_ROWS_PER_CHUNK)
+        chunks_in_memory = 1
+        if VALIDATION_WORKERS > 1 and file_size >= PARALLEL_VALIDATION_THRESHOLD:
+            chunks_in_memory += VALIDATION_WORKERS * 2
+        return chunk_rows * width * MEMORY_BYTES_PER_VALUE_ESTIMATE * chunks_in_memory
+
+    @contextmanager
+    def admit(self, schema: Schema, file: BinaryIO, wait: bool = False) -> Iterator:
+        # Uploads larger than the whole budget are admitted on their own
+        estimate = min(
+            self.estimate_memory(schema, get_file_size(file)), self.memory_budget
+        )
+        self._reserve(estimate, wait)
+        try:
+            with self._track_peak_memory(schema, estimate):
+                yield
+        finally:
+            self._release(estimate)
+
+    def reserved_memory(self) -> int:
+        return self._reserved_memory
+
+    def _reserve(self, estimate: int, wait: bool):
+        with self._condition:
+            has_capacity = self._condition.wait_for(
+                lambda: self._reserved_memory + estimate <= self.memory_budget,
+                timeout=None if wait else 0,
+            )
+            if not has_capacity:
+                AppLogger.warning(
+                    f"Upload rejected: {estimate} bytes estimated, {self._reserved_memory} of {self.memory_budget} bytes reserved"
+                )
+                raise UploadCapacityExceededError(
+                    "The service is processing too many uploads. Please try again later.",
+                    self.retry_after,
+                )
+            self._reserved_memory += estimate
+            self._active_uploads += 1
+            if self._active_uploads == 1 and self.trace_memory:
+                tracemalloc.reset_peak()
+
+    def _release(self, estimate: int):
+        with self._condition:
+            self._reserved_memory -= estimate
+            self._active_uploads -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def _track_peak_memory(self, schema: Schema, estimate: int) -> Iterator:
+        try:
+            yield
+        finally:
+            AppLogger.info(
+                "Upload memory: domain=%s dataset=%s estimated_bytes=%d peak_rss_bytes=%d traced_peak_bytes=%s",
+                schema.get_domain(),
+                schema.get_dataset(),
+                estimate,
+                peak_rss_bytes(),
+                traced_peak_bytes(),
+            )
+
+
+def get_file_size(file: BinaryIO) -> int:
+    position = file.tell()
+    file_size = file.seek(0, io.SEEK_END)
+    file.seek(position)
+    return file_size
+
+
+def peak_rss_bytes() -> int:
+    # The high-water mark of the whole process, reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def traced_peak_bytes() -> Optional[int]:
+    if not tracemalloc.is_tracing():
+        return None
+    return tracemalloc.get_traced_memory()[1]
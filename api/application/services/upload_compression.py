@@ -0,0 +1,41 @@
+import io
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+from api.common.compression import decompress
+from api.common.config.aws import MAX_UPLOAD_SIZE
+from api.common.custom_exceptions import DatasetError
+from api.domain.upload_format import Compression
+
+
+@contextmanager
+def decompressed_upload(
+    filename: str, file: BinaryIO, max_size: int = MAX_UPLOAD_SIZE
+) -> Iterator[BinaryIO]:
+    # Uploads are read more than once, and Parquet files need random access, so compressed
+    # uploads are decompressed once, in blocks, to a temporary file rather than in memory
+    compression = Compression.from_filename(filename)
+    if compression is None:
+        check_upload_size(file, max_size)
+        yield file
+        return
+    with tempfile.TemporaryFile() as decompressed_file:
+        try:
+            decompress(file, decompressed_file, compression.value, max_size)
+        except OSError as error:
+            raise DatasetError(
+                f"The file could not be decompressed as {compression.value}: {error}"
+            )
+        finally:
+            file.seek(0)
+        decompressed_file.seek(0)
+        yield decompressed_file
+
+
+def check_upload_size(file: BinaryIO, max_size: int):
+    position = file.tell()
+    file_size = file.seek(0, io.SEEK_END)
+    file.seek(position)
+    if file_size > max_size:
+        raise DatasetError(f"The file is larger than the limit of {max_size} bytes")
@@ -0,0 +1,118 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from api.adapter.s3_adapter import S3Adapter
+from api.common.config.aws import UPLOAD_CLAIM_TIMEOUT
+from api.common.config.constants import CONTENT_HASH_READ_SIZE
+from api.common.custom_exceptions import ConflictError, UserError
+from api.common.logger import AppLogger
+from api.domain.schema import Schema
+from api.domain.schema_metadata import UpdateBehaviour
+from api.domain.upload_record import (
+    UploadClaim,
+    UploadRecord,
+    content_hash_index_key,
+    idempotency_key_index_key,
+)
+
+
+def compute_content_hash(file: BinaryIO) -> str:
+    content_hash = hashlib.sha256()
+    for block in iter(lambda: file.read(CONTENT_HASH_READ_SIZE), b""):
+        content_hash.update(block)
+    file.seek(0)
+    return content_hash.hexdigest()
+
+
+class UploadIndexService:
+    def __init__(
+        self,
+        persistence_adapter=S3Adapter(),
+        claim_timeout: int = UPLOAD_CLAIM_TIMEOUT,
+    ):
+        self.persistence_adapter = persistence_adapter
+        self.claim_timeout = claim_timeout
+
+    def find_previous_upload(
+        self, schema: Schema, content_hash: str, idempotency_key: Optional[str]
+    ) -> Optional[UploadRecord]:
+        index_key = self._index_key(schema, content_hash, idempotency_key)
+        if index_key is None:
+            return None
+        record = self.persistence_adapter.find_upload_record(
+            schema.get_domain(), schema.get_dataset(), index_key
+        )
+        if idempotency_key and record and record.content_hash != content_hash:
+            raise ConflictError(
+                f"The idempotency key [{idempotency_key}] has already been used to upload a different file"
+            )
+        if record and self._uploaded_data_exists(record):
+            return record
+        return None
+
+    @contextmanager
+    def claim_upload(
+        self, schema: Schema, content_hash: str, idempotency_key: Optional[str]
+    ) -> Iterator:
+        # The upload is claimed before it is processed, so that a retry of a request
+        # that is still being processed is rejected rather than writing the file twice
+        index_key = self._index_key(schema, content_hash, idempotency_key)
+        if index_key is None:
+            yield
+            return
+        claim = self._claim(schema, index_key)
+        try:
+            yield
+        finally:
+            self.persistence_adapter.delete_upload_claim(claim)
+
+    def record_upload(self, record: UploadRecord):
+        self.persistence_adapter.save_upload_record(record)
+
+    def _index_key(
+        self, schema: Schema, content_hash: str, idempotency_key: Optional[str]
+    ) -> Optional[str]:
+        if idempotency_key:
+            return idempotency_key_index_key(idempotency_key)
+        if schema.get_update_behaviour() == UpdateBehaviour.APPEND.value:
+            return content_hash_index_key(content_hash)
+        # Re-uploading a previous file to an overwritten dataset restores its data
+        return None
+
+    def _claim(self, schema: Schema, index_key: str) -> UploadClaim:
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        claim = UploadClaim(domain=domain, dataset=dataset, index_key=index_key)
+        if self.persistence_adapter.create_upload_claim(claim):
+            return claim
+        # Claims of uploads that stopped without releasing them, e.g.: when their
+        # instance stopped, expire so that the file can be uploaded again
+        existing_claim = self.persistence_adapter.find_upload_claim(
+            domain, dataset, index_key
+        )
+        if existing_claim and self._has_expired(existing_claim):
+            AppLogger.warning(
+                f"Replacing expired upload claim [{index_key}] of [{domain}/{dataset}]"
+            )
+            self.persistence_adapter.delete_upload_claim(existing_claim)
+            if self.persistence_adapter.create_upload_claim(claim):
+                return claim
+        raise ConflictError(
+            f"The file is already being uploaded to [{domain}/{dataset}]. Please try again later."
+        )
+
+    def _has_expired(self, claim: UploadClaim) -> bool:
+        return time.time() - claim.claimed_at >= self.claim_timeout
+
+    def _uploaded_data_exists(self, record: UploadRecord) -> bool:
+        try:
+            self.persistence_adapter.find_raw_file(
+                record.domain, record.dataset, record.raw_filename
+            )
+            return True
+        except UserError:
+            AppLogger.info(
+                f"Previous upload [{record.raw_filename}] has been deleted, processing the file again"
+            )
+            return False
@@ -0,0 +1,124 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict
+
+from api.adapter.s3_adapter import S3Adapter
+from api.common.config.aws import (
+    UPLOAD_JOB_HEARTBEAT_INTERVAL,
+    UPLOAD_JOB_TIMEOUT,
+    UPLOAD_JOB_WORKERS,
+)
+from api.common.custom_exceptions import (
+    BaseAppException,
+    CrawlerIsNotReadyError,
+    DatasetError,
+    SchemaNotFoundError,
+    UploadJobNotFoundError,
+)
+from api.common.logger import AppLogger
+from api.domain.upload_job import UploadJob
+
+
+class UploadJobService:
+    def __init__(
+        self,
+        persistence_adapter=S3Adapter(),
+        executor=ThreadPoolExecutor(
+            max_workers=UPLOAD_JOB_WORKERS, thread_name_prefix="upload-job"
+        ),
+        heartbeat_interval: int = UPLOAD_JOB_HEARTBEAT_INTERVAL,
+        job_timeout: int = UPLOAD_JOB_TIMEOUT,
+    ):
+        self.persistence_adapter = persistence_adapter
+        self.executor = executor
+        self.heartbeat_interval = heartbeat_interval
+        self.job_timeout = job_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._active_jobs: Dict[str, UploadJob] = {}
+        self._lock = threading.Lock()
+        self._heartbeat_thread = None
+
+    def create_job(self, domain: str, dataset: str, filename: str) -> UploadJob:
+        job = UploadJob(
+            domain=domain, dataset=dataset, filename=filename, owner=self.owner
+        )
+        self.update_job(job)
+        return job
+
+    def update_job(self, job: UploadJob):
+        # Saves are serialised so that a heartbeat cannot overwrite a newer stage
+        with self._lock:
+            job.heartbeat()
+            self.persistence_adapter.save_upload_job(job)
+
+    def get_job(self, domain: str, dataset: str, job_id: str) -> UploadJob:
+        job = self.persistence_adapter.find_upload_job(domain, dataset, job_id)
+        if not job:
+            raise UploadJobNotFoundError(
+                f"Could not find upload job [{job_id}] for domain [{domain}] and dataset [{dataset}]"
+            )
+        if job.is_stale(self.job_timeout):
+            AppLogger.warning(
+                f"Upload job [{job.job_id}] of [{job.owner}] stopped reporting progress"
+            )
+            job.fail(
+                ["The upload stopped before finishing. Please upload the file again."]
+            )
+            self.persistence_adapter.save_upload_job(job)
+        return job
+
+    def submit_job(self, job: UploadJob, task: Callable[[], str]) -> Future:
+        with self._lock:
+            self._active_jobs[job.job_id] = job
+            self._start_heartbeat()
+        return self.executor.submit(self._run_job, job, task)
+
+    def _start_heartbeat(self):
+        if self._heartbeat_thread is None:
+            self._heartbeat_thread = threading.Thread(
+                target=self._send_heartbeats, name="upload-job-heartbeat", daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def _send_heartbeats(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            self.send_heartbeats()
+
+    def send_heartbeats(self):
+        with self._lock:
+            jobs = list(self._active_jobs.values())
+        for job in jobs:
+            try:
+                self.update_job(job)
+            except Exception as error:
+                AppLogger.warning(
+                    f"Could not update upload job [{job.job_id}]: {error}"
+                )
+
+    def _run_job(self, job: UploadJob, task: Callable[[], str]):
+        try:
+            job.complete(task())
+        except DatasetError as error:
+            errors = (
+                error.message if isinstance(error.message, list) else [error.message]
+            )
+            job.fail(errors)
+        except BaseAppException as error:
+            job.fail([error.message])
+        except SchemaNotFoundError as error:
+            job.fail([error.args[0]])
+        except CrawlerIsNotReadyError as error:
+            AppLogger.warning("Data was not uploaded: %s", error.args[0])
+            job.fail(["Data is currently processing. Please try again later."])
+        except Exception as error:
+            AppLogger.error(f"Upload job [{job.job_id}] failed: {error}")
+            job.fail(["Internal failure when uploading data."])
+        finally:
+            AppLogger.info(f"Upload job [{job.job_id}] finished with stage {job.stage}")
+            with self._lock:
+                self._active_jobs.pop(job.job_id, None)
+            self.update_job(job)
@@ -0,0 +1,184 @@
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from api.adapter.s3_adapter import S3Adapter
+from api.application.services.partitioning_service import generate_partitioned_data
+from api.common.logger import AppLogger
+from api.domain.key_index import generate_key_buckets, generate_keys
+from api.domain.schema import Schema
+from api.domain.upsert_manifest import UpsertManifest
+
+NewPartitions = Dict[str, Tuple[pd.DataFrame, pd.Series]]
+
+
+class UpsertService:
+    def __init__(self, persistence_adapter=S3Adapter()):
+        self.persistence_adapter = persistence_adapter
+
+    def upsert_data(
+        self, schema: Schema, data: pd.DataFrame, filename: str
+    ) -> List[str]:
+        domain, dataset = schema.get_domain(), schema.get_dataset()
+        self._finish_unfinished_upserts(domain, dataset)
+        # When a key appears more than once, the last row wins
+        data = data.loc[~generate_keys(schema, data, "").duplicated(keep="last")]
+        new_partitions = {
+            partition_path: (
+                partition_data,
+                generate_keys(schema, partition_data, partition_path),
+            )
+            for partition_path, partition_data in generate_partitioned_data(
+                schema, data
+            )
+        }
+        upserted_keys = pd.concat([keys for _, keys in new_partitions.values()])
+        buckets = sorted(generate_key_buckets(upserted_keys).unique().tolist())
+
+        key_index = self.persistence_adapter.find_key_index(domain, dataset, buckets)
+        previous_partitions = key_index.loc[
+            key_index["key"].isin(upserted_keys), "partition"
+        ].unique()
+        affected_partitions = list(
+            dict.fromkeys([*new_partitions.keys(), *previous_partitions])
+        )
+
+        merged_partitions, superseded_files = self._merge_partitions(
+            schema, affected_partitions, new_partitions, upserted_keys
+        )
+        # The merged data is written under a new name, unless the upload replaces
+        # a file of the same name, before the files it was merged from are removed
+        written_files = self.persistence_adapter.partitioned_data_paths(
+            schema,
+            filename,
+            [partition_path for partition_path, _ in merged_partitions],
+        )
+        manifest = UpsertManifest(
+            domain=domain,
+            dataset=dataset,
+            filename=filename,
+            written_files=[key for key in written_files if key not in superseded_files],
+            superseded_files=[
+                key for key in superseded_files if key not in written_files
+            ],
+        )
+        # The manifest records the files of the upsert, so that an upsert that stops
+        # part way through is rolled back, or finished once committed, rather than
+        # leaving the rows of its keys duplicated
+        self.persistence_adapter.save_upsert_manifest(manifest)
+        try:
+            self.persistence_adapter.upload_partitioned_data(
+                schema, filename, merged_partitions
+            )
+            self._update_key_index(
+                domain, dataset, buckets, key_index, new_partitions, upserted_keys
+            )
+        except Exception:
+            self._roll_back(manifest, buckets, key_index)
+            raise
+        manifest.committed = True
+        self.persistence_adapter.save_upsert_manifest(manifest)
+        self._finish(manifest)
+        AppLogger.info(
+            f"Upserted {len(data)} rows into {len(affected_partitions)} partitions of {domain}/{dataset}"
+        )
+        return [partition_path for partition_path in new_partitions if partition_path]
+
+    def _finish_unfinished_upserts(self, domain: str, dataset: str):
+        for manifest in self.persistence_adapter.list_upsert_manifests(domain, dataset):
+            AppLogger.warning(
+                f"Finishing upsert of [{manifest.filename}] into {domain}/{dataset} that stopped part way through"
+            )
+            if manifest.committed:
+                self._finish(manifest)
+            else:
+                # The key index saved before the upsert stopped, if any, is left as it is
+                self._remove(manifest)
+
+    def _finish(self, manifest: UpsertManifest):
+        self.persistence_adapter.delete_partition_files(
+            manifest.domain, manifest.dataset, manifest.superseded_files
+        )
+        self.persistence_adapter.delete_upsert_manifest(manifest)
+
+    def _roll_back(
+        self, manifest: UpsertManifest, buckets: List[int], key_index: pd.DataFrame
+    ):
+        try:
+            self._save_key_index(manifest.domain, manifest.dataset, buckets, key_index)
+            self._remove(manifest)
+        except Exception as error:
+            AppLogger.error(
+                f"Failed to roll back upsert of [{manifest.filename}], it is rolled back by the next upsert: {error}"
+            )
+
+    def _remove(self, manifest: UpsertManifest):
+        self.persistence_adapter.delete_partition_files(
+            manifest.domain, manifest.dataset, manifest.written_files
+        )
+        self.persistence_adapter.delete_upsert_manifest(manifest)
+
+    def _merge_partitions(
+        self,
+        schema: Schema,
+        partition_paths: List[str],
+        new_partitions: NewPartitions,
+        upserted_keys: pd.Series,
+    ) -> Tuple[List[Tuple[str, pd.DataFrame]], List[str]]:
+        merged_partitions, superseded_files = [], []
+        existing_partitions = self.persistence_adapter.read_partitioned_data(
+            schema, partition_paths
+        )
+        for partition_path, existing_data, files in existing_partitions:
+            retained_data = self._retain_rows(
+                schema, partition_path, existing_data, upserted_keys
+            )
+            new_data, _ = new_partitions.get(partition_path, (pd.DataFrame(), None))
+            frames = [frame for frame in (retained_data, new_data) if not frame.empty]
+            if frames:
+                merged_partitions.append(
+                    (partition_path, pd.concat(frames, ignore_index=True))
+                )
+            superseded_files.extend(files)
+        return merged_partitions, superseded_files
+
+    def _retain_rows(
+        self,
+        schema: Schema,
+        partition_path: str,
+        existing_data: pd.DataFrame,
+        upserted_keys: pd.Series,
+    ) -> pd.DataFrame:
+        if existing_data.empty:
+            return existing_data
+        existing_keys = generate_keys(schema, existing_data, partition_path)
+        return existing_data.loc[~existing_keys.isin(upserted_keys)]
+
+    def _update_key_index(
+        self,
+        domain: str,
+        dataset: str,
+        buckets: List[int],
+        key_index: pd.DataFrame,
+        new_partitions: NewPartitions,
+        upserted_keys: pd.Series,
+    ):
+        new_key_index = [
+            pd.DataFrame({"key": keys.to_numpy(), "partition": partition_path})
+            for partition_path, (_, keys) in new_partitions.items()
+        ]
+        key_index = pd.concat(
+            [key_index.loc[~key_index["key"].isin(upserted_keys)], *new_key_index],
+            ignore_index=True,
+        )
+        self._save_key_index(domain, dataset, buckets, key_index)
+
+    def _save_key_index(
+        self, domain: str, dataset: str, buckets: List[int], key_index: pd.DataFrame
+    ):
+        key_buckets = generate_key_buckets(key_index["key"])
+        self.persistence_adapter.save_key_index(
+            domain,
+            dataset,
+            [(bucket, key_index.loc[key_buckets == bucket]) for bucket in buckets],
+        )
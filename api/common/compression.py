@@ -0,0 +1,53 @@
+import io
+import shutil
+from typing import BinaryIO, Optional
+
+import pyarrow as pa
+
+from api.common.config.constants import COMPRESSION_BLOCK_SIZE
+from api.common.custom_exceptions import DatasetError
+
+
+def compress(source: BinaryIO, destination: BinaryIO, codec: str):
+    with pa.CompressedOutputStream(
+        pa.PythonFile(destination, mode="w"), codec
+    ) as stream:
+        shutil.copyfileobj(source, stream, COMPRESSION_BLOCK_SIZE)
+
+
+def decompress(
+    source: BinaryIO, destination: BinaryIO, codec: str, max_size: Optional[int] = None
+):
+    stream = pa.CompressedInputStream(
+        pa.PythonFile(UnclosedReader(source), mode="r"), codec
+    )
+    if max_size is None:
+        shutil.copyfileobj(stream, destination, COMPRESSION_BLOCK_SIZE)
+        return
+    # Counted as it is written, as a small compressed file can decompress to any size
+    size = 0
+    while True:
+        block = stream.read(COMPRESSION_BLOCK_SIZE)
+        if not block:
+            break
+        size += len(block)
+        if size > max_size:
+            raise DatasetError(
+                f"The file is larger than the limit of {max_size} bytes when decompressed"
+            )
+        destination.write(block)
+
+
+class UnclosedReader(io.RawIOBase):
+    # Arrow closes the files it wraps, while the source may still be needed, e.g.: as the raw file
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.file.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        return size
@@ -16,13 +16,69 @@ GLUE_CSV_CLASSIFIER = RESOURCE_PREFIX + "-single_column_csv_classifier"
 DYNAMO_PERMISSIONS_TABLE_NAME = RESOURCE_PREFIX + "_users_permissions"
 
 SCHEMAS_LOCATION = "data/schemas"
+UPLOAD_JOBS_LOCATION = "upload_jobs"
+UPLOAD_INDEX_LOCATION = "upload_index"
+KEY_INDEX_LOCATION = "key_index"
+COMPACTION_MANIFESTS_LOCATION = "compaction_manifests"
+UPSERT_MANIFESTS_LOCATION = "upsert_manifests"
+QUERY_JOBS_LOCATION = "query_jobs"
+
+PARTITION_UPLOAD_CONCURRENCY = int(os.getenv("PARTITION_UPLOAD_CONCURRENCY", "10"))
+MULTIPART_UPLOAD_PART_SIZE = int(
+    os.getenv("MULTIPART_UPLOAD_PART_SIZE", str(8 * 1024 * 1024))
+)
+MULTIPART_UPLOAD_CONCURRENCY = int(os.getenv("MULTIPART_UPLOAD_CONCURRENCY", "4"))
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+UPLOAD_JOB_HEARTBEAT_INTERVAL = int(os.getenv("UPLOAD_JOB_HEARTBEAT_INTERVAL", "60"))
+UPLOAD_JOB_TIMEOUT = int(os.getenv("UPLOAD_JOB_TIMEOUT", "600"))
+DATASET_INGEST_ENGINE = os.getenv("DATASET_INGEST_ENGINE", "ARROW")
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_VALIDATION_THRESHOLD = int(
+    os.getenv("PARALLEL_VALIDATION_THRESHOLD", str(64 * 1024 * 1024))
+)
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024**3)))
+UPLOAD_MEMORY_BUDGET = int(os.getenv("UPLOAD_MEMORY_BUDGET", str(2 * 1024**3)))
+UPLOAD_RETRY_AFTER = int(os.getenv("UPLOAD_RETRY_AFTER", "30"))
+UPLOAD_CLAIM_TIMEOUT = int(os.getenv("UPLOAD_CLAIM_TIMEOUT", str(6 * 3600)))
+UPLOAD_MEMORY_TRACING = os.getenv("UPLOAD_MEMORY_TRACING", "false").lower() == "true"
+COMPACTION_TARGET_FILE_SIZE = int(
+    os.getenv("COMPACTION_TARGET_FILE_SIZE", str(128 * 1024 * 1024))
+)
+PRESIGNED_UPLOAD_URL_EXPIRY = int(os.getenv("PRESIGNED_UPLOAD_URL_EXPIRY", "3600"))
+COMPACTION_SCHEDULE_INTERVAL = int(os.getenv("COMPACTION_SCHEDULE_INTERVAL", "0"))
+BATCH_UPLOAD_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", "4"))
+RAW_DATA_COMPRESSION = os.getenv("RAW_DATA_COMPRESSION", "gzip")
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", str(256 * 1024 * 1024)))
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_UNLOAD_RESULTS = os.getenv("QUERY_UNLOAD_RESULTS", "REQUEST").upper()
 
 MAX_CUSTOM_TAG_COUNT = 30
 
 GLUE_CSV_SERIALISATION_LIBRARY = "org.apache.hadoop.hive.serde2.OpenCSVSerde"
 GLUE_QUOTE_CHAR = '"'
+GLUE_CSV_SEPARATOR_CHAR = ","
+GLUE_CSV_INPUT_FORMAT = "org.apache.hadoop.mapred.TextInputFormat"
+GLUE_CSV_OUTPUT_FORMAT = "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat"
+GLUE_PARQUET_SERIALISATION_LIBRARY = (
+    "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+)
+GLUE_PARQUET_INPUT_FORMAT = (
+    "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+)
+GLUE_PARQUET_OUTPUT_FORMAT = (
+    "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+)
+GLUE_CRAWLER_CONFIGURATION = (
+    '{"Version": 1.0, "CrawlerOutput": '
+    '{"Partitions": {"AddOrUpdateBehavior": "InheritFromTable"}}}'
+)
 GLUE_TABLE_PRESENCE_CHECK_RETRY_COUNT = 18
 GLUE_TABLE_PRESENCE_CHECK_INTERVAL = 20
+GLUE_CRAWLER_READY_CHECK_RETRY_COUNT = 18
+GLUE_CRAWLER_READY_CHECK_INTERVAL = 20
+GLUE_MAX_PARTITIONS_PER_BATCH = 100
+GLUE_MAX_PARTITIONS_PER_DELETE_BATCH = 25
+S3_MAX_KEYS_PER_DELETE_BATCH = 1000
 
 INFERRED_UNNAMED_COLUMN_PREFIX = (
     "unnamed_"  # Pandas infers an empty column name as "unnamed_\d"
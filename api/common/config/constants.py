@@ -1,8 +1,28 @@
 BASE_REGEX = "^[a-zA-Z0-9_-]"
-FILENAME_WITH_TIMESTAMP_REGEX = r"[a-zA-Z0-9:_\-]+.csv$"
+FILENAME_WITH_TIMESTAMP_REGEX = r"[a-zA-Z0-9:_\-]+\.(csv|parquet|arrows)(\.(gz|zst))?$"
 
 CONTENT_ENCODING = "utf-8"
 
+DATASET_ROWS_PER_CHUNK = 100_000
+
+QUERY_ROWS_PER_CHUNK = 100_000
+# The most rows Athena returns per page of query results
+QUERY_RESULTS_MAX_PAGE_SIZE = 1000
+
+CONTENT_HASH_READ_SIZE = 1024 * 1024
+
+COMPRESSION_BLOCK_SIZE = 1024 * 1024
+
+CSV_BYTES_PER_VALUE_ESTIMATE = 8
+MEMORY_BYTES_PER_VALUE_ESTIMATE = 200
+
+PARQUET_COMPRESSION = "snappy"
+
+# Changing the number of buckets invalidates the key indexes of existing datasets
+KEY_INDEX_BUCKET_COUNT = 64
+
+COMPACTED_FILE_PREFIX = "compacted-"
+
 TAG_KEYS_REGEX = BASE_REGEX + "{1,128}$"
 TAG_VALUES_REGEX = BASE_REGEX + "{0,256}$"
 
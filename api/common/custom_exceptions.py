@@ -24,6 +24,12 @@ class ConflictError(UserError):
         super().__init__(message, status_code)
 
 
+class UploadCapacityExceededError(BaseAppException):
+    def __init__(self, message, retry_after: int):
+        super().__init__(message, 503)
+        self.retry_after = retry_after
+
+
 class SchemaError(UserError):
     def __init__(self, message):
         super().__init__(message)
@@ -62,6 +68,18 @@ class CrawlerDeleteFailsError(Exception):
     pass
 
 
+class PartitionCreateFailsError(Exception):
+    pass
+
+
+class TableCreateFailsError(Exception):
+    pass
+
+
+class TableUpdateFailsError(Exception):
+    pass
+
+
 class GetCrawlerError(Exception):
     pass
 
@@ -80,3 +98,11 @@ class UserGroupDeletionError(Exception):
 
 class ProtectedDomainDoesNotExistError(Exception):
     pass
+
+
+class UploadJobNotFoundError(Exception):
+    pass
+
+
+class QueryJobNotFoundError(Exception):
+    pass
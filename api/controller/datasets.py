@@ -1,22 +1,25 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Request
-from fastapi import UploadFile, File, HTTPException, Response, Security
+from fastapi import UploadFile, File, Header, HTTPException, Response, Security
 from fastapi import status as http_status
 from pandas import DataFrame
-from starlette.responses import PlainTextResponse
+from starlette.responses import PlainTextResponse, StreamingResponse
 
-from api.adapter.athena_adapter import AthenaAdapter
 from api.adapter.aws_resource_adapter import AWSResourceAdapter
 from api.application.services.authorisation.authorisation_service import (
     protect_dataset_endpoint,
     protect_endpoint,
 )
+from api.application.services.compaction_service import CompactionService
 from api.application.services.data_service import DataService
 from api.application.services.delete_service import DeleteService
 from api.application.services.format_service import FormatService
+from api.application.services.query_cache import QueryCache
+from api.application.services.query_service import QueryService
 from api.common.config.auth import Action
 from api.common.config.aws import RESOURCE_PREFIX
+from api.common.config.constants import QUERY_RESULTS_MAX_PAGE_SIZE
 from api.common.custom_exceptions import (
     CrawlerStartFailsError,
     SchemaNotFoundError,
@@ -24,17 +27,24 @@ from api.common.custom_exceptions import (
     GetCrawlerError,
     AWSServiceError,
     UserError,
+    UploadJobNotFoundError,
+    QueryJobNotFoundError,
 )
 from api.common.logger import AppLogger
 from api.controller.utils import _response_body
 from api.domain.dataset_filters import DatasetFilters
 from api.domain.mime_type import MimeType
 from api.domain.sql_query import SQLQuery
+from api.domain.upload_format import upload_filename
 
 resource_adapter = AWSResourceAdapter()
-data_service = DataService()
-athena_adapter = AthenaAdapter()
-delete_service = DeleteService()
+query_cache = QueryCache()
+data_service = DataService(query_cache=query_cache)
+query_service = QueryService(query_cache=query_cache)
+compaction_service = CompactionService()
+delete_service = DeleteService(
+    compaction_service=compaction_service, query_cache=query_cache
+)
 
 datasets_router = APIRouter(
     prefix="/datasets",
@@ -212,7 +222,12 @@ async def delete_data_file(
     dependencies=[Security(protect_dataset_endpoint, scopes=[Action.WRITE.value])],
 )
 async def upload_data(
-    domain: str, dataset: str, response: Response, file: UploadFile = File(...)
+    domain: str,
+    dataset: str,
+    response: Response,
+    file: UploadFile = File(...),
+    asynchronous: bool = False,
+    idempotency_key: Optional[str] = Header(None),
 ):
     """
     ## Upload dataset
@@ -221,13 +236,37 @@ async def upload_data(
     ensures that the data matches the schema and that it is consistent and sanitised. Should any errors be detected during
     upload, these are sent back in the response to facilitate you fixing the issues.
 
+    The file is read and validated in chunks of rows, so large files can be uploaded without being held in memory in
+    their entirety. Validation errors are collected across all chunks and no data is written if any chunk is invalid.
+
+    Parquet files and Arrow IPC streams can be uploaded as well as CSV files, by sending them with the
+    `application/vnd.apache.parquet` or `application/vnd.apache.arrow.stream` content type or a `.parquet` or `.arrows`
+    file extension. Their columns and data types are checked against the schema from the file metadata before any row is
+    read, and their values are used as they are rather than parsed from text. Columns of `date` type can hold date or
+    timestamp values, or strings in the format defined in the schema.
+
+    Files compressed with gzip or zstd can be uploaded by sending them with the `application/gzip` or `application/zstd`
+    content type or a `.gz` or `.zst` extension, e.g.: `data.csv.gz`. They are decompressed before being validated, and
+    the compressed file is kept as the raw file.
+
+    Large files can be uploaded asynchronously by setting `asynchronous=true`. The request then returns straight away with
+    the details of an upload job, which is processed in the background. The progress of the job can be followed with the
+    `/datasets/{domain}/{dataset}/jobs/{job_id}` endpoint.
+
+    Uploads are idempotent. Uploading a file with the same content as a previous upload to an `APPEND` dataset returns
+    the file name of the previous upload without processing the file again. Retries can also be identified by sending an
+    `Idempotency-Key` header, which works for `OVERWRITE` and `UPSERT` datasets too. Reusing a key for a file with different
+    content, or retrying while the first upload is still being processed, returns a `409` error.
+
     ### Inputs
 
-    | Parameters    | Usage                                   | Example values               | Definition              |
-    |---------------|-----------------------------------------|------------------------------|-------------------------|
-    | `domain`      | URL parameter                           | `air`                        | domain of the dataset   |
-    | `dataset`     | URL parameter                           | `passengers_by_airport`      | dataset title           |
-    | `file`        | File in form data with key value `file` | `passengers_by_airport.csv`  | the dataset file itself |
+    | Parameters        | Usage                                   | Example values                         | Definition                          |
+    |-------------------|-----------------------------------------|----------------------------------------|-------------------------------------|
+    | `domain`          | URL parameter                           | `air`                                  | domain of the dataset               |
+    | `dataset`         | URL parameter                           | `passengers_by_airport`                | dataset title                       |
+    | `file`            | File in form data with key value `file` | `passengers_by_airport.csv`            | the dataset file itself             |
+    | `asynchronous`    | Query parameter (optional)              | `true`                                 | process upload in the background    |
+    | `Idempotency-Key` | Header (optional)                       | `5f2b8c6e-0a43-4c8e-b7a1-2d0d4f6e9a10` | identifies retries of an upload     |
 
     ### Output
 
@@ -239,6 +278,19 @@ async def upload_data(
     }
     ```
 
+    When uploading asynchronously, returns a `202` status code and the upload job, e.g.:
+
+    ```json
+    {
+    "job_id": "3b1e8c1a-7f0d-4a8e-9c55-0f9f0c4c1f2e",
+    "domain": "air",
+    "dataset": "passengers_by_airport",
+    "filename": "passengers_by_airport.csv",
+    "stage": "QUEUED",
+    ...
+    }
+    ```
+
     ### Accepted scopes
 
     In order to use this endpoint you need a relevant `WRITE` scope that matches the dataset sensitivity level,
@@ -247,12 +299,28 @@ async def upload_data(
     ### Click  `Try it out` to use the endpoint
 
     """
+    filename = upload_filename(file.filename, file.content_type)
     try:
-        file_contents = await file.read()
-        filename = data_service.upload_dataset(
-            RESOURCE_PREFIX, domain, dataset, file.filename, file_contents
+        if asynchronous:
+            job = data_service.upload_dataset_async(
+                RESOURCE_PREFIX,
+                domain,
+                dataset,
+                filename,
+                file.file,
+                idempotency_key,
+            )
+            response.status_code = http_status.HTTP_202_ACCEPTED
+            return job
+        uploaded_filename = data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            domain,
+            dataset,
+            filename,
+            file.file,
+            idempotency_key=idempotency_key,
         )
-        return _response_body(filename)
+        return _response_body(uploaded_filename)
     except SchemaNotFoundError as error:
         AppLogger.warning("Schema not found: %s", error.args[0])
         raise UserError(message=error.args[0])
@@ -271,6 +339,323 @@ async def upload_data(
         return _response_body(file.filename)
 
 
+@datasets_router.post(
+    "/{domain}/{dataset}/batch",
+    status_code=http_status.HTTP_201_CREATED,
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.WRITE.value])],
+)
+async def upload_data_batch(
+    domain: str,
+    dataset: str,
+    response: Response,
+    files: List[UploadFile] = File(...),
+):
+    """
+    ## Upload dataset batch
+
+    Use this endpoint to upload many files to a dataset in one request. The files are validated and stored as files
+    uploaded to the `/datasets/{domain}/{dataset}` endpoint are, several at a time, and the dataset is made available to
+    query once all the files are stored. Files can only be uploaded in batches to `APPEND` and `UPSERT` datasets.
+
+    Each file is processed on its own, so files that fail validation do not stop the others from being stored. Files
+    with the same content as a previous upload are not processed again.
+
+    ### Inputs
+
+    | Parameters  | Usage                                     | Example values                        | Definition                |
+    |-------------|-------------------------------------------|---------------------------------------|---------------------------|
+    | `domain`    | URL parameter                             | `air`                                 | domain of the dataset     |
+    | `dataset`   | URL parameter                             | `passengers_by_airport`               | dataset title             |
+    | `files`     | Files in form data with key value `files` | `passengers_by_airport_2022_01.csv`   | the dataset files         |
+
+    ### Output
+
+    The result of each file, in the order the files were sent. Returns a `201` status code if every file was uploaded and
+    a `207` status code otherwise, e.g.:
+
+    ```json
+    [
+    {
+    "filename": "passengers_by_airport_2022_01.csv",
+    "status_code": 201,
+    "uploaded": "2022-01-01T13:00:00-passengers_by_airport_2022_01.csv"
+    },
+    {
+    "filename": "passengers_by_airport_2022_02.csv",
+    "status_code": 400,
+    "details": ["Column [passengers] has an incorrect data type. Expected Int64, received object"]
+    }
+    ]
+    ```
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a relevant `WRITE` scope that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        results = data_service.upload_datasets(
+            RESOURCE_PREFIX,
+            domain,
+            dataset,
+            [
+                (upload_filename(file.filename, file.content_type), file.file)
+                for file in files
+            ],
+        )
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+    except CrawlerIsNotReadyError as error:
+        AppLogger.warning("Data was not uploaded: %s", error.args[0])
+        raise UserError(
+            message="Data is currently processing. Please try again later.",
+            status_code=429,
+        )
+    except GetCrawlerError as error:
+        AppLogger.error(error.args[0])
+        raise AWSServiceError(message="Internal failure when uploading data.")
+    if any(result.uploaded is None for result in results):
+        response.status_code = http_status.HTTP_207_MULTI_STATUS
+    return [result.dict(exclude_none=True) for result in results]
+
+
+@datasets_router.post(
+    "/{domain}/{dataset}/upload-url",
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.WRITE.value])],
+)
+async def generate_upload_url(domain: str, dataset: str, filename: str):
+    """
+    ## Generate upload URL
+
+    Use this endpoint to upload large files straight to S3 rather than through the API. It returns a presigned URL that
+    the file can be sent to with an HTTP `PUT` request before it expires, under the returned file name. Once the file is
+    uploaded, it is validated and its data stored with the `/datasets/{domain}/{dataset}/process/{filename}` endpoint.
+
+    Files of up to 5GB can be uploaded to a presigned URL. Parquet files and Arrow IPC streams are read as such when
+    the file name has a `.parquet` or `.arrows` extension, and are decompressed when it ends with `.gz` or `.zst`.
+
+    ### Inputs
+
+    | Parameters    | Usage                                   | Example values                  | Definition                  |
+    |---------------|-----------------------------------------|---------------------------------|-----------------------------|
+    | `domain`      | URL parameter                           | `air`                           | domain of the dataset       |
+    | `dataset`     | URL parameter                           | `passengers_by_airport`         | dataset title               |
+    | `filename`    | Query parameter                         | `passengers_by_airport.csv`     | name of the file to upload  |
+
+    ### Output
+
+    ```json
+    {
+    "filename": "2022-01-01T13:00:00-passengers_by_airport.csv",
+    "upload_url": "https://bucket.s3.amazonaws.com/raw_data/air/passengers_by_airport/2022-01-01T13:00:00-passengers_by_airport.csv?...",
+    "expires_in": 3600
+    }
+    ```
+
+    The file can then be uploaded with e.g.: `curl -X PUT -T passengers_by_airport.csv "{upload_url}"`
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a relevant `WRITE` scope that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        return data_service.generate_upload_url(domain, dataset, filename)
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+
+
+@datasets_router.post(
+    "/{domain}/{dataset}/process/{filename}",
+    status_code=http_status.HTTP_201_CREATED,
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.WRITE.value])],
+)
+async def process_uploaded_file(
+    domain: str,
+    dataset: str,
+    filename: str,
+    response: Response,
+    asynchronous: bool = False,
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    ## Process uploaded file
+
+    Use this endpoint to validate and store the data of a file uploaded to a URL from the
+    `/datasets/{domain}/{dataset}/upload-url` endpoint. The file is read from S3 and processed as files uploaded to the
+    `/datasets/{domain}/{dataset}` endpoint are, including idempotency and asynchronous processing. A file that fails
+    validation is deleted and has to be uploaded again.
+
+    ### Inputs
+
+    | Parameters        | Usage                                   | Example values                                   | Definition                          |
+    |-------------------|-----------------------------------------|--------------------------------------------------|-------------------------------------|
+    | `domain`          | URL parameter                           | `air`                                            | domain of the dataset               |
+    | `dataset`         | URL parameter                           | `passengers_by_airport`                          | dataset title                       |
+    | `filename`        | URL parameter                           | `2022-01-01T13:00:00-passengers_by_airport.csv`  | file name returned with the URL     |
+    | `asynchronous`    | Query parameter (optional)              | `true`                                           | process upload in the background    |
+    | `Idempotency-Key` | Header (optional)                       | `5f2b8c6e-0a43-4c8e-b7a1-2d0d4f6e9a10`           | identifies retries of an upload     |
+
+    ### Output
+
+    The same as the `/datasets/{domain}/{dataset}` endpoint, e.g.:
+
+    ```json
+    {
+    "uploaded": "2022-01-01T13:00:00-passengers_by_airport.csv"
+    }
+    ```
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a relevant `WRITE` scope that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        if asynchronous:
+            job = data_service.process_uploaded_file_async(
+                RESOURCE_PREFIX, domain, dataset, filename, idempotency_key
+            )
+            response.status_code = http_status.HTTP_202_ACCEPTED
+            return job
+        uploaded_filename = data_service.process_uploaded_file(
+            RESOURCE_PREFIX,
+            domain,
+            dataset,
+            filename,
+            idempotency_key=idempotency_key,
+        )
+        return _response_body(uploaded_filename)
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+    except CrawlerIsNotReadyError as error:
+        AppLogger.warning("Data was not uploaded: %s", error.args[0])
+        raise UserError(
+            message="Data is currently processing. Please try again later.",
+            status_code=429,
+        )
+    except GetCrawlerError as error:
+        AppLogger.error(error.args[0])
+        raise AWSServiceError(message="Internal failure when uploading data.")
+    except CrawlerStartFailsError as error:
+        AppLogger.warning("Failed to start crawler: %s", error.args[0])
+        response.status_code = http_status.HTTP_202_ACCEPTED
+        return _response_body(filename)
+
+
+@datasets_router.get(
+    "/{domain}/{dataset}/jobs/{job_id}",
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.WRITE.value])],
+)
+async def get_upload_job(domain: str, dataset: str, job_id: str):
+    """
+    ## Upload job status
+
+    Use this endpoint to follow the progress of an asynchronous upload.
+
+    The job reports the stage it is in (`QUEUED`, `VALIDATION`, `RAW_FILE_UPLOAD`, `DATA_UPLOAD`, `CATALOGUE_UPDATE`,
+    `COMPLETED` or `FAILED`), the number of chunks and rows uploaded so far, the time in seconds spent in each completed
+    stage and, if the upload failed, the validation or processing errors.
+
+    A job that stops reporting progress, e.g.: because the instance processing it stopped, is reported as `FAILED`, and
+    the file has to be uploaded again.
+
+    ### Inputs
+
+    | Parameters    | Usage                                   | Example values                         | Definition            |
+    |---------------|-----------------------------------------|----------------------------------------|-----------------------|
+    | `domain`      | URL parameter                           | `air`                                  | domain of the dataset |
+    | `dataset`     | URL parameter                           | `passengers_by_airport`                | dataset title         |
+    | `job_id`      | URL parameter                           | `3b1e8c1a-7f0d-4a8e-9c55-0f9f0c4c1f2e` | id of the upload job  |
+
+    ### Output
+
+    ```json
+    {
+    "job_id": "3b1e8c1a-7f0d-4a8e-9c55-0f9f0c4c1f2e",
+    "domain": "air",
+    "dataset": "passengers_by_airport",
+    "filename": "passengers_by_airport.csv",
+    "stage": "COMPLETED",
+    "chunks_uploaded": 3,
+    "rows_uploaded": 250000,
+    "uploaded_filename": "2022-01-01T13:00:00-passengers_by_airport.csv",
+    "errors": [],
+    "timings": {"QUEUED": 0.01, "VALIDATION": 4.2, "RAW_FILE_UPLOAD": 1.3, "DATA_UPLOAD": 9.8, "CATALOGUE_UPDATE": 0.4},
+    ...
+    }
+    ```
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a relevant `WRITE` scope that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        return data_service.get_upload_job(domain, dataset, job_id)
+    except UploadJobNotFoundError as error:
+        AppLogger.warning("Upload job not found: %s", error.args[0])
+        raise UserError(message=error.args[0], status_code=404)
+
+
+@datasets_router.post(
+    "/{domain}/{dataset}/compact",
+    status_code=http_status.HTTP_202_ACCEPTED,
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.WRITE.value])],
+)
+async def compact_dataset(domain: str, dataset: str):
+    """
+    ## Compact dataset
+
+    Use this endpoint to merge the small files that `APPEND` uploads add to each partition of a dataset into larger
+    files (of up to 128MB by default), which makes the dataset faster to query. Compaction runs in the background and
+    the request returns straight away.
+
+    Files of the uploads that were compacted can still be deleted: their rows are removed from the compacted files.
+
+    ### Inputs
+
+    | Parameters    | Usage                                   | Example values                  | Definition            |
+    |---------------|-----------------------------------------|---------------------------------|-----------------------|
+    | `domain`      | URL parameter                           | `air`                           | domain of the dataset |
+    | `dataset`     | URL parameter                           | `passengers_by_airport`         | dataset title         |
+
+    ### Output
+
+    Returns a `202` status code once compaction has started. If the dataset is already being compacted, returns a `409`
+    status code.
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a relevant `WRITE` scope that matches the dataset sensitivity level,
+    e.g.: `WRITE_ALL`, `WRITE_PUBLIC`, `WRITE_PRIVATE`, `WRITE_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        compaction_service.compact_dataset_async(domain, dataset)
+        return {"compacting": f"{domain}/{dataset}"}
+    except SchemaNotFoundError as error:
+        AppLogger.warning("Schema not found: %s", error.args[0])
+        raise UserError(message=error.args[0])
+
+
 @datasets_router.post(
     "/{domain}/{dataset}/query",
     dependencies=[Security(protect_dataset_endpoint, scopes=[Action.READ.value])],
@@ -286,18 +671,35 @@ async def upload_data(
                 "text/csv": {
                     "example": 'col1;col2;col3\n"123","something","500"\n"456","something else","600"'
                 },
+                "application/x-ndjson": {
+                    "example": '{"col1":"123","col2":"something","col3":"500"}\n{"col1":"456","col2":"something else","col3":"600"}'
+                },
+                "application/vnd.apache.arrow.stream": {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+                "application/vnd.apache.parquet": {
+                    "schema": {"type": "string", "format": "binary"}
+                },
             }
         }
     },
 )
 async def query_dataset(
-    domain: str, dataset: str, request: Request, query: Optional[SQLQuery] = SQLQuery()
+    domain: str,
+    dataset: str,
+    request: Request,
+    query: Optional[SQLQuery] = SQLQuery(),
+    stream: Optional[bool] = False,
+    unload: Optional[bool] = False,
 ):
     """
     ## Query dataset
 
     Data can be queried provided data has been uploaded at some point in the past and the 'crawler' has completed its run.
 
+    Query results are cached for a few minutes, so repeating a query returns straight away. Uploading or deleting a file
+    clears the cached results of the dataset.
+
     ### Inputs
 
     | Parameters    | Required     | Usage                   | Example values                                                                                                              | Definition                    |
@@ -305,6 +707,8 @@ async def query_dataset(
     | `domain`      | True         | URL parameter           | `space`                                                                                                                     | domain of the dataset         |
     | `dataset`     | True         | URL parameter           | `rocket_launches`                                                                                                           | dataset title                 |
     | `query`       | False        | JSON Request Body       | Consult the [docs](https://github.com/no10ds/rapid-api/blob/main/docs/guides/usage/usage.md#how-to-construct-a-query-object)| the query object              |
+    | `stream`      | False        | Query parameter         | `true`                                                                                                                      | stream the results in chunks  |
+    | `unload`      | False        | Query parameter         | `true`                                                                                                                      | unload results as Parquet     |
 
 
     ### Outputs
@@ -333,6 +737,46 @@ async def query_dataset(
     ...
     ```
 
+    #### NDJSON
+
+    To get the results as newline-delimited JSON, the `Accept` Header has to be set to `application/x-ndjson`. Each row
+    comes as a JSON object on its own line, e.g.:
+
+    ```json
+    {"column1":"value1","column2":"value2"}
+    {"column1":"value3","column2":"value4"}
+    ```
+
+    NDJSON responses are always streamed.
+
+    #### Arrow and Parquet
+
+    To get the results as typed columns, the `Accept` Header has to be set to `application/vnd.apache.arrow.stream`, for
+    the Arrow IPC streaming format, or `application/vnd.apache.parquet`. The columns keep the types of the dataset,
+    rather than being converted to strings, and the row numbers are left out, e.g.: in Python
+
+    ```python
+    import pyarrow as pa
+
+    df = pa.ipc.open_stream(response.content).read_pandas()
+    ```
+
+    #### Streaming
+
+    Large results can be streamed by setting `stream=true`, with the `Accept` Header set to any format but
+    `application/json`. The results are then read from Athena and sent in chunks of rows, rather than being held in
+    memory as a whole, so rows start arriving as soon as the query has finished. Each chunk is sent as an Arrow record
+    batch or a Parquet row group when streaming those formats. Streamed CSV has the same content as CSV that is not
+    streamed. Streamed results are not cached, and an error while the results are being sent ends the
+    response early, as its status has already been sent.
+
+    #### Large results
+
+    Results of queries expected to return many rows can be read faster by setting `unload=true`. Athena then writes the
+    result as Parquet files that are read in parallel, rather than as a single CSV file, which is slower for small
+    results, e.g.: counts or aggregates. Results of queries with `order_by_columns`, or with columns that are not named,
+    e.g.: `avg(column1)` rather than `avg(column1) AS average`, are read as CSV.
+
     ### Accepted scopes
 
     In order to use this endpoint you need a `READ` scope with appropriate sensitivity level permission,
@@ -341,16 +785,196 @@ async def query_dataset(
     ### Click  `Try it out` to use the endpoint
 
     """
-    df = athena_adapter.query(domain, dataset, query)
-    string_df = df.astype("string")
     output_format = request.headers.get("Accept")
     mime_type = MimeType.to_mimetype(output_format)
-    return _format_query_output(string_df, mime_type)
+    if stream or mime_type == MimeType.APPLICATION_NDJSON:
+        return _stream_query_output(domain, dataset, query, unload, mime_type)
+    df = query_service.query(domain, dataset, query, unload)
+    return _format_query_output(_typed_for(df, mime_type), mime_type)
+
+
+def _stream_query_output(
+    domain: str, dataset: str, query: SQLQuery, unload: bool, mime_type: MimeType
+) -> StreamingResponse:
+    if mime_type == MimeType.APPLICATION_JSON:
+        streamable_mime_types = [
+            item.value for item in MimeType if item != MimeType.APPLICATION_JSON
+        ]
+        raise UserError(
+            f"Query results can only be streamed as {', '.join(streamable_mime_types[:-1])} or {streamable_mime_types[-1]}"
+        )
+    chunks = query_service.query_chunks(domain, dataset, query, unload)
+    typed_chunks = (_typed_for(chunk, mime_type) for chunk in chunks)
+    return StreamingResponse(
+        FormatService.from_chunks_to_mimetype(typed_chunks, mime_type),
+        media_type=mime_type.value,
+    )
+
+
+def _typed_for(df: DataFrame, mime_type: MimeType) -> DataFrame:
+    # Columnar formats keep the column types of the dataset, text formats return every value as a string
+    return df if mime_type.is_columnar() else df.astype("string")
 
 
 def _format_query_output(df: DataFrame, mime_type: MimeType) -> Response:
     formatted_output = FormatService.from_df_to_mimetype(df, mime_type)
     if mime_type == MimeType.TEXT_CSV:
         return PlainTextResponse(status_code=200, content=formatted_output)
+    elif mime_type.is_columnar():
+        return Response(content=formatted_output, media_type=mime_type.value)
     else:
         return formatted_output
+
+
+@datasets_router.post(
+    "/{domain}/{dataset}/query/async",
+    status_code=http_status.HTTP_202_ACCEPTED,
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.READ.value])],
+)
+async def submit_query(
+    domain: str, dataset: str, query: Optional[SQLQuery] = SQLQuery()
+):
+    """
+    ## Submit query
+
+    Use this endpoint to run a query that takes too long to wait for. The query is started and its id returned straight
+    away, then its progress can be followed with the `/datasets/{domain}/{dataset}/query/async/{query_id}` endpoint
+    and its results fetched a page at a time with the `/datasets/{domain}/{dataset}/query/async/{query_id}/results`
+    endpoint once it has succeeded.
+
+    ### Inputs
+
+    | Parameters    | Required     | Usage                   | Example values                                                                                                              | Definition                    |
+    |---------------|--------------|-------------------------|-----------------------------------------------------------------------------------------------------------------------------|-------------------------------|
+    | `domain`      | True         | URL parameter           | `space`                                                                                                                     | domain of the dataset         |
+    | `dataset`     | True         | URL parameter           | `rocket_launches`                                                                                                           | dataset title                 |
+    | `query`       | False        | JSON Request Body       | Consult the [docs](https://github.com/no10ds/rapid-api/blob/main/docs/guides/usage/usage.md#how-to-construct-a-query-object)| the query object              |
+
+    ### Output
+
+    ```json
+    {
+    "query_id": "0d6b6e4c-2a3c-4c9e-8a53-2f4f1d9d7e21",
+    "status": "QUEUED",
+    "scanned_bytes": 0,
+    "execution_time_ms": null,
+    "error": null
+    }
+    ```
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a `READ` scope with appropriate sensitivity level permission,
+    e.g.: `READ_ALL`, `READ_PUBLIC`, `READ_PRIVATE`, `READ_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    return query_service.submit_query(domain, dataset, query)
+
+
+@datasets_router.get(
+    "/{domain}/{dataset}/query/async/{query_id}",
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.READ.value])],
+)
+async def get_query_status(domain: str, dataset: str, query_id: str):
+    """
+    ## Query status
+
+    Use this endpoint to follow the progress of a submitted query.
+
+    The query reports its status (`QUEUED`, `RUNNING`, `SUCCEEDED`, `FAILED` or `CANCELLED`), the number of bytes it
+    has scanned, the time in milliseconds it ran for and, if it failed, the reason why.
+
+    ### Inputs
+
+    | Parameters    | Usage                                   | Example values                         | Definition            |
+    |---------------|-----------------------------------------|----------------------------------------|-----------------------|
+    | `domain`      | URL parameter                           | `space`                                | domain of the dataset |
+    | `dataset`     | URL parameter                           | `rocket_launches`                      | dataset title         |
+    | `query_id`    | URL parameter                           | `0d6b6e4c-2a3c-4c9e-8a53-2f4f1d9d7e21` | id of the query       |
+
+    ### Output
+
+    ```json
+    {
+    "query_id": "0d6b6e4c-2a3c-4c9e-8a53-2f4f1d9d7e21",
+    "status": "SUCCEEDED",
+    "scanned_bytes": 52428800,
+    "execution_time_ms": 84211,
+    "error": null
+    }
+    ```
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a `READ` scope with appropriate sensitivity level permission,
+    e.g.: `READ_ALL`, `READ_PUBLIC`, `READ_PRIVATE`, `READ_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        return query_service.get_query_execution(domain, dataset, query_id)
+    except QueryJobNotFoundError as error:
+        AppLogger.warning("Query not found: %s", error.args[0])
+        raise UserError(message=error.args[0], status_code=404)
+
+
+@datasets_router.get(
+    "/{domain}/{dataset}/query/async/{query_id}/results",
+    dependencies=[Security(protect_dataset_endpoint, scopes=[Action.READ.value])],
+)
+async def get_query_results(
+    domain: str,
+    dataset: str,
+    query_id: str,
+    page_size: Optional[int] = QUERY_RESULTS_MAX_PAGE_SIZE,
+    page_token: Optional[str] = None,
+):
+    """
+    ## Query results
+
+    Use this endpoint to fetch the results of a submitted query once it has succeeded, a page at a time. Each page
+    returns the token of the next one, which is passed as `page_token` to fetch it, until there are no pages left.
+
+    Pages hold up to 1000 rows, and the first page holds one row fewer than the page size. Values are returned as text.
+
+    ### Inputs
+
+    | Parameters    | Usage                                   | Example values                         | Definition                        |
+    |---------------|-----------------------------------------|----------------------------------------|-----------------------------------|
+    | `domain`      | URL parameter                           | `space`                                | domain of the dataset             |
+    | `dataset`     | URL parameter                           | `rocket_launches`                      | dataset title                     |
+    | `query_id`    | URL parameter                           | `0d6b6e4c-2a3c-4c9e-8a53-2f4f1d9d7e21` | id of the query                   |
+    | `page_size`   | Query parameter (optional)              | `500`                                  | the number of rows per page       |
+    | `page_token`  | Query parameter (optional)              | `AYAD...`                              | token of the page, from the last  |
+
+    ### Output
+
+    ```json
+    {
+    "columns": ["column1", "column2"],
+    "rows": [
+        {"column1": "value1", "column2": "value2"},
+        ...
+    ],
+    "next_page_token": "AYAD..."
+    }
+    ```
+
+    ### Accepted scopes
+
+    In order to use this endpoint you need a `READ` scope with appropriate sensitivity level permission,
+    e.g.: `READ_ALL`, `READ_PUBLIC`, `READ_PRIVATE`, `READ_PROTECTED_{DOMAIN}`
+
+    ### Click  `Try it out` to use the endpoint
+
+    """
+    try:
+        return query_service.get_query_results(
+            domain, dataset, query_id, page_size, page_token
+        )
+    except QueryJobNotFoundError as error:
+        AppLogger.warning("Query not found: %s", error.args[0])
+        raise UserError(message=error.args[0], status_code=404)
@@ -15,6 +15,7 @@ from api.common.custom_exceptions import (
     CrawlerCreateFailsError,
     UserGroupCreationError,
     ProtectedDomainDoesNotExistError,
+    TableCreateFailsError,
 )
 from api.common.logger import AppLogger
 from api.controller.utils import _response_body
@@ -95,6 +96,9 @@ async def upload_schema(schema: Schema):
     except UserGroupCreationError as error:
         _delete_uploaded_schema(schema)
         _log_and_raise_error("User group creation error", error.args[0])
+    except TableCreateFailsError as error:
+        _delete_created_groups_and_schema(schema)
+        _log_and_raise_error("Failed to create table", error.args[0])
     except CrawlerCreateFailsError as error:
         _delete_created_groups_and_schema(schema)
         _log_and_raise_error("Failed to create crawler", error.args[0])
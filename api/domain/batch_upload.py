@@ -0,0 +1,10 @@
+from typing import List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class BatchUploadResult(BaseModel):
+    filename: str
+    status_code: int
+    uploaded: Optional[str] = None
+    details: Optional[Union[str, List[str]]] = None
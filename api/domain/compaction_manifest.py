@@ -0,0 +1,57 @@
+import os
+from typing import List, Tuple
+
+from pydantic import BaseModel
+
+from api.common.config.aws import COMPACTION_MANIFESTS_LOCATION
+from api.domain.storage_metadata import StorageMetaData
+
+
+class CompactedSource(BaseModel):
+    filename: str
+    rows: int
+
+
+class CompactionManifest(BaseModel):
+    domain: str
+    dataset: str
+    partition_path: str
+    filename: str
+    sources: List[CompactedSource]
+
+    def data_path(self) -> str:
+        return os.path.join(
+            StorageMetaData(self.domain, self.dataset).location(),
+            self.partition_path,
+            self.filename,
+        )
+
+    def manifest_path(self) -> str:
+        return compaction_manifest_path(
+            self.domain, self.dataset, self.partition_path, self.filename
+        )
+
+    def source_row_ranges(self) -> List[Tuple[CompactedSource, int, int]]:
+        # Rows of the compacted file are stored in the order of its sources
+        row_ranges, start = [], 0
+        for source in self.sources:
+            row_ranges.append((source, start, start + source.rows))
+            start += source.rows
+        return row_ranges
+
+
+def compaction_manifest_path(
+    domain: str, dataset: str, partition_path: str, filename: str
+) -> str:
+    return "/".join(
+        filter(
+            None,
+            [
+                COMPACTION_MANIFESTS_LOCATION,
+                domain,
+                dataset,
+                partition_path,
+                f"{filename}.json",
+            ],
+        )
+    )
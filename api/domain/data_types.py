@@ -1,4 +1,7 @@
-from typing import List
+from typing import List, Dict
+
+import pandas as pd
+import pyarrow as pa
 
 
 class DataTypes:
@@ -24,3 +27,40 @@ class DataTypes:
     @classmethod
     def custom_data_types(cls) -> List[str]:
         return [cls.DATE]
+
+    @classmethod
+    def arrow_data_types(cls) -> Dict[str, pa.DataType]:
+        return {
+            cls.DATE: pa.date32(),
+            cls.INT: pa.int64(),
+            cls.FLOAT: pa.float64(),
+            cls.STRING: pa.string(),
+            cls.BOOLEAN: pa.bool_(),
+        }
+
+    @classmethod
+    def pandas_data_types(cls) -> Dict[pa.DataType, pd.api.extensions.ExtensionDtype]:
+        return {
+            pa.int64(): pd.Int64Dtype(),
+            pa.float64(): pd.Float64Dtype(),
+            pa.bool_(): pd.BooleanDtype(),
+        }
+
+    @classmethod
+    def glue_data_types(cls) -> Dict[str, str]:
+        return {
+            cls.DATE: "date",
+            cls.INT: "bigint",
+            cls.FLOAT: "double",
+            cls.STRING: "string",
+            cls.BOOLEAN: "boolean",
+        }
+
+    @classmethod
+    def data_types_of_glue_types(cls) -> Dict[str, str]:
+        # Dates are read from Parquet as Python dates, held as objects
+        return {
+            glue_type: data_type
+            for data_type, glue_type in cls.glue_data_types().items()
+            if data_type != cls.DATE
+        }
@@ -0,0 +1,42 @@
+from functools import reduce
+from typing import Dict
+
+import pandas as pd
+
+from api.common.config.aws import KEY_INDEX_LOCATION
+from api.common.config.constants import KEY_INDEX_BUCKET_COUNT
+from api.domain.schema import Schema
+
+KEY_INDEX_COLUMNS = ["key", "partition"]
+KEY_SEPARATOR = "\x1f"
+
+
+def key_index_path(domain: str, dataset: str, bucket: int) -> str:
+    return f"{KEY_INDEX_LOCATION}/{domain}/{dataset}/{bucket}.parquet"
+
+
+def empty_key_index() -> pd.DataFrame:
+    return pd.DataFrame(columns=KEY_INDEX_COLUMNS, dtype=object)
+
+
+def generate_keys(schema: Schema, data: pd.DataFrame, partition_path: str) -> pd.Series:
+    # Partition columns are not stored with the data, so their values come from the path
+    partition_values = parse_partition_path(partition_path)
+    key_values = [
+        data[column].astype(str)
+        if column in data.columns
+        else pd.Series(partition_values[column], index=data.index, dtype=object)
+        for column in schema.get_key_column_names()
+    ]
+    return reduce(lambda left, right: left + KEY_SEPARATOR + right, key_values)
+
+
+def generate_key_buckets(keys: pd.Series) -> pd.Series:
+    key_hashes = pd.util.hash_array(keys.to_numpy(dtype=object))
+    return pd.Series(key_hashes % KEY_INDEX_BUCKET_COUNT, index=keys.index)
+
+
+def parse_partition_path(partition_path: str) -> Dict[str, str]:
+    return dict(
+        segment.split("=", 1) for segment in partition_path.split("/") if segment
+    )
@@ -6,6 +6,12 @@ from api.common.custom_exceptions import UserError
 class MimeType(Enum):
     APPLICATION_JSON = "application/json"
     TEXT_CSV = "text/csv"
+    APPLICATION_NDJSON = "application/x-ndjson"
+    APPLICATION_ARROW_STREAM = "application/vnd.apache.arrow.stream"
+    APPLICATION_PARQUET = "application/vnd.apache.parquet"
+
+    def is_columnar(self) -> bool:
+        return self in (MimeType.APPLICATION_ARROW_STREAM, MimeType.APPLICATION_PARQUET)
 
     @staticmethod
     def to_mimetype(mime_type: str):
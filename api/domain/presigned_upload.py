@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class PresignedUpload(BaseModel):
+    filename: str
+    upload_url: str
+    expires_in: int
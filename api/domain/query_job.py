@@ -0,0 +1,44 @@
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from api.common.config.aws import QUERY_JOBS_LOCATION
+from api.common.utilities import BaseEnum
+
+
+class QueryJobStatus(BaseEnum):
+    # The states of Athena query executions
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class QueryJob(BaseModel):
+    query_id: str
+    domain: str
+    dataset: str
+    created_at: float = Field(default_factory=time.time)
+
+    def job_path(self) -> str:
+        return query_job_path(self.domain, self.dataset, self.query_id)
+
+
+class QueryExecution(BaseModel):
+    query_id: str
+    status: str
+    scanned_bytes: int = 0
+    execution_time_ms: Optional[int] = None
+    error: Optional[str] = None
+
+
+class QueryResultsPage(BaseModel):
+    columns: List[str]
+    rows: List[Dict[str, Optional[str]]]
+    next_page_token: Optional[str] = None
+
+
+def query_job_path(domain: str, dataset: str, query_id: str) -> str:
+    return f"{QUERY_JOBS_LOCATION}/{domain}/{dataset}/{query_id}.json"
@@ -12,6 +12,7 @@ class Column(BaseModel):
     data_type: str
     allow_null: bool
     format: Optional[str] = None
+    primary_key: bool = False
 
 
 class Schema(BaseModel):
@@ -39,6 +40,9 @@ class Schema(BaseModel):
     def get_update_behaviour(self) -> str:
         return self.metadata.get_update_behaviour()
 
+    def get_storage_format(self) -> str:
+        return self.metadata.get_storage_format()
+
     def get_column_names(self) -> List[str]:
         return [column.name for column in self.columns]
 
@@ -66,8 +70,25 @@ class Schema(BaseModel):
     def get_column_names_by_type(self, d_type: str) -> List[str]:
         return [column.name for column in self.columns if column.data_type == d_type]
 
+    def get_non_partition_columns(self) -> List[Column]:
+        return [column for column in self.columns if column.partition_index is None]
+
+    def get_key_columns(self) -> List[Column]:
+        return [column for column in self.columns if column.primary_key]
+
+    def get_key_column_names(self) -> List[str]:
+        return [column.name for column in self.get_key_columns()]
+
     def get_partition_columns(self) -> List[Column]:
         return sorted(
             [column for column in self.columns if column.partition_index is not None],
             key=lambda x: x.partition_index,
         )
+
+    def with_column_order(self, column_names: List[str]) -> "Schema":
+        # Columns that are not named keep their order, after those that are
+        positions = {name: index for index, name in enumerate(column_names)}
+        columns = sorted(
+            self.columns, key=lambda column: positions.get(column.name, len(positions))
+        )
+        return self.copy(update={"columns": columns})
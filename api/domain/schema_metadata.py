@@ -18,6 +18,15 @@ class Owner(BaseModel):
 class UpdateBehaviour(BaseEnum):
     APPEND = "APPEND"
     OVERWRITE = "OVERWRITE"
+    UPSERT = "UPSERT"
+
+
+class StorageFormat(BaseEnum):
+    CSV = "CSV"
+    PARQUET = "PARQUET"
+
+    def file_extension(self) -> str:
+        return self.value.lower()
 
 
 class SchemaMetadata(BaseModel):
@@ -28,6 +37,7 @@ class SchemaMetadata(BaseModel):
     key_only_tags: List[str] = list()
     owners: Optional[List[Owner]] = None
     update_behaviour: str = UpdateBehaviour.APPEND.value
+    storage_format: str = StorageFormat.CSV.value
 
     def get_domain(self) -> str:
         return self.domain
@@ -62,6 +72,9 @@ class SchemaMetadata(BaseModel):
     def get_update_behaviour(self) -> str:
         return self.update_behaviour
 
+    def get_storage_format(self) -> str:
+        return self.storage_format
+
     def remove_duplicates(self):
         updated_key_only_list = []
 
@@ -1,3 +1,4 @@
+import re
 from enum import Enum
 from typing import Optional, List
 
@@ -42,6 +43,33 @@ class SQLQuery(BaseModel):
         AppLogger.info(f"Constructed SQL from input query: {constructed_sql}")
         return constructed_sql
 
+    def result_column_names(self, table_columns: List[str]) -> List[str]:
+        # Athena names columns in lower case, after their alias when they have one, and
+        # columns that are neither aliased nor of the table after their position
+        column_names = []
+        for index, column in enumerate(self._selected_columns()):
+            if column == "*":
+                column_names.extend(table_columns)
+            else:
+                column_names.append(self._column_name(column) or f"_col{index}")
+        return column_names
+
+    def has_unnamed_columns(self) -> bool:
+        return any(
+            column != "*" and self._column_name(column) is None
+            for column in self._selected_columns()
+        )
+
+    def _selected_columns(self) -> List[str]:
+        selected_columns = [column for column in self.select_columns or [] if column]
+        return [column.strip() for column in selected_columns] or ["*"]
+
+    def _column_name(self, column: str) -> Optional[str]:
+        name = re.split(r"\s+AS\s+", column, flags=re.IGNORECASE)[-1].strip()
+        if re.fullmatch(r'"[^"]+"|\w+', name):
+            return name.strip('"').lower()
+        return None
+
     def _generate_select_columns(self):
         columns = self._generate_columns(self.select_columns, "")
         if columns == "":
@@ -1,7 +1,14 @@
+import os
 import time
+import uuid
 from dataclasses import dataclass
+from typing import Optional
 
 from api.common.config.aws import DATA_BUCKET
+from api.domain.schema_metadata import StorageFormat
+from api.domain.upload_format import uncompressed_filename
+
+GENERATION_PREFIX = "generation-"
 
 
 @dataclass(frozen=True)
@@ -27,6 +34,19 @@ class StorageMetaData:
     def s3_path(self) -> str:
         return f"s3://{DATA_BUCKET}/{self.location()}/"
 
+    def generation_location(self, generation: str) -> str:
+        return f"{self.location()}/{generation}"
+
+    def generation_s3_path(self, generation: str) -> str:
+        return f"s3://{DATA_BUCKET}/{self.generation_location(generation)}/"
+
+    def generation_of(self, path: str) -> Optional[str]:
+        # Paths are keys or S3 paths within the dataset location, data stored
+        # directly under the location belongs to no generation
+        _, _, relative_path = path.partition(f"{self.location()}/")
+        name = relative_path.split("/")[0]
+        return name if name.startswith(GENERATION_PREFIX) else None
+
     def _construct_dataset_location(self, domain: str, dataset: str):
         return f"data/{domain}/{dataset}"
 
@@ -34,5 +54,24 @@ class StorageMetaData:
         return f"raw_data/{domain}/{dataset}"
 
 
+def generate_generation_id() -> str:
+    return f'{GENERATION_PREFIX}{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:8]}'
+
+
 def filename_with_timestamp(filename: str):
     return f'{time.strftime("%Y-%m-%dT%H:%M:%S")}-{filename}'
+
+
+def filename_with_extension(filename: str, extension: str) -> str:
+    return f"{os.path.splitext(filename)[0]}.{extension}"
+
+
+def data_filenames(raw_filename: str) -> tuple:
+    # Data files are named after their raw file, with the extension of their storage format
+    filenames = [raw_filename] + [
+        filename_with_extension(
+            uncompressed_filename(raw_filename), storage_format.file_extension()
+        )
+        for storage_format in StorageFormat
+    ]
+    return tuple(dict.fromkeys(filenames))
@@ -0,0 +1,97 @@
+import os
+from typing import Optional
+
+from api.common.utilities import BaseEnum
+
+
+class UploadFormat(BaseEnum):
+    CSV = "CSV"
+    PARQUET = "PARQUET"
+    ARROW = "ARROW"
+
+    def file_extension(self) -> str:
+        return {
+            UploadFormat.CSV: "csv",
+            UploadFormat.PARQUET: "parquet",
+            UploadFormat.ARROW: "arrows",
+        }[self]
+
+    def mime_type(self) -> str:
+        return {
+            UploadFormat.CSV: "text/csv",
+            UploadFormat.PARQUET: "application/vnd.apache.parquet",
+            UploadFormat.ARROW: "application/vnd.apache.arrow.stream",
+        }[self]
+
+    @classmethod
+    def from_filename(cls, filename: str) -> "UploadFormat":
+        # Files without a known extension are read as CSV
+        extension = file_extension(uncompressed_filename(filename))
+        for upload_format in cls:
+            if upload_format.file_extension() == extension:
+                return upload_format
+        return cls.CSV
+
+    @classmethod
+    def from_mime_type(cls, mime_type: Optional[str]) -> Optional["UploadFormat"]:
+        for upload_format in cls:
+            if upload_format.mime_type() == mime_type:
+                return upload_format
+        return None
+
+    @classmethod
+    def file_extensions(cls) -> tuple:
+        return tuple(f".{upload_format.file_extension()}" for upload_format in cls)
+
+
+class Compression(BaseEnum):
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+    def file_extension(self) -> str:
+        return {Compression.GZIP: "gz", Compression.ZSTD: "zst"}[self]
+
+    def mime_type(self) -> str:
+        return f"application/{self.value}"
+
+    @classmethod
+    def from_filename(cls, filename: str) -> Optional["Compression"]:
+        extension = file_extension(filename)
+        for compression in cls:
+            if compression.file_extension() == extension:
+                return compression
+        return None
+
+    @classmethod
+    def from_mime_type(cls, mime_type: Optional[str]) -> Optional["Compression"]:
+        for compression in cls:
+            if compression.mime_type() == mime_type:
+                return compression
+        return None
+
+
+def file_extension(filename: str) -> str:
+    return os.path.splitext(filename)[1].lstrip(".").lower()
+
+
+def uncompressed_filename(filename: str) -> str:
+    if Compression.from_filename(filename):
+        return os.path.splitext(filename)[0]
+    return filename
+
+
+def upload_filename(filename: str, mime_type: Optional[str]) -> str:
+    # The format and compression of an upload are kept in its file name, so that raw
+    # files can be read again when processed, e.g.: after being uploaded to a presigned URL
+    compression = Compression.from_mime_type(mime_type)
+    if compression:
+        if Compression.from_filename(filename) != compression:
+            return f"{filename}.{compression.file_extension()}"
+        return filename
+    upload_format = UploadFormat.from_mime_type(mime_type)
+    if (
+        upload_format in (UploadFormat.PARQUET, UploadFormat.ARROW)
+        and UploadFormat.from_filename(filename) != upload_format
+    ):
+        return f"{os.path.splitext(filename)[0]}.{upload_format.file_extension()}"
+    return filename
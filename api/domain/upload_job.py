@@ -0,0 +1,72 @@
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from api.common.config.aws import UPLOAD_JOBS_LOCATION
+from api.common.utilities import BaseEnum
+
+
+class UploadJobStage(BaseEnum):
+    QUEUED = "QUEUED"
+    VALIDATION = "VALIDATION"
+    RAW_FILE_UPLOAD = "RAW_FILE_UPLOAD"
+    DATA_UPLOAD = "DATA_UPLOAD"
+    CATALOGUE_UPDATE = "CATALOGUE_UPDATE"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class UploadJob(BaseModel):
+    job_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    domain: str
+    dataset: str
+    filename: str
+    stage: str = UploadJobStage.QUEUED.value
+    chunks_uploaded: int = 0
+    rows_uploaded: int = 0
+    uploaded_filename: Optional[str] = None
+    errors: List[str] = list()
+    timings: Dict[str, float] = dict()
+    created_at: float = Field(default_factory=time.time)
+    stage_started_at: float = Field(default_factory=time.time)
+    owner: Optional[str] = None
+    heartbeat_at: float = Field(default_factory=time.time)
+
+    def set_stage(self, stage: UploadJobStage):
+        now = time.time()
+        self.timings[self.stage] = round(now - self.stage_started_at, 3)
+        self.stage = stage.value
+        self.stage_started_at = now
+
+    def record_chunk(self, rows: int):
+        self.chunks_uploaded += 1
+        self.rows_uploaded += rows
+
+    def complete(self, uploaded_filename: str):
+        self.uploaded_filename = uploaded_filename
+        self.set_stage(UploadJobStage.COMPLETED)
+
+    def fail(self, errors: List[str]):
+        self.errors = errors
+        self.set_stage(UploadJobStage.FAILED)
+
+    def heartbeat(self):
+        self.heartbeat_at = time.time()
+
+    def is_finished(self) -> bool:
+        return self.stage in [
+            UploadJobStage.COMPLETED.value,
+            UploadJobStage.FAILED.value,
+        ]
+
+    def is_stale(self, timeout: int) -> bool:
+        return not self.is_finished() and time.time() - self.heartbeat_at > timeout
+
+    def job_path(self) -> str:
+        return upload_job_path(self.domain, self.dataset, self.job_id)
+
+
+def upload_job_path(domain: str, dataset: str, job_id: str) -> str:
+    return f"{UPLOAD_JOBS_LOCATION}/{domain}/{dataset}/{job_id}.json"
@@ -0,0 +1,58 @@
+import hashlib
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from api.common.config.aws import UPLOAD_INDEX_LOCATION
+from api.common.config.constants import CONTENT_ENCODING
+
+
+class UploadRecord(BaseModel):
+    domain: str
+    dataset: str
+    content_hash: str
+    idempotency_key: Optional[str] = None
+    raw_filename: str
+    uploaded_filename: str
+    uploaded_at: float = Field(default_factory=time.time)
+
+    def index_keys(self) -> List[str]:
+        index_keys = [content_hash_index_key(self.content_hash)]
+        if self.idempotency_key:
+            index_keys.append(idempotency_key_index_key(self.idempotency_key))
+        return index_keys
+
+    def record_paths(self) -> List[str]:
+        return [
+            upload_record_path(self.domain, self.dataset, index_key)
+            for index_key in self.index_keys()
+        ]
+
+
+class UploadClaim(BaseModel):
+    domain: str
+    dataset: str
+    index_key: str
+    claimed_at: float = Field(default_factory=time.time)
+
+    def claim_path(self) -> str:
+        return upload_claim_path(self.domain, self.dataset, self.index_key)
+
+
+def content_hash_index_key(content_hash: str) -> str:
+    return f"sha256-{content_hash}"
+
+
+def idempotency_key_index_key(idempotency_key: str) -> str:
+    # Keys are supplied by the client, so they are hashed to be safe to use in object paths
+    key_hash = hashlib.sha256(idempotency_key.encode(CONTENT_ENCODING)).hexdigest()
+    return f"key-{key_hash}"
+
+
+def upload_record_path(domain: str, dataset: str, index_key: str) -> str:
+    return f"{UPLOAD_INDEX_LOCATION}/{domain}/{dataset}/{index_key}.json"
+
+
+def upload_claim_path(domain: str, dataset: str, index_key: str) -> str:
+    return f"{UPLOAD_INDEX_LOCATION}/{domain}/{dataset}/{index_key}.claim"
@@ -0,0 +1,22 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from api.common.config.aws import UPSERT_MANIFESTS_LOCATION
+
+
+class UpsertManifest(BaseModel):
+    domain: str
+    dataset: str
+    filename: str
+    written_files: List[str]
+    superseded_files: List[str]
+    # Set once the merged files and the key index are saved
+    committed: bool = False
+
+    def manifest_path(self) -> str:
+        return upsert_manifest_path(self.domain, self.dataset, self.filename)
+
+
+def upsert_manifest_path(domain: str, dataset: str, filename: str) -> str:
+    return f"{UPSERT_MANIFESTS_LOCATION}/{domain}/{dataset}/{filename}.json"
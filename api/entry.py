@@ -18,11 +18,12 @@ from api.common.config.auth import (
     COGNITO_USER_LOGIN_APP_CREDENTIALS_SECRETS_NAME,
     construct_user_auth_url,
 )
+from api.common.config.aws import COMPACTION_SCHEDULE_INTERVAL
 from api.common.config.docs import custom_openapi_docs_generator, COMMIT_SHA, VERSION
 from api.common.logger import AppLogger, init_logger
 from api.controller.auth import auth_router
 from api.controller.client import client_router
-from api.controller.datasets import datasets_router
+from api.controller.datasets import compaction_service, datasets_router
 from api.controller.protected_domain import protected_domain_router
 from api.controller.schema import schema_router
 from api.exception_handler import add_exception_handlers
@@ -45,6 +46,13 @@ app.include_router(protected_domain_router)
 @app.on_event("startup")
 async def startup_event():
     init_logger()
+    if COMPACTION_SCHEDULE_INTERVAL:
+        compaction_service.schedule_compaction(COMPACTION_SCHEDULE_INTERVAL)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    compaction_service.stop_scheduled_compaction()
 
 
 @app.middleware("http")
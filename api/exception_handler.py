@@ -9,7 +9,11 @@ from starlette.responses import RedirectResponse
 from api.application.services.authorisation.authorisation_service import (
     UserCredentialsUnavailableError,
 )
-from api.common.custom_exceptions import SchemaError, BaseAppException
+from api.common.custom_exceptions import (
+    SchemaError,
+    BaseAppException,
+    UploadCapacityExceededError,
+)
 from api.common.logger import AppLogger
 
 
@@ -32,6 +36,14 @@ def add_exception_handlers(app: FastAPI) -> None:
             content={"details": exc.message}, status_code=exc.status_code
         )
 
+    @app.exception_handler(UploadCapacityExceededError)
+    async def upload_capacity_exceeded_handler(request, exc):
+        return JSONResponse(
+            content={"details": exc.message},
+            status_code=exc.status_code,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
     @app.exception_handler(SchemaError)
     async def schema_error_handler(request, exc):
         AppLogger.warning(f"Invalid schema generated: {exc.message}")
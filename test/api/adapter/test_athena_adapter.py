@@ -1,22 +1,27 @@
-from unittest.mock import Mock
+from unittest.mock import ANY, Mock
 
 import pandas as pd
 import pytest
-from awswrangler.exceptions import QueryFailed
+from awswrangler.exceptions import EmptyDataFrame, InvalidArgumentValue, QueryFailed
 from botocore.exceptions import ClientError
 
 from api.common.custom_exceptions import UserError
 from api.adapter.athena_adapter import AthenaAdapter
+from api.domain.query_job import QueryExecution, QueryResultsPage
 from api.domain.sql_query import SQLQuery, SQLQueryOrderBy
 
 
 class TestAthenaAdapter:
     def setup_method(self):
         self.mock_athena_read_sql_query = Mock()
+        self.mock_athena_start_query_execution = Mock()
+        self.mock_athena_client = Mock()
         self.athena_adapter = AthenaAdapter(
             database="my_database",
             athena_read_sql_query=self.mock_athena_read_sql_query,
             s3_output="out",
+            athena_start_query_execution=self.mock_athena_start_query_execution,
+            athena_client=self.mock_athena_client,
         )
 
     def test_returns_query_result_dataframe(self):
@@ -69,6 +74,30 @@ class TestAthenaAdapter:
             s3_output="out",
         )
 
+    def test_query_chunks_returns_chunks_of_query_result(self):
+        chunks = iter(
+            [pd.DataFrame({"column1": [1, 2]}), pd.DataFrame({"column1": [3]})]
+        )
+        self.mock_athena_read_sql_query.return_value = chunks
+
+        result = self.athena_adapter.query_chunks("my", "table", SQLQuery())
+
+        self.mock_athena_read_sql_query.assert_called_once_with(
+            sql="SELECT * FROM my_table",
+            database="my_database",
+            ctas_approach=False,
+            workgroup="rapid_athena_workgroup",
+            s3_output="out",
+            chunksize=100_000,
+        )
+        assert result is chunks
+
+    def test_query_chunks_fails_before_returning_chunks(self):
+        self.mock_athena_read_sql_query.side_effect = QueryFailed("Some error")
+
+        with pytest.raises(UserError, match="Query failed to execute: Some error"):
+            self.athena_adapter.query_chunks("my", "table", SQLQuery())
+
     def test_query_fails(self):
         self.mock_athena_read_sql_query.side_effect = QueryFailed("Some error")
 
@@ -98,3 +127,325 @@ class TestAthenaAdapter:
 
         with pytest.raises(UserError, match=expected_message):
             self.athena_adapter.query("my", "table", SQLQuery())
+
+    def test_start_query(self):
+        self.mock_athena_start_query_execution.return_value = "query-id"
+
+        query_id = self.athena_adapter.start_query("my", "table", SQLQuery(limit="10"))
+
+        assert query_id == "query-id"
+        self.mock_athena_start_query_execution.assert_called_once_with(
+            sql="SELECT * FROM my_table LIMIT 10",
+            database="my_database",
+            workgroup="rapid_athena_workgroup",
+            s3_output="out",
+        )
+
+    def test_start_query_fails_because_of_invalid_request(self):
+        self.mock_athena_start_query_execution.side_effect = ClientError(
+            error_response={
+                "Error": {"Code": "InvalidRequestException"},
+                "Message": "The error message",
+            },
+            operation_name="StartQueryExecution",
+        )
+
+        with pytest.raises(
+            UserError, match="Failed to execute query: The error message"
+        ):
+            self.athena_adapter.start_query("my", "table", SQLQuery())
+
+    def test_get_query_execution(self):
+        self.mock_athena_client.get_query_execution.return_value = {
+            "QueryExecution": {
+                "Status": {"State": "FAILED", "StateChangeReason": "Some error"},
+                "Statistics": {
+                    "DataScannedInBytes": 1024,
+                    "EngineExecutionTimeInMillis": 300,
+                },
+            }
+        }
+
+        execution = self.athena_adapter.get_query_execution("query-id")
+
+        self.mock_athena_client.get_query_execution.assert_called_once_with(
+            QueryExecutionId="query-id"
+        )
+        assert execution == QueryExecution(
+            query_id="query-id",
+            status="FAILED",
+            scanned_bytes=1024,
+            execution_time_ms=300,
+            error="Some error",
+        )
+
+    def test_get_query_execution_of_queued_query(self):
+        self.mock_athena_client.get_query_execution.return_value = {
+            "QueryExecution": {"Status": {"State": "QUEUED"}}
+        }
+
+        execution = self.athena_adapter.get_query_execution("query-id")
+
+        assert execution == QueryExecution(query_id="query-id", status="QUEUED")
+
+    def test_get_first_page_of_query_results(self):
+        self.mock_athena_client.get_query_results.return_value = {
+            "ResultSet": {
+                "Rows": [
+                    {
+                        "Data": [
+                            {"VarCharValue": "column1"},
+                            {"VarCharValue": "column2"},
+                        ]
+                    },
+                    {"Data": [{"VarCharValue": "1"}, {"VarCharValue": "item1"}]},
+                    {"Data": [{"VarCharValue": "2"}, {}]},
+                ],
+                "ResultSetMetadata": {
+                    "ColumnInfo": [{"Name": "column1"}, {"Name": "column2"}]
+                },
+            },
+            "NextToken": "next-page",
+        }
+
+        page = self.athena_adapter.get_query_results("query-id", 3)
+
+        self.mock_athena_client.get_query_results.assert_called_once_with(
+            QueryExecutionId="query-id", MaxResults=3
+        )
+        assert page == QueryResultsPage(
+            columns=["column1", "column2"],
+            rows=[
+                {"column1": "1", "column2": "item1"},
+                {"column1": "2", "column2": None},
+            ],
+            next_page_token="next-page",
+        )
+
+    def test_get_next_page_of_query_results(self):
+        self.mock_athena_client.get_query_results.return_value = {
+            "ResultSet": {
+                "Rows": [{"Data": [{"VarCharValue": "3"}]}],
+                "ResultSetMetadata": {"ColumnInfo": [{"Name": "column1"}]},
+            },
+        }
+
+        page = self.athena_adapter.get_query_results("query-id", 3, "next-page")
+
+        self.mock_athena_client.get_query_results.assert_called_once_with(
+            QueryExecutionId="query-id", MaxResults=3, NextToken="next-page"
+        )
+        assert page == QueryResultsPage(columns=["column1"], rows=[{"column1": "3"}])
+
+    def test_get_query_results_fails_because_of_invalid_page_token(self):
+        self.mock_athena_client.get_query_results.side_effect = ClientError(
+            error_response={
+                "Error": {"Code": "InvalidRequestException"},
+                "Message": "Invalid token",
+            },
+            operation_name="GetQueryResults",
+        )
+
+        with pytest.raises(UserError, match="Failed to execute query: Invalid token"):
+            self.athena_adapter.get_query_results("query-id", 3, "bad-token")
+
+
+class TestAthenaAdapterUnload:
+    def setup_method(self):
+        self.mock_athena_read_sql_query = Mock()
+        self.mock_get_table_types = Mock()
+        self.athena_adapter = AthenaAdapter(
+            database="my_database",
+            athena_read_sql_query=self.mock_athena_read_sql_query,
+            s3_output="out",
+            athena_start_query_execution=Mock(),
+            athena_client=Mock(),
+            get_table_types=self.mock_get_table_types,
+            unload_results="REQUEST",
+        )
+
+    def test_unloads_query_result_as_parquet(self):
+        query_result_df = pd.DataFrame({"column1": [1, 2]})
+        self.mock_athena_read_sql_query.return_value = query_result_df
+
+        result = self.athena_adapter.query("my", "table", SQLQuery(), unload=True)
+
+        assert result is query_result_df
+        self.mock_athena_read_sql_query.assert_called_once_with(
+            sql="SELECT * FROM my_table",
+            database="my_database",
+            ctas_approach=False,
+            unload_approach=True,
+            keep_files=False,
+            workgroup="rapid_athena_workgroup",
+            s3_output=ANY,
+        )
+
+    def test_unloads_each_query_result_to_a_location_of_its_own(self):
+        self.athena_adapter.query("my", "table", SQLQuery(), unload=True)
+        self.athena_adapter.query("my", "table", SQLQuery(), unload=True)
+
+        first_output, second_output = [
+            call.kwargs["s3_output"]
+            for call in self.mock_athena_read_sql_query.call_args_list
+        ]
+        assert first_output.startswith("s3://out/unload/")
+        assert first_output.endswith("/")
+        assert first_output != second_output
+
+    def test_unloads_query_result_in_chunks(self):
+        self.athena_adapter.query_chunks("my", "table", SQLQuery(), unload=True)
+
+        call_kwargs = self.mock_athena_read_sql_query.call_args.kwargs
+        assert call_kwargs["unload_approach"] is True
+        assert call_kwargs["chunksize"] == 100_000
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            SQLQuery(),
+            SQLQuery(select_columns=["count(*) AS total"]),
+            SQLQuery(limit="1000000"),
+        ],
+    )
+    def test_reads_query_result_as_csv_unless_unload_is_requested(
+        self, query: SQLQuery
+    ):
+        self.athena_adapter.query("my", "table", query)
+        self.athena_adapter.query_chunks("my", "table", query)
+
+        for call in self.mock_athena_read_sql_query.call_args_list:
+            assert "unload_approach" not in call.kwargs
+            assert call.kwargs["s3_output"] == "out"
+
+    def test_reads_sorted_query_result_as_csv(self):
+        query = SQLQuery(order_by_columns=[SQLQueryOrderBy(column="column1")])
+
+        self.athena_adapter.query("my", "table", query, unload=True)
+
+        call_kwargs = self.mock_athena_read_sql_query.call_args.kwargs
+        assert "unload_approach" not in call_kwargs
+        assert call_kwargs["s3_output"] == "out"
+
+    def test_reads_query_result_as_csv_when_unloading_is_disabled(self):
+        athena_adapter = AthenaAdapter(
+            athena_read_sql_query=self.mock_athena_read_sql_query,
+            athena_client=Mock(),
+            unload_results="NEVER",
+        )
+
+        athena_adapter.query("my", "table", SQLQuery(), unload=True)
+
+        call_kwargs = self.mock_athena_read_sql_query.call_args.kwargs
+        assert "unload_approach" not in call_kwargs
+
+    def test_returns_empty_result_without_running_query_again(self):
+        self.mock_athena_read_sql_query.side_effect = EmptyDataFrame(
+            "Query would return untyped, empty dataframe."
+        )
+        self.mock_get_table_types.return_value = {
+            "column1": "int",
+            "column2": "string",
+            "year": "string",
+        }
+
+        result = self.athena_adapter.query("my", "table", SQLQuery(), unload=True)
+
+        assert result.empty
+        assert list(result.columns) == ["column1", "column2", "year"]
+        self.mock_athena_read_sql_query.assert_called_once()
+        self.mock_get_table_types.assert_called_once_with(
+            database="my_database", table="my_table"
+        )
+
+    def test_unloads_every_query_result_when_always_enabled(self):
+        athena_adapter = AthenaAdapter(
+            athena_read_sql_query=self.mock_athena_read_sql_query,
+            athena_client=Mock(),
+            unload_results="ALWAYS",
+        )
+
+        athena_adapter.query("my", "table", SQLQuery())
+
+        call_kwargs = self.mock_athena_read_sql_query.call_args.kwargs
+        assert call_kwargs["unload_approach"] is True
+
+    def test_reads_query_result_with_unnamed_columns_as_csv(self):
+        query = SQLQuery(select_columns=["column1", "count(*)"])
+
+        self.athena_adapter.query("my", "table", query, unload=True)
+
+        call_kwargs = self.mock_athena_read_sql_query.call_args.kwargs
+        assert "unload_approach" not in call_kwargs
+
+    def test_returns_empty_aggregate_result_with_columns_typed_from_table(self):
+        self.mock_athena_read_sql_query.side_effect = EmptyDataFrame("Empty")
+        self.mock_get_table_types.return_value = {
+            "column1": "bigint",
+            "column2": "double",
+            "column3": "string",
+            "column4": "boolean",
+            "column5": "date",
+        }
+        query = SQLQuery(
+            select_columns=[
+                "column1",
+                "column3",
+                "column4",
+                "column5",
+                "avg(column2) AS average",
+            ],
+            group_by_columns=["column1", "column3", "column4", "column5"],
+        )
+
+        result = self.athena_adapter.query("my", "table", query, unload=True)
+
+        assert result.empty
+        assert result.dtypes.to_dict() == {
+            "column1": "Int64",
+            "column3": "object",
+            "column4": "boolean",
+            "column5": "object",
+            "average": "object",
+        }
+
+    def test_returns_empty_result_with_selected_columns(self):
+        self.mock_athena_read_sql_query.side_effect = EmptyDataFrame("Empty")
+        self.mock_get_table_types.return_value = {"column1": "int", "column2": "int"}
+        query = SQLQuery(select_columns=["column1", 'avg("column2") AS "Average"', "*"])
+
+        result = self.athena_adapter.query("my", "table", query, unload=True)
+
+        assert list(result.columns) == ["column1", "average", "column1", "column2"]
+
+    def test_returns_empty_result_in_a_single_chunk(self):
+        self.mock_athena_read_sql_query.side_effect = EmptyDataFrame("Empty")
+        self.mock_get_table_types.return_value = {"column1": "int"}
+
+        chunks = list(
+            self.athena_adapter.query_chunks("my", "table", SQLQuery(), unload=True)
+        )
+
+        assert len(chunks) == 1
+        assert chunks[0].empty
+        assert list(chunks[0].columns) == ["column1"]
+        self.mock_athena_read_sql_query.assert_called_once()
+
+    def test_query_that_cannot_be_unloaded_fails(self):
+        self.mock_athena_read_sql_query.side_effect = InvalidArgumentValue(
+            "Please, define all columns names in your query."
+        )
+
+        with pytest.raises(
+            UserError,
+            match="Query failed to execute: Please, define all columns names",
+        ):
+            self.athena_adapter.query("my", "table", SQLQuery(), unload=True)
+
+        self.mock_athena_read_sql_query.assert_called_once()
+
+    def test_unloaded_query_fails(self):
+        self.mock_athena_read_sql_query.side_effect = QueryFailed("Some error")
+
+        with pytest.raises(UserError, match="Query failed to execute: Some error"):
+            self.athena_adapter.query("my", "table", SQLQuery(), unload=True)
@@ -7,6 +7,7 @@ from api.adapter.glue_adapter import GlueAdapter
 from api.common.config.aws import (
     GLUE_TABLE_PRESENCE_CHECK_RETRY_COUNT,
     GLUE_CSV_CLASSIFIER,
+    GLUE_CRAWLER_CONFIGURATION,
     DATA_BUCKET,
 )
 from api.common.config.aws import RESOURCE_PREFIX
@@ -17,7 +18,12 @@ from api.common.custom_exceptions import (
     GetCrawlerError,
     CrawlerIsNotReadyError,
     TableNotCreatedError,
+    PartitionCreateFailsError,
+    TableCreateFailsError,
+    TableUpdateFailsError,
 )
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import SchemaMetadata
 
 
 class TestGlueAdapterCrawlerMethods:
@@ -58,6 +64,8 @@ class TestGlueAdapterCrawlerMethods:
                 "tag2": "value2",
                 "tag3": "value3",
             },
+            SchemaChangePolicy={"UpdateBehavior": "LOG", "DeleteBehavior": "LOG"},
+            Configuration=GLUE_CRAWLER_CONFIGURATION,
         )
 
     def test_create_crawler_fails_already_exists(self):
@@ -427,3 +435,514 @@ class TestGlueAdapterCatalogTableMethods:
         self.glue_boto_client.update_table.assert_called_once_with(
             DatabaseName="GLUE_CATALOGUE_DB_NAME", TableInput=altered_table_config
         )
+
+
+class TestGlueAdapterPartitionMethods:
+    glue_boto_client = None
+
+    def setup_method(self):
+        self.glue_boto_client = Mock()
+        self.glue_adapter = GlueAdapter(
+            self.glue_boto_client,
+            "GLUE_CATALOGUE_DB_NAME",
+            "GLUE_CRAWLER_ROLE",
+            "GLUE_CONNECTION_DB_NAME",
+        )
+        self.glue_boto_client.get_table.return_value = {
+            "Table": {
+                "Name": "domain_dataset",
+                "PartitionKeys": [
+                    {"Name": "year", "Type": "string"},
+                    {"Name": "month", "Type": "string"},
+                ],
+                "StorageDescriptor": {
+                    "Location": "s3://bucket/data/domain/dataset/",
+                    "SerdeInfo": {"SerializationLibrary": "serde"},
+                },
+            }
+        }
+        self.glue_boto_client.batch_create_partition.return_value = {}
+
+    def test_table_exists(self):
+        assert self.glue_adapter.table_exists("domain", "dataset") is True
+
+        self.glue_boto_client.get_table.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME", Name="domain_dataset"
+        )
+
+    def test_table_does_not_exist(self):
+        self.glue_boto_client.get_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "EntityNotFoundException"}},
+            operation_name="GetTable",
+        )
+
+        assert self.glue_adapter.table_exists("domain", "dataset") is False
+
+    def test_creates_partitions_with_table_storage_descriptor(self):
+        self.glue_adapter.create_partitions(
+            "domain", "dataset", ["year=2020/month=1", "year=2021/month=12"]
+        )
+
+        self.glue_boto_client.batch_create_partition.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME",
+            TableName="domain_dataset",
+            PartitionInputList=[
+                {
+                    "Values": ["2020", "1"],
+                    "StorageDescriptor": {
+                        "Location": "s3://bucket/data/domain/dataset/year=2020/month=1/",
+                        "SerdeInfo": {"SerializationLibrary": "serde"},
+                    },
+                },
+                {
+                    "Values": ["2021", "12"],
+                    "StorageDescriptor": {
+                        "Location": "s3://bucket/data/domain/dataset/year=2021/month=12/",
+                        "SerdeInfo": {"SerializationLibrary": "serde"},
+                    },
+                },
+            ],
+        )
+
+    @patch("api.adapter.glue_adapter.GLUE_MAX_PARTITIONS_PER_BATCH", 2)
+    def test_creates_partitions_in_batches(self):
+        partition_paths = [f"year={year}/month=1" for year in range(5)]
+
+        self.glue_adapter.create_partitions("domain", "dataset", partition_paths)
+
+        batches = self.glue_boto_client.batch_create_partition.call_args_list
+        assert [len(batch.kwargs["PartitionInputList"]) for batch in batches] == [
+            2,
+            2,
+            1,
+        ]
+
+    def test_does_not_create_partitions_when_there_are_none(self):
+        self.glue_adapter.create_partitions("domain", "dataset", [])
+
+        self.glue_boto_client.get_table.assert_not_called()
+        self.glue_boto_client.batch_create_partition.assert_not_called()
+
+    def test_ignores_partitions_that_already_exist(self):
+        self.glue_boto_client.batch_create_partition.return_value = {
+            "Errors": [
+                {
+                    "PartitionValues": ["2020", "1"],
+                    "ErrorDetail": {"ErrorCode": "AlreadyExistsException"},
+                }
+            ]
+        }
+
+        self.glue_adapter.create_partitions("domain", "dataset", ["year=2020/month=1"])
+
+    def test_raises_error_when_partitions_fail_to_be_created(self):
+        self.glue_boto_client.batch_create_partition.return_value = {
+            "Errors": [
+                {
+                    "PartitionValues": ["2020", "1"],
+                    "ErrorDetail": {"ErrorCode": "InternalServiceException"},
+                }
+            ]
+        }
+
+        with pytest.raises(
+            PartitionCreateFailsError,
+            match=r"Failed to create partitions for table \[domain_dataset\]",
+        ):
+            self.glue_adapter.create_partitions(
+                "domain", "dataset", ["year=2020/month=1"]
+            )
+
+    def test_raises_error_when_partition_does_not_match_table_partition_keys(self):
+        with pytest.raises(
+            PartitionCreateFailsError,
+            match=r"Failed to generate partitions for table \[domain_dataset\]",
+        ):
+            self.glue_adapter.create_partitions("domain", "dataset", ["day=1"])
+
+
+class TestGlueAdapterTableCreation:
+    glue_boto_client = None
+
+    def setup_method(self):
+        self.glue_boto_client = Mock()
+        self.glue_adapter = GlueAdapter(
+            self.glue_boto_client,
+            "GLUE_CATALOGUE_DB_NAME",
+            "GLUE_CRAWLER_ROLE",
+            "GLUE_CONNECTION_DB_NAME",
+        )
+
+    def _schema(self, storage_format: str = "CSV") -> Schema:
+        return Schema(
+            metadata=SchemaMetadata(
+                domain="domain",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                storage_format=storage_format,
+            ),
+            columns=[
+                Column(
+                    name="year",
+                    partition_index=1,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="name",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                ),
+                Column(
+                    name="region",
+                    partition_index=0,
+                    data_type="object",
+                    allow_null=False,
+                ),
+                Column(
+                    name="price",
+                    partition_index=None,
+                    data_type="Float64",
+                    allow_null=True,
+                ),
+                Column(
+                    name="date",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=True,
+                    format="%d/%m/%Y",
+                ),
+                Column(
+                    name="active",
+                    partition_index=None,
+                    data_type="boolean",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+    def test_create_csv_table_from_schema(self):
+        self.glue_adapter.create_table(self._schema())
+
+        self.glue_boto_client.create_table.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME",
+            TableInput={
+                "Name": "domain_dataset",
+                "TableType": "EXTERNAL_TABLE",
+                "Parameters": {
+                    "classification": "csv",
+                    "skip.header.line.count": "1",
+                },
+                "PartitionKeys": [
+                    {"Name": "region", "Type": "string"},
+                    {"Name": "year", "Type": "string"},
+                ],
+                "StorageDescriptor": {
+                    "Columns": [
+                        {"Name": "name", "Type": "string"},
+                        {"Name": "price", "Type": "double"},
+                        {"Name": "date", "Type": "string"},
+                        {"Name": "active", "Type": "boolean"},
+                    ],
+                    "Location": f"s3://{DATA_BUCKET}/data/domain/dataset/",
+                    "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
+                    "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+                    "SerdeInfo": {
+                        "SerializationLibrary": "org.apache.hadoop.hive.serde2.OpenCSVSerde",
+                        "Parameters": {"separatorChar": ",", "quoteChar": '"'},
+                    },
+                },
+            },
+        )
+
+    def test_create_parquet_table_from_schema(self):
+        self.glue_adapter.create_table(self._schema("PARQUET"))
+
+        table_input = self.glue_boto_client.create_table.call_args.kwargs["TableInput"]
+        assert table_input["Parameters"] == {"classification": "parquet"}
+        assert table_input["StorageDescriptor"]["Columns"] == [
+            {"Name": "name", "Type": "string"},
+            {"Name": "price", "Type": "double"},
+            {"Name": "date", "Type": "date"},
+            {"Name": "active", "Type": "boolean"},
+        ]
+        assert table_input["StorageDescriptor"]["SerdeInfo"] == {
+            "SerializationLibrary": "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+            "Parameters": {"serialization.format": "1"},
+        }
+        assert (
+            table_input["StorageDescriptor"]["InputFormat"]
+            == "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+        )
+
+    def test_replaces_table_when_it_already_exists(self):
+        self.glue_boto_client.create_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "AlreadyExistsException"}},
+            operation_name="CreateTable",
+        )
+
+        self.glue_adapter.create_table(self._schema())
+
+        self.glue_boto_client.update_table.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME",
+            TableInput=self.glue_boto_client.create_table.call_args.kwargs[
+                "TableInput"
+            ],
+        )
+
+    def test_matches_column_order_of_table_created_by_crawler(self):
+        self.glue_boto_client.get_table.return_value = {
+            "Table": {
+                "StorageDescriptor": {
+                    "Columns": [
+                        {"Name": "active", "Type": "boolean"},
+                        {"Name": "date", "Type": "string"},
+                        {"Name": "name", "Type": "string"},
+                        {"Name": "price", "Type": "double"},
+                    ]
+                }
+            }
+        }
+
+        schema = self.glue_adapter.match_table_column_order(self._schema())
+
+        self.glue_boto_client.get_table.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME", Name="domain_dataset"
+        )
+        assert schema.get_column_names() == [
+            "active",
+            "date",
+            "name",
+            "price",
+            "year",
+            "region",
+        ]
+
+    def test_keeps_schema_column_order_when_table_does_not_exist(self):
+        self.glue_boto_client.get_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "EntityNotFoundException"}},
+            operation_name="GetTable",
+        )
+        schema = self._schema()
+
+        assert self.glue_adapter.match_table_column_order(schema) == schema
+
+    def test_keeps_schema_column_order_of_parquet_tables(self):
+        schema = self._schema("PARQUET")
+
+        assert self.glue_adapter.match_table_column_order(schema) == schema
+        self.glue_boto_client.get_table.assert_not_called()
+
+    def test_create_table_fails(self):
+        self.glue_boto_client.create_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "SomethingElse"}},
+            operation_name="CreateTable",
+        )
+
+        with pytest.raises(
+            TableCreateFailsError, match=r"Failed to create table \[domain_dataset\]"
+        ):
+            self.glue_adapter.create_table(self._schema())
+
+        self.glue_boto_client.update_table.assert_not_called()
+
+    def test_replacing_existing_table_fails(self):
+        self.glue_boto_client.create_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "AlreadyExistsException"}},
+            operation_name="CreateTable",
+        )
+        self.glue_boto_client.update_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "SomethingElse"}},
+            operation_name="UpdateTable",
+        )
+
+        with pytest.raises(TableCreateFailsError):
+            self.glue_adapter.create_table(self._schema())
+
+
+class TestGlueAdapterTableDataReplacement:
+    glue_boto_client = None
+
+    def setup_method(self):
+        self.glue_boto_client = Mock()
+        self.glue_adapter = GlueAdapter(
+            self.glue_boto_client,
+            "GLUE_CATALOGUE_DB_NAME",
+            "GLUE_CRAWLER_ROLE",
+            "GLUE_CONNECTION_DB_NAME",
+        )
+        self.glue_boto_client.get_table.return_value = {
+            "Table": {
+                "Name": "domain_dataset",
+                "DatabaseName": "GLUE_CATALOGUE_DB_NAME",
+                "CreateTime": "2022-03-01 11:03:49+00:00",
+                "TableType": "EXTERNAL_TABLE",
+                "PartitionKeys": [{"Name": "year", "Type": "string"}],
+                "StorageDescriptor": {
+                    "Location": f"s3://{DATA_BUCKET}/data/domain/dataset/",
+                    "SerdeInfo": {"SerializationLibrary": "serde"},
+                },
+            }
+        }
+        self.mock_paginator = Mock()
+        self.mock_paginator.paginate.return_value = [
+            {"Partitions": [{"Values": ["2020"]}, {"Values": ["2021"]}]},
+            {"Partitions": [{"Values": ["2022"]}]},
+        ]
+        self.glue_boto_client.get_paginator.return_value = self.mock_paginator
+        self.glue_boto_client.batch_create_partition.return_value = {}
+        self.glue_boto_client.batch_update_partition.return_value = {}
+        self.glue_boto_client.batch_delete_partition.return_value = {}
+
+    def _partition_input(self, year: str):
+        return {
+            "Values": [year],
+            "StorageDescriptor": {
+                "Location": f"s3://{DATA_BUCKET}/data/domain/dataset/generation-1/year={year}/",
+                "SerdeInfo": {"SerializationLibrary": "serde"},
+            },
+        }
+
+    def test_points_table_at_new_generation(self):
+        self.glue_adapter.replace_table_data(
+            "domain", "dataset", "generation-1", ["year=2021", "year=2023"]
+        )
+
+        self.glue_boto_client.update_table.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME",
+            TableInput={
+                "Name": "domain_dataset",
+                "TableType": "EXTERNAL_TABLE",
+                "PartitionKeys": [{"Name": "year", "Type": "string"}],
+                "StorageDescriptor": {
+                    "Location": f"s3://{DATA_BUCKET}/data/domain/dataset/generation-1/",
+                    "SerdeInfo": {"SerializationLibrary": "serde"},
+                },
+            },
+        )
+
+    def test_updates_creates_and_deletes_partitions(self):
+        self.glue_adapter.replace_table_data(
+            "domain", "dataset", "generation-1", ["year=2021", "year=2023"]
+        )
+
+        self.mock_paginator.paginate.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME", TableName="domain_dataset"
+        )
+        self.glue_boto_client.batch_update_partition.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME",
+            TableName="domain_dataset",
+            Entries=[
+                {
+                    "PartitionValueList": ["2021"],
+                    "PartitionInput": self._partition_input("2021"),
+                }
+            ],
+        )
+        self.glue_boto_client.batch_create_partition.assert_called_once_with(
+            DatabaseName="GLUE_CATALOGUE_DB_NAME",
+            TableName="domain_dataset",
+            PartitionInputList=[self._partition_input("2023")],
+        )
+        deleted_partitions = self.glue_boto_client.batch_delete_partition.call_args
+        assert sorted(
+            partition["Values"]
+            for partition in deleted_partitions.kwargs["PartitionsToDelete"]
+        ) == [["2020"], ["2022"]]
+
+    def test_creates_partitions_before_updating_or_deleting_any(self):
+        self.glue_adapter.replace_table_data(
+            "domain", "dataset", "generation-1", ["year=2021", "year=2023"]
+        )
+
+        glue_calls = [
+            name
+            for name, _, _ in self.glue_boto_client.mock_calls
+            if name
+            in (
+                "batch_create_partition",
+                "batch_update_partition",
+                "batch_delete_partition",
+                "update_table",
+            )
+        ]
+        assert glue_calls == [
+            "batch_create_partition",
+            "batch_update_partition",
+            "batch_delete_partition",
+            "update_table",
+        ]
+
+    def test_returns_generation_read_before_the_switch(self):
+        self.glue_boto_client.get_table.return_value["Table"]["StorageDescriptor"][
+            "Location"
+        ] = f"s3://{DATA_BUCKET}/data/domain/dataset/generation-0/"
+
+        previous_generation = self.glue_adapter.replace_table_data(
+            "domain", "dataset", "generation-1", []
+        )
+
+        assert previous_generation == "generation-0"
+
+    def test_returns_no_generation_when_table_read_from_dataset_location(self):
+        previous_generation = self.glue_adapter.replace_table_data(
+            "domain", "dataset", "generation-1", []
+        )
+
+        assert previous_generation is None
+
+    @patch("api.adapter.glue_adapter.GLUE_MAX_PARTITIONS_PER_DELETE_BATCH", 1)
+    def test_deletes_partitions_in_batches(self):
+        self.glue_adapter.replace_table_data("domain", "dataset", "generation-1", [])
+
+        assert self.glue_boto_client.batch_delete_partition.call_count == 3
+
+    def test_does_not_touch_partitions_of_unpartitioned_table(self):
+        self.glue_boto_client.get_table.return_value["Table"]["PartitionKeys"] = []
+
+        self.glue_adapter.replace_table_data("domain", "dataset", "generation-1", [])
+
+        self.glue_boto_client.get_paginator.assert_not_called()
+        self.glue_boto_client.update_table.assert_called_once()
+
+    def test_raises_error_when_partitions_fail_to_be_updated(self):
+        self.glue_boto_client.batch_update_partition.return_value = {
+            "Errors": [{"PartitionValueList": ["2021"]}]
+        }
+
+        with pytest.raises(
+            TableUpdateFailsError,
+            match=r"Failed to update partitions for table \[domain_dataset\]",
+        ):
+            self.glue_adapter.replace_table_data(
+                "domain", "dataset", "generation-1", ["year=2021"]
+            )
+
+        self.glue_boto_client.update_table.assert_not_called()
+
+    def test_raises_error_when_table_location_fails_to_be_updated(self):
+        self.glue_boto_client.get_table.return_value["Table"]["PartitionKeys"] = []
+        self.glue_boto_client.update_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "InternalServiceException"}},
+            operation_name="UpdateTable",
+        )
+
+        with pytest.raises(
+            TableUpdateFailsError,
+            match=r"Failed to update location of table \[domain_dataset\]",
+        ):
+            self.glue_adapter.replace_table_data(
+                "domain", "dataset", "generation-1", []
+            )
+
+    def test_raises_error_when_table_does_not_exist(self):
+        self.glue_boto_client.get_table.side_effect = ClientError(
+            error_response={"Error": {"Code": "EntityNotFoundException"}},
+            operation_name="GetTable",
+        )
+
+        with pytest.raises(TableUpdateFailsError):
+            self.glue_adapter.replace_table_data(
+                "domain", "dataset", "generation-1", []
+            )
@@ -1,6 +1,14 @@
-from unittest.mock import Mock, call
-
+import gzip
+import threading
+import time
+from datetime import date
+from io import BytesIO
+from unittest.mock import Mock, call, ANY, patch
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from botocore.exceptions import ClientError
 
@@ -11,8 +19,17 @@ from api.common.custom_exceptions import (
     UserError,
     AWSServiceError,
 )
+from api.domain.compaction_manifest import CompactedSource, CompactionManifest
 from api.domain.schema import Schema, Column
-from api.domain.schema_metadata import Owner, SchemaMetadata
+from api.domain.schema_metadata import Owner, SchemaMetadata, StorageFormat
+from api.domain.query_job import QueryJob
+from api.domain.upload_job import UploadJob
+from api.domain.upload_record import (
+    UploadClaim,
+    UploadRecord,
+    idempotency_key_index_key,
+)
+from api.domain.upsert_manifest import UpsertManifest
 from test.test_utils import (
     set_encoded_content,
     mock_schema_response,
@@ -74,9 +91,39 @@ class TestS3AdapterUpload:
             object_content="",
         )
 
+    def _partitioned_schema(
+        self, storage_format: str = StorageFormat.CSV.value
+    ) -> Schema:
+        return Schema(
+            metadata=SchemaMetadata(
+                domain="domain",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                storage_format=storage_format,
+            ),
+            columns=[
+                Column(
+                    name="year",
+                    partition_index=0,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="month",
+                    partition_index=1,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                ),
+            ],
+        )
+
     def test_upload_partitioned_data(self):
-        domain = "domain"
-        dataset = "dataset"
         filename = "data.csv"
         partitioned_data = [
             ("year=2020/month=1", pd.DataFrame({"colname2": ["user1"]})),
@@ -84,7 +131,7 @@ class TestS3AdapterUpload:
         ]
 
         self.persistence_adapter.upload_partitioned_data(
-            domain, dataset, filename, partitioned_data
+            self._partitioned_schema(), filename, partitioned_data
         )
 
         calls = [
@@ -100,7 +147,185 @@ class TestS3AdapterUpload:
             ),
         ]
 
-        self.mock_s3_client.put_object.assert_has_calls(calls)
+        self.mock_s3_client.put_object.assert_has_calls(calls, any_order=True)
+
+    def test_upload_partitioned_data_into_generation(self):
+        partitioned_data = [
+            ("year=2020", pd.DataFrame({"colname2": ["user1"]})),
+        ]
+
+        self.persistence_adapter.upload_partitioned_data(
+            self._partitioned_schema(), "data.csv", partitioned_data, "generation-1"
+        )
+
+        self.mock_s3_client.put_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="data/domain/dataset/generation-1/year=2020/data.csv",
+            Body=set_encoded_content("colname2\n" "user1\n"),
+        )
+
+    def test_partitioned_data_paths(self):
+        paths = self.persistence_adapter.partitioned_data_paths(
+            self._partitioned_schema(), "data.csv", ["year=2020/month=1", ""]
+        )
+
+        assert paths == [
+            "data/domain/dataset/year=2020/month=1/data.csv",
+            "data/domain/dataset/data.csv",
+        ]
+
+    def test_upload_partitioned_csv_data_in_schema_column_order(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                domain="domain", dataset="dataset", sensitivity="PUBLIC"
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                ),
+            ],
+        )
+        partitioned_data = [
+            ("", pd.DataFrame({"colname2": ["user1"], "colname1": [1]})),
+        ]
+
+        self.persistence_adapter.upload_partitioned_data(
+            schema, "data.csv", partitioned_data
+        )
+
+        self.mock_s3_client.put_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="data/domain/dataset/data.csv",
+            Body=set_encoded_content("colname1,colname2\n" "1,user1\n"),
+        )
+
+    def test_upload_partitioned_data_concurrently_up_to_the_concurrency_limit(self):
+        persistence_adapter = S3Adapter(
+            s3_client=self.mock_s3_client, s3_bucket="dataset", upload_concurrency=2
+        )
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        def put_object(**kwargs):
+            with lock:
+                in_flight.append(kwargs["Key"])
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(kwargs["Key"])
+
+        self.mock_s3_client.put_object.side_effect = put_object
+        partitioned_data = [
+            (f"year=2020/month={month}", pd.DataFrame({"colname2": [f"user{month}"]}))
+            for month in range(1, 9)
+        ]
+
+        persistence_adapter.upload_partitioned_data(
+            self._partitioned_schema(), "data.csv", partitioned_data
+        )
+
+        assert self.mock_s3_client.put_object.call_count == 8
+        assert max(max_in_flight) == 2
+
+    def test_upload_partitioned_data_raises_error_when_a_partition_fails(self):
+        self.mock_s3_client.put_object.side_effect = ClientError(
+            error_response={"Error": {"Code": "Failed"}}, operation_name="PutObject"
+        )
+        partitioned_data = [
+            ("year=2020/month=1", pd.DataFrame({"colname2": ["user1"]})),
+            ("year=2020/month=2", pd.DataFrame({"colname2": ["user2"]})),
+        ]
+
+        with pytest.raises(ClientError):
+            self.persistence_adapter.upload_partitioned_data(
+                self._partitioned_schema(), "data.csv", partitioned_data
+            )
+
+    def test_upload_partitioned_data_as_parquet(self):
+        schema = Schema(
+            metadata=SchemaMetadata(
+                domain="domain",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                storage_format=StorageFormat.PARQUET.value,
+            ),
+            columns=[
+                Column(
+                    name="region",
+                    partition_index=0,
+                    data_type="object",
+                    allow_null=False,
+                ),
+                Column(
+                    name="count",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=True,
+                ),
+                Column(
+                    name="price",
+                    partition_index=None,
+                    data_type="Float64",
+                    allow_null=True,
+                ),
+                Column(
+                    name="active",
+                    partition_index=None,
+                    data_type="boolean",
+                    allow_null=True,
+                ),
+                Column(
+                    name="day",
+                    partition_index=None,
+                    data_type="date",
+                    format="%Y-%m-%d",
+                    allow_null=True,
+                ),
+                Column(
+                    name="name",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                ),
+            ],
+        )
+        data = pd.DataFrame(
+            {
+                "count": pd.array([1, None], dtype="Int64"),
+                "price": pd.array([1.5, None], dtype="Float64"),
+                "active": pd.array([True, None], dtype="boolean"),
+                "day": ["2022-01-21", None],
+                "name": [None, None],
+            }
+        )
+
+        self.persistence_adapter.upload_partitioned_data(
+            schema, "data.parquet", [("region=north", data)]
+        )
+
+        _, kwargs = self.mock_s3_client.put_object.call_args
+        assert kwargs["Key"] == "data/domain/dataset/region=north/data.parquet"
+        table = pq.read_table(BytesIO(kwargs["Body"]))
+        assert table.schema.names == ["count", "price", "active", "day", "name"]
+        assert [str(field.type) for field in table.schema] == [
+            "int64",
+            "double",
+            "bool",
+            "date32[day]",
+            "string",
+        ]
+        assert table.column("count").to_pylist() == [1, None]
+        assert table.column("day").to_pylist() == [date(2022, 1, 21), None]
 
     def test_schema_upload(self):
         valid_schema = Schema(
@@ -130,27 +355,295 @@ class TestS3AdapterUpload:
         self.mock_s3_client.put_object.assert_called_with(
             Bucket="dataset",
             Key="data/schemas/PUBLIC/test_domain-test_dataset.json",
-            Body=b'{\n "metadata": {\n  "domain": "test_domain",\n  "dataset": "test_dataset",\n  "sensitivity": "PUBLIC",\n  "key_value_tags": {},\n  "key_only_tags": [],\n  "owners": [\n   {\n    "name": "owner",\n    "email": "owner@email.com"\n   }\n  ],\n  "update_behaviour": "APPEND"\n },\n "columns": [\n  {\n   "name": "colname1",\n   "partition_index": 0,\n   "data_type": "Int64",\n   "allow_null": true,\n   "format": null\n  }\n ]\n}',
+            Body=b'{\n "metadata": {\n  "domain": "test_domain",\n  "dataset": "test_dataset",\n  "sensitivity": "PUBLIC",\n  "key_value_tags": {},\n  "key_only_tags": [],\n  "owners": [\n   {\n    "name": "owner",\n    "email": "owner@email.com"\n   }\n  ],\n  "update_behaviour": "APPEND",\n  "storage_format": "CSV"\n },\n "columns": [\n  {\n   "name": "colname1",\n   "partition_index": 0,\n   "data_type": "Int64",\n   "allow_null": true,\n   "format": null,\n   "primary_key": false\n  }\n ]\n}',
         )
 
         assert result == "test_domain-test_dataset.json"
 
+    def test_save_upload_job(self):
+        job = UploadJob(
+            job_id="1234", domain="domain", dataset="dataset", filename="file.csv"
+        )
+
+        self.persistence_adapter.save_upload_job(job)
+
+        self.mock_s3_client.put_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="upload_jobs/domain/dataset/1234.json",
+            Body=job.json().encode(),
+        )
+
+    def test_save_query_job(self):
+        job = QueryJob(query_id="1234", domain="domain", dataset="dataset")
+
+        self.persistence_adapter.save_query_job(job)
+
+        self.mock_s3_client.put_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="query_jobs/domain/dataset/1234.json",
+            Body=job.json().encode(),
+        )
+
+    def test_save_upload_record_under_each_index_key(self):
+        record = UploadRecord(
+            domain="domain",
+            dataset="dataset",
+            content_hash="abc123",
+            idempotency_key="request-1",
+            raw_filename="2022-01-01T12:00:00-file.csv",
+            uploaded_filename="2022-01-01T12:00:00-file.csv",
+        )
+
+        self.persistence_adapter.save_upload_record(record)
+
+        self.mock_s3_client.put_object.assert_has_calls(
+            [
+                call(
+                    Bucket="dataset",
+                    Key="upload_index/domain/dataset/sha256-abc123.json",
+                    Body=record.json().encode(),
+                ),
+                call(
+                    Bucket="dataset",
+                    Key=f"upload_index/domain/dataset/{idempotency_key_index_key('request-1')}.json",
+                    Body=record.json().encode(),
+                ),
+            ]
+        )
+
     def test_raw_data_upload(self):
-        file_contents = b"value,data\n1,2\n1,12"
+        persistence_adapter = S3Adapter(
+            s3_client=self.mock_s3_client,
+            s3_bucket="dataset",
+            raw_data_compression="none",
+        )
+        file = BytesIO(b"value,data\n1,2\n1,12")
 
-        self.persistence_adapter.upload_raw_data(
+        persistence_adapter.upload_raw_data(
             domain="some",
             dataset="values",
             filename="filename.csv",
-            file_contents=file_contents,
+            file=file,
         )
 
-        self.mock_s3_client.put_object.assert_called_with(
+        self.mock_s3_client.upload_fileobj.assert_called_with(
+            Fileobj=file,
             Bucket="dataset",
             Key="raw_data/some/values/filename.csv",
-            Body=file_contents,
+            Config=ANY,
+        )
+
+    @pytest.mark.parametrize("codec", ["gzip", "zstd"])
+    def test_raw_data_upload_compresses_file(self, codec):
+        persistence_adapter = S3Adapter(
+            s3_client=self.mock_s3_client,
+            s3_bucket="dataset",
+            raw_data_compression=codec,
+        )
+        content = b"value,data\n" + b"1,2\n" * 100_000
+        uploaded_content = []
+        self.mock_s3_client.upload_fileobj.side_effect = (
+            lambda Fileobj, **kwargs: uploaded_content.append(Fileobj.read())
+        )
+
+        persistence_adapter.upload_raw_data(
+            "some", "values", "filename.csv", BytesIO(content)
+        )
+
+        self.mock_s3_client.upload_fileobj.assert_called_once_with(
+            Fileobj=ANY,
+            Bucket="dataset",
+            Key="raw_data/some/values/filename.csv",
+            ExtraArgs={"ContentEncoding": codec},
+            Config=ANY,
+        )
+        assert len(uploaded_content[0]) < len(content)
+        assert (
+            pa.Codec(codec).decompress(uploaded_content[0], len(content), asbytes=True)
+            == content
+        )
+
+    @pytest.mark.parametrize(
+        "filename", ["filename.csv.gz", "filename.csv.zst", "filename.parquet"]
+    )
+    def test_raw_data_upload_stores_compressed_files_as_they_are(self, filename):
+        file = BytesIO(b"compressed")
+
+        self.persistence_adapter.upload_raw_data("some", "values", filename, file)
+
+        self.mock_s3_client.upload_fileobj.assert_called_once_with(
+            Fileobj=file,
+            Bucket="dataset",
+            Key=f"raw_data/some/values/{filename}",
+            Config=ANY,
         )
 
+    def test_raw_data_upload_deletes_raw_file_when_compression_fails(self):
+        file = Mock()
+        file.read.side_effect = OSError("Read failed")
+        self.mock_s3_client.upload_fileobj.side_effect = (
+            lambda Fileobj, **kwargs: Fileobj.read()
+        )
+
+        with pytest.raises(OSError, match="Read failed"):
+            self.persistence_adapter.upload_raw_data(
+                "some", "values", "filename.csv", file
+            )
+
+        self.mock_s3_client.delete_object.assert_called_once_with(
+            Bucket="dataset", Key="raw_data/some/values/filename.csv"
+        )
+
+    def test_raw_data_upload_uses_fixed_size_multipart_parts(self):
+        persistence_adapter = S3Adapter(
+            s3_client=self.mock_s3_client,
+            s3_bucket="dataset",
+            multipart_part_size=5 * 1024 * 1024,
+            multipart_concurrency=3,
+            raw_data_compression="none",
+        )
+
+        persistence_adapter.upload_raw_data("some", "values", "filename.csv", BytesIO())
+
+        transfer_config = self.mock_s3_client.upload_fileobj.call_args.kwargs["Config"]
+        assert transfer_config.multipart_threshold == 5 * 1024 * 1024
+        assert transfer_config.multipart_chunksize == 5 * 1024 * 1024
+        assert transfer_config.max_concurrency == 3
+
+    def test_generate_raw_data_upload_url(self):
+        self.mock_s3_client.generate_presigned_url.return_value = "https://url"
+
+        upload_url = self.persistence_adapter.generate_raw_data_upload_url(
+            "some", "values", "2022-01-01T00:00:00-filename.csv", 600
+        )
+
+        assert upload_url == "https://url"
+        self.mock_s3_client.generate_presigned_url.assert_called_once_with(
+            "put_object",
+            Params={
+                "Bucket": "dataset",
+                "Key": "raw_data/some/values/2022-01-01T00:00:00-filename.csv",
+            },
+            ExpiresIn=600,
+        )
+
+    def test_download_raw_data(self):
+        self.mock_s3_client.head_object.return_value = {}
+        file = BytesIO()
+
+        self.persistence_adapter.download_raw_data(
+            "some", "values", "2022-01-01T00:00:00-filename.csv", file
+        )
+
+        self.mock_s3_client.download_fileobj.assert_called_once_with(
+            Bucket="dataset",
+            Key="raw_data/some/values/2022-01-01T00:00:00-filename.csv",
+            Fileobj=file,
+            Config=ANY,
+        )
+
+    def test_download_compressed_raw_data(self):
+        content = b"value,data\n1,2\n1,12"
+        self.mock_s3_client.head_object.return_value = {"ContentEncoding": "gzip"}
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(gzip.compress(content))
+        }
+        file = BytesIO()
+
+        self.persistence_adapter.download_raw_data(
+            "some", "values", "2022-01-01T00:00:00-filename.csv", file
+        )
+
+        assert file.getvalue() == content
+        self.mock_s3_client.get_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="raw_data/some/values/2022-01-01T00:00:00-filename.csv",
+        )
+        self.mock_s3_client.download_fileobj.assert_not_called()
+
+    def test_delete_raw_data(self):
+        self.persistence_adapter.delete_raw_data(
+            "some", "values", "2022-01-01T00:00:00-filename.csv"
+        )
+
+        self.mock_s3_client.delete_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="raw_data/some/values/2022-01-01T00:00:00-filename.csv",
+        )
+
+    def test_streams_large_partitions_as_multipart_upload(self):
+        persistence_adapter = S3Adapter(
+            s3_client=self.mock_s3_client,
+            s3_bucket="dataset",
+            multipart_part_size=16,
+        )
+        self.mock_s3_client.create_multipart_upload.return_value = {
+            "UploadId": "upload-id"
+        }
+        self.mock_s3_client.upload_part.side_effect = lambda **kwargs: {
+            "ETag": f"etag-{kwargs['PartNumber']}"
+        }
+        schema = self._partitioned_schema()
+        data = pd.DataFrame({"colname2": ["some-long-value"] * 3})
+
+        persistence_adapter.upload_partitioned_data(
+            schema, "filename.csv", [("colname1=1", data)]
+        )
+
+        uploaded_parts = sorted(
+            self.mock_s3_client.upload_part.call_args_list,
+            key=lambda part: part.kwargs["PartNumber"],
+        )
+        assert b"".join(part.kwargs["Body"] for part in uploaded_parts) == (
+            b"colname2\nsome-long-value\nsome-long-value\nsome-long-value\n"
+        )
+        assert all(len(part.kwargs["Body"]) == 16 for part in uploaded_parts[:-1])
+        self.mock_s3_client.put_object.assert_not_called()
+        self.mock_s3_client.complete_multipart_upload.assert_called_once_with(
+            Bucket="dataset",
+            Key="data/domain/dataset/colname1=1/filename.csv",
+            UploadId="upload-id",
+            MultipartUpload={
+                "Parts": [
+                    {"ETag": f"etag-{number}", "PartNumber": number}
+                    for number in range(1, len(uploaded_parts) + 1)
+                ]
+            },
+        )
+
+    def test_aborts_multipart_upload_when_partition_serialisation_fails(self):
+        persistence_adapter = S3Adapter(
+            s3_client=self.mock_s3_client,
+            s3_bucket="dataset",
+            multipart_part_size=16,
+        )
+        self.mock_s3_client.create_multipart_upload.return_value = {
+            "UploadId": "upload-id"
+        }
+        self.mock_s3_client.upload_part.return_value = {"ETag": "etag"}
+
+        with pytest.raises(ValueError, match="serialisation failed"):
+            with persistence_adapter.stream_data("some/path/filename.csv") as writer:
+                writer.write(b"more than sixteen bytes of data")
+                raise ValueError("serialisation failed")
+
+        self.mock_s3_client.abort_multipart_upload.assert_called_once_with(
+            Bucket="dataset", Key="some/path/filename.csv", UploadId="upload-id"
+        )
+        self.mock_s3_client.complete_multipart_upload.assert_not_called()
+
+    def test_stream_data_throws_exception_when_file_name_is_empty(self):
+        with pytest.raises(UserError, match="File path is invalid"):
+            self.persistence_adapter.stream_data("")
+
+    def test_store_file_throws_exception_when_file_name_is_empty(self):
+        with pytest.raises(UserError, match="File path is invalid"):
+            self.persistence_adapter.store_file(
+                object_full_path="", file=BytesIO(b"something")
+            )
+
+        self.mock_s3_client.upload_fileobj.assert_not_called()
+
 
 class TestS3AdapterDataRetrieval:
     mock_s3_client = None
@@ -227,6 +720,456 @@ class TestS3AdapterDataRetrieval:
             Bucket="dataset", Key="raw_data/domain/dataset/bad_file"
         )
 
+    def test_find_upload_job(self):
+        job = UploadJob(
+            job_id="1234", domain="domain", dataset="dataset", filename="file.csv"
+        )
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(job.json().encode())
+        }
+
+        result = self.persistence_adapter.find_upload_job("domain", "dataset", "1234")
+
+        assert result == job
+        self.mock_s3_client.get_object.assert_called_once_with(
+            Bucket="dataset", Key="upload_jobs/domain/dataset/1234.json"
+        )
+
+    def test_find_upload_job_returns_none_when_job_does_not_exist(self):
+        self.mock_s3_client.get_object.side_effect = ClientError(
+            error_response={"Error": {"Code": "NoSuchKey"}},
+            operation_name="message",
+        )
+
+        assert (
+            self.persistence_adapter.find_upload_job("domain", "dataset", "1234")
+            is None
+        )
+
+    def test_find_query_job(self):
+        job = QueryJob(query_id="1234", domain="domain", dataset="dataset")
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(job.json().encode())
+        }
+
+        result = self.persistence_adapter.find_query_job("domain", "dataset", "1234")
+
+        assert result == job
+        self.mock_s3_client.get_object.assert_called_once_with(
+            Bucket="dataset", Key="query_jobs/domain/dataset/1234.json"
+        )
+
+    def test_find_query_job_returns_none_when_job_does_not_exist(self):
+        self.mock_s3_client.get_object.side_effect = ClientError(
+            error_response={"Error": {"Code": "NoSuchKey"}},
+            operation_name="message",
+        )
+
+        assert (
+            self.persistence_adapter.find_query_job("domain", "dataset", "1234") is None
+        )
+
+    def test_create_upload_claim_only_when_there_is_none(self):
+        claim = UploadClaim(domain="domain", dataset="dataset", index_key="sha256-abc")
+
+        assert self.persistence_adapter.create_upload_claim(claim) is True
+
+        self.mock_s3_client.put_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="upload_index/domain/dataset/sha256-abc.claim",
+            Body=claim.json().encode(),
+            IfNoneMatch="*",
+        )
+
+    @pytest.mark.parametrize(
+        "error_code", ["PreconditionFailed", "ConditionalRequestConflict"]
+    )
+    def test_create_upload_claim_fails_when_already_claimed(self, error_code):
+        self.mock_s3_client.put_object.side_effect = ClientError(
+            error_response={"Error": {"Code": error_code}},
+            operation_name="PutObject",
+        )
+        claim = UploadClaim(domain="domain", dataset="dataset", index_key="sha256-abc")
+
+        assert self.persistence_adapter.create_upload_claim(claim) is False
+
+    def test_find_upload_claim(self):
+        claim = UploadClaim(domain="domain", dataset="dataset", index_key="sha256-abc")
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(claim.json().encode())
+        }
+
+        result = self.persistence_adapter.find_upload_claim(
+            "domain", "dataset", "sha256-abc"
+        )
+
+        assert result == claim
+        self.mock_s3_client.get_object.assert_called_once_with(
+            Bucket="dataset", Key="upload_index/domain/dataset/sha256-abc.claim"
+        )
+
+    def test_find_upload_claim_returns_none_when_not_claimed(self):
+        self.mock_s3_client.get_object.side_effect = ClientError(
+            error_response={"Error": {"Code": "NoSuchKey"}},
+            operation_name="GetObject",
+        )
+
+        assert (
+            self.persistence_adapter.find_upload_claim(
+                "domain", "dataset", "sha256-abc"
+            )
+            is None
+        )
+
+    def test_delete_upload_claim(self):
+        claim = UploadClaim(domain="domain", dataset="dataset", index_key="sha256-abc")
+
+        self.persistence_adapter.delete_upload_claim(claim)
+
+        self.mock_s3_client.delete_object.assert_called_once_with(
+            Bucket="dataset", Key="upload_index/domain/dataset/sha256-abc.claim"
+        )
+
+    def test_find_upload_record(self):
+        record = UploadRecord(
+            domain="domain",
+            dataset="dataset",
+            content_hash="abc123",
+            raw_filename="2022-01-01T12:00:00-file.csv",
+            uploaded_filename="2022-01-01T12:00:00-file.csv",
+        )
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(record.json().encode())
+        }
+
+        result = self.persistence_adapter.find_upload_record(
+            "domain", "dataset", "sha256-abc123"
+        )
+
+        assert result == record
+        self.mock_s3_client.get_object.assert_called_once_with(
+            Bucket="dataset", Key="upload_index/domain/dataset/sha256-abc123.json"
+        )
+
+    def test_find_upload_record_returns_none_when_record_does_not_exist(self):
+        self.mock_s3_client.get_object.side_effect = ClientError(
+            error_response={"Error": {"Code": "NoSuchKey"}},
+            operation_name="message",
+        )
+
+        assert (
+            self.persistence_adapter.find_upload_record(
+                "domain", "dataset", "sha256-abc123"
+            )
+            is None
+        )
+
+
+class TestS3PartitionedDataRetrieval:
+    mock_s3_client = None
+    persistence_adapter = None
+
+    def setup_method(self):
+        self.mock_s3_client = Mock()
+        self.persistence_adapter = S3Adapter(
+            s3_client=self.mock_s3_client, s3_bucket="dataset"
+        )
+        self.mock_paginator = Mock()
+        self.mock_s3_client.get_paginator.return_value = self.mock_paginator
+
+    def _schema(self, storage_format: str = StorageFormat.CSV.value) -> Schema:
+        return Schema(
+            metadata=SchemaMetadata(
+                domain="domain",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                storage_format=storage_format,
+            ),
+            columns=[
+                Column(
+                    name="year",
+                    partition_index=0,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=False,
+                    primary_key=True,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+    def test_read_partitioned_csv_data_as_stored_text(self):
+        self.mock_paginator.paginate.return_value = [
+            {
+                "Contents": [
+                    {"Key": "data/domain/dataset/year=2020/data.csv"},
+                    {"Key": "data/domain/dataset/year=2020/1-data.csv"},
+                ]
+            }
+        ]
+        self.mock_s3_client.get_object.side_effect = [
+            {"Body": BytesIO(b"colname1,colname2\n1,2020-01-01\n2,\n")},
+            {"Body": BytesIO(b"colname1,colname2\n3,NA\n")},
+        ]
+
+        [(partition_path, data, keys)] = self.persistence_adapter.read_partitioned_data(
+            self._schema(), ["year=2020"]
+        )
+
+        assert partition_path == "year=2020"
+        assert keys == [
+            "data/domain/dataset/year=2020/data.csv",
+            "data/domain/dataset/year=2020/1-data.csv",
+        ]
+        pd.testing.assert_frame_equal(
+            data,
+            pd.DataFrame(
+                {
+                    "colname1": ["1", "2", "3"],
+                    "colname2": ["2020-01-01", np.nan, "NA"],
+                }
+            ),
+        )
+        self.mock_paginator.paginate.assert_called_once_with(
+            Bucket="dataset", Prefix="data/domain/dataset/year=2020/"
+        )
+
+    def test_read_partitioned_parquet_data_with_dates_as_text(self):
+        buffer = BytesIO()
+        pq.write_table(
+            pa.table(
+                {
+                    "colname1": pa.array([1, 2], pa.int64()),
+                    "colname2": pa.array([date(2020, 1, 1), None], pa.date32()),
+                }
+            ),
+            buffer,
+        )
+        self.mock_paginator.paginate.return_value = [
+            {"Contents": [{"Key": "data/domain/dataset/year=2020/data.parquet"}]}
+        ]
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(buffer.getvalue())
+        }
+
+        [(_, data, _)] = self.persistence_adapter.read_partitioned_data(
+            self._schema(StorageFormat.PARQUET.value), ["year=2020"]
+        )
+
+        pd.testing.assert_frame_equal(
+            data,
+            pd.DataFrame(
+                {
+                    "colname1": pd.array([1, 2], dtype=pd.Int64Dtype()),
+                    "colname2": ["2020-01-01", None],
+                }
+            ),
+        )
+
+    def test_read_partition_without_files(self):
+        self.mock_paginator.paginate.return_value = [{}]
+
+        [(_, data, keys)] = self.persistence_adapter.read_partitioned_data(
+            self._schema(), ["year=2020"]
+        )
+
+        assert data.empty
+        assert keys == []
+
+    def test_find_key_index(self):
+        buffer = BytesIO()
+        pq.write_table(
+            pa.table({"key": ["1"], "partition": ["year=2020"]}),
+            buffer,
+        )
+        self.mock_s3_client.get_object.side_effect = [
+            {"Body": BytesIO(buffer.getvalue())},
+            ClientError(
+                error_response={"Error": {"Code": "NoSuchKey"}},
+                operation_name="message",
+            ),
+        ]
+
+        key_index = self.persistence_adapter.find_key_index(
+            "domain", "dataset", [3, 12]
+        )
+
+        assert key_index.to_dict("records") == [{"key": "1", "partition": "year=2020"}]
+        self.mock_s3_client.get_object.assert_has_calls(
+            [
+                call(Bucket="dataset", Key="key_index/domain/dataset/3.parquet"),
+                call(Bucket="dataset", Key="key_index/domain/dataset/12.parquet"),
+            ],
+            any_order=True,
+        )
+
+    def test_find_key_index_raises_unexpected_errors(self):
+        self.mock_s3_client.get_object.side_effect = ClientError(
+            error_response={"Error": {"Code": "AccessDenied"}},
+            operation_name="message",
+        )
+
+        with pytest.raises(ClientError):
+            self.persistence_adapter.find_key_index("domain", "dataset", [3])
+
+    def test_save_key_index(self):
+        key_index = pd.DataFrame({"key": ["1", "2"], "partition": ["a=1", "a=2"]})
+
+        self.persistence_adapter.save_key_index("domain", "dataset", [(3, key_index)])
+
+        put_object_args = self.mock_s3_client.put_object.call_args.kwargs
+        assert put_object_args["Key"] == "key_index/domain/dataset/3.parquet"
+        saved_index = pq.read_table(BytesIO(put_object_args["Body"])).to_pandas()
+        pd.testing.assert_frame_equal(saved_index, key_index)
+
+    def test_read_data_files(self):
+        self.mock_s3_client.get_object.side_effect = lambda Bucket, Key: {
+            "Body": BytesIO(f"colname1\n{Key[-5]}\n".encode())
+        }
+
+        frames = self.persistence_adapter.read_data_files(
+            self._schema(),
+            ["data/domain/dataset/year=2020/1.csv", "data/domain/dataset/2.csv"],
+        )
+
+        assert [frame["colname1"].tolist() for frame in frames] == [["1"], ["2"]]
+
+    def test_list_dataset_files(self):
+        self.mock_paginator.paginate.return_value = [
+            {"Contents": [{"Key": "data/domain/dataset/year=2020/1.csv", "Size": 10}]}
+        ]
+
+        files = self.persistence_adapter.list_dataset_files("domain", "dataset")
+
+        assert files == [{"Key": "data/domain/dataset/year=2020/1.csv", "Size": 10}]
+        self.mock_paginator.paginate.assert_called_once_with(
+            Bucket="dataset", Prefix="data/domain/dataset/"
+        )
+
+    def test_save_compaction_manifest(self):
+        manifest = CompactionManifest(
+            domain="domain",
+            dataset="dataset",
+            partition_path="year=2020",
+            filename="compacted-1234.csv",
+            sources=[CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=2)],
+        )
+
+        self.persistence_adapter.save_compaction_manifest(manifest)
+
+        self.mock_s3_client.put_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="compaction_manifests/domain/dataset/year=2020/compacted-1234.csv.json",
+            Body=manifest.json().encode(),
+        )
+
+    def test_list_compaction_manifests(self):
+        manifest = CompactionManifest(
+            domain="domain",
+            dataset="dataset",
+            partition_path="",
+            filename="compacted-1234.csv",
+            sources=[CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=2)],
+        )
+        self.mock_paginator.paginate.return_value = [
+            {"Contents": [{"Key": manifest.manifest_path()}]}
+        ]
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(manifest.json().encode())
+        }
+
+        manifests = self.persistence_adapter.list_compaction_manifests(
+            "domain", "dataset"
+        )
+
+        assert manifests == [manifest]
+        self.mock_paginator.paginate.assert_called_once_with(
+            Bucket="dataset", Prefix="compaction_manifests/domain/dataset/"
+        )
+
+    def test_delete_compaction_manifests(self):
+        manifest = CompactionManifest(
+            domain="domain",
+            dataset="dataset",
+            partition_path="",
+            filename="compacted-1234.csv",
+            sources=[],
+        )
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_compaction_manifests(
+            "domain", "dataset", [manifest]
+        )
+
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="dataset",
+            Delete={
+                "Objects": [
+                    {
+                        "Key": "compaction_manifests/domain/dataset/compacted-1234.csv.json"
+                    }
+                ]
+            },
+        )
+
+    def _upsert_manifest(self) -> UpsertManifest:
+        return UpsertManifest(
+            domain="domain",
+            dataset="dataset",
+            filename="data.csv",
+            written_files=["data/domain/dataset/year=2020/data.csv"],
+            superseded_files=["data/domain/dataset/year=2020/old.csv"],
+        )
+
+    def test_save_upsert_manifest(self):
+        manifest = self._upsert_manifest()
+
+        self.persistence_adapter.save_upsert_manifest(manifest)
+
+        self.mock_s3_client.put_object.assert_called_once_with(
+            Bucket="dataset",
+            Key="upsert_manifests/domain/dataset/data.csv.json",
+            Body=manifest.json().encode(),
+        )
+
+    def test_list_upsert_manifests(self):
+        manifest = self._upsert_manifest()
+        self.mock_paginator.paginate.return_value = [
+            {"Contents": [{"Key": manifest.manifest_path()}]}
+        ]
+        self.mock_s3_client.get_object.return_value = {
+            "Body": BytesIO(manifest.json().encode())
+        }
+
+        manifests = self.persistence_adapter.list_upsert_manifests("domain", "dataset")
+
+        assert manifests == [manifest]
+        self.mock_paginator.paginate.assert_called_once_with(
+            Bucket="dataset", Prefix="upsert_manifests/domain/dataset/"
+        )
+
+    def test_delete_upsert_manifest(self):
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_upsert_manifest(self._upsert_manifest())
+
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="dataset",
+            Delete={
+                "Objects": [{"Key": "upsert_manifests/domain/dataset/data.csv.json"}]
+            },
+        )
+
 
 class TestS3Deletion:
     mock_s3_client = None
@@ -342,6 +1285,66 @@ class TestS3Deletion:
             },
         )
 
+    def test_deletion_of_raw_files_stored_as_parquet(self):
+        self.mock_s3_client.list_objects.return_value = {
+            "Contents": [
+                {
+                    "Key": "data/domain/dataset/2022/03/2022-03-10T12:00:00-test_file.parquet"
+                },
+                {
+                    "Key": "data/domain/dataset/2022/03/2020-05-01T12:00:00-file1.parquet"
+                },
+            ],
+        }
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_dataset_files(
+            "domain", "dataset", "2022-03-10T12:00:00-test_file.csv"
+        )
+
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="data-bucket",
+            Delete={
+                "Objects": [
+                    {
+                        "Key": "data/domain/dataset/2022/03/2022-03-10T12:00:00-test_file.parquet",
+                    },
+                    {
+                        "Key": "raw_data/domain/dataset/2022-03-10T12:00:00-test_file.csv",
+                    },
+                ],
+            },
+        )
+
+    def test_deletion_of_raw_files_uploaded_as_parquet_and_stored_as_csv(self):
+        self.mock_s3_client.list_objects.return_value = {
+            "Contents": [
+                {
+                    "Key": "data/domain/dataset/2022/03/2022-03-10T12:00:00-test_file.csv"
+                },
+                {"Key": "data/domain/dataset/2022/03/2020-05-01T12:00:00-file1.csv"},
+            ],
+        }
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_dataset_files(
+            "domain", "dataset", "2022-03-10T12:00:00-test_file.parquet"
+        )
+
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="data-bucket",
+            Delete={
+                "Objects": [
+                    {
+                        "Key": "data/domain/dataset/2022/03/2022-03-10T12:00:00-test_file.csv",
+                    },
+                    {
+                        "Key": "raw_data/domain/dataset/2022-03-10T12:00:00-test_file.parquet",
+                    },
+                ],
+            },
+        )
+
     def test_deletion_of_raw_files_when_error_is_thrown(self):
         self.mock_s3_client.list_objects.return_value = {}
 
@@ -372,6 +1375,158 @@ class TestS3Deletion:
             Bucket="data-bucket", Prefix="data/domain/dataset"
         )
 
+    def test_deletion_of_superseded_data(self):
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {
+                "Contents": [
+                    {"Key": "data/domain/dataset/year=2020/domain.csv"},
+                    {"Key": "data/domain/dataset/generation-0/year=2020/0-domain.csv"},
+                    {"Key": "data/domain/dataset/generation-1/year=2020/0-domain.csv"},
+                ]
+            },
+            {
+                "Contents": [
+                    {"Key": "data/domain/dataset/generation-2/year=2021/0-domain.csv"},
+                    {"Key": "data/domain/dataset/generation-2/year=2021/1-domain.csv"},
+                ]
+            },
+        ]
+        self.mock_s3_client.get_paginator.return_value = mock_paginator
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_superseded_data(
+            "domain", "dataset", "generation-2", "generation-1"
+        )
+
+        self.mock_s3_client.get_paginator.assert_called_once_with("list_objects_v2")
+        mock_paginator.paginate.assert_called_once_with(
+            Bucket="data-bucket", Prefix="data/domain/dataset/"
+        )
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="data-bucket",
+            Delete={
+                "Objects": [
+                    {"Key": "data/domain/dataset/year=2020/domain.csv"},
+                    {"Key": "data/domain/dataset/generation-0/year=2020/0-domain.csv"},
+                ],
+            },
+        )
+
+    def test_deletion_of_superseded_data_keeps_data_stored_before_generations(self):
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {
+                "Contents": [
+                    {"Key": "data/domain/dataset/year=2020/domain.csv"},
+                    {"Key": "data/domain/dataset/generation-1/year=2020/0-domain.csv"},
+                    {"Key": "data/domain/dataset/generation-2/year=2021/0-domain.csv"},
+                ]
+            },
+        ]
+        self.mock_s3_client.get_paginator.return_value = mock_paginator
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_superseded_data(
+            "domain", "dataset", "generation-2", None
+        )
+
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="data-bucket",
+            Delete={
+                "Objects": [
+                    {"Key": "data/domain/dataset/generation-1/year=2020/0-domain.csv"},
+                ],
+            },
+        )
+
+    @patch("api.adapter.s3_adapter.S3_MAX_KEYS_PER_DELETE_BATCH", 2)
+    def test_deletion_of_superseded_data_in_batches(self):
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {
+                "Contents": [
+                    {"Key": f"data/domain/dataset/year={year}/domain.csv"}
+                    for year in range(2015, 2020)
+                ]
+            },
+        ]
+        self.mock_s3_client.get_paginator.return_value = mock_paginator
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_superseded_data(
+            "domain", "dataset", "generation-2", "generation-1"
+        )
+
+        deleted_batches = [
+            delete_call.kwargs["Delete"]["Objects"]
+            for delete_call in self.mock_s3_client.delete_objects.call_args_list
+        ]
+        assert sorted(len(batch) for batch in deleted_batches) == [1, 2, 2]
+        assert sorted(key["Key"] for batch in deleted_batches for key in batch) == [
+            f"data/domain/dataset/year={year}/domain.csv" for year in range(2015, 2020)
+        ]
+
+    def test_deletion_of_superseded_data_when_there_is_none(self):
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {"Contents": [{"Key": "data/domain/dataset/generation-2/domain.csv"}]},
+        ]
+        self.mock_s3_client.get_paginator.return_value = mock_paginator
+
+        self.persistence_adapter.delete_superseded_data(
+            "domain", "dataset", "generation-2", "generation-1"
+        )
+
+        self.mock_s3_client.delete_objects.assert_not_called()
+
+    def test_deletion_of_superseded_data_raises_error_when_deletion_fails(self):
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {"Contents": [{"Key": "data/domain/dataset/year=2020/domain.csv"}]},
+        ]
+        self.mock_s3_client.get_paginator.return_value = mock_paginator
+        self.mock_s3_client.delete_objects.return_value = {
+            "Errors": [{"Key": "data/domain/dataset/year=2020/domain.csv"}]
+        }
+
+        with pytest.raises(AWSServiceError):
+            self.persistence_adapter.delete_superseded_data(
+                "domain", "dataset", "generation-2", "generation-1"
+            )
+
+    def test_deletion_of_partition_files(self):
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_partition_files(
+            "domain", "dataset", ["data/domain/dataset/year=2020/data.csv"]
+        )
+
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="data-bucket",
+            Delete={"Objects": [{"Key": "data/domain/dataset/year=2020/data.csv"}]},
+        )
+
+    def test_deletion_of_staged_data(self):
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {"Contents": [{"Key": "data/domain/dataset/generation-2/domain.csv"}]},
+        ]
+        self.mock_s3_client.get_paginator.return_value = mock_paginator
+        self.mock_s3_client.delete_objects.return_value = {}
+
+        self.persistence_adapter.delete_staged_data("domain", "dataset", "generation-2")
+
+        mock_paginator.paginate.assert_called_once_with(
+            Bucket="data-bucket", Prefix="data/domain/dataset/generation-2/"
+        )
+        self.mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="data-bucket",
+            Delete={
+                "Objects": [{"Key": "data/domain/dataset/generation-2/domain.csv"}],
+            },
+        )
+
 
 class TestDatasetMetadataRetrieval:
     mock_s3_client = None
@@ -453,6 +1608,12 @@ class TestS3FileList:
                 {
                     "Key": "raw_data/my_domain/my_dataset/2020-11-15T16:00:00-file3.csv",
                 },
+                {
+                    "Key": "raw_data/my_domain/my_dataset/2020-12-01T09:00:00-file4.parquet",
+                },
+                {
+                    "Key": "raw_data/my_domain/my_dataset/2020-12-02T09:00:00-file5.csv.gz",
+                },
             ],
             "Name": "my-bucket",
             "Prefix": "raw_data/my_domain/my_dataset",
@@ -464,6 +1625,8 @@ class TestS3FileList:
             "2020-01-01T12:00:00-file1.csv",
             "2020-06-01T15:00:00-file2.csv",
             "2020-11-15T16:00:00-file3.csv",
+            "2020-12-01T09:00:00-file4.parquet",
+            "2020-12-02T09:00:00-file5.csv.gz",
         ]
 
         self.mock_s3_client.list_objects.assert_called_once_with(
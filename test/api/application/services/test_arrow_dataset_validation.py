@@ -0,0 +1,392 @@
+from io import BytesIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from api.application.services.arrow_dataset_validation import (
+    cast_to_schema_types,
+    construct_arrow_chunks,
+    construct_arrow_stream_chunks,
+    construct_parquet_chunks,
+    convert_dates_to_ymd,
+    dataset_has_acceptable_null_values,
+    dataset_has_correct_columns,
+    dataset_has_no_illegal_characters_in_partition_columns,
+    is_compatible_type,
+    remove_empty_rows,
+    supports_arrow_ingest,
+    transform_and_validate_table,
+)
+from api.common.custom_exceptions import DatasetError
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import Owner, SchemaMetadata
+from test.test_utils import set_encoded_content
+
+
+class TestArrowDatasetValidation:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=0,
+                    data_type="object",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=True,
+                ),
+                Column(
+                    name="colname3",
+                    partition_index=None,
+                    data_type="Float64",
+                    allow_null=True,
+                ),
+                Column(
+                    name="colname4",
+                    partition_index=None,
+                    data_type="boolean",
+                    allow_null=True,
+                ),
+                Column(
+                    name="colname5",
+                    partition_index=None,
+                    data_type="date",
+                    allow_null=True,
+                    format="%d/%m/%Y",
+                ),
+            ],
+        )
+
+    def test_reads_chunks_with_schema_data_types(self):
+        file = BytesIO(
+            set_encoded_content(
+                "ColName1,colname2,colname3,colname4,colname5\n"
+                "a,1,2.5,True,01/02/2022\n"
+                "b,2,3,false,\n"
+                "c,,,,31/12/2021\n"
+            )
+        )
+
+        chunks = list(construct_arrow_chunks(self.schema, file, 2))
+
+        assert [chunk.num_rows for chunk in chunks] == [2, 1]
+        assert chunks[0].schema == pa.schema(
+            [
+                ("colname1", pa.string()),
+                ("colname2", pa.int64()),
+                ("colname3", pa.float64()),
+                ("colname4", pa.bool_()),
+                ("colname5", pa.string()),
+            ]
+        )
+
+    def test_raises_error_before_reading_when_columns_do_not_match(self):
+        file = BytesIO(set_encoded_content("colname1,colname2\n" "a,1\n"))
+
+        with pytest.raises(
+            DatasetError,
+            match=r"Expected columns: \['colname1', 'colname2', 'colname3', 'colname4', 'colname5'\], received: \['colname1', 'colname2'\]",
+        ):
+            list(construct_arrow_chunks(self.schema, file, 2))
+
+    def test_raises_arrow_error_when_values_do_not_match_data_types(self):
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2,colname3,colname4,colname5\n"
+                "a,not_an_int,2.5,True,01/02/2022\n"
+            )
+        )
+
+        with pytest.raises(pa.ArrowInvalid):
+            list(construct_arrow_chunks(self.schema, file, 2))
+
+    def _typed_table(self, **columns) -> pa.Table:
+        return pa.table(
+            {
+                "ColName1": pa.array(["a", "b", "c"]),
+                "colname2": pa.array([1, 2, None], pa.int32()),
+                "colname3": pa.array([2.5, None, 1.0], pa.float64()),
+                "colname4": pa.array([True, False, None]),
+                "colname5": pa.array([19024, None, 18992], pa.date32()),
+                **columns,
+            }
+        )
+
+    def _parquet_file(self, table: pa.Table, **kwargs) -> BytesIO:
+        file = BytesIO()
+        pq.write_table(table, file, **kwargs)
+        file.seek(0)
+        return file
+
+    def test_reads_parquet_chunks_with_their_column_names_cleaned(self):
+        file = self._parquet_file(self._typed_table(), row_group_size=2)
+
+        chunks = list(construct_parquet_chunks(self.schema, file, 2))
+
+        assert [chunk.num_rows for chunk in chunks] == [2, 1]
+        assert chunks[0].column_names == self.schema.get_column_names()
+        assert chunks[0].schema.field("colname2").type == pa.int32()
+
+    def test_reads_arrow_stream_chunks(self):
+        table = self._typed_table()
+        file = BytesIO()
+        with pa.ipc.new_stream(file, table.schema) as writer:
+            writer.write_table(table)
+        file.seek(0)
+
+        chunks = list(construct_arrow_stream_chunks(self.schema, file, 2))
+
+        assert [chunk.num_rows for chunk in chunks] == [2, 1]
+        assert chunks[0].column_names == self.schema.get_column_names()
+
+    def test_raises_error_from_file_metadata_when_columns_do_not_match(self):
+        file = self._parquet_file(pa.table({"colname1": ["a"]}))
+
+        with pytest.raises(DatasetError, match="Expected columns"):
+            next(construct_parquet_chunks(self.schema, file, 2))
+
+    def test_raises_data_type_errors_from_file_metadata(self):
+        file = self._parquet_file(
+            self._typed_table(
+                colname2=pa.array([1.5, 2.0, None]),
+                colname4=pa.array(["yes", "no", None]),
+            )
+        )
+
+        with pytest.raises(DatasetError) as error:
+            next(construct_parquet_chunks(self.schema, file, 2))
+
+        assert error.value.message == [
+            "Column [colname2] has an incorrect data type. Expected Int64, received double",
+            "Column [colname4] has an incorrect data type. Expected boolean, received string",
+        ]
+
+    def test_raises_null_value_errors_from_parquet_statistics(self):
+        file = self._parquet_file(
+            self._typed_table(ColName1=pa.array(["a", None, "c"])), row_group_size=2
+        )
+
+        with pytest.raises(DatasetError) as error:
+            next(construct_parquet_chunks(self.schema, file, 2))
+
+        assert error.value.message == ["Column [colname1] does not allow null values"]
+
+    def test_does_not_raise_null_value_errors_from_statistics_of_rows_that_may_be_empty(
+        self,
+    ):
+        table = pa.table(
+            {
+                "colname1": pa.array(["a", None], pa.string()),
+                "colname2": pa.array([1, None], pa.int64()),
+                "colname3": pa.array([1.0, None], pa.float64()),
+                "colname4": pa.array([True, None]),
+                "colname5": pa.array([19024, None], pa.date32()),
+            }
+        )
+        file = self._parquet_file(table)
+
+        (chunk,) = construct_parquet_chunks(self.schema, file, 2)
+
+        assert list(transform_and_validate_table(self.schema, chunk)["colname1"]) == [
+            "a"
+        ]
+
+    @pytest.mark.parametrize(
+        "data_type, expected_type, date_format, compatible",
+        [
+            (pa.int8(), "Int64", None, True),
+            (pa.uint32(), "Int64", None, True),
+            (pa.float32(), "Int64", None, False),
+            (pa.int64(), "Float64", None, True),
+            (pa.string(), "Float64", None, False),
+            (pa.bool_(), "boolean", None, True),
+            (pa.large_string(), "object", None, True),
+            (pa.dictionary(pa.int32(), pa.string()), "object", None, True),
+            (pa.int64(), "object", None, False),
+            (pa.date64(), "date", None, True),
+            (pa.timestamp("ms"), "date", None, True),
+            (pa.string(), "date", "%Y-%m-%d", True),
+            (pa.string(), "date", None, False),
+            (pa.null(), "Int64", None, True),
+        ],
+    )
+    def test_checks_data_type_compatibility(
+        self, data_type, expected_type, date_format, compatible
+    ):
+        column = Column(
+            name="column",
+            partition_index=None,
+            data_type=expected_type,
+            allow_null=True,
+            format=date_format,
+        )
+
+        assert is_compatible_type(data_type, column) is compatible
+
+    def test_casts_typed_columns_to_schema_data_types(self):
+        table = self._typed_table(
+            colname3=pa.array([1, None, 3], pa.int16()),
+            colname5=pa.array([1643716800000, None, 1640908800000], pa.timestamp("ms")),
+        ).rename_columns(self.schema.get_column_names())
+
+        result = transform_and_validate_table(self.schema, table)
+
+        assert list(result["colname3"]) == [1.0, pd.NA, 3.0]
+        assert list(result["colname5"]) == ["2022-02-01", None, "2021-12-31"]
+        assert result.dtypes.astype(str).to_dict() == {
+            "colname1": "object",
+            "colname2": "Int64",
+            "colname3": "Float64",
+            "colname4": "boolean",
+            "colname5": "object",
+        }
+
+    def test_decodes_dictionary_encoded_columns(self):
+        table = pa.table({"colname1": pa.array(["a", "b", "a"]).dictionary_encode()})
+
+        result, errors = cast_to_schema_types(
+            table,
+            Schema(metadata=self.schema.metadata, columns=self.schema.columns[:1]),
+        )
+
+        assert result.column("colname1").type == pa.string()
+        assert errors == []
+
+    def test_reports_values_that_cannot_be_cast(self):
+        table = pa.table({"colname2": pa.array([2**63], pa.uint64())})
+
+        _, errors = cast_to_schema_types(
+            table,
+            Schema(metadata=self.schema.metadata, columns=self.schema.columns[1:2]),
+        )
+
+        assert errors == ["Failed to convert column [colname2] to type [Int64]"]
+
+    def test_transforms_table_into_dataframe_with_schema_data_types(self):
+        table = pa.table(
+            {
+                "colname1": ["a", "b", None],
+                "colname2": pa.array([1, None, None], pa.int64()),
+                "colname3": pa.array([2.5, None, None], pa.float64()),
+                "colname4": pa.array([True, False, None], pa.bool_()),
+                "colname5": ["01/02/2022", None, None],
+            }
+        )
+
+        result = transform_and_validate_table(self.schema, table)
+
+        assert list(result["colname1"]) == ["a", "b"]
+        assert list(result["colname5"]) == ["2022-02-01", None]
+        assert result.dtypes.astype(str).to_dict() == {
+            "colname1": "object",
+            "colname2": "Int64",
+            "colname3": "Float64",
+            "colname4": "boolean",
+            "colname5": "object",
+        }
+
+    def test_raises_all_validation_errors(self):
+        table = pa.table(
+            {
+                "colname1": ["a/b", None],
+                "colname2": pa.array([1, 2], pa.int64()),
+                "colname3": pa.array([2.5, 1.0], pa.float64()),
+                "colname4": pa.array([True, False], pa.bool_()),
+                "colname5": ["2022-02-01", "01/02/2022"],
+            }
+        )
+
+        with pytest.raises(DatasetError) as error:
+            transform_and_validate_table(self.schema, table)
+
+        assert error.value.message == [
+            "Column [colname5] does not match specified date format in at least one row",
+            "Column [colname1] does not allow null values",
+            "Partition column [colname1] has values with illegal characters '/'",
+        ]
+
+    def test_removes_empty_rows(self):
+        table = pa.table({"colname1": ["a", None, "c"], "colname2": [1, None, None]})
+
+        result, errors = remove_empty_rows(table)
+
+        assert result.column("colname1").to_pylist() == ["a", "c"]
+        assert errors == []
+
+    @pytest.mark.parametrize(
+        "date_format, values, expected",
+        [
+            ("%d/%m/%Y", ["01/02/2022", None], ["2022-02-01", None]),
+            ("%Y-%m-%d", ["2021-12-31"], ["2021-12-31"]),
+            ("%Y-%m", ["2021-03"], ["2021-03-01"]),
+            ("%m/%Y", ["03/2021"], ["2021-03-01"]),
+            ("%Y%m", ["202103"], ["2021-03-01"]),
+            ("%Y", ["2021"], ["2021-01-01"]),
+            ("%b %Y", ["Mar 2021"], ["2021-03-01"]),
+            (
+                "%Y-%m-%d",
+                ["2020-01-01 10:00:00", "2020-01-02", None],
+                ["2020-01-01", "2020-01-02", None],
+            ),
+        ],
+    )
+    def test_converts_dates_to_ymd(self, date_format, values, expected):
+        self.schema.columns[4].format = date_format
+        table = pa.table({"colname5": pa.array(values, pa.string())})
+
+        result, errors = convert_dates_to_ymd(table, self.schema)
+
+        assert result.column("colname5").to_pylist() == expected
+        assert errors == []
+
+    def test_reports_dates_that_pandas_cannot_parse_either(self):
+        self.schema.columns[4].format = "%Y-%m-%d"
+        table = pa.table({"colname5": ["2020-01-01 10:00:00", "01/02/2022"]})
+
+        _, errors = convert_dates_to_ymd(table, self.schema)
+
+        assert errors == [
+            "Column [colname5] does not match specified date format in at least one row"
+        ]
+
+    def test_checks_for_null_values(self):
+        table = pa.table({name: [None] for name in self.schema.get_column_names()})
+
+        _, errors = dataset_has_acceptable_null_values(table, self.schema)
+
+        assert errors == ["Column [colname1] does not allow null values"]
+
+    def test_checks_for_illegal_characters_in_partition_columns(self):
+        table = pa.table({"colname1": ["a", "b/c", None]})
+
+        _, errors = dataset_has_no_illegal_characters_in_partition_columns(
+            table, self.schema
+        )
+
+        assert errors == [
+            "Partition column [colname1] has values with illegal characters '/'"
+        ]
+
+    def test_checks_columns_regardless_of_order(self):
+        dataset_has_correct_columns(
+            ["colname5", "colname4", "colname3", "colname2", "colname1"], self.schema
+        )
+
+    def test_supports_arrow_ingest_only_when_dates_have_a_format(self):
+        assert supports_arrow_ingest(self.schema) is True
+
+        self.schema.columns[4].format = None
+
+        assert supports_arrow_ingest(self.schema) is False
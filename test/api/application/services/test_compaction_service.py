@@ -0,0 +1,343 @@
+import threading
+from unittest.mock import Mock, call
+
+import pandas as pd
+import pytest
+
+from api.application.services.compaction_service import CompactionService
+from api.common.custom_exceptions import (
+    ConflictError,
+    SchemaNotFoundError,
+    UserError,
+)
+from api.domain.compaction_manifest import CompactedSource, CompactionManifest
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import SchemaMetadata, UpdateBehaviour
+
+
+class TestCompactionService:
+    def setup_method(self):
+        self.persistence_adapter = Mock()
+        self.persistence_adapter.list_compaction_manifests.return_value = []
+        self.executor = Mock()
+        self.glue_adapter = Mock()
+        self.glue_adapter.match_table_column_order.side_effect = lambda schema: schema
+        self.compaction_service = CompactionService(
+            self.persistence_adapter,
+            self.executor,
+            target_file_size=100,
+            glue_adapter=self.glue_adapter,
+        )
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                update_behaviour=UpdateBehaviour.APPEND.value,
+            ),
+            columns=[
+                Column(
+                    name="year",
+                    partition_index=0,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="value",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                ),
+            ],
+        )
+        self.persistence_adapter.find_schema.return_value = self.schema
+
+    def _files(self, *files):
+        return [{"Key": f"data/some/other/{key}", "Size": size} for key, size in files]
+
+    def _saved_manifests(self):
+        return [
+            manifest_call.args[0]
+            for manifest_call in self.persistence_adapter.save_compaction_manifest.call_args_list
+        ]
+
+    def test_compacts_the_small_files_of_each_partition(self):
+        self.persistence_adapter.list_dataset_files.return_value = self._files(
+            ("year=2020/2022-01-01T00:00:00-a.csv", 10),
+            ("year=2020/2022-01-02T00:00:00-b.csv", 20),
+            ("year=2021/2022-01-01T00:00:00-a.csv", 10),
+        )
+        self.persistence_adapter.read_data_files.return_value = [
+            pd.DataFrame({"value": ["a1", "a2"]}),
+            pd.DataFrame({"value": ["b1"]}),
+        ]
+
+        compacted_groups = self.compaction_service.compact_dataset(self.schema)
+
+        assert compacted_groups == 1
+        self.persistence_adapter.read_data_files.assert_called_once_with(
+            self.schema,
+            [
+                "data/some/other/year=2020/2022-01-01T00:00:00-a.csv",
+                "data/some/other/year=2020/2022-01-02T00:00:00-b.csv",
+            ],
+        )
+        (manifest,) = self._saved_manifests()
+        assert manifest.partition_path == "year=2020"
+        assert manifest.filename.startswith("compacted-")
+        assert manifest.filename.endswith(".csv")
+        assert manifest.sources == [
+            CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=2),
+            CompactedSource(filename="2022-01-02T00:00:00-b.csv", rows=1),
+        ]
+        (
+            schema,
+            filename,
+            partitions,
+        ) = self.persistence_adapter.upload_partitioned_data.call_args.args
+        assert filename == manifest.filename
+        assert [partition_path for partition_path, _ in partitions] == ["year=2020"]
+        assert partitions[0][1]["value"].tolist() == ["a1", "a2", "b1"]
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some",
+            "other",
+            [
+                "data/some/other/year=2020/2022-01-01T00:00:00-a.csv",
+                "data/some/other/year=2020/2022-01-02T00:00:00-b.csv",
+            ],
+        )
+        self.persistence_adapter.delete_compaction_manifests.assert_called_once_with(
+            "some", "other", []
+        )
+
+    def test_groups_files_up_to_the_target_file_size(self):
+        self.persistence_adapter.list_dataset_files.return_value = self._files(
+            ("year=2020/a.csv", 60),
+            ("year=2020/b.csv", 30),
+            ("year=2020/c.csv", 150),
+            ("year=2020/d.csv", 50),
+            ("year=2020/e.csv", 40),
+            ("year=2020/f.csv", 90),
+        )
+        self.persistence_adapter.read_data_files.side_effect = lambda _, keys: [
+            pd.DataFrame({"value": ["x"]}) for _ in keys
+        ]
+
+        compacted_groups = self.compaction_service.compact_dataset(self.schema)
+
+        assert compacted_groups == 2
+        assert self.persistence_adapter.read_data_files.call_args_list == [
+            call(
+                self.schema,
+                ["data/some/other/year=2020/a.csv", "data/some/other/year=2020/b.csv"],
+            ),
+            call(
+                self.schema,
+                ["data/some/other/year=2020/d.csv", "data/some/other/year=2020/e.csv"],
+            ),
+        ]
+
+    def test_compacted_files_keep_the_uploads_they_came_from(self):
+        previous_manifest = CompactionManifest(
+            domain="some",
+            dataset="other",
+            partition_path="",
+            filename="compacted-1234.csv",
+            sources=[
+                CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=1),
+                CompactedSource(filename="2022-01-02T00:00:00-b.csv", rows=2),
+            ],
+        )
+        self.persistence_adapter.list_compaction_manifests.return_value = [
+            previous_manifest
+        ]
+        self.persistence_adapter.list_dataset_files.return_value = self._files(
+            ("compacted-1234.csv", 30),
+            ("2022-01-03T00:00:00-c.csv", 10),
+        )
+        self.persistence_adapter.read_data_files.return_value = [
+            pd.DataFrame({"value": ["a", "b", "b"]}),
+            pd.DataFrame({"value": ["c"]}),
+        ]
+
+        self.compaction_service.compact_dataset(self.schema)
+
+        (manifest,) = self._saved_manifests()
+        assert manifest.partition_path == ""
+        assert manifest.sources == [
+            CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=1),
+            CompactedSource(filename="2022-01-02T00:00:00-b.csv", rows=2),
+            CompactedSource(filename="2022-01-03T00:00:00-c.csv", rows=1),
+        ]
+        self.persistence_adapter.delete_compaction_manifests.assert_called_once_with(
+            "some", "other", [previous_manifest]
+        )
+
+    def test_removes_the_rows_of_a_deleted_upload_from_compacted_files(self):
+        manifest = CompactionManifest(
+            domain="some",
+            dataset="other",
+            partition_path="year=2020",
+            filename="compacted-1234.csv",
+            sources=[
+                CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=1),
+                CompactedSource(filename="2022-01-02T00:00:00-b.csv", rows=2),
+                CompactedSource(filename="1-2022-01-02T00:00:00-b.csv", rows=1),
+                CompactedSource(filename="2022-01-03T00:00:00-c.csv", rows=1),
+            ],
+        )
+        self.persistence_adapter.list_compaction_manifests.return_value = [manifest]
+        self.persistence_adapter.list_dataset_files.return_value = self._files(
+            ("year=2020/compacted-1234.csv", 50)
+        )
+        self.persistence_adapter.read_data_files.return_value = [
+            pd.DataFrame({"value": ["a", "b", "b", "b", "c"]})
+        ]
+
+        self.compaction_service.remove_compacted_rows(
+            self.schema, "2022-01-02T00:00:00-b.csv"
+        )
+
+        (new_manifest,) = self._saved_manifests()
+        assert new_manifest.sources == [
+            CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=1),
+            CompactedSource(filename="2022-01-03T00:00:00-c.csv", rows=1),
+        ]
+        (
+            _,
+            _,
+            partitions,
+        ) = self.persistence_adapter.upload_partitioned_data.call_args.args
+        assert partitions[0][0] == "year=2020"
+        assert partitions[0][1]["value"].tolist() == ["a", "c"]
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some", "other", ["data/some/other/year=2020/compacted-1234.csv"]
+        )
+        self.persistence_adapter.delete_compaction_manifests.assert_called_once_with(
+            "some", "other", [manifest]
+        )
+
+    def test_deletes_compacted_files_left_without_rows(self):
+        manifest = CompactionManifest(
+            domain="some",
+            dataset="other",
+            partition_path="",
+            filename="compacted-1234.csv",
+            sources=[CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=2)],
+        )
+        self.persistence_adapter.list_compaction_manifests.return_value = [manifest]
+        self.persistence_adapter.list_dataset_files.return_value = self._files(
+            ("compacted-1234.csv", 50)
+        )
+        self.persistence_adapter.read_data_files.return_value = [
+            pd.DataFrame({"value": ["a", "a"]})
+        ]
+
+        self.compaction_service.remove_compacted_rows(
+            self.schema, "2022-01-01T00:00:00-a.csv"
+        )
+
+        self.persistence_adapter.upload_partitioned_data.assert_not_called()
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some", "other", ["data/some/other/compacted-1234.csv"]
+        )
+        self.persistence_adapter.delete_compaction_manifests.assert_called_once_with(
+            "some", "other", [manifest]
+        )
+
+    def test_ignores_manifests_of_compacted_files_that_were_not_written(self):
+        self.persistence_adapter.list_compaction_manifests.return_value = [
+            CompactionManifest(
+                domain="some",
+                dataset="other",
+                partition_path="",
+                filename="compacted-1234.csv",
+                sources=[CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=2)],
+            )
+        ]
+        self.persistence_adapter.list_dataset_files.return_value = []
+
+        self.compaction_service.remove_compacted_rows(
+            self.schema, "2022-01-01T00:00:00-a.csv"
+        )
+
+        self.persistence_adapter.read_data_files.assert_not_called()
+
+    def test_submits_compaction_of_a_dataset(self):
+        self.compaction_service.compact_dataset_async("some", "other")
+
+        self.executor.submit.assert_called_once()
+        assert self.compaction_service.dataset_locks[("some", "other")].locked()
+
+    def test_releases_the_dataset_lock_once_compacted(self):
+        self.persistence_adapter.list_dataset_files.return_value = []
+        self.compaction_service.compact_dataset_async("some", "other")
+        task, *args = self.executor.submit.call_args.args
+
+        task(*args)
+
+        assert not self.compaction_service.dataset_locks[("some", "other")].locked()
+
+    def test_rejects_compaction_of_a_dataset_being_compacted(self):
+        self.compaction_service.dataset_locks[("some", "other")].acquire()
+
+        with pytest.raises(
+            ConflictError, match=r"The dataset \[some/other\] is being compacted"
+        ):
+            self.compaction_service.compact_dataset_async("some", "other")
+
+        self.executor.submit.assert_not_called()
+
+    def test_rejects_compaction_of_datasets_that_are_not_appended(self):
+        self.schema.metadata.update_behaviour = UpdateBehaviour.OVERWRITE.value
+
+        with pytest.raises(
+            UserError,
+            match="Only datasets with the APPEND update behaviour can be compacted",
+        ):
+            self.compaction_service.compact_dataset_async("some", "other")
+
+    def test_rejects_compaction_of_datasets_without_schema(self):
+        self.persistence_adapter.find_schema.return_value = None
+
+        with pytest.raises(SchemaNotFoundError):
+            self.compaction_service.compact_dataset_async("some", "other")
+
+    def test_compacts_all_appended_datasets(self):
+        overwritten_schema = self.schema.copy(deep=True)
+        overwritten_schema.metadata.update_behaviour = UpdateBehaviour.OVERWRITE.value
+        self.persistence_adapter.list_schemas.return_value = [
+            SchemaMetadata(domain="some", dataset="other", sensitivity="PUBLIC"),
+            SchemaMetadata(domain="some", dataset="replaced", sensitivity="PUBLIC"),
+        ]
+        self.persistence_adapter.find_schema.side_effect = [
+            self.schema,
+            overwritten_schema,
+        ]
+        self.persistence_adapter.list_dataset_files.side_effect = Exception("Failed")
+
+        self.compaction_service.compact_all_datasets()
+
+        self.persistence_adapter.list_dataset_files.assert_called_once_with(
+            "some", "other"
+        )
+
+    def test_dataset_lock_rejects_changes_while_compacting(self):
+        self.compaction_service.dataset_locks[("some", "other")].acquire()
+
+        with pytest.raises(ConflictError):
+            with self.compaction_service.dataset_lock("some", "other"):
+                pass
+
+    def test_schedules_compaction_of_all_datasets(self):
+        compacted = threading.Event()
+        self.persistence_adapter.list_schemas.side_effect = (
+            lambda: compacted.set() or []
+        )
+
+        thread = self.compaction_service.schedule_compaction(0)
+
+        assert compacted.wait(timeout=5)
+        self.compaction_service.stop_scheduled_compaction()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
@@ -1,11 +1,22 @@
+import gzip
+import hashlib
 import re
-from unittest.mock import Mock, patch
+import threading
+from contextlib import nullcontext
+from io import BytesIO
+from unittest.mock import Mock, MagicMock, patch, ANY, call
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from botocore.exceptions import ClientError
 
 from api.application.services.data_service import DataService
+from api.application.services.upload_admission_service import (
+    UploadAdmissionService,
+)
+from api.application.services.upload_index_service import UploadIndexService
 from api.common.config.aws import RESOURCE_PREFIX
 from api.common.custom_exceptions import (
     ProtectedDomainDoesNotExistError,
@@ -16,6 +27,12 @@ from api.common.custom_exceptions import (
     SchemaError,
     ConflictError,
     UserError,
+    PartitionCreateFailsError,
+    TableCreateFailsError,
+    DatasetError,
+    UploadCapacityExceededError,
+    TableUpdateFailsError,
+    AWSServiceError,
 )
 from api.domain.enriched_schema import (
     EnrichedSchema,
@@ -23,8 +40,15 @@ from api.domain.enriched_schema import (
     EnrichedColumn,
 )
 from api.domain.schema import Schema, Column
-from api.domain.schema_metadata import Owner, UpdateBehaviour, SchemaMetadata
+from api.domain.schema_metadata import (
+    Owner,
+    UpdateBehaviour,
+    SchemaMetadata,
+    StorageFormat,
+)
 from api.domain.sql_query import SQLQuery
+from api.domain.upload_job import UploadJob
+from api.domain.upload_record import UploadRecord
 from test.test_utils import set_encoded_content
 
 
@@ -75,11 +99,23 @@ class TestUploadSchema:
             "some", "other", "PUBLIC", self.valid_schema
         )
         self.cognito_adapter.create_user_groups.assert_called_once_with("some", "other")
+        self.glue_adapter.create_table.assert_called_once_with(self.valid_schema)
         self.glue_adapter.create_crawler.assert_called_once_with(
             RESOURCE_PREFIX, "some", "other", {"sensitivity": "PUBLIC"}
         )
         assert result == "some-other.json"
 
+    def test_does_not_create_crawler_if_table_creation_fails(self):
+        self.s3_adapter.find_schema.return_value = None
+        self.glue_adapter.create_table.side_effect = TableCreateFailsError(
+            "Failed to create table"
+        )
+
+        with pytest.raises(TableCreateFailsError):
+            self.data_service.upload_schema(self.valid_schema)
+
+        self.glue_adapter.create_crawler.assert_not_called()
+
     def test_aborts_uploading_if_schema_upload_fails(self):
         self.s3_adapter.find_schema.return_value = None
         self.s3_adapter.save_schema.side_effect = ClientError(
@@ -90,6 +126,7 @@ class TestUploadSchema:
             self.data_service.upload_schema(self.valid_schema)
 
         self.cognito_adapter.create_user_groups.assert_not_called()
+        self.glue_adapter.create_table.assert_not_called()
         self.glue_adapter.create_crawler.assert_not_called()
 
     def test_check_for_protected_domain_success(self):
@@ -175,14 +212,20 @@ class TestUploadDataset:
     def setup_method(self):
         self.s3_adapter = Mock()
         self.glue_adapter = Mock()
+        self.glue_adapter.table_exists.return_value = False
+        self.glue_adapter.match_table_column_order.side_effect = lambda schema: schema
         self.query_adapter = Mock()
         self.protected_domain_service = Mock()
+        self.upload_index_service = Mock()
+        self.upload_index_service.find_previous_upload.return_value = None
+        self.upload_index_service.claim_upload.side_effect = lambda *args: nullcontext()
         self.data_service = DataService(
             self.s3_adapter,
             self.glue_adapter,
             self.query_adapter,
             self.protected_domain_service,
             None,
+            upload_index_service=self.upload_index_service,
         )
         self.valid_schema = Schema(
             metadata=SchemaMetadata(
@@ -251,12 +294,15 @@ class TestUploadDataset:
         )
 
         filename = self.data_service.upload_dataset(
-            RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
         )
         assert filename == "2022-03-03T12:00:00-data.csv"
 
         self.s3_adapter.upload_partitioned_data.assert_called_once_with(
-            "some", "other", "2022-03-03T12:00:00-data.csv", partitioned_data
+            self.s3_adapter.find_schema.return_value,
+            "2022-03-03T12:00:00-data.csv",
+            partitioned_data,
+            None,
         )
 
         self.glue_adapter.update_catalog_table_config.assert_called_once_with(
@@ -311,12 +357,15 @@ class TestUploadDataset:
         )
 
         filename = self.data_service.upload_dataset(
-            RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
         )
         assert filename == "2022-03-02T12:00:00-data.csv"
 
         self.s3_adapter.upload_partitioned_data.assert_called_once_with(
-            "some", "other", "2022-03-02T12:00:00-data.csv", partitioned_data
+            self.s3_adapter.find_schema.return_value,
+            "2022-03-02T12:00:00-data.csv",
+            partitioned_data,
+            None,
         )
 
         self.glue_adapter.update_catalog_table_config.assert_called_once_with(
@@ -324,10 +373,12 @@ class TestUploadDataset:
         )
 
     # Happy Path -------------------------------------
+    @patch("api.application.services.data_service.generate_generation_id")
     @patch("api.application.services.data_service.generate_partitioned_data")
     def test_upload_dataset_with_overwrite_behaviour_with_no_partition(
-        self, mock_partitioner
+        self, mock_partitioner, mock_generate_generation_id
     ):
+        mock_generate_generation_id.return_value = "generation-1"
         file_contents = set_encoded_content(
             "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
         )
@@ -366,22 +417,36 @@ class TestUploadDataset:
         mock_partitioner.return_value = partitioned_data
 
         filename = self.data_service.upload_dataset(
-            RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
         )
         assert filename == "some.csv"
 
         self.s3_adapter.upload_partitioned_data.assert_called_once_with(
-            "some", "other", "some.csv", partitioned_data
+            self.s3_adapter.find_schema.return_value,
+            "some.csv",
+            partitioned_data,
+            "generation-1",
         )
-
-        self.glue_adapter.update_catalog_table_config.assert_called_once_with(
-            "some", "other"
+        self.glue_adapter.create_table.assert_called_once_with(
+            self.s3_adapter.find_schema.return_value
+        )
+        self.glue_adapter.replace_table_data.assert_called_once_with(
+            "some", "other", "generation-1", []
         )
+        self.s3_adapter.delete_superseded_data.assert_called_once_with(
+            "some",
+            "other",
+            "generation-1",
+            self.glue_adapter.replace_table_data.return_value,
+        )
+        self.glue_adapter.start_crawler.assert_not_called()
 
+    @patch("api.application.services.data_service.generate_generation_id")
     @patch("api.application.services.data_service.generate_partitioned_data")
     def test_upload_dataset_with_overwrite_behaviour_with_two_partitions(
-        self, mock_partitioner
+        self, mock_partitioner, mock_generate_generation_id
     ):
+        mock_generate_generation_id.return_value = "generation-1"
         file_contents = set_encoded_content(
             "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
         )
@@ -423,17 +488,29 @@ class TestUploadDataset:
         mock_partitioner.return_value = partitioned_data
 
         filename = self.data_service.upload_dataset(
-            RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
         )
         assert filename == "some.csv"
 
         self.s3_adapter.upload_partitioned_data.assert_called_once_with(
-            "some", "other", "some.csv", partitioned_data
+            self.s3_adapter.find_schema.return_value,
+            "some.csv",
+            partitioned_data,
+            "generation-1",
         )
-
-        self.glue_adapter.update_catalog_table_config.assert_called_once_with(
-            "some", "other"
+        self.glue_adapter.create_table.assert_called_once_with(
+            self.s3_adapter.find_schema.return_value
+        )
+        self.glue_adapter.replace_table_data.assert_called_once_with(
+            "some", "other", "generation-1", ["colname1=1234", "colname1=4567"]
         )
+        self.s3_adapter.delete_superseded_data.assert_called_once_with(
+            "some",
+            "other",
+            "generation-1",
+            self.glue_adapter.replace_table_data.return_value,
+        )
+        self.glue_adapter.start_crawler.assert_not_called()
 
     # E2E flow ---------------------------------------
     @patch("api.application.services.data_service.generate_partitioned_data")
@@ -485,7 +562,7 @@ class TestUploadDataset:
         )
 
         filename = self.data_service.upload_dataset(
-            RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
         )
         assert filename == "2022-03-03T12:00:00-data.csv"
 
@@ -495,10 +572,9 @@ class TestUploadDataset:
 
         assert partitioner_args[1].equals(expected_transformed_df)
 
-        assert upload_args[0] == "some"
-        assert upload_args[1] == "other"
-        assert upload_args[2] == "2022-03-03T12:00:00-data.csv"
-        assert upload_args[3].equals(expected_transformed_df)
+        assert upload_args[0] == self.s3_adapter.find_schema.return_value
+        assert upload_args[1] == "2022-03-03T12:00:00-data.csv"
+        assert upload_args[2].equals(expected_transformed_df)
 
         self.glue_adapter.update_catalog_table_config.assert_called_once_with(
             "some", "other"
@@ -514,7 +590,7 @@ class TestUploadDataset:
 
         with pytest.raises(SchemaNotFoundError):
             self.data_service.upload_dataset(
-                RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
             )
 
         self.s3_adapter.find_schema.assert_called_once_with("some", "other")
@@ -552,7 +628,7 @@ class TestUploadDataset:
 
         with pytest.raises(GetCrawlerError):
             self.data_service.upload_dataset(
-                RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
             )
 
         self.glue_adapter.check_crawler_is_ready.assert_called_once_with(
@@ -593,7 +669,7 @@ class TestUploadDataset:
 
         with pytest.raises(CrawlerIsNotReadyError):
             self.data_service.upload_dataset(
-                RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
             )
 
         self.glue_adapter.check_crawler_is_ready.assert_called_once_with(
@@ -629,12 +705,89 @@ class TestUploadDataset:
         )
 
         self.data_service.upload_dataset(
-            RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        self.glue_adapter.start_crawler.assert_called_once_with(
+            RESOURCE_PREFIX, "some", "other"
+        )
+
+    def test_upload_dataset_registers_partitions_when_table_exists(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n" "1234,Grace\n"
+        )
+        self.glue_adapter.table_exists.return_value = True
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        self.glue_adapter.create_partitions.assert_called_once_with(
+            "some", "other", ["colname1=1234", "colname1=4567"]
+        )
+        self.glue_adapter.check_crawler_is_ready.assert_not_called()
+        self.glue_adapter.start_crawler.assert_not_called()
+        self.glue_adapter.update_catalog_table_config.assert_not_called()
+
+    def test_upload_dataset_writes_columns_in_order_of_table_created_by_crawler(
+        self,
+    ):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        crawled_schema = self.valid_schema.with_column_order(["colname2", "colname1"])
+        self.glue_adapter.table_exists.return_value = True
+        self.glue_adapter.match_table_column_order.side_effect = None
+        self.glue_adapter.match_table_column_order.return_value = crawled_schema
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        self.glue_adapter.match_table_column_order.assert_called_once_with(
+            self.valid_schema
+        )
+        written_schema = self.s3_adapter.upload_partitioned_data.call_args.args[0]
+        assert written_schema.get_column_names() == ["colname2", "colname1"]
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 1)
+    def test_upload_dataset_registers_partitions_from_all_chunks_once(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n" "1234,Grace\n"
+        )
+        self.glue_adapter.table_exists.return_value = True
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        self.glue_adapter.create_partitions.assert_called_once_with(
+            "some", "other", ["colname1=1234", "colname1=4567"]
+        )
+
+    def test_upload_dataset_starts_crawler_when_partitions_fail_to_be_registered(
+        self,
+    ):
+        file_contents = set_encoded_content("colname1,colname2\n" "1234,Carlos\n")
+        self.glue_adapter.table_exists.return_value = True
+        self.glue_adapter.create_partitions.side_effect = PartitionCreateFailsError(
+            "error"
+        )
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
         )
 
         self.glue_adapter.start_crawler.assert_called_once_with(
             RESOURCE_PREFIX, "some", "other"
         )
+        self.glue_adapter.update_catalog_table_config.assert_called_once_with(
+            "some", "other"
+        )
 
     def test_upload_dataset_fails_to_start_crawler(self):
         file_contents = set_encoded_content(
@@ -670,7 +823,7 @@ class TestUploadDataset:
 
         with pytest.raises(CrawlerStartFailsError):
             self.data_service.upload_dataset(
-                RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
             )
 
     # Persist raw copy of data -------------------------------
@@ -705,14 +858,1042 @@ class TestUploadDataset:
             return_value=("2022-03-03T12:00:00-data.csv")
         )
 
+        file = BytesIO(file_contents)
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", file
+        )
+
+        self.s3_adapter.upload_raw_data.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv", file
+        )
+
+    # Idempotent uploads ----------------------------
+    def test_upload_dataset_records_the_upload_in_the_index(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv")
+        )
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            BytesIO(file_contents),
+            idempotency_key="request-1",
+        )
+
+        content_hash = hashlib.sha256(file_contents).hexdigest()
+        self.upload_index_service.find_previous_upload.assert_called_once_with(
+            self.valid_schema, content_hash, "request-1"
+        )
+        record = self.upload_index_service.record_upload.call_args.args[0]
+        assert record.dict(exclude={"uploaded_at"}) == {
+            "domain": "some",
+            "dataset": "other",
+            "content_hash": content_hash,
+            "idempotency_key": "request-1",
+            "raw_filename": "2022-03-03T12:00:00-data.csv",
+            "uploaded_filename": "2022-03-03T12:00:00-data.csv",
+        }
+
+    def test_upload_dataset_returns_previous_upload_without_processing_the_file(
+        self,
+    ):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.upload_index_service.find_previous_upload.return_value = UploadRecord(
+            domain="some",
+            dataset="other",
+            content_hash="abc123",
+            raw_filename="2022-03-03T12:00:00-data.csv",
+            uploaded_filename="2022-03-03T12:00:00-data.csv",
+        )
+
+        filename = self.data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            BytesIO(set_encoded_content("colname1,colname2\n" "1234,Carlos\n")),
+        )
+
+        assert filename == "2022-03-03T12:00:00-data.csv"
+        self.glue_adapter.check_crawler_is_ready.assert_not_called()
+        self.s3_adapter.upload_raw_data.assert_not_called()
+        self.s3_adapter.upload_partitioned_data.assert_not_called()
+        self.upload_index_service.record_upload.assert_not_called()
+
+    def test_upload_dataset_claims_upload_before_looking_for_previous_upload(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        file_contents = set_encoded_content("colname1,colname2\n" "1234,Carlos\n")
+        steps = Mock()
+        steps.attach_mock(self.upload_index_service.claim_upload, "claim_upload")
+        steps.attach_mock(
+            self.upload_index_service.find_previous_upload, "find_previous_upload"
+        )
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            BytesIO(file_contents),
+            idempotency_key="request-1",
+        )
+
+        content_hash = hashlib.sha256(file_contents).hexdigest()
+        assert steps.mock_calls == [
+            call.claim_upload(self.valid_schema, content_hash, "request-1"),
+            call.find_previous_upload(self.valid_schema, content_hash, "request-1"),
+        ]
+
+    def test_overlapping_uploads_of_the_same_file_are_processed_once(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        claims = {}
+        self.s3_adapter.create_upload_claim.side_effect = (
+            lambda claim: claims.setdefault(claim.claim_path(), claim) is claim
+        )
+        self.s3_adapter.find_upload_claim.side_effect = (
+            lambda domain, dataset, index_key: next(iter(claims.values()), None)
+        )
+        self.s3_adapter.delete_upload_claim.side_effect = lambda claim: claims.pop(
+            claim.claim_path()
+        )
+        self.s3_adapter.find_upload_record.return_value = None
+        self.data_service.upload_index_service = UploadIndexService(self.s3_adapter)
+        raw_data_uploading, first_upload_can_finish = (
+            threading.Event(),
+            threading.Event(),
+        )
+
+        def upload_raw_data(*args):
+            raw_data_uploading.set()
+            first_upload_can_finish.wait(timeout=5)
+
+        self.s3_adapter.upload_raw_data.side_effect = upload_raw_data
+        file_contents = set_encoded_content("colname1,colname2\n" "1234,Carlos\n")
+
+        def upload():
+            return self.data_service.upload_dataset(
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+            )
+
+        first_upload = threading.Thread(target=upload)
+        first_upload.start()
+        assert raw_data_uploading.wait(timeout=5)
+
+        with pytest.raises(ConflictError, match="already being uploaded") as error:
+            upload()
+
+        first_upload_can_finish.set()
+        first_upload.join(timeout=5)
+        assert error.value.status_code == 409
+        self.s3_adapter.upload_raw_data.assert_called_once()
+        self.s3_adapter.save_upload_record.assert_called_once()
+        assert claims == {}
+
+    def test_upload_dataset_does_not_record_invalid_upload(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        with pytest.raises(DatasetError):
+            self.data_service.upload_dataset(
+                RESOURCE_PREFIX,
+                "some",
+                "other",
+                "data.csv",
+                BytesIO(set_encoded_content("colname1,colname2\n" "1234,\n")),
+            )
+
+        self.upload_index_service.record_upload.assert_not_called()
+
+    # Admission control -----------------------------
+    def test_upload_dataset_is_rejected_when_over_memory_budget(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.data_service.upload_admission_service = UploadAdmissionService(
+            memory_budget=1
+        )
+        self.data_service.upload_admission_service.estimate_memory = (
+            lambda schema, file_size: 1
+        )
+
+        with self.data_service.upload_admission_service.admit(
+            self.valid_schema, BytesIO(b"")
+        ):
+            with pytest.raises(UploadCapacityExceededError):
+                self.data_service.upload_dataset(
+                    RESOURCE_PREFIX,
+                    "some",
+                    "other",
+                    "data.csv",
+                    BytesIO(set_encoded_content("colname1,colname2\n" "1234,Carlos\n")),
+                )
+
+        self.s3_adapter.upload_raw_data.assert_not_called()
+        self.s3_adapter.upload_partitioned_data.assert_not_called()
+
+    def test_upload_job_waits_for_memory_budget(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        upload_admission_service = MagicMock()
+        self.data_service.upload_admission_service = upload_admission_service
+        self.data_service.upload_job_service = Mock()
+        file = BytesIO(set_encoded_content("colname1,colname2\n" "1234,Carlos\n"))
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            file,
+            UploadJob(domain="some", dataset="other", filename="data.csv"),
+        )
+
+        upload_admission_service.admit.assert_called_once_with(
+            self.valid_schema, file, wait=True
+        )
+
+    # Chunked uploads -------------------------------
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_upload_dataset_in_multiple_chunks(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n" "8910,Grace\n"
+        )
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv")
+        )
+
+        filename = self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        assert filename == "2022-03-03T12:00:00-data.csv"
+        upload_calls = self.s3_adapter.upload_partitioned_data.call_args_list
+        assert len(upload_calls) == 2
+        assert upload_calls[0].args[1] == "2022-03-03T12:00:00-data.csv"
+        assert [path for path, _ in upload_calls[0].args[2]] == [
+            "colname1=1234",
+            "colname1=4567",
+        ]
+        assert upload_calls[1].args[1] == "1-2022-03-03T12:00:00-data.csv"
+        assert [path for path, _ in upload_calls[1].args[2]] == ["colname1=8910"]
+        self.s3_adapter.delete_chunk_files.assert_not_called()
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_upload_dataset_does_not_write_data_when_a_later_chunk_is_invalid(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n" "8910,\n"
+        )
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        with pytest.raises(
+            UserError, match="Column \\[colname2\\] does not allow null values"
+        ):
+            self.data_service.upload_dataset(
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+            )
+
+        self.s3_adapter.upload_raw_data.assert_not_called()
+        self.s3_adapter.upload_partitioned_data.assert_not_called()
+
+    def test_upload_dataset_with_overwrite_behaviour_stages_a_new_generation(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        self.valid_schema.metadata.update_behaviour = UpdateBehaviour.OVERWRITE.value
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.table_exists.return_value = True
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        generation = self.s3_adapter.upload_partitioned_data.call_args.args[3]
+        assert generation.startswith("generation-")
+        self.glue_adapter.create_table.assert_not_called()
+        self.glue_adapter.create_partitions.assert_not_called()
+        self.glue_adapter.replace_table_data.assert_called_once_with(
+            "some", "other", generation, ["colname1=1234", "colname1=4567"]
+        )
+        self.s3_adapter.delete_superseded_data.assert_called_once_with(
+            "some",
+            "other",
+            generation,
+            self.glue_adapter.replace_table_data.return_value,
+        )
+
+    def test_upload_dataset_with_overwrite_behaviour_keeps_data_read_before_the_switch(
+        self,
+    ):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        self.valid_schema.metadata.update_behaviour = UpdateBehaviour.OVERWRITE.value
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.table_exists.return_value = True
+        self.glue_adapter.replace_table_data.return_value = "generation-previous"
+        calls = Mock()
+        calls.attach_mock(self.glue_adapter.replace_table_data, "replace_table_data")
+        calls.attach_mock(
+            self.s3_adapter.delete_superseded_data, "delete_superseded_data"
+        )
+
         self.data_service.upload_dataset(
-            RESOURCE_PREFIX, "some", "other", "data.csv", file_contents
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        generation = self.s3_adapter.upload_partitioned_data.call_args.args[3]
+        assert calls.mock_calls == [
+            call.replace_table_data(
+                "some", "other", generation, ["colname1=1234", "colname1=4567"]
+            ),
+            call.delete_superseded_data(
+                "some", "other", generation, "generation-previous"
+            ),
+        ]
+
+    def test_upload_dataset_with_overwrite_behaviour_deletes_staged_data_on_failure(
+        self,
+    ):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        self.valid_schema.metadata.update_behaviour = UpdateBehaviour.OVERWRITE.value
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.s3_adapter.upload_partitioned_data.side_effect = AWSServiceError("Oops")
+
+        with pytest.raises(AWSServiceError, match="Oops"):
+            self.data_service.upload_dataset(
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+            )
+
+        generation = self.s3_adapter.upload_partitioned_data.call_args.args[3]
+        self.s3_adapter.delete_staged_data.assert_called_once_with(
+            "some", "other", generation
+        )
+        self.glue_adapter.replace_table_data.assert_not_called()
+        self.s3_adapter.delete_superseded_data.assert_not_called()
+
+    def test_upload_dataset_with_overwrite_behaviour_keeps_previous_data_when_swap_fails(
+        self,
+    ):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        self.valid_schema.metadata.update_behaviour = UpdateBehaviour.OVERWRITE.value
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.table_exists.return_value = True
+        self.glue_adapter.replace_table_data.side_effect = TableUpdateFailsError("Oops")
+
+        with pytest.raises(TableUpdateFailsError):
+            self.data_service.upload_dataset(
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+            )
+
+        self.s3_adapter.delete_superseded_data.assert_not_called()
+        self.s3_adapter.delete_staged_data.assert_not_called()
+
+    def test_upload_dataset_with_upsert_behaviour_merges_rows_by_key(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        self.valid_schema.metadata.update_behaviour = UpdateBehaviour.UPSERT.value
+        self.valid_schema.columns[1].primary_key = True
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.table_exists.return_value = True
+        upsert_service = Mock()
+        upsert_service.upsert_data.return_value = ["colname1=1234"]
+        self.data_service.upsert_service = upsert_service
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv")
+        )
+
+        filename = self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        assert filename == "2022-03-03T12:00:00-data.csv"
+        (
+            upserted_schema,
+            upserted_data,
+            upserted_filename,
+        ) = upsert_service.upsert_data.call_args.args
+        assert upserted_schema == self.valid_schema
+        assert upserted_data["colname2"].tolist() == ["Carlos", "Ada"]
+        assert upserted_filename == "2022-03-03T12:00:00-data.csv"
+        self.s3_adapter.upload_partitioned_data.assert_not_called()
+        self.glue_adapter.create_partitions.assert_called_once_with(
+            "some", "other", ["colname1=1234"]
+        )
+
+    def test_upload_dataset_stored_as_parquet(self):
+        file_contents = set_encoded_content(
+            "colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n"
+        )
+        self.valid_schema.metadata.storage_format = StorageFormat.PARQUET.value
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv")
+        )
+
+        filename = self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(file_contents)
+        )
+
+        assert filename == "2022-03-03T12:00:00-data.parquet"
+        self.s3_adapter.upload_raw_data.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv", ANY
+        )
+        upload_args = self.s3_adapter.upload_partitioned_data.call_args.args
+        assert upload_args[1] == "2022-03-03T12:00:00-data.parquet"
+        self.glue_adapter.start_crawler.assert_called_once_with(
+            RESOURCE_PREFIX, "some", "other"
+        )
+        self.glue_adapter.update_catalog_table_config.assert_not_called()
+
+    def test_upload_dataset_from_parquet_file(self):
+        table = pa.table(
+            {"colname1": pa.array([1234, 4567], pa.int32()), "colname2": ["a", "b"]}
+        )
+        file = BytesIO()
+        pq.write_table(table, file)
+        file.seek(0)
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.parquet")
         )
 
+        filename = self.data_service.upload_dataset(
+            RESOURCE_PREFIX, "some", "other", "data.parquet", file
+        )
+
+        assert filename == "2022-03-03T12:00:00-data.csv"
         self.s3_adapter.upload_raw_data.assert_called_once_with(
-            "some", "other", "2022-03-03T12:00:00-data.csv", file_contents
+            "some", "other", "2022-03-03T12:00:00-data.parquet", ANY
+        )
+        (
+            _,
+            uploaded_filename,
+            partitions,
+        ) = self.s3_adapter.upload_partitioned_data.call_args.args[:3]
+        assert uploaded_filename == "2022-03-03T12:00:00-data.csv"
+        assert [path for path, _ in partitions] == ["colname1=1234", "colname1=4567"]
+        assert partitions[0][1]["colname2"].tolist() == ["a"]
+
+    def test_upload_dataset_reports_parquet_file_with_incorrect_data_types(self):
+        file = BytesIO()
+        pq.write_table(pa.table({"colname1": [1.5], "colname2": ["a"]}), file)
+        file.seek(0)
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        with pytest.raises(DatasetError) as error:
+            self.data_service.upload_dataset(
+                RESOURCE_PREFIX, "some", "other", "data.parquet", file
+            )
+
+        assert error.value.message == [
+            "Column [colname1] has an incorrect data type. Expected Int64, received double"
+        ]
+        self.s3_adapter.upload_raw_data.assert_not_called()
+
+    def test_upload_dataset_from_compressed_file_keeps_compressed_raw_file(self):
+        compressed_contents = gzip.compress(
+            set_encoded_content("colname1,colname2\n" "1234,Carlos\n" "4567,Ada\n")
+        )
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv.gz")
+        )
+        raw_contents = []
+        self.s3_adapter.upload_raw_data.side_effect = (
+            lambda domain, dataset, filename, file: raw_contents.append(file.read())
+        )
+
+        filename = self.data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv.gz",
+            BytesIO(compressed_contents),
+        )
+
+        assert filename == "2022-03-03T12:00:00-data.csv"
+        assert raw_contents == [compressed_contents]
+        self.s3_adapter.upload_raw_data.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv.gz", ANY
+        )
+        (
+            _,
+            uploaded_filename,
+            partitions,
+        ) = self.s3_adapter.upload_partitioned_data.call_args.args[:3]
+        assert uploaded_filename == "2022-03-03T12:00:00-data.csv"
+        assert [path for path, _ in partitions] == ["colname1=1234", "colname1=4567"]
+        record = self.upload_index_service.record_upload.call_args.args[0]
+        assert record.raw_filename == "2022-03-03T12:00:00-data.csv.gz"
+
+    def test_upload_dataset_estimates_memory_of_decompressed_file(self):
+        contents = set_encoded_content("colname1,colname2\n" + "1234,Carlos\n" * 100)
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        upload_admission_service = MagicMock()
+        admitted_sizes = []
+
+        def admit(schema, file, wait):
+            admitted_sizes.append(len(file.read()))
+            file.seek(0)
+            return MagicMock()
+
+        upload_admission_service.admit.side_effect = admit
+        self.data_service.upload_admission_service = upload_admission_service
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv.gz",
+            BytesIO(gzip.compress(contents)),
+        )
+
+        assert admitted_sizes == [len(contents)]
+
+    def test_upload_dataset_invalidates_cached_query_results(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.data_service.query_cache = Mock()
+
+        self.data_service.upload_dataset(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            BytesIO(set_encoded_content("colname1,colname2\n" "1234,Carlos\n")),
+        )
+
+        self.data_service.query_cache.invalidate.assert_called_with("some", "other")
+
+    def test_upload_dataset_invalidates_cached_query_results_when_storing_fails(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.s3_adapter.upload_partitioned_data.side_effect = AWSServiceError(
+            "Upload failed"
+        )
+        self.data_service.query_cache = Mock()
+
+        with pytest.raises(AWSServiceError):
+            self.data_service.upload_dataset(
+                RESOURCE_PREFIX,
+                "some",
+                "other",
+                "data.csv",
+                BytesIO(set_encoded_content("colname1,colname2\n" "1234,Carlos\n")),
+            )
+
+        self.data_service.query_cache.invalidate.assert_called_once_with(
+            "some", "other"
+        )
+
+    # Asynchronous uploads --------------------------
+    def test_upload_dataset_async_queues_job_with_copy_of_file(self):
+        upload_job_service = Mock()
+        job = UploadJob(domain="some", dataset="other", filename="data.csv")
+        upload_job_service.create_job.return_value = job
+        self.data_service.upload_job_service = upload_job_service
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        file = BytesIO(b"colname1,colname2\n1234,Carlos\n")
+
+        result = self.data_service.upload_dataset_async(
+            RESOURCE_PREFIX, "some", "other", "data.csv", file
+        )
+
+        assert result == job
+        upload_job_service.create_job.assert_called_once_with(
+            "some", "other", "data.csv"
+        )
+        upload_job_service.submit_job.assert_called_once_with(job, ANY)
+        self.s3_adapter.upload_raw_data.assert_not_called()
+
+    def test_upload_dataset_async_fails_when_schema_does_not_exist(self):
+        upload_job_service = Mock()
+        self.data_service.upload_job_service = upload_job_service
+        self.s3_adapter.find_schema.return_value = None
+
+        with pytest.raises(SchemaNotFoundError):
+            self.data_service.upload_dataset_async(
+                RESOURCE_PREFIX, "some", "other", "data.csv", BytesIO(b"")
+            )
+
+        upload_job_service.create_job.assert_not_called()
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 1)
+    def test_upload_job_reports_stages_and_progress(self):
+        upload_job_service = Mock()
+        job = UploadJob(domain="some", dataset="other", filename="data.csv")
+        upload_job_service.create_job.return_value = job
+        stages = []
+        upload_job_service.update_job.side_effect = lambda job: stages.append(job.stage)
+        self.data_service.upload_job_service = upload_job_service
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv")
+        )
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        self.data_service.upload_dataset_async(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            BytesIO(b"colname1,colname2\n1234,Carlos\n4567,Ada\n"),
+        )
+        task = upload_job_service.submit_job.call_args.args[1]
+
+        assert task() == "2022-03-03T12:00:00-data.csv"
+        assert list(dict.fromkeys(stages)) == [
+            "VALIDATION",
+            "RAW_FILE_UPLOAD",
+            "DATA_UPLOAD",
+            "CATALOGUE_UPDATE",
+        ]
+        assert job.chunks_uploaded == 2
+        assert job.rows_uploaded == 2
+        assert job.uploaded_filename == "2022-03-03T12:00:00-data.csv"
+
+    @patch("api.application.services.data_service.time.sleep")
+    def test_upload_job_waits_for_crawler_to_be_ready(self, mock_sleep):
+        upload_job_service = Mock()
+        job = UploadJob(domain="some", dataset="other", filename="data.csv")
+        upload_job_service.create_job.return_value = job
+        self.data_service.upload_job_service = upload_job_service
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.check_crawler_is_ready.side_effect = [
+            CrawlerIsNotReadyError("Crawler is running"),
+            None,
+            None,
+        ]
+
+        self.data_service.upload_dataset_async(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            BytesIO(b"colname1,colname2\n1234,Carlos\n"),
+        )
+        upload_job_service.submit_job.call_args.args[1]()
+
+        mock_sleep.assert_called_once()
+        self.s3_adapter.upload_partitioned_data.assert_called_once()
+
+    def test_upload_job_completes_when_crawler_fails_to_start(self):
+        upload_job_service = Mock()
+        job = UploadJob(domain="some", dataset="other", filename="data.csv")
+        upload_job_service.create_job.return_value = job
+        self.data_service.upload_job_service = upload_job_service
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv")
+        )
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.start_crawler.side_effect = CrawlerStartFailsError("error")
+
+        self.data_service.upload_dataset_async(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            "data.csv",
+            BytesIO(b"colname1,colname2\n1234,Carlos\n"),
+        )
+        task = upload_job_service.submit_job.call_args.args[1]
+
+        assert task() == "2022-03-03T12:00:00-data.csv"
+
+    # Batch uploads ---------------------------------
+    def _batch_files(self, *contents: str):
+        self.data_service.generate_raw_filename = (
+            lambda filename: f"2022-03-03T12:00:00-{filename}"
+        )
+        return [
+            (f"data{index}.csv", BytesIO(set_encoded_content(content)))
+            for index, content in enumerate(contents)
+        ]
+
+    def test_upload_datasets_stores_every_file_and_updates_catalogue_once(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.table_exists.return_value = True
+
+        results = self.data_service.upload_datasets(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            self._batch_files(
+                "colname1,colname2\n" "1234,Carlos\n",
+                "colname1,colname2\n" "1234,Ada\n" "4567,Grace\n",
+            ),
+        )
+
+        assert [result.dict() for result in results] == [
+            {
+                "filename": "data0.csv",
+                "status_code": 201,
+                "uploaded": "2022-03-03T12:00:00-data0.csv",
+                "details": None,
+            },
+            {
+                "filename": "data1.csv",
+                "status_code": 201,
+                "uploaded": "2022-03-03T12:00:00-data1.csv",
+                "details": None,
+            },
+        ]
+        self.s3_adapter.find_schema.assert_called_once_with("some", "other")
+        assert self.s3_adapter.upload_raw_data.call_count == 2
+        assert self.s3_adapter.upload_partitioned_data.call_count == 2
+        assert self.upload_index_service.record_upload.call_count == 2
+        (
+            domain,
+            dataset,
+            partition_paths,
+        ) = self.glue_adapter.create_partitions.call_args.args
+        assert (domain, dataset) == ("some", "other")
+        assert sorted(partition_paths) == ["colname1=1234", "colname1=4567"]
+        self.glue_adapter.create_partitions.assert_called_once()
+
+    def test_upload_datasets_checks_and_starts_crawler_once(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.check_crawler_is_ready.return_value = True
+
+        self.data_service.upload_datasets(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            self._batch_files(
+                "colname1,colname2\n" "1234,Carlos\n",
+                "colname1,colname2\n" "4567,Ada\n",
+            ),
+        )
+
+        self.glue_adapter.check_crawler_is_ready.assert_called_once_with(
+            RESOURCE_PREFIX, "some", "other"
+        )
+        self.glue_adapter.start_crawler.assert_called_once_with(
+            RESOURCE_PREFIX, "some", "other"
+        )
+        self.glue_adapter.update_catalog_table_config.assert_called_once_with(
+            "some", "other"
+        )
+
+    def test_upload_datasets_reports_invalid_files_and_stores_the_others(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.table_exists.return_value = True
+
+        results = self.data_service.upload_datasets(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            self._batch_files(
+                "colname1,colname2\n" "1234,\n",
+                "colname1,colname2\n" "4567,Ada\n",
+            ),
+        )
+
+        assert results[0].uploaded is None
+        assert results[0].status_code == 400
+        assert results[0].details
+        assert results[1].uploaded == "2022-03-03T12:00:00-data1.csv"
+        self.s3_adapter.upload_raw_data.assert_called_once()
+        self.upload_index_service.record_upload.assert_called_once()
+        self.glue_adapter.create_partitions.assert_called_once_with(
+            "some", "other", ["colname1=4567"]
+        )
+
+    def test_upload_datasets_reports_unexpected_failures_of_a_file(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.s3_adapter.upload_raw_data.side_effect = Exception("S3 is down")
+
+        (result,) = self.data_service.upload_datasets(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            self._batch_files("colname1,colname2\n" "1234,Carlos\n"),
+        )
+
+        assert result.dict() == {
+            "filename": "data0.csv",
+            "status_code": 500,
+            "uploaded": None,
+            "details": "Something went wrong. Contact your administrator.",
+        }
+        self.glue_adapter.start_crawler.assert_not_called()
+
+    def test_upload_datasets_returns_previous_uploads_without_processing_them(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.upload_index_service.find_previous_upload.return_value = UploadRecord(
+            domain="some",
+            dataset="other",
+            content_hash="abc123",
+            raw_filename="2022-01-01T12:00:00-data.csv",
+            uploaded_filename="2022-01-01T12:00:00-data.csv",
+        )
+
+        (result,) = self.data_service.upload_datasets(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            self._batch_files("colname1,colname2\n" "1234,Carlos\n"),
+        )
+
+        assert result.uploaded == "2022-01-01T12:00:00-data.csv"
+        assert result.status_code == 200
+        self.s3_adapter.upload_partitioned_data.assert_not_called()
+        self.glue_adapter.start_crawler.assert_not_called()
+        self.glue_adapter.create_partitions.assert_not_called()
+
+    def test_upload_datasets_fails_when_crawler_is_not_ready(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.check_crawler_is_ready.side_effect = CrawlerIsNotReadyError(
+            "Crawler is running"
+        )
+
+        with pytest.raises(CrawlerIsNotReadyError):
+            self.data_service.upload_datasets(
+                RESOURCE_PREFIX,
+                "some",
+                "other",
+                self._batch_files("colname1,colname2\n" "1234,Carlos\n"),
+            )
+
+        self.s3_adapter.upload_raw_data.assert_not_called()
+
+    def test_upload_datasets_returns_results_when_crawler_fails_to_start(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.glue_adapter.start_crawler.side_effect = CrawlerStartFailsError("error")
+
+        (result,) = self.data_service.upload_datasets(
+            RESOURCE_PREFIX,
+            "some",
+            "other",
+            self._batch_files("colname1,colname2\n" "1234,Carlos\n"),
+        )
+
+        assert result.uploaded == "2022-03-03T12:00:00-data0.csv"
+
+    def test_upload_datasets_fails_when_schema_does_not_exist(self):
+        self.s3_adapter.find_schema.return_value = None
+
+        with pytest.raises(SchemaNotFoundError):
+            self.data_service.upload_datasets(
+                RESOURCE_PREFIX,
+                "some",
+                "other",
+                self._batch_files("colname1,colname2\n" "1234,Carlos\n"),
+            )
+
+    def test_upload_datasets_rejects_datasets_with_overwrite_behaviour(self):
+        self.valid_schema.metadata.update_behaviour = UpdateBehaviour.OVERWRITE.value
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        with pytest.raises(UserError, match="OVERWRITE"):
+            self.data_service.upload_datasets(
+                RESOURCE_PREFIX,
+                "some",
+                "other",
+                self._batch_files("colname1,colname2\n" "1234,Carlos\n"),
+            )
+
+        self.glue_adapter.table_exists.assert_not_called()
+
+    def test_upload_datasets_rejects_files_with_the_same_name(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        file_contents = set_encoded_content("colname1,colname2\n" "1234,Carlos\n")
+
+        with pytest.raises(UserError, match="different names"):
+            self.data_service.upload_datasets(
+                RESOURCE_PREFIX,
+                "some",
+                "other",
+                [
+                    ("data.csv", BytesIO(file_contents)),
+                    ("data.csv", BytesIO(file_contents)),
+                ],
+            )
+
+        self.s3_adapter.upload_raw_data.assert_not_called()
+
+    # Presigned uploads -----------------------------
+    @patch("api.application.services.data_service.PRESIGNED_UPLOAD_URL_EXPIRY", 600)
+    def test_generate_upload_url(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.s3_adapter.generate_raw_data_upload_url.return_value = "https://url"
+        self.data_service.generate_raw_filename = Mock(
+            return_value=("2022-03-03T12:00:00-data.csv")
+        )
+
+        upload = self.data_service.generate_upload_url("some", "other", "data.csv")
+
+        assert upload.dict() == {
+            "filename": "2022-03-03T12:00:00-data.csv",
+            "upload_url": "https://url",
+            "expires_in": 600,
+        }
+        self.s3_adapter.generate_raw_data_upload_url.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv", 600
+        )
+
+    def test_generate_upload_url_fails_when_schema_does_not_exist(self):
+        self.s3_adapter.find_schema.return_value = None
+
+        with pytest.raises(SchemaNotFoundError):
+            self.data_service.generate_upload_url("some", "other", "data.csv")
+
+        self.s3_adapter.generate_raw_data_upload_url.assert_not_called()
+
+    def test_generate_upload_url_rejects_invalid_file_names(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        with pytest.raises(UserError, match="Invalid file name"):
+            self.data_service.generate_upload_url("some", "other", "../data.csv")
+
+        self.s3_adapter.generate_raw_data_upload_url.assert_not_called()
+
+    def _store_uploaded_file(self, content: bytes):
+        self.s3_adapter.download_raw_data.side_effect = (
+            lambda domain, dataset, filename, file: file.write(content)
+        )
+
+    def test_process_uploaded_file(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self._store_uploaded_file(b"colname1,colname2\n1234,Carlos\n4567,Ada\n")
+
+        filename = self.data_service.process_uploaded_file(
+            RESOURCE_PREFIX, "some", "other", "2022-03-03T12:00:00-data.csv"
+        )
+
+        assert filename == "2022-03-03T12:00:00-data.csv"
+        self.s3_adapter.find_raw_file.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv"
+        )
+        self.s3_adapter.download_raw_data.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv", ANY
+        )
+        self.s3_adapter.upload_raw_data.assert_not_called()
+        (
+            _,
+            uploaded_filename,
+            partitions,
+        ) = self.s3_adapter.upload_partitioned_data.call_args.args[:3]
+        assert uploaded_filename == "2022-03-03T12:00:00-data.csv"
+        assert [path for path, _ in partitions] == ["colname1=1234", "colname1=4567"]
+        record = self.upload_index_service.record_upload.call_args.args[0]
+        assert record.raw_filename == "2022-03-03T12:00:00-data.csv"
+
+    def test_process_uploaded_file_deletes_invalid_files(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self._store_uploaded_file(b"colname1,colname2\n1234,\n")
+
+        with pytest.raises(DatasetError):
+            self.data_service.process_uploaded_file(
+                RESOURCE_PREFIX, "some", "other", "2022-03-03T12:00:00-data.csv"
+            )
+
+        self.s3_adapter.delete_raw_data.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv"
+        )
+        self.s3_adapter.upload_partitioned_data.assert_not_called()
+
+    def test_process_uploaded_file_deletes_files_that_were_already_uploaded(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self._store_uploaded_file(b"colname1,colname2\n1234,Carlos\n")
+        self.upload_index_service.find_previous_upload.return_value = UploadRecord(
+            domain="some",
+            dataset="other",
+            content_hash="abc123",
+            raw_filename="2022-03-01T12:00:00-data.csv",
+            uploaded_filename="2022-03-01T12:00:00-data.csv",
+        )
+
+        filename = self.data_service.process_uploaded_file(
+            RESOURCE_PREFIX, "some", "other", "2022-03-03T12:00:00-data.csv"
         )
 
+        assert filename == "2022-03-01T12:00:00-data.csv"
+        self.s3_adapter.delete_raw_data.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv"
+        )
+        self.s3_adapter.upload_partitioned_data.assert_not_called()
+
+    def test_process_uploaded_file_keeps_files_that_were_processed_before(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self._store_uploaded_file(b"colname1,colname2\n1234,Carlos\n")
+        self.upload_index_service.find_previous_upload.return_value = UploadRecord(
+            domain="some",
+            dataset="other",
+            content_hash="abc123",
+            raw_filename="2022-03-03T12:00:00-data.csv",
+            uploaded_filename="2022-03-03T12:00:00-data.csv",
+        )
+
+        self.data_service.process_uploaded_file(
+            RESOURCE_PREFIX, "some", "other", "2022-03-03T12:00:00-data.csv"
+        )
+
+        self.s3_adapter.delete_raw_data.assert_not_called()
+
+    def test_process_uploaded_file_fails_when_file_does_not_exist(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self.s3_adapter.find_raw_file.side_effect = UserError(
+            "The file [2022-03-03T12:00:00-data.csv] does not exist"
+        )
+
+        with pytest.raises(UserError, match="does not exist"):
+            self.data_service.process_uploaded_file(
+                RESOURCE_PREFIX, "some", "other", "2022-03-03T12:00:00-data.csv"
+            )
+
+        self.s3_adapter.download_raw_data.assert_not_called()
+
+    def test_process_uploaded_file_rejects_invalid_file_names(self):
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+
+        with pytest.raises(UserError, match="Invalid file name"):
+            self.data_service.process_uploaded_file(
+                RESOURCE_PREFIX, "some", "other", "../other/data.csv"
+            )
+
+        self.s3_adapter.find_raw_file.assert_not_called()
+
+    def test_process_uploaded_file_async_queues_job(self):
+        upload_job_service = Mock()
+        job = UploadJob(
+            domain="some", dataset="other", filename="2022-03-03T12:00:00-data.csv"
+        )
+        upload_job_service.create_job.return_value = job
+        self.data_service.upload_job_service = upload_job_service
+        self.s3_adapter.find_schema.return_value = self.valid_schema
+        self._store_uploaded_file(b"colname1,colname2\n1234,Carlos\n")
+
+        result = self.data_service.process_uploaded_file_async(
+            RESOURCE_PREFIX, "some", "other", "2022-03-03T12:00:00-data.csv"
+        )
+        task = upload_job_service.submit_job.call_args.args[1]
+
+        assert result == job
+        upload_job_service.create_job.assert_called_once_with(
+            "some", "other", "2022-03-03T12:00:00-data.csv"
+        )
+        self.s3_adapter.download_raw_data.assert_not_called()
+        assert task() == "2022-03-03T12:00:00-data.csv"
+        self.s3_adapter.upload_raw_data.assert_not_called()
+
+    def test_get_upload_job(self):
+        upload_job_service = Mock()
+        self.data_service.upload_job_service = upload_job_service
+
+        self.data_service.get_upload_job("some", "other", "1234")
+
+        upload_job_service.get_job.assert_called_once_with("some", "other", "1234")
+
+    def test_generate_chunk_filename(self):
+        assert self.data_service.generate_chunk_filename("data.csv", 0) == "data.csv"
+        assert self.data_service.generate_chunk_filename("data.csv", 3) == "3-data.csv"
+
     def test_list_raw_files_from_domain_and_dataset(self):
         self.s3_adapter.list_raw_files.return_value = [
             "2022-01-01T12:00:00-my_first_file.csv",
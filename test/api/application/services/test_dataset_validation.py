@@ -1,7 +1,11 @@
 import re
+from io import BytesIO
 from typing import List
+from unittest.mock import patch
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
 from api.application.services.dataset_validation import (
@@ -15,11 +19,19 @@ from api.application.services.dataset_validation import (
     dataset_has_correct_data_types,
     dataset_has_no_illegal_characters_in_partition_columns,
     transform_and_validate,
+    validate_dataframe_chunks,
+    get_validated_dataframe_chunks,
+    select_ingest_engine,
+    IngestEngine,
+    use_parallel_validation,
+    reset_validation_process_pool,
+    validate_chunks,
 )
 from api.common.custom_exceptions import DatasetError, UserError
 from api.domain.data_types import DataTypes
 from api.domain.schema import Schema, Column
 from api.domain.schema_metadata import Owner, SchemaMetadata
+from api.domain.upload_format import UploadFormat
 from test.test_utils import set_encoded_content
 
 
@@ -916,3 +928,408 @@ class TestDatasetTransformation:
                 "Failed to convert [col3] to [Float64]",
                 "Failed to convert [col4] to [boolean]",
             ]
+
+
+class TestChunkedDatasetValidation:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=False,
+                ),
+            ],
+        )
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_yields_validated_dataframe_per_chunk(self):
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2\n" "1,Carlos\n" "2,Ada\n" "3,Grace\n"
+            )
+        )
+
+        chunks = list(get_validated_dataframe_chunks(self.schema, file))
+
+        assert len(chunks) == 2
+        assert list(chunks[0]["colname1"]) == [1, 2]
+        assert list(chunks[1]["colname1"]) == [3]
+        assert chunks[1]["colname1"].dtype == "Int64"
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_validates_all_chunks_successfully(self):
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2\n" "1,Carlos\n" "2,Ada\n" "3,Grace\n"
+            )
+        )
+
+        validate_dataframe_chunks(self.schema, file)
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_reads_text_columns_as_text_in_every_chunk(self):
+        file = BytesIO(
+            set_encoded_content(
+                "Colname1,Colname2\n" "1,Carlos\n" "2,Ada\n" "3,3\n" "4,04\n"
+            )
+        )
+
+        validate_chunks(self.schema, file, IngestEngine.PANDAS)
+        file.seek(0)
+        chunks = list(
+            get_validated_dataframe_chunks(self.schema, file, IngestEngine.PANDAS)
+        )
+
+        assert [list(chunk["colname2"]) for chunk in chunks] == [
+            ["Carlos", "Ada"],
+            ["3", "04"],
+        ]
+        assert all(chunk["colname1"].dtype == "Int64" for chunk in chunks)
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_aggregates_errors_across_chunks(self):
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2\n"
+                "1,Carlos\n"
+                "2,\n"
+                "3,Grace\n"
+                "4,Alan\n"
+                ",Linus\n"
+                "6,\n"
+            )
+        )
+
+        with pytest.raises(DatasetError) as error:
+            validate_dataframe_chunks(self.schema, file)
+
+        assert error.value.message == [
+            "Column [colname2] does not allow null values",
+            "Column [colname1] does not allow null values",
+        ]
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_raises_structural_error_without_reading_further_chunks(self):
+        file = BytesIO(
+            set_encoded_content(
+                "wrongcolumn,colname2\n" "1,Carlos\n" "2,Ada\n" "3,Grace\n"
+            )
+        )
+
+        with pytest.raises(
+            DatasetError,
+            match="Expected columns: \\['colname1', 'colname2'\\], received: \\['wrongcolumn', 'colname2'\\]",
+        ):
+            validate_dataframe_chunks(self.schema, file)
+
+    def test_validates_with_arrow_engine_by_default(self):
+        file = BytesIO(set_encoded_content("colname1,colname2\n" "1,Carlos\n"))
+
+        assert validate_dataframe_chunks(self.schema, file) == IngestEngine.ARROW
+
+    @pytest.mark.parametrize("engine", [IngestEngine.ARROW, IngestEngine.PANDAS])
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_both_engines_yield_the_same_chunks(self, engine):
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2\n" "1,Carlos\n" "2,Ada\n" ",\n" "3,Grace\n"
+            )
+        )
+
+        chunks = list(get_validated_dataframe_chunks(self.schema, file, engine))
+
+        assert [list(chunk["colname1"]) for chunk in chunks] == [[1, 2], [3]]
+        assert [list(chunk["colname2"]) for chunk in chunks] == [
+            ["Carlos", "Ada"],
+            ["Grace"],
+        ]
+        assert all(chunk["colname1"].dtype == "Int64" for chunk in chunks)
+
+    def test_falls_back_to_pandas_engine_when_arrow_cannot_parse_values(self):
+        file = BytesIO(
+            set_encoded_content("colname1,colname2\n" "1,Carlos\n" "2.0,Ada\n")
+        )
+
+        assert validate_dataframe_chunks(self.schema, file) == IngestEngine.PANDAS
+
+    def test_reports_pandas_engine_errors_when_arrow_cannot_parse_values(self):
+        file = BytesIO(
+            set_encoded_content("colname1,colname2\n" "1,Carlos\n" "abc,Ada\n")
+        )
+
+        with pytest.raises(DatasetError) as error:
+            validate_dataframe_chunks(self.schema, file)
+
+        assert error.value.message == [
+            "Failed to convert column [colname1] to type [Int64]",
+            "Column [colname1] has an incorrect data type. Expected Int64, received object",
+        ]
+
+    @patch(
+        "api.application.services.dataset_validation.DATASET_INGEST_ENGINE", "PANDAS"
+    )
+    def test_selects_configured_ingest_engine(self):
+        assert select_ingest_engine(self.schema) == IngestEngine.PANDAS
+
+    def test_selects_pandas_engine_when_date_column_has_no_format(self):
+        self.schema.columns.append(
+            Column(
+                name="colname3",
+                partition_index=None,
+                data_type="date",
+                allow_null=True,
+                format=None,
+            )
+        )
+
+        assert select_ingest_engine(self.schema) == IngestEngine.PANDAS
+
+    @pytest.mark.parametrize(
+        "date_format, value, expected",
+        [
+            ("%Y%m", "202103", "2021-03-01"),
+            ("%Y", "2021", "2021-01-01"),
+            ("%b %Y", "Mar 2021", "2021-03-01"),
+        ],
+    )
+    def test_validates_dates_without_day_or_separator_with_arrow_engine(
+        self, date_format, value, expected
+    ):
+        self.schema.columns.append(
+            Column(
+                name="colname3",
+                partition_index=None,
+                data_type="date",
+                allow_null=True,
+                format=date_format,
+            )
+        )
+        file = BytesIO(
+            set_encoded_content(f"colname1,colname2,colname3\n1,Carlos,{value}\n")
+        )
+
+        engine = validate_dataframe_chunks(self.schema, file)
+        file.seek(0)
+        chunks = list(get_validated_dataframe_chunks(self.schema, file, engine))
+
+        assert engine == IngestEngine.ARROW
+        assert list(chunks[0]["colname3"]) == [expected]
+
+    @pytest.mark.parametrize("engine", [IngestEngine.ARROW, IngestEngine.PANDAS])
+    def test_validates_dates_followed_by_a_time_with_both_engines(self, engine):
+        self.schema.columns.append(
+            Column(
+                name="colname3",
+                partition_index=None,
+                data_type="date",
+                allow_null=True,
+                format="%Y-%m-%d",
+            )
+        )
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2,colname3\n"
+                "1,Carlos,2020-01-01 10:00:00\n"
+                "2,Ada,2020-01-02\n"
+            )
+        )
+
+        validate_chunks(self.schema, file, engine)
+        file.seek(0)
+        chunks = list(get_validated_dataframe_chunks(self.schema, file, engine))
+
+        assert list(chunks[0]["colname3"]) == ["2020-01-01", "2020-01-02"]
+
+    def test_validates_dates_followed_by_a_time_with_default_engine(self):
+        self.schema.columns.append(
+            Column(
+                name="colname3",
+                partition_index=None,
+                data_type="date",
+                allow_null=True,
+                format="%Y-%m-%d",
+            )
+        )
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2,colname3\n1,Carlos,2020-01-01 10:00:00\n"
+            )
+        )
+
+        assert validate_dataframe_chunks(self.schema, file) == IngestEngine.ARROW
+
+    def _parquet_file(self, table: pa.Table) -> BytesIO:
+        file = BytesIO()
+        pq.write_table(table, file)
+        file.seek(0)
+        return file
+
+    @pytest.mark.parametrize(
+        "upload_format, engine",
+        [
+            (UploadFormat.PARQUET, IngestEngine.PARQUET),
+            (UploadFormat.ARROW, IngestEngine.ARROW_STREAM),
+        ],
+    )
+    def test_selects_ingest_engine_of_typed_files(self, upload_format, engine):
+        assert select_ingest_engine(self.schema, upload_format) == engine
+
+    @patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+    def test_validates_parquet_files_without_parsing_text(self):
+        file = self._parquet_file(
+            pa.table(
+                {
+                    "colname1": pa.array([1, 2, None, 3], pa.int32()),
+                    "colname2": ["Carlos", "Ada", None, "Grace"],
+                }
+            )
+        )
+
+        engine = validate_dataframe_chunks(self.schema, file, UploadFormat.PARQUET)
+        file.seek(0)
+        chunks = list(get_validated_dataframe_chunks(self.schema, file, engine))
+
+        assert engine == IngestEngine.PARQUET
+        assert [list(chunk["colname1"]) for chunk in chunks] == [[1, 2], [3]]
+        assert all(chunk["colname1"].dtype == "Int64" for chunk in chunks)
+
+    def test_aggregates_errors_of_parquet_files(self):
+        file = self._parquet_file(
+            pa.table({"colname1": pa.array([1, 2]), "colname2": ["Carlos", None]})
+        )
+
+        with pytest.raises(DatasetError) as error:
+            validate_dataframe_chunks(self.schema, file, UploadFormat.PARQUET)
+
+        assert error.value.message == ["Column [colname2] does not allow null values"]
+
+    def test_raises_error_when_typed_file_cannot_be_read(self):
+        file = BytesIO(set_encoded_content("colname1,colname2\n" "1,Carlos\n"))
+
+        with pytest.raises(DatasetError, match="could not be read as PARQUET"):
+            validate_dataframe_chunks(self.schema, file, UploadFormat.PARQUET)
+
+
+@patch("api.application.services.dataset_validation.VALIDATION_WORKERS", 2)
+@patch("api.application.services.dataset_validation.PARALLEL_VALIDATION_THRESHOLD", 0)
+@patch("api.application.services.dataset_validation.DATASET_ROWS_PER_CHUNK", 2)
+class TestParallelChunkValidation:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                domain="test_domain",
+                dataset="test_dataset",
+                sensitivity="PUBLIC",
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=False,
+                ),
+            ],
+        )
+
+    @classmethod
+    def teardown_class(cls):
+        reset_validation_process_pool()
+
+    @pytest.mark.parametrize("engine", [IngestEngine.ARROW, IngestEngine.PANDAS])
+    def test_yields_validated_chunks_in_order(self, engine):
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2\n"
+                "1,Carlos\n"
+                "2,Ada\n"
+                "3,Grace\n"
+                "4,Alan\n"
+                "5,Linus\n"
+            )
+        )
+
+        chunks = list(get_validated_dataframe_chunks(self.schema, file, engine))
+
+        assert [list(chunk["colname1"]) for chunk in chunks] == [[1, 2], [3, 4], [5]]
+        assert all(chunk["colname1"].dtype == "Int64" for chunk in chunks)
+
+    def test_aggregates_errors_across_chunks_validated_in_parallel(self):
+        file = BytesIO(
+            set_encoded_content(
+                "colname1,colname2\n"
+                "1,Carlos\n"
+                "2,\n"
+                "3,Grace\n"
+                "4,Alan\n"
+                ",Linus\n"
+                "6,\n"
+            )
+        )
+
+        with pytest.raises(DatasetError) as error:
+            validate_dataframe_chunks(self.schema, file)
+
+        assert error.value.message == [
+            "Column [colname2] does not allow null values",
+            "Column [colname1] does not allow null values",
+        ]
+
+    def test_raises_structural_error_from_parallel_validation(self):
+        file = BytesIO(
+            set_encoded_content(
+                "wrongcolumn,colname2\n" "1,Carlos\n" "2,Ada\n" "3,Grace\n"
+            )
+        )
+
+        with pytest.raises(DatasetError, match="Expected columns"):
+            validate_chunks(self.schema, file, IngestEngine.PANDAS)
+
+
+class TestParallelValidationSelection:
+    @patch("api.application.services.dataset_validation.VALIDATION_WORKERS", 4)
+    @patch(
+        "api.application.services.dataset_validation.PARALLEL_VALIDATION_THRESHOLD", 10
+    )
+    def test_validates_files_from_the_threshold_size_in_parallel(self):
+        assert use_parallel_validation(BytesIO(b"0123456789")) is True
+        assert use_parallel_validation(BytesIO(b"012345678")) is False
+
+    @patch("api.application.services.dataset_validation.VALIDATION_WORKERS", 1)
+    @patch(
+        "api.application.services.dataset_validation.PARALLEL_VALIDATION_THRESHOLD", 0
+    )
+    def test_does_not_validate_in_parallel_with_a_single_worker(self):
+        assert use_parallel_validation(BytesIO(b"0123456789")) is False
+
+    @patch("api.application.services.dataset_validation.VALIDATION_WORKERS", 4)
+    @patch(
+        "api.application.services.dataset_validation.PARALLEL_VALIDATION_THRESHOLD", 0
+    )
+    def test_keeps_file_position_when_checking_its_size(self):
+        file = BytesIO(b"0123456789")
+        file.seek(3)
+
+        use_parallel_validation(file)
+
+        assert file.tell() == 3
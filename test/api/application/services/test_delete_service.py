@@ -1,4 +1,4 @@
-from unittest.mock import Mock
+from unittest.mock import Mock, MagicMock
 
 import pytest
 
@@ -7,15 +7,25 @@ from api.common.config.aws import RESOURCE_PREFIX
 from api.common.custom_exceptions import (
     CrawlerIsNotReadyError,
     CrawlerStartFailsError,
+    ConflictError,
     UserError,
 )
+from api.domain.schema import Schema
+from api.domain.schema_metadata import SchemaMetadata, UpdateBehaviour
 
 
 class TestDeleteService:
     def setup_method(self):
         self.s3_adapter = Mock()
         self.glue_adapter = Mock()
-        self.delete_service = DeleteService(self.s3_adapter, self.glue_adapter)
+        self.compaction_service = MagicMock()
+        self.query_cache = Mock()
+        self.delete_service = DeleteService(
+            self.s3_adapter,
+            self.glue_adapter,
+            self.compaction_service,
+            self.query_cache,
+        )
 
     def test_delete_schema(self):
         self.delete_service.delete_schema("domain", "dataset", "PUBLIC")
@@ -41,6 +51,60 @@ class TestDeleteService:
             RESOURCE_PREFIX, "domain", "dataset"
         )
 
+    def test_delete_file_invalidates_cached_query_results(self):
+        self.delete_service.delete_dataset_file(
+            RESOURCE_PREFIX, "domain", "dataset", "2022-01-01T00:00:00-file.csv"
+        )
+
+        self.query_cache.invalidate.assert_called_once_with("domain", "dataset")
+
+    def test_delete_file_removes_its_rows_from_compacted_files(self):
+        schema = self.s3_adapter.find_schema.return_value
+
+        self.delete_service.delete_dataset_file(
+            RESOURCE_PREFIX, "domain", "dataset", "2022-01-01T00:00:00-file.csv"
+        )
+
+        self.compaction_service.dataset_lock.assert_called_once_with(
+            "domain", "dataset"
+        )
+        self.compaction_service.remove_compacted_rows.assert_called_once_with(
+            schema, "2022-01-01T00:00:00-file.csv"
+        )
+
+    def test_delete_file_is_rejected_while_the_dataset_is_compacted(self):
+        self.compaction_service.dataset_lock.side_effect = ConflictError(
+            "The dataset [domain/dataset] is being compacted"
+        )
+
+        with pytest.raises(ConflictError):
+            self.delete_service.delete_dataset_file(
+                RESOURCE_PREFIX, "domain", "dataset", "2022-01-01T00:00:00-file.csv"
+            )
+
+        self.s3_adapter.delete_dataset_files.assert_not_called()
+
+    def test_delete_file_is_rejected_for_upsert_datasets(self):
+        self.s3_adapter.find_schema.return_value = Schema(
+            metadata=SchemaMetadata(
+                domain="domain",
+                dataset="dataset",
+                sensitivity="PUBLIC",
+                update_behaviour=UpdateBehaviour.UPSERT.value,
+            ),
+            columns=[],
+        )
+
+        with pytest.raises(
+            UserError,
+            match="Files cannot be deleted from datasets with the UPSERT update behaviour",
+        ):
+            self.delete_service.delete_dataset_file(
+                RESOURCE_PREFIX, "domain", "dataset", "2022-01-01T00:00:00-file.csv"
+            )
+
+        self.s3_adapter.delete_dataset_files.assert_not_called()
+
     def test_delete_file_when_file_does_not_exist(self):
         self.s3_adapter.find_raw_file.side_effect = UserError("Some message")
 
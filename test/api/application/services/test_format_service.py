@@ -1,4 +1,9 @@
+import io
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
 
 from api.application.services.format_service import FormatService
 from api.domain.mime_type import MimeType
@@ -20,3 +25,116 @@ class TestFormatService:
             0: {"area": "area_1", "column1": 1, "column2": "item1"},
             1: {"area": "area_2", "column1": 2, "column2": "item2"},
         }
+
+    def test_format_chunks_to_csv(self):
+        chunks = [self.df.iloc[:1], self.df.iloc[1:]]
+
+        output = FormatService.from_chunks_to_mimetype(chunks, MimeType.TEXT_CSV)
+
+        assert "".join(output) == FormatService.from_df_to_mimetype(
+            self.df, MimeType.TEXT_CSV
+        )
+
+    def test_format_chunks_to_csv_with_header_when_first_chunk_is_empty(self):
+        chunks = [self.df.iloc[:0], self.df.iloc[:1]]
+
+        output = list(FormatService.from_chunks_to_mimetype(chunks, MimeType.TEXT_CSV))
+
+        assert output == [
+            '"","column1","column2","area"\n',
+            '0,1,"item1","area_1"\n',
+        ]
+
+    def test_format_chunks_to_ndjson(self):
+        chunks = [self.df.iloc[:1], self.df.iloc[:0], self.df.iloc[1:]]
+
+        output = FormatService.from_chunks_to_mimetype(
+            chunks, MimeType.APPLICATION_NDJSON
+        )
+
+        assert list(output) == [
+            '{"column1":1,"column2":"item1","area":"area_1"}\n',
+            '{"column1":2,"column2":"item2","area":"area_2"}\n',
+        ]
+
+    def test_format_to_arrow_stream(self):
+        output = FormatService.from_df_to_mimetype(
+            self.df, MimeType.APPLICATION_ARROW_STREAM
+        )
+
+        table = pa.ipc.open_stream(output).read_all()
+        assert table.schema.types == [pa.int64(), pa.string(), pa.string()]
+        assert table.to_pandas().equals(self.df)
+
+    def test_format_to_parquet(self):
+        output = FormatService.from_df_to_mimetype(
+            self.df, MimeType.APPLICATION_PARQUET
+        )
+
+        table = pq.read_table(io.BytesIO(output))
+        assert table.schema.types == [pa.int64(), pa.string(), pa.string()]
+        assert table.to_pandas().equals(self.df)
+
+    def test_format_to_columnar_keeps_dataframe_index(self):
+        df = self.df.set_index(pd.Index([5, 6]))
+
+        FormatService.from_df_to_mimetype(df, MimeType.APPLICATION_PARQUET)
+
+        assert list(df.index) == [5, 6]
+
+    def test_format_chunks_to_arrow_stream_as_record_batches(self):
+        chunks = [self.df.iloc[:1], self.df.iloc[:0], self.df.iloc[1:]]
+
+        output = list(
+            FormatService.from_chunks_to_mimetype(
+                chunks, MimeType.APPLICATION_ARROW_STREAM
+            )
+        )
+
+        assert len(output) == 3
+        reader = pa.ipc.open_stream(b"".join(output))
+        assert [batch.num_rows for batch in reader] == [1, 1]
+
+    def test_format_chunks_to_parquet_as_row_groups(self):
+        chunks = [self.df.iloc[:1], self.df.iloc[1:]]
+
+        output = list(
+            FormatService.from_chunks_to_mimetype(chunks, MimeType.APPLICATION_PARQUET)
+        )
+
+        assert len(output) == 3
+        parquet_file = pq.ParquetFile(io.BytesIO(b"".join(output)))
+        assert parquet_file.metadata.num_row_groups == 2
+        assert parquet_file.read().to_pandas().equals(self.df)
+
+    def test_format_chunks_to_columnar_with_the_types_of_the_first_chunk(self):
+        chunks = [
+            pd.DataFrame({"column1": [1], "column2": ["item1"]}),
+            pd.DataFrame({"column1": [None], "column2": [None]}),
+        ]
+
+        output = FormatService.from_chunks_to_mimetype(
+            chunks, MimeType.APPLICATION_ARROW_STREAM
+        )
+
+        table = pa.ipc.open_stream(b"".join(output)).read_all()
+        assert table.schema.types == [pa.int64(), pa.string()]
+        assert table.column("column1").to_pylist() == [1, None]
+
+    @pytest.mark.parametrize(
+        "mime_type, read",
+        [
+            (
+                MimeType.APPLICATION_ARROW_STREAM,
+                lambda output: pa.ipc.open_stream(output).read_all(),
+            ),
+            (
+                MimeType.APPLICATION_PARQUET,
+                lambda output: pq.read_table(io.BytesIO(output)),
+            ),
+        ],
+    )
+    def test_format_no_chunks_to_empty_columnar_result(self, mime_type, read):
+        output = FormatService.from_chunks_to_mimetype([], mime_type)
+
+        assert read(b"".join(output)).num_rows == 0
@@ -1,9 +1,12 @@
+import numpy as np
 import pandas as pd
 
 from api.application.services.partitioning_service import (
     generate_path,
     drop_columns,
     generate_partitioned_data,
+    partition_group_codes,
+    partitioned_dataframe,
 )
 from api.domain.schema import Column, Schema
 from api.domain.schema_metadata import Owner, SchemaMetadata
@@ -17,6 +20,13 @@ class TestPartitioningUtilities:
         expected = "first=123/second=456/third=789"
         assert result == expected
 
+    def test_partition_group_codes_follow_the_sort_order_of_values(self):
+        result = partition_group_codes(
+            [np.array([1, 0, 1, 0, 1]), np.array([0, 2, 0, 1, 3])]
+        )
+
+        assert result.tolist() == [2, 1, 2, 0, 3]
+
 
 class TestDropColumns:
     def test_drops_columns(self):
@@ -177,3 +187,38 @@ class TestPartitioning:
         for (result_path, result_df), (expected_path, expected_df) in test_combos:
             assert result_path == expected_path
             assert result_df.equals(expected_df)
+
+    def test_partitions_are_slices_that_keep_the_order_of_rows(self):
+        df = pd.DataFrame(
+            {
+                "col1": ["b", "a", "b", "a", "b"],
+                "col2": [1, 2, 3, 4, 5],
+            },
+            index=[10, 11, 12, 13, 14],
+        )
+
+        result = partitioned_dataframe(df, ["col1"])
+
+        assert [path for path, _ in result] == ["col1=a", "col1=b"]
+        pd.testing.assert_frame_equal(result[0][1], pd.DataFrame({"col2": [2, 4]}))
+        pd.testing.assert_frame_equal(result[1][1], pd.DataFrame({"col2": [1, 3, 5]}))
+        assert result[1][1]["col2"].to_numpy().base is not None
+
+    def test_drops_rows_without_partition_values(self):
+        df = pd.DataFrame(
+            {
+                "col1": pd.array([1, None, 1], dtype="Int64"),
+                "col2": ["x", "y", None],
+                "col3": [1, 2, 3],
+            }
+        )
+
+        result = partitioned_dataframe(df, ["col1", "col2"])
+
+        assert [path for path, _ in result] == ["col1=1/col2=x"]
+        pd.testing.assert_frame_equal(result[0][1], pd.DataFrame({"col3": [1]}))
+
+    def test_handles_data_without_rows(self):
+        df = pd.DataFrame({"col1": pd.array([], dtype="Int64"), "col2": []})
+
+        assert partitioned_dataframe(df, ["col1"]) == []
@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+from api.application.services.query_cache import QueryCache, normalise_sql
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def result(rows: int = 1) -> pd.DataFrame:
+    return pd.DataFrame({"colname1": ["value"] * rows})
+
+
+class TestQueryCache:
+    def setup_method(self):
+        self.clock = FakeClock()
+        self.query_cache = QueryCache(max_size=10_000, ttl=60, clock=self.clock)
+
+    def test_returns_cached_result(self):
+        key = self.query_cache.key("domain", "dataset", "SELECT * FROM table")
+        cached_result = result()
+
+        self.query_cache.put(key, cached_result)
+
+        assert self.query_cache.get(key) is cached_result
+
+    def test_returns_none_for_queries_not_cached(self):
+        key = self.query_cache.key("domain", "dataset", "SELECT * FROM table")
+
+        assert self.query_cache.get(key) is None
+
+    def test_keys_of_queries_differing_in_whitespace_are_equal(self):
+        assert self.query_cache.key(
+            "domain", "dataset", "SELECT *  FROM table\nWHERE a = 1"
+        ) == self.query_cache.key(
+            "domain", "dataset", "SELECT * FROM table WHERE a = 1"
+        )
+
+    def test_results_expire_after_ttl(self):
+        key = self.query_cache.key("domain", "dataset", "SELECT * FROM table")
+        self.query_cache.put(key, result())
+
+        self.clock.now = 59
+        assert self.query_cache.get(key) is not None
+        self.clock.now = 60
+        assert self.query_cache.get(key) is None
+
+    def test_evicts_least_recently_used_results_when_full(self):
+        size = int(result(100).memory_usage(index=True, deep=True).sum())
+        query_cache = QueryCache(max_size=size * 2, ttl=60, clock=self.clock)
+        first, second, third = [
+            query_cache.key("domain", "dataset", f"SELECT {column} FROM table")
+            for column in ("a", "b", "c")
+        ]
+        query_cache.put(first, result(100))
+        query_cache.put(second, result(100))
+
+        query_cache.get(first)
+        query_cache.put(third, result(100))
+
+        assert query_cache.get(first) is not None
+        assert query_cache.get(second) is None
+        assert query_cache.get(third) is not None
+
+    def test_does_not_cache_results_larger_than_the_cache(self):
+        key = self.query_cache.key("domain", "dataset", "SELECT * FROM table")
+
+        self.query_cache.put(key, result(10_000))
+
+        assert self.query_cache.get(key) is None
+
+    @pytest.mark.parametrize("max_size, ttl", [(0, 60), (10_000, 0)])
+    def test_does_not_cache_results_when_disabled(self, max_size, ttl):
+        query_cache = QueryCache(max_size=max_size, ttl=ttl, clock=self.clock)
+        key = query_cache.key("domain", "dataset", "SELECT * FROM table")
+
+        query_cache.put(key, result())
+
+        assert query_cache.get(key) is None
+
+    def test_invalidation_removes_results_of_dataset(self):
+        key = self.query_cache.key("domain", "dataset", "SELECT * FROM table")
+        other_key = self.query_cache.key("domain", "other", "SELECT * FROM other")
+        self.query_cache.put(key, result())
+        self.query_cache.put(other_key, result())
+
+        self.query_cache.invalidate("domain", "dataset")
+
+        assert self.query_cache.get(key) is None
+        assert self.query_cache.get(other_key) is not None
+        assert self.query_cache.key(
+            "domain", "dataset", "SELECT * FROM table"
+        ).version == (key.version + 1)
+
+    def test_does_not_cache_results_of_queries_that_ran_during_invalidation(self):
+        key = self.query_cache.key("domain", "dataset", "SELECT * FROM table")
+
+        self.query_cache.invalidate("domain", "dataset")
+        self.query_cache.put(key, result())
+
+        assert self.query_cache.get(key) is None
+        assert (
+            self.query_cache.get(
+                self.query_cache.key("domain", "dataset", "SELECT * FROM table")
+            )
+            is None
+        )
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT *\n  FROM table ", "SELECT * FROM table"),
+        (
+            "SELECT * FROM table WHERE a = 'x  y'",
+            "SELECT * FROM table WHERE a = 'x  y'",
+        ),
+        ('SELECT "a  b"  FROM table', 'SELECT "a  b" FROM table'),
+        (
+            "SELECT * FROM t WHERE a = 'it''s  x'",
+            "SELECT * FROM t WHERE a = 'it''s  x'",
+        ),
+    ],
+)
+def test_normalise_sql(sql: str, expected: str):
+    assert normalise_sql(sql) == expected
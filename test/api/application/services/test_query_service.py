@@ -0,0 +1,172 @@
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from api.application.services.query_cache import QueryCache
+from api.application.services.query_service import QueryService
+from api.common.custom_exceptions import (
+    ConflictError,
+    QueryJobNotFoundError,
+    UserError,
+)
+from api.domain.query_job import QueryExecution, QueryJob, QueryResultsPage
+from api.domain.sql_query import SQLQuery
+
+
+class TestQueryService:
+    def setup_method(self):
+        self.athena_adapter = Mock()
+        self.query_cache = QueryCache(max_size=1024 * 1024, ttl=60)
+        self.s3_adapter = Mock()
+        self.query_service = QueryService(
+            self.athena_adapter, self.query_cache, self.s3_adapter
+        )
+
+    def test_runs_query_once_for_repeated_queries(self):
+        result = pd.DataFrame({"colname1": ["value"]})
+        self.athena_adapter.query.return_value = result
+
+        first_result = self.query_service.query("domain", "dataset", SQLQuery())
+        second_result = self.query_service.query("domain", "dataset", SQLQuery())
+
+        assert first_result is result
+        assert second_result is result
+        self.athena_adapter.query.assert_called_once_with(
+            "domain", "dataset", SQLQuery(), False
+        )
+
+    def test_runs_queries_generating_the_same_sql_once(self):
+        self.athena_adapter.query.return_value = pd.DataFrame({"colname1": ["value"]})
+
+        self.query_service.query("domain", "dataset", SQLQuery())
+        self.query_service.query(
+            "domain", "dataset", SQLQuery(select_columns=[], filter="")
+        )
+
+        self.athena_adapter.query.assert_called_once()
+
+    def test_runs_different_queries(self):
+        self.athena_adapter.query.return_value = pd.DataFrame({"colname1": ["value"]})
+
+        self.query_service.query("domain", "dataset", SQLQuery())
+        self.query_service.query("domain", "dataset", SQLQuery(limit="10"))
+        self.query_service.query("domain", "other", SQLQuery())
+
+        assert self.athena_adapter.query.call_count == 3
+
+    def test_caches_unloaded_results_apart_from_results_read_as_csv(self):
+        csv_result = pd.DataFrame({"colname1": ["1"]})
+        unloaded_result = pd.DataFrame({"colname1": [1]})
+        self.athena_adapter.query.side_effect = [csv_result, unloaded_result]
+
+        first_result = self.query_service.query("domain", "dataset", SQLQuery())
+        second_result = self.query_service.query(
+            "domain", "dataset", SQLQuery(), unload=True
+        )
+        third_result = self.query_service.query(
+            "domain", "dataset", SQLQuery(), unload=True
+        )
+
+        assert first_result is csv_result
+        assert second_result is unloaded_result
+        assert third_result is unloaded_result
+        self.athena_adapter.query.assert_called_with(
+            "domain", "dataset", SQLQuery(), True
+        )
+
+    def test_query_chunks_passes_unload_to_adapter(self):
+        self.query_service.query_chunks("domain", "dataset", SQLQuery(), unload=True)
+
+        self.athena_adapter.query_chunks.assert_called_once_with(
+            "domain", "dataset", SQLQuery(), True
+        )
+
+    def test_runs_query_again_once_dataset_changes(self):
+        self.athena_adapter.query.return_value = pd.DataFrame({"colname1": ["value"]})
+
+        self.query_service.query("domain", "dataset", SQLQuery())
+        self.query_cache.invalidate("domain", "dataset")
+        self.query_service.query("domain", "dataset", SQLQuery())
+
+        assert self.athena_adapter.query.call_count == 2
+
+    # Asynchronous queries ---------------------------
+
+    def test_submit_query_saves_query_job(self):
+        self.athena_adapter.start_query.return_value = "1234"
+
+        execution = self.query_service.submit_query("domain", "dataset", SQLQuery())
+
+        assert execution == QueryExecution(query_id="1234", status="QUEUED")
+        self.athena_adapter.start_query.assert_called_once_with(
+            "domain", "dataset", SQLQuery()
+        )
+        job = self.s3_adapter.save_query_job.call_args.args[0]
+        assert (job.query_id, job.domain, job.dataset) == ("1234", "domain", "dataset")
+
+    def test_get_query_execution(self):
+        self.s3_adapter.find_query_job.return_value = QueryJob(
+            query_id="1234", domain="domain", dataset="dataset"
+        )
+        execution = QueryExecution(query_id="1234", status="RUNNING")
+        self.athena_adapter.get_query_execution.return_value = execution
+
+        assert (
+            self.query_service.get_query_execution("domain", "dataset", "1234")
+            == execution
+        )
+        self.s3_adapter.find_query_job.assert_called_once_with(
+            "domain", "dataset", "1234"
+        )
+
+    def test_get_query_execution_of_query_of_another_dataset_fails(self):
+        self.s3_adapter.find_query_job.return_value = None
+
+        with pytest.raises(
+            QueryJobNotFoundError,
+            match=r"Could not find query \[1234\] for domain \[domain\] and dataset \[other\]",
+        ):
+            self.query_service.get_query_execution("domain", "other", "1234")
+
+        self.athena_adapter.get_query_execution.assert_not_called()
+
+    def test_get_query_results(self):
+        self.s3_adapter.find_query_job.return_value = QueryJob(
+            query_id="1234", domain="domain", dataset="dataset"
+        )
+        self.athena_adapter.get_query_execution.return_value = QueryExecution(
+            query_id="1234", status="SUCCEEDED"
+        )
+        page = QueryResultsPage(columns=["colname1"], rows=[{"colname1": "value"}])
+        self.athena_adapter.get_query_results.return_value = page
+
+        result = self.query_service.get_query_results(
+            "domain", "dataset", "1234", 100, "token"
+        )
+
+        assert result == page
+        self.athena_adapter.get_query_results.assert_called_once_with(
+            "1234", 100, "token"
+        )
+
+    def test_get_query_results_fails_when_query_has_not_succeeded(self):
+        self.s3_adapter.find_query_job.return_value = QueryJob(
+            query_id="1234", domain="domain", dataset="dataset"
+        )
+        self.athena_adapter.get_query_execution.return_value = QueryExecution(
+            query_id="1234", status="RUNNING"
+        )
+
+        with pytest.raises(
+            ConflictError,
+            match=r"The results of query \[1234\] are not available, its status is \[RUNNING\]",
+        ):
+            self.query_service.get_query_results("domain", "dataset", "1234", 100)
+
+        self.athena_adapter.get_query_results.assert_not_called()
+
+    @pytest.mark.parametrize("page_size", [0, 1001])
+    def test_get_query_results_fails_for_invalid_page_size(self, page_size: int):
+        with pytest.raises(UserError, match="The page size must be between 1 and 1000"):
+            self.query_service.get_query_results("domain", "dataset", "1234", page_size)
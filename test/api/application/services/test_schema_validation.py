@@ -642,7 +642,8 @@ class TestSchemaValidation:
                     name="colname1",
                     partition_index=None,
                     data_type="object",
-                    allow_null=True,
+                    allow_null=False,
+                    primary_key=True,
                 ),
             ],
         )
@@ -688,7 +689,88 @@ class TestSchemaValidation:
 
         self._assert_validate_schema_raises_error(
             invalid_schema,
-            r"You must specify a valid update behaviour. Accepted values: \['APPEND', 'OVERWRITE'\]",
+            r"You must specify a valid update behaviour. Accepted values: \['APPEND', 'OVERWRITE', 'UPSERT'\]",
+        )
+
+    def test_is_invalid_when_upsert_schema_has_no_key_columns(self):
+        invalid_schema = Schema(
+            metadata=SchemaMetadata(
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                update_behaviour=UpdateBehaviour.UPSERT.value,
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=False,
+                ),
+            ],
+        )
+
+        self._assert_validate_schema_raises_error(
+            invalid_schema,
+            r"You must specify at least one key column for the UPSERT update behaviour",
+        )
+
+    def test_is_invalid_when_key_column_allows_null_values(self):
+        invalid_schema = Schema(
+            metadata=SchemaMetadata(
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                update_behaviour=UpdateBehaviour.UPSERT.value,
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                    primary_key=True,
+                ),
+                Column(
+                    name="colname2",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        self._assert_validate_schema_raises_error(
+            invalid_schema, r"Key columns can not allow null values"
+        )
+
+    @pytest.mark.parametrize("provided_storage_format", ["csv", "ORC", "JSON", ""])
+    def test_is_invalid_when_provided_storage_format_is_unsupported(
+        self, provided_storage_format: str
+    ):
+        invalid_schema = Schema(
+            metadata=SchemaMetadata(
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                storage_format=provided_storage_format,
+                owners=[Owner(name="owner", email="owner@email.com")],
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+        self._assert_validate_schema_raises_error(
+            invalid_schema,
+            r"You must specify a valid storage format. Accepted values: \['CSV', 'PARQUET'\]",
         )
 
     def test_valid_schema_when_all_custom_tags_are_set(self):
@@ -910,6 +992,7 @@ class TestSchemaValidation:
             "key_only_tags": ["tag4"],
             "owners": [{"name": "owner", "email": "owner@email.com"}],
             "update_behaviour": "APPEND",
+            "storage_format": "CSV",
         }
 
         schema_has_valid_tag_set(valid_schema)
@@ -0,0 +1,131 @@
+import threading
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from api.application.services.upload_admission_service import (
+    UploadAdmissionService,
+    get_file_size,
+)
+from api.common.custom_exceptions import UploadCapacityExceededError
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import SchemaMetadata
+
+
+class TestUploadAdmissionService:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                domain="some", dataset="other", sensitivity="PUBLIC"
+            ),
+            columns=[
+                Column(
+                    name=f"colname{index}",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                )
+                for index in range(4)
+            ],
+        )
+        self.admission_service = UploadAdmissionService(
+            memory_budget=1000, retry_after=15
+        )
+
+    @patch(
+        "api.application.services.upload_admission_service.DATASET_ROWS_PER_CHUNK", 10
+    )
+    @patch(
+        "api.application.services.upload_admission_service.CSV_BYTES_PER_VALUE_ESTIMATE",
+        2,
+    )
+    @patch(
+        "api.application.services.upload_admission_service.MEMORY_BYTES_PER_VALUE_ESTIMATE",
+        5,
+    )
+    @patch("api.application.services.upload_admission_service.VALIDATION_WORKERS", 2)
+    @patch(
+        "api.application.services.upload_admission_service.PARALLEL_VALIDATION_THRESHOLD",
+        1000,
+    )
+    def test_estimates_memory_from_file_size_and_schema_width(self):
+        # 40 bytes with 4 columns of 2 bytes each is 5 rows of 4 values
+        assert self.admission_service.estimate_memory(self.schema, 40) == 100
+        # Only a single chunk of 10 rows is held in memory at a time
+        assert self.admission_service.estimate_memory(self.schema, 800) == 200
+        # Large files hold two chunks per validation worker as well
+        assert self.admission_service.estimate_memory(self.schema, 1000) == 1000
+
+    def test_admits_upload_within_budget_and_releases_it(self):
+        self.admission_service.estimate_memory = lambda schema, file_size: 600
+
+        with self.admission_service.admit(self.schema, BytesIO(b"data")):
+            assert self.admission_service.reserved_memory() == 600
+
+        assert self.admission_service.reserved_memory() == 0
+
+    def test_releases_memory_when_upload_fails(self):
+        self.admission_service.estimate_memory = lambda schema, file_size: 600
+
+        with pytest.raises(ValueError):
+            with self.admission_service.admit(self.schema, BytesIO(b"data")):
+                raise ValueError("Upload failed")
+
+        assert self.admission_service.reserved_memory() == 0
+
+    def test_rejects_upload_over_budget_with_retry_after(self):
+        self.admission_service.estimate_memory = lambda schema, file_size: 600
+
+        with self.admission_service.admit(self.schema, BytesIO(b"data")):
+            with pytest.raises(UploadCapacityExceededError) as error:
+                with self.admission_service.admit(self.schema, BytesIO(b"data")):
+                    pass
+
+        assert error.value.status_code == 503
+        assert error.value.retry_after == 15
+        assert (
+            error.value.message
+            == "The service is processing too many uploads. Please try again later."
+        )
+        assert self.admission_service.reserved_memory() == 0
+
+    def test_admits_upload_larger_than_the_whole_budget_on_its_own(self):
+        self.admission_service.estimate_memory = lambda schema, file_size: 5000
+
+        with self.admission_service.admit(self.schema, BytesIO(b"data")):
+            assert self.admission_service.reserved_memory() == 1000
+
+    def test_queued_upload_waits_for_capacity(self):
+        self.admission_service.estimate_memory = lambda schema, file_size: 600
+        admitted = threading.Event()
+
+        def queued_upload():
+            with self.admission_service.admit(self.schema, BytesIO(b"data"), wait=True):
+                admitted.set()
+
+        with self.admission_service.admit(self.schema, BytesIO(b"data")):
+            thread = threading.Thread(target=queued_upload)
+            thread.start()
+            assert not admitted.wait(0.1)
+
+        thread.join(timeout=5)
+        assert admitted.is_set()
+        assert self.admission_service.reserved_memory() == 0
+
+    @patch("api.application.services.upload_admission_service.AppLogger")
+    def test_records_peak_memory_of_the_upload(self, mock_logger):
+        with self.admission_service.admit(self.schema, BytesIO(b"data")):
+            pass
+
+        message, domain, dataset, _, peak_rss, _ = mock_logger.info.call_args.args
+        assert message.startswith("Upload memory: ")
+        assert (domain, dataset) == ("some", "other")
+        assert peak_rss > 0
+
+    def test_get_file_size_keeps_file_position(self):
+        file = BytesIO(b"0123456789")
+        file.seek(4)
+
+        assert get_file_size(file) == 10
+        assert file.tell() == 4
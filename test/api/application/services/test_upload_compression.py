@@ -0,0 +1,78 @@
+import gzip
+from io import BytesIO
+
+import pyarrow as pa
+import pytest
+
+from api.application.services.upload_compression import decompressed_upload
+from api.common.custom_exceptions import DatasetError
+
+CONTENT = b"colname1,colname2\n" + b"1234,Carlos\n" * 1000
+
+
+def zstd_compress(content: bytes) -> bytes:
+    return pa.Codec("zstd").compress(content, asbytes=True)
+
+
+class TestDecompressedUpload:
+    def test_yields_uncompressed_files_as_they_are(self):
+        file = BytesIO(CONTENT)
+
+        with decompressed_upload("data.csv", file) as data_file:
+            assert data_file is file
+
+    @pytest.mark.parametrize(
+        "filename, compressed_content",
+        [
+            ("data.csv.gz", gzip.compress(CONTENT)),
+            ("data.csv.zst", zstd_compress(CONTENT)),
+        ],
+    )
+    def test_decompresses_compressed_files(self, filename, compressed_content):
+        file = BytesIO(compressed_content)
+
+        with decompressed_upload(filename, file) as data_file:
+            assert data_file.read() == CONTENT
+
+        assert not file.closed
+        assert file.tell() == 0
+        assert file.read() == compressed_content
+
+    def test_raises_error_when_file_cannot_be_decompressed(self):
+        file = BytesIO(CONTENT)
+
+        with pytest.raises(DatasetError, match="could not be decompressed as gzip"):
+            with decompressed_upload("data.csv.gz", file):
+                pass
+
+        assert not file.closed
+
+    def test_raises_error_when_uncompressed_file_is_over_the_size_limit(self):
+        file = BytesIO(CONTENT)
+
+        with pytest.raises(DatasetError, match="larger than the limit of 100 bytes"):
+            with decompressed_upload("data.csv", file, max_size=100):
+                pass
+
+    @pytest.mark.parametrize(
+        "filename, compressed_content",
+        [
+            ("data.csv.gz", gzip.compress(CONTENT)),
+            ("data.csv.zst", zstd_compress(CONTENT)),
+        ],
+    )
+    def test_raises_error_when_file_decompresses_over_the_size_limit(
+        self, filename, compressed_content
+    ):
+        file = BytesIO(compressed_content)
+        max_size = len(compressed_content)
+
+        with pytest.raises(
+            DatasetError,
+            match=f"larger than the limit of {max_size} bytes when decompressed",
+        ):
+            with decompressed_upload(filename, file, max_size=max_size):
+                pass
+
+        assert not file.closed
+        assert file.tell() == 0
@@ -0,0 +1,219 @@
+import hashlib
+import time
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+import pytest
+
+from api.application.services.upload_index_service import (
+    UploadIndexService,
+    compute_content_hash,
+)
+from api.common.custom_exceptions import ConflictError, UserError
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import SchemaMetadata
+from api.domain.upload_record import (
+    UploadClaim,
+    UploadRecord,
+    idempotency_key_index_key,
+)
+
+
+class TestComputeContentHash:
+    def test_computes_hash_of_whole_file_and_rewinds_it(self):
+        file = BytesIO(b"colname1,colname2\n1,2\n")
+
+        content_hash = compute_content_hash(file)
+
+        assert content_hash == hashlib.sha256(b"colname1,colname2\n1,2\n").hexdigest()
+        assert file.tell() == 0
+
+    @patch("api.application.services.upload_index_service.CONTENT_HASH_READ_SIZE", 4)
+    def test_computes_hash_reading_file_in_blocks(self):
+        file = BytesIO(b"colname1,colname2\n1,2\n")
+
+        content_hash = compute_content_hash(file)
+
+        assert content_hash == hashlib.sha256(b"colname1,colname2\n1,2\n").hexdigest()
+
+
+class TestUploadIndexService:
+    def setup_method(self):
+        self.persistence_adapter = Mock()
+        self.upload_index_service = UploadIndexService(self.persistence_adapter)
+        self.record = UploadRecord(
+            domain="some",
+            dataset="other",
+            content_hash="abc123",
+            raw_filename="2022-01-01T12:00:00-file.csv",
+            uploaded_filename="2022-01-01T12:00:00-file.csv",
+        )
+
+    def _schema(self, update_behaviour: str = "APPEND") -> Schema:
+        return Schema(
+            metadata=SchemaMetadata(
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                update_behaviour=update_behaviour,
+            ),
+            columns=[
+                Column(
+                    name="colname1",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=True,
+                )
+            ],
+        )
+
+    def test_finds_previous_upload_of_same_content(self):
+        self.persistence_adapter.find_upload_record.return_value = self.record
+
+        result = self.upload_index_service.find_previous_upload(
+            self._schema(), "abc123", None
+        )
+
+        assert result == self.record
+        self.persistence_adapter.find_upload_record.assert_called_once_with(
+            "some", "other", "sha256-abc123"
+        )
+        self.persistence_adapter.find_raw_file.assert_called_once_with(
+            "some", "other", "2022-01-01T12:00:00-file.csv"
+        )
+
+    def test_returns_none_when_content_was_not_uploaded_before(self):
+        self.persistence_adapter.find_upload_record.return_value = None
+
+        assert (
+            self.upload_index_service.find_previous_upload(
+                self._schema(), "abc123", None
+            )
+            is None
+        )
+        self.persistence_adapter.find_raw_file.assert_not_called()
+
+    def test_returns_none_when_previous_upload_was_deleted(self):
+        self.persistence_adapter.find_upload_record.return_value = self.record
+        self.persistence_adapter.find_raw_file.side_effect = UserError(
+            "The file [2022-01-01T12:00:00-file.csv] does not exist"
+        )
+
+        assert (
+            self.upload_index_service.find_previous_upload(
+                self._schema(), "abc123", None
+            )
+            is None
+        )
+
+    def test_does_not_deduplicate_content_of_overwritten_datasets(self):
+        assert (
+            self.upload_index_service.find_previous_upload(
+                self._schema("OVERWRITE"), "abc123", None
+            )
+            is None
+        )
+        self.persistence_adapter.find_upload_record.assert_not_called()
+
+    def test_finds_previous_upload_by_idempotency_key(self):
+        self.persistence_adapter.find_upload_record.return_value = self.record
+
+        result = self.upload_index_service.find_previous_upload(
+            self._schema("OVERWRITE"), "abc123", "request-1"
+        )
+
+        assert result == self.record
+        self.persistence_adapter.find_upload_record.assert_called_once_with(
+            "some", "other", idempotency_key_index_key("request-1")
+        )
+
+    def test_raises_conflict_when_idempotency_key_was_used_for_different_content(
+        self,
+    ):
+        self.persistence_adapter.find_upload_record.return_value = self.record
+
+        with pytest.raises(
+            ConflictError,
+            match=r"The idempotency key \[request-1\] has already been used to upload a different file",
+        ):
+            self.upload_index_service.find_previous_upload(
+                self._schema(), "def456", "request-1"
+            )
+
+    def test_record_upload(self):
+        self.upload_index_service.record_upload(self.record)
+
+        self.persistence_adapter.save_upload_record.assert_called_once_with(self.record)
+
+    def test_claims_upload_while_it_is_processed(self):
+        self.persistence_adapter.create_upload_claim.return_value = True
+
+        with self.upload_index_service.claim_upload(self._schema(), "abc123", None):
+            claim = self.persistence_adapter.create_upload_claim.call_args.args[0]
+            assert claim.claim_path() == "upload_index/some/other/sha256-abc123.claim"
+            self.persistence_adapter.delete_upload_claim.assert_not_called()
+
+        self.persistence_adapter.delete_upload_claim.assert_called_once_with(claim)
+
+    def test_claims_upload_by_idempotency_key(self):
+        self.persistence_adapter.create_upload_claim.return_value = True
+
+        with self.upload_index_service.claim_upload(
+            self._schema("OVERWRITE"), "abc123", "request-1"
+        ):
+            pass
+
+        claim = self.persistence_adapter.create_upload_claim.call_args.args[0]
+        assert claim.index_key == idempotency_key_index_key("request-1")
+
+    def test_releases_claim_when_upload_fails(self):
+        self.persistence_adapter.create_upload_claim.return_value = True
+
+        with pytest.raises(UserError):
+            with self.upload_index_service.claim_upload(self._schema(), "abc123", None):
+                raise UserError("Invalid file")
+
+        self.persistence_adapter.delete_upload_claim.assert_called_once()
+
+    def test_does_not_claim_uploads_to_overwritten_datasets_without_key(self):
+        with self.upload_index_service.claim_upload(
+            self._schema("OVERWRITE"), "abc123", None
+        ):
+            pass
+
+        self.persistence_adapter.create_upload_claim.assert_not_called()
+
+    def test_raises_conflict_when_upload_is_already_claimed(self):
+        self.persistence_adapter.create_upload_claim.return_value = False
+        self.persistence_adapter.find_upload_claim.return_value = UploadClaim(
+            domain="some", dataset="other", index_key="sha256-abc123"
+        )
+
+        with pytest.raises(
+            ConflictError,
+            match=r"The file is already being uploaded to \[some/other\]",
+        ):
+            with self.upload_index_service.claim_upload(self._schema(), "abc123", None):
+                pass
+
+        self.persistence_adapter.delete_upload_claim.assert_not_called()
+
+    def test_replaces_expired_claim(self):
+        expired_claim = UploadClaim(
+            domain="some",
+            dataset="other",
+            index_key="sha256-abc123",
+            claimed_at=time.time() - 61,
+        )
+        self.persistence_adapter.create_upload_claim.side_effect = [False, True]
+        self.persistence_adapter.find_upload_claim.return_value = expired_claim
+        upload_index_service = UploadIndexService(
+            self.persistence_adapter, claim_timeout=60
+        )
+
+        with upload_index_service.claim_upload(self._schema(), "abc123", None):
+            self.persistence_adapter.delete_upload_claim.assert_called_once_with(
+                expired_claim
+            )
+
+        assert self.persistence_adapter.create_upload_claim.call_count == 2
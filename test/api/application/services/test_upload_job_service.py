@@ -0,0 +1,165 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from api.application.services.upload_job_service import UploadJobService
+from api.common.custom_exceptions import (
+    CrawlerIsNotReadyError,
+    DatasetError,
+    SchemaNotFoundError,
+    UploadJobNotFoundError,
+    UserError,
+)
+from api.domain.upload_job import UploadJob
+
+
+class TestUploadJobService:
+    def setup_method(self):
+        self.s3_adapter = Mock()
+        self.executor = Mock()
+        self.executor.submit.side_effect = lambda function, *args: function(*args)
+        self.upload_job_service = UploadJobService(
+            self.s3_adapter, self.executor, heartbeat_interval=60, job_timeout=600
+        )
+
+    def test_creates_and_saves_job(self):
+        job = self.upload_job_service.create_job("domain", "dataset", "file.csv")
+
+        assert job.domain == "domain"
+        assert job.dataset == "dataset"
+        assert job.filename == "file.csv"
+        assert job.stage == "QUEUED"
+        assert job.owner == self.upload_job_service.owner
+        self.s3_adapter.save_upload_job.assert_called_once_with(job)
+
+    def test_gets_job(self):
+        job = UploadJob(domain="domain", dataset="dataset", filename="file.csv")
+        self.s3_adapter.find_upload_job.return_value = job
+
+        result = self.upload_job_service.get_job("domain", "dataset", job.job_id)
+
+        assert result == job
+        self.s3_adapter.find_upload_job.assert_called_once_with(
+            "domain", "dataset", job.job_id
+        )
+
+    @patch("api.domain.upload_job.time.time")
+    def test_fails_unfinished_job_that_stopped_reporting_progress(self, mock_time):
+        mock_time.return_value = 1000.0
+        job = UploadJob(
+            domain="domain",
+            dataset="dataset",
+            filename="file.csv",
+            stage="DATA_UPLOAD",
+            heartbeat_at=399.0,
+        )
+        self.s3_adapter.find_upload_job.return_value = job
+
+        result = self.upload_job_service.get_job("domain", "dataset", job.job_id)
+
+        assert result.stage == "FAILED"
+        assert result.errors == [
+            "The upload stopped before finishing. Please upload the file again."
+        ]
+        self.s3_adapter.save_upload_job.assert_called_once_with(job)
+
+    @pytest.mark.parametrize(
+        "stage, heartbeat_at",
+        [("DATA_UPLOAD", 401.0), ("QUEUED", 401.0), ("COMPLETED", 0.0)],
+    )
+    @patch("api.domain.upload_job.time.time")
+    def test_does_not_fail_job_that_is_running_or_finished(
+        self, mock_time, stage, heartbeat_at
+    ):
+        mock_time.return_value = 1000.0
+        job = UploadJob(
+            domain="domain",
+            dataset="dataset",
+            filename="file.csv",
+            stage=stage,
+            heartbeat_at=heartbeat_at,
+        )
+        self.s3_adapter.find_upload_job.return_value = job
+
+        result = self.upload_job_service.get_job("domain", "dataset", job.job_id)
+
+        assert result.stage == stage
+        self.s3_adapter.save_upload_job.assert_not_called()
+
+    @patch("api.domain.upload_job.time.time")
+    def test_sends_heartbeats_for_submitted_jobs_until_they_finish(self, mock_time):
+        mock_time.return_value = 1000.0
+        self.executor.submit.side_effect = None
+        job = UploadJob(
+            domain="domain", dataset="dataset", filename="file.csv", heartbeat_at=0.0
+        )
+        self.upload_job_service.submit_job(job, lambda: "file.csv")
+
+        self.upload_job_service.send_heartbeats()
+
+        assert job.heartbeat_at == 1000.0
+        self.s3_adapter.save_upload_job.assert_called_once_with(job)
+
+        run_job, _, task = self.executor.submit.call_args[0]
+        run_job(job, task)
+        self.s3_adapter.save_upload_job.reset_mock()
+
+        self.upload_job_service.send_heartbeats()
+
+        self.s3_adapter.save_upload_job.assert_not_called()
+
+    def test_keeps_sending_heartbeats_when_one_fails(self):
+        self.executor.submit.side_effect = None
+        first_job = UploadJob(domain="domain", dataset="dataset", filename="1.csv")
+        second_job = UploadJob(domain="domain", dataset="dataset", filename="2.csv")
+        self.upload_job_service.submit_job(first_job, lambda: "1.csv")
+        self.upload_job_service.submit_job(second_job, lambda: "2.csv")
+        self.s3_adapter.save_upload_job.side_effect = [Exception("S3 error"), None]
+
+        self.upload_job_service.send_heartbeats()
+
+        assert self.s3_adapter.save_upload_job.call_count == 2
+
+    def test_raises_error_when_job_does_not_exist(self):
+        self.s3_adapter.find_upload_job.return_value = None
+
+        with pytest.raises(
+            UploadJobNotFoundError,
+            match=r"Could not find upload job \[1234\] for domain \[domain\] and dataset \[dataset\]",
+        ):
+            self.upload_job_service.get_job("domain", "dataset", "1234")
+
+    def test_completes_job_when_task_succeeds(self):
+        job = UploadJob(domain="domain", dataset="dataset", filename="file.csv")
+
+        self.upload_job_service.submit_job(job, lambda: "2022-01-01T12:00:00-file.csv")
+
+        assert job.stage == "COMPLETED"
+        assert job.uploaded_filename == "2022-01-01T12:00:00-file.csv"
+        self.s3_adapter.save_upload_job.assert_called_once_with(job)
+
+    @pytest.mark.parametrize(
+        "error, expected_errors",
+        [
+            (DatasetError(["error 1", "error 2"]), ["error 1", "error 2"]),
+            (DatasetError("Expected 3 columns"), ["Expected 3 columns"]),
+            (UserError("File content is invalid"), ["File content is invalid"]),
+            (SchemaNotFoundError("Schema not found"), ["Schema not found"]),
+            (
+                CrawlerIsNotReadyError("Crawler is running"),
+                ["Data is currently processing. Please try again later."],
+            ),
+            (Exception("boom"), ["Internal failure when uploading data."]),
+        ],
+    )
+    def test_fails_job_when_task_raises_error(self, error, expected_errors):
+        job = UploadJob(domain="domain", dataset="dataset", filename="file.csv")
+
+        def failing_task():
+            raise error
+
+        self.upload_job_service.submit_job(job, failing_task)
+
+        assert job.stage == "FAILED"
+        assert job.errors == expected_errors
+        self.s3_adapter.save_upload_job.assert_called_once_with(job)
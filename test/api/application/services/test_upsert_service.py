@@ -0,0 +1,365 @@
+from unittest.mock import Mock, call
+
+import pandas as pd
+import pytest
+
+from api.application.services.upsert_service import UpsertService
+from api.domain.key_index import empty_key_index, generate_key_buckets
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import SchemaMetadata, UpdateBehaviour
+from api.domain.upsert_manifest import UpsertManifest
+
+
+class TestUpsertService:
+    def setup_method(self):
+        self.persistence_adapter = Mock()
+        self.persistence_adapter.find_key_index.return_value = empty_key_index()
+        self.existing_partitions = {}
+        self.persistence_adapter.read_partitioned_data.side_effect = (
+            lambda schema, partition_paths: [
+                (
+                    partition_path,
+                    *self.existing_partitions.get(partition_path, (pd.DataFrame(), [])),
+                )
+                for partition_path in partition_paths
+            ]
+        )
+        self.persistence_adapter.partitioned_data_paths.side_effect = (
+            lambda schema, filename, partition_paths: [
+                "/".join(filter(None, ["data/some/other", partition_path, filename]))
+                for partition_path in partition_paths
+            ]
+        )
+        self.persistence_adapter.list_upsert_manifests.return_value = []
+        self.saved_manifests = []
+        self.persistence_adapter.save_upsert_manifest.side_effect = (
+            lambda manifest: self.saved_manifests.append(manifest.copy())
+        )
+        self.upsert_service = UpsertService(self.persistence_adapter)
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                domain="some",
+                dataset="other",
+                sensitivity="PUBLIC",
+                update_behaviour=UpdateBehaviour.UPSERT.value,
+            ),
+            columns=[
+                Column(
+                    name="id",
+                    partition_index=None,
+                    data_type="Int64",
+                    allow_null=False,
+                    primary_key=True,
+                ),
+                Column(
+                    name="year",
+                    partition_index=0,
+                    data_type="Int64",
+                    allow_null=False,
+                ),
+                Column(
+                    name="value",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+    def _data(self, ids, years, values) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "id": pd.array(ids, dtype=pd.Int64Dtype()),
+                "year": pd.array(years, dtype=pd.Int64Dtype()),
+                "value": values,
+            }
+        )
+
+    def _uploaded_partitions(self):
+        (
+            _,
+            _,
+            partitions,
+        ) = self.persistence_adapter.upload_partitioned_data.call_args.args
+        return {
+            partition_path: data.astype(str).to_dict("records")
+            for partition_path, data in partitions
+        }
+
+    def _saved_key_index(self):
+        _, _, buckets = self.persistence_adapter.save_key_index.call_args.args
+        return sorted(
+            tuple(entry)
+            for _, key_index in buckets
+            for entry in key_index[["key", "partition"]].itertuples(index=False)
+        )
+
+    def test_inserts_new_keys_into_their_partitions(self):
+        partition_paths = self.upsert_service.upsert_data(
+            self.schema, self._data([1, 2], [2020, 2021], ["a", "b"]), "data.csv"
+        )
+
+        assert partition_paths == ["year=2020", "year=2021"]
+        assert self._uploaded_partitions() == {
+            "year=2020": [{"id": "1", "value": "a"}],
+            "year=2021": [{"id": "2", "value": "b"}],
+        }
+        self.persistence_adapter.read_partitioned_data.assert_called_once_with(
+            self.schema, ["year=2020", "year=2021"]
+        )
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some", "other", []
+        )
+        assert self._saved_key_index() == [("1", "year=2020"), ("2", "year=2021")]
+
+    def test_only_reads_the_index_buckets_of_the_upserted_keys(self):
+        self.upsert_service.upsert_data(
+            self.schema, self._data([1, 2], [2020, 2021], ["a", "b"]), "data.csv"
+        )
+
+        expected_buckets = sorted(
+            generate_key_buckets(pd.Series(["1", "2"])).unique().tolist()
+        )
+        self.persistence_adapter.find_key_index.assert_called_once_with(
+            "some", "other", expected_buckets
+        )
+        _, _, saved_buckets = self.persistence_adapter.save_key_index.call_args.args
+        assert [bucket for bucket, _ in saved_buckets] == expected_buckets
+
+    def test_replaces_rows_with_the_same_key_in_affected_partitions(self):
+        self.persistence_adapter.find_key_index.return_value = pd.DataFrame(
+            {"key": ["2"], "partition": ["year=2020"]}
+        )
+        self.existing_partitions = {
+            "year=2020": (
+                pd.DataFrame({"id": ["1", "2"], "value": ["a", "b"]}),
+                ["data/some/other/year=2020/old.csv"],
+            ),
+            "year=2021": (
+                pd.DataFrame({"id": ["3"], "value": ["c"]}),
+                ["data/some/other/year=2021/old.csv"],
+            ),
+        }
+
+        partition_paths = self.upsert_service.upsert_data(
+            self.schema, self._data([2], [2021], ["updated"]), "data.csv"
+        )
+
+        assert partition_paths == ["year=2021"]
+        self.persistence_adapter.read_partitioned_data.assert_called_once_with(
+            self.schema, ["year=2021", "year=2020"]
+        )
+        assert self._uploaded_partitions() == {
+            "year=2020": [{"id": "1", "value": "a"}],
+            "year=2021": [{"id": "3", "value": "c"}, {"id": "2", "value": "updated"}],
+        }
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some",
+            "other",
+            [
+                "data/some/other/year=2021/old.csv",
+                "data/some/other/year=2020/old.csv",
+            ],
+        )
+        assert self._saved_key_index() == [("2", "year=2021")]
+
+    def test_does_not_rewrite_partitions_left_empty(self):
+        self.persistence_adapter.find_key_index.return_value = pd.DataFrame(
+            {"key": ["1"], "partition": ["year=2020"]}
+        )
+        self.existing_partitions = {
+            "year=2020": (
+                pd.DataFrame({"id": ["1"], "value": ["a"]}),
+                ["data/some/other/year=2020/old.csv"],
+            ),
+        }
+
+        self.upsert_service.upsert_data(
+            self.schema, self._data([1], [2021], ["a"]), "data.csv"
+        )
+
+        assert list(self._uploaded_partitions()) == ["year=2021"]
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some", "other", ["data/some/other/year=2020/old.csv"]
+        )
+
+    def test_keeps_the_last_row_of_duplicated_keys(self):
+        self.upsert_service.upsert_data(
+            self.schema,
+            self._data([1, 1], [2020, 2021], ["first", "last"]),
+            "data.csv",
+        )
+
+        assert self._uploaded_partitions() == {
+            "year=2021": [{"id": "1", "value": "last"}],
+        }
+        assert self._saved_key_index() == [("1", "year=2021")]
+
+    def test_does_not_delete_files_replaced_by_the_upload(self):
+        self.existing_partitions = {
+            "year=2020": (
+                pd.DataFrame({"id": ["1"], "value": ["a"]}),
+                ["data/some/other/year=2020/data.csv"],
+            ),
+        }
+
+        self.upsert_service.upsert_data(
+            self.schema, self._data([2], [2020], ["b"]), "data.csv"
+        )
+
+        assert self._uploaded_partitions() == {
+            "year=2020": [{"id": "1", "value": "a"}, {"id": "2", "value": "b"}],
+        }
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some", "other", []
+        )
+
+    def test_matches_keys_stored_in_partition_columns(self):
+        self.schema.columns[1].primary_key = True
+        self.persistence_adapter.find_key_index.return_value = pd.DataFrame(
+            {"key": ["1\x1f2020"], "partition": ["year=2020"]}
+        )
+        self.existing_partitions = {
+            "year=2020": (
+                pd.DataFrame({"id": ["1", "2"], "value": ["a", "b"]}),
+                ["data/some/other/year=2020/old.csv"],
+            ),
+        }
+
+        self.upsert_service.upsert_data(
+            self.schema, self._data([1], [2020], ["updated"]), "data.csv"
+        )
+
+        assert self._uploaded_partitions() == {
+            "year=2020": [{"id": "2", "value": "b"}, {"id": "1", "value": "updated"}],
+        }
+
+    def _existing_partition(self):
+        self.persistence_adapter.find_key_index.return_value = pd.DataFrame(
+            {"key": ["1"], "partition": ["year=2020"]}
+        )
+        self.existing_partitions = {
+            "year=2020": (
+                pd.DataFrame({"id": ["1"], "value": ["a"]}),
+                ["data/some/other/year=2020/old.csv"],
+            ),
+        }
+
+    def _manifest(self, committed: bool = False) -> UpsertManifest:
+        return UpsertManifest(
+            domain="some",
+            dataset="other",
+            filename="data.csv",
+            written_files=["data/some/other/year=2021/data.csv"],
+            superseded_files=["data/some/other/year=2020/old.csv"],
+            committed=committed,
+        )
+
+    def test_commits_the_upsert_before_deleting_superseded_files(self):
+        self._existing_partition()
+        calls = Mock()
+        for method in [
+            "save_upsert_manifest",
+            "upload_partitioned_data",
+            "save_key_index",
+            "delete_partition_files",
+            "delete_upsert_manifest",
+        ]:
+            calls.attach_mock(getattr(self.persistence_adapter, method), method)
+
+        self.upsert_service.upsert_data(
+            self.schema, self._data([1], [2021], ["b"]), "data.csv"
+        )
+
+        assert [name for name, _, _ in calls.mock_calls] == [
+            "save_upsert_manifest",
+            "upload_partitioned_data",
+            "save_key_index",
+            "save_upsert_manifest",
+            "delete_partition_files",
+            "delete_upsert_manifest",
+        ]
+        assert self.saved_manifests == [self._manifest(), self._manifest(True)]
+
+    def test_rolls_back_the_upsert_when_merged_data_fails_to_be_written(self):
+        self._existing_partition()
+        self.persistence_adapter.upload_partitioned_data.side_effect = ValueError(
+            "Oops"
+        )
+
+        with pytest.raises(ValueError, match="Oops"):
+            self.upsert_service.upsert_data(
+                self.schema, self._data([1], [2021], ["b"]), "data.csv"
+            )
+
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some", "other", ["data/some/other/year=2021/data.csv"]
+        )
+        self.persistence_adapter.delete_upsert_manifest.assert_called_once_with(
+            self._manifest()
+        )
+        assert self._saved_key_index() == [("1", "year=2020")]
+
+    def test_restores_the_key_index_when_it_fails_to_be_saved(self):
+        self._existing_partition()
+        self.persistence_adapter.save_key_index.side_effect = [ValueError("Oops"), None]
+
+        with pytest.raises(ValueError, match="Oops"):
+            self.upsert_service.upsert_data(
+                self.schema, self._data([1], [2021], ["b"]), "data.csv"
+            )
+
+        assert self._saved_key_index() == [("1", "year=2020")]
+        self.persistence_adapter.delete_partition_files.assert_called_once_with(
+            "some", "other", ["data/some/other/year=2021/data.csv"]
+        )
+        assert self.saved_manifests == [self._manifest()]
+
+    def test_leaves_the_manifest_when_the_upsert_fails_to_be_rolled_back(self):
+        self._existing_partition()
+        self.persistence_adapter.upload_partitioned_data.side_effect = ValueError(
+            "Oops"
+        )
+        self.persistence_adapter.delete_partition_files.side_effect = ValueError(
+            "Rollback failed"
+        )
+
+        with pytest.raises(ValueError, match="Oops"):
+            self.upsert_service.upsert_data(
+                self.schema, self._data([1], [2021], ["b"]), "data.csv"
+            )
+
+        self.persistence_adapter.delete_upsert_manifest.assert_not_called()
+
+    def test_rolls_back_upserts_that_stopped_before_being_committed(self):
+        self.persistence_adapter.list_upsert_manifests.return_value = [self._manifest()]
+
+        self.upsert_service.upsert_data(
+            self.schema, self._data([2], [2022], ["c"]), "next.csv"
+        )
+
+        self.persistence_adapter.list_upsert_manifests.assert_called_once_with(
+            "some", "other"
+        )
+        assert self.persistence_adapter.delete_partition_files.call_args_list[0] == (
+            call("some", "other", ["data/some/other/year=2021/data.csv"])
+        )
+        assert self.persistence_adapter.delete_upsert_manifest.call_args_list[0] == (
+            call(self._manifest())
+        )
+
+    def test_finishes_upserts_that_stopped_after_being_committed(self):
+        self.persistence_adapter.list_upsert_manifests.return_value = [
+            self._manifest(True)
+        ]
+
+        self.upsert_service.upsert_data(
+            self.schema, self._data([2], [2022], ["c"]), "next.csv"
+        )
+
+        assert self.persistence_adapter.delete_partition_files.call_args_list[0] == (
+            call("some", "other", ["data/some/other/year=2020/old.csv"])
+        )
+        assert self.persistence_adapter.delete_upsert_manifest.call_args_list[0] == (
+            call(self._manifest(True))
+        )
@@ -0,0 +1,58 @@
+from io import BytesIO
+
+import pytest
+
+from api.common.compression import compress, decompress
+from api.common.custom_exceptions import DatasetError
+
+CONTENT = b"colname1,colname2\n" + b"1234,Carlos\n" * 1000
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_compressed_content_decompresses_to_the_original(codec):
+    compressed, decompressed = BytesIO(), BytesIO()
+    compressed.close = lambda: None
+
+    compress(BytesIO(CONTENT), compressed, codec)
+    compressed.seek(0)
+    decompress(compressed, decompressed, codec)
+
+    assert len(compressed.getvalue()) < len(CONTENT)
+    assert decompressed.getvalue() == CONTENT
+
+
+def test_decompression_leaves_source_open():
+    source = BytesIO()
+    source.close = lambda: None
+    compress(BytesIO(CONTENT), source, "gzip")
+    source = BytesIO(source.getvalue())
+
+    decompress(source, BytesIO(), "gzip")
+
+    assert not source.closed
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_decompression_stops_at_the_size_limit(codec):
+    compressed = BytesIO()
+    compressed.close = lambda: None
+    compress(BytesIO(CONTENT * 2000), compressed, codec)
+    compressed.seek(0)
+    decompressed = BytesIO()
+
+    with pytest.raises(DatasetError, match="larger than the limit of 1000 bytes"):
+        decompress(compressed, decompressed, codec, max_size=1000)
+
+    assert len(decompressed.getvalue()) <= 1000
+
+
+def test_decompression_writes_content_of_exactly_the_size_limit():
+    compressed = BytesIO()
+    compressed.close = lambda: None
+    compress(BytesIO(CONTENT), compressed, "gzip")
+    compressed.seek(0)
+    decompressed = BytesIO()
+
+    decompress(compressed, decompressed, "gzip", max_size=len(CONTENT))
+
+    assert decompressed.getvalue() == CONTENT
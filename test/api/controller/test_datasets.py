@@ -1,12 +1,16 @@
-from unittest.mock import patch
+import io
+from unittest.mock import patch, ANY
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
-from api.adapter.athena_adapter import AthenaAdapter
 from api.adapter.aws_resource_adapter import AWSResourceAdapter
+from api.application.services.compaction_service import CompactionService
 from api.application.services.data_service import DataService
 from api.application.services.delete_service import DeleteService
+from api.application.services.query_service import QueryService
 from api.common.config.aws import RESOURCE_PREFIX
 from api.common.custom_exceptions import (
     UserError,
@@ -15,11 +19,19 @@ from api.common.custom_exceptions import (
     SchemaNotFoundError,
     CrawlerIsNotReadyError,
     GetCrawlerError,
+    UploadJobNotFoundError,
+    ConflictError,
+    UploadCapacityExceededError,
+    QueryJobNotFoundError,
 )
+from api.domain.batch_upload import BatchUploadResult
 from api.domain.dataset_filters import DatasetFilters
+from api.domain.presigned_upload import PresignedUpload
+from api.domain.query_job import QueryExecution, QueryResultsPage
 from api.domain.schema import Schema, Column
 from api.domain.schema_metadata import Owner, SchemaMetadata
 from api.domain.sql_query import SQLQuery
+from api.domain.upload_job import UploadJob
 from test.api.controller.controller_test_utils import BaseClientTest
 
 
@@ -30,7 +42,15 @@ class TestDataUpload(BaseClientTest):
         file_name = "filename.csv"
         file_name_with_timestamp = f"2022-05-05T12:00:00-{file_name}"
 
-        mock_upload_dataset.return_value = file_name_with_timestamp
+        uploaded_contents = []
+
+        def read_uploaded_file(
+            resource_prefix, domain, dataset, filename, file, idempotency_key
+        ):
+            uploaded_contents.append(file.read())
+            return file_name_with_timestamp
+
+        mock_upload_dataset.side_effect = read_uploaded_file
 
         response = self.client.post(
             "/datasets/domain/dataset",
@@ -39,12 +59,119 @@ class TestDataUpload(BaseClientTest):
         )
 
         mock_upload_dataset.assert_called_once_with(
-            RESOURCE_PREFIX, "domain", "dataset", file_name, file_content
+            RESOURCE_PREFIX, "domain", "dataset", file_name, ANY, idempotency_key=None
         )
 
+        assert uploaded_contents == [file_content]
         assert response.status_code == 201
         assert response.json() == {"uploaded": file_name_with_timestamp}
 
+    @patch.object(DataService, "upload_dataset")
+    def test_uploads_parquet_files_by_their_content_type(self, mock_upload_dataset):
+        mock_upload_dataset.return_value = "2022-05-05T12:00:00-filename.parquet"
+
+        response = self.client.post(
+            "/datasets/domain/dataset",
+            files={"file": ("filename", b"PAR1", "application/vnd.apache.parquet")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_upload_dataset.assert_called_once_with(
+            RESOURCE_PREFIX,
+            "domain",
+            "dataset",
+            "filename.parquet",
+            ANY,
+            idempotency_key=None,
+        )
+        assert response.status_code == 201
+
+    @patch.object(DataService, "upload_dataset")
+    def test_uploads_compressed_files_by_their_content_type(self, mock_upload_dataset):
+        mock_upload_dataset.return_value = "2022-05-05T12:00:00-filename.csv"
+
+        response = self.client.post(
+            "/datasets/domain/dataset",
+            files={"file": ("filename.csv", b"compressed", "application/gzip")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_upload_dataset.assert_called_once_with(
+            RESOURCE_PREFIX,
+            "domain",
+            "dataset",
+            "filename.csv.gz",
+            ANY,
+            idempotency_key=None,
+        )
+        assert response.status_code == 201
+
+    @patch.object(DataService, "upload_dataset")
+    def test_passes_idempotency_key_to_data_upload_service(self, mock_upload_dataset):
+        file_name = "filename.csv"
+        mock_upload_dataset.return_value = f"2022-05-05T12:00:00-{file_name}"
+
+        response = self.client.post(
+            "/datasets/domain/dataset",
+            files={"file": (file_name, b"some,content", "text/csv")},
+            headers={
+                "Authorization": "Bearer test-token",
+                "Idempotency-Key": "request-1",
+            },
+        )
+
+        mock_upload_dataset.assert_called_once_with(
+            RESOURCE_PREFIX,
+            "domain",
+            "dataset",
+            file_name,
+            ANY,
+            idempotency_key="request-1",
+        )
+        assert response.status_code == 201
+
+    @patch.object(DataService, "upload_dataset")
+    def test_returns_503_with_retry_after_when_over_upload_capacity(
+        self, mock_upload_dataset
+    ):
+        mock_upload_dataset.side_effect = UploadCapacityExceededError(
+            "The service is processing too many uploads. Please try again later.", 30
+        )
+
+        response = self.client.post(
+            "/datasets/domain/dataset",
+            files={"file": ("filename.csv", b"some,content", "text/csv")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "30"
+        assert response.json() == {
+            "details": "The service is processing too many uploads. Please try again later."
+        }
+
+    @patch.object(DataService, "upload_dataset")
+    def test_returns_409_when_idempotency_key_was_used_for_a_different_file(
+        self, mock_upload_dataset
+    ):
+        mock_upload_dataset.side_effect = ConflictError(
+            "The idempotency key [request-1] has already been used to upload a different file"
+        )
+
+        response = self.client.post(
+            "/datasets/domain/dataset",
+            files={"file": ("filename.csv", b"some,content", "text/csv")},
+            headers={
+                "Authorization": "Bearer test-token",
+                "Idempotency-Key": "request-1",
+            },
+        )
+
+        assert response.status_code == 409
+        assert response.json() == {
+            "details": "The idempotency key [request-1] has already been used to upload a different file"
+        }
+
     @patch.object(DataService, "upload_dataset")
     def test_calls_data_upload_service_fails_when_invalid_dataset_is_uploaded(
         self, mock_upload_dataset
@@ -61,7 +188,7 @@ class TestDataUpload(BaseClientTest):
         )
 
         mock_upload_dataset.assert_called_once_with(
-            RESOURCE_PREFIX, "domain", "dataset", file_name, file_content
+            RESOURCE_PREFIX, "domain", "dataset", file_name, ANY, idempotency_key=None
         )
 
         assert response.status_code == 400
@@ -85,12 +212,70 @@ class TestDataUpload(BaseClientTest):
         )
 
         mock_upload_dataset.assert_called_once_with(
-            RESOURCE_PREFIX, "domain", "dataset", file_name, file_content
+            RESOURCE_PREFIX, "domain", "dataset", file_name, ANY, idempotency_key=None
         )
 
         assert response.status_code == 202
         assert response.json() == {"uploaded": file_name}
 
+    @patch.object(DataService, "upload_dataset_async")
+    def test_queues_asynchronous_upload_job(self, mock_upload_dataset_async):
+        file_content = b"some,content"
+        file_name = "filename.csv"
+        job = UploadJob(
+            job_id="1234", domain="domain", dataset="dataset", filename=file_name
+        )
+        mock_upload_dataset_async.return_value = job
+
+        response = self.client.post(
+            "/datasets/domain/dataset?asynchronous=true",
+            files={"file": (file_name, file_content, "text/csv")},
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_upload_dataset_async.assert_called_once_with(
+            RESOURCE_PREFIX, "domain", "dataset", file_name, ANY, None
+        )
+
+        assert response.status_code == 202
+        assert response.json()["job_id"] == "1234"
+        assert response.json()["stage"] == "QUEUED"
+
+    @patch.object(DataService, "get_upload_job")
+    def test_gets_upload_job(self, mock_get_upload_job):
+        job = UploadJob(
+            job_id="1234", domain="domain", dataset="dataset", filename="file.csv"
+        )
+        job.fail(["Column [colname2] does not allow null values"])
+        mock_get_upload_job.return_value = job
+
+        response = self.client.get(
+            "/datasets/domain/dataset/jobs/1234",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_get_upload_job.assert_called_once_with("domain", "dataset", "1234")
+
+        assert response.status_code == 200
+        assert response.json()["stage"] == "FAILED"
+        assert response.json()["errors"] == [
+            "Column [colname2] does not allow null values"
+        ]
+
+    @patch.object(DataService, "get_upload_job")
+    def test_returns_not_found_when_upload_job_does_not_exist(
+        self, mock_get_upload_job
+    ):
+        mock_get_upload_job.side_effect = UploadJobNotFoundError("Job not found")
+
+        response = self.client.get(
+            "/datasets/domain/dataset/jobs/1234",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 404
+        assert response.json() == {"details": "Job not found"}
+
     def test_calls_data_fails_with_missing_path(self):
         file_content = b"some,content"
         file_name = "filename.csv"
@@ -138,7 +323,7 @@ class TestDataUpload(BaseClientTest):
         )
 
         mock_upload_dataset.assert_called_once_with(
-            RESOURCE_PREFIX, "domain", "dataset", file_name, file_content
+            RESOURCE_PREFIX, "domain", "dataset", file_name, ANY, idempotency_key=None
         )
 
         assert response.status_code == 429
@@ -160,13 +345,212 @@ class TestDataUpload(BaseClientTest):
         )
 
         mock_upload_dataset.assert_called_once_with(
-            RESOURCE_PREFIX, "domain", "dataset", file_name, file_content
+            RESOURCE_PREFIX, "domain", "dataset", file_name, ANY, idempotency_key=None
         )
 
         assert response.status_code == 500
         assert response.json() == {"details": "Internal failure when uploading data."}
 
 
+class TestBatchUpload(BaseClientTest):
+    @patch.object(DataService, "upload_datasets")
+    def test_uploads_every_file_of_the_batch(self, mock_upload_datasets):
+        uploaded_files = []
+
+        def upload_files(resource_prefix, domain, dataset, files):
+            uploaded_files.extend((filename, file.read()) for filename, file in files)
+            return [
+                BatchUploadResult(
+                    filename=filename,
+                    status_code=201,
+                    uploaded=f"2022-05-05T12:00:00-{filename}",
+                )
+                for filename, _ in files
+            ]
+
+        mock_upload_datasets.side_effect = upload_files
+
+        response = self.client.post(
+            "/datasets/domain/dataset/batch",
+            files=[
+                ("files", ("first.csv", b"some,content", "text/csv")),
+                ("files", ("second.csv", b"other,content", "text/csv")),
+            ],
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_upload_datasets.assert_called_once_with(
+            RESOURCE_PREFIX, "domain", "dataset", ANY
+        )
+        assert uploaded_files == [
+            ("first.csv", b"some,content"),
+            ("second.csv", b"other,content"),
+        ]
+        assert response.status_code == 201
+        assert response.json() == [
+            {
+                "filename": "first.csv",
+                "status_code": 201,
+                "uploaded": "2022-05-05T12:00:00-first.csv",
+            },
+            {
+                "filename": "second.csv",
+                "status_code": 201,
+                "uploaded": "2022-05-05T12:00:00-second.csv",
+            },
+        ]
+
+    @patch.object(DataService, "upload_datasets")
+    def test_returns_207_when_some_files_fail(self, mock_upload_datasets):
+        mock_upload_datasets.return_value = [
+            BatchUploadResult(
+                filename="first.csv",
+                status_code=201,
+                uploaded="2022-05-05T12:00:00-first.csv",
+            ),
+            BatchUploadResult(
+                filename="second.csv", status_code=400, details=["Invalid data"]
+            ),
+        ]
+
+        response = self.client.post(
+            "/datasets/domain/dataset/batch",
+            files=[
+                ("files", ("first.csv", b"some,content", "text/csv")),
+                ("files", ("second.csv", b"other,content", "text/csv")),
+            ],
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 207
+        assert response.json()[1] == {
+            "filename": "second.csv",
+            "status_code": 400,
+            "details": ["Invalid data"],
+        }
+
+    @patch.object(DataService, "upload_datasets")
+    def test_returns_400_when_schema_does_not_exist(self, mock_upload_datasets):
+        mock_upload_datasets.side_effect = SchemaNotFoundError("Error message")
+
+        response = self.client.post(
+            "/datasets/domain/dataset/batch",
+            files=[("files", ("first.csv", b"some,content", "text/csv"))],
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Error message"}
+
+    @patch.object(DataService, "upload_datasets")
+    def test_returns_429_when_crawler_is_already_running(self, mock_upload_datasets):
+        mock_upload_datasets.side_effect = CrawlerIsNotReadyError("Some message")
+
+        response = self.client.post(
+            "/datasets/domain/dataset/batch",
+            files=[("files", ("first.csv", b"some,content", "text/csv"))],
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 429
+        assert response.json() == {
+            "details": "Data is currently processing. Please try again later."
+        }
+
+
+class TestPresignedUpload(BaseClientTest):
+    @patch.object(DataService, "generate_upload_url")
+    def test_generates_upload_url(self, mock_generate_upload_url):
+        mock_generate_upload_url.return_value = PresignedUpload(
+            filename="2022-01-01T00:00:00-file.csv",
+            upload_url="https://url",
+            expires_in=3600,
+        )
+
+        response = self.client.post(
+            "/datasets/domain/dataset/upload-url?filename=file.csv",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_generate_upload_url.assert_called_once_with(
+            "domain", "dataset", "file.csv"
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "filename": "2022-01-01T00:00:00-file.csv",
+            "upload_url": "https://url",
+            "expires_in": 3600,
+        }
+
+    @patch.object(DataService, "generate_upload_url")
+    def test_returns_400_when_schema_does_not_exist(self, mock_generate_upload_url):
+        mock_generate_upload_url.side_effect = SchemaNotFoundError("Schema not found")
+
+        response = self.client.post(
+            "/datasets/domain/dataset/upload-url?filename=file.csv",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Schema not found"}
+
+    @patch.object(DataService, "process_uploaded_file")
+    def test_processes_uploaded_file(self, mock_process_uploaded_file):
+        mock_process_uploaded_file.return_value = "2022-01-01T00:00:00-file.csv"
+
+        response = self.client.post(
+            "/datasets/domain/dataset/process/2022-01-01T00:00:00-file.csv",
+            headers={
+                "Authorization": "Bearer test-token",
+                "Idempotency-Key": "request-1",
+            },
+        )
+
+        mock_process_uploaded_file.assert_called_once_with(
+            RESOURCE_PREFIX,
+            "domain",
+            "dataset",
+            "2022-01-01T00:00:00-file.csv",
+            idempotency_key="request-1",
+        )
+        assert response.status_code == 201
+        assert response.json() == {"uploaded": "2022-01-01T00:00:00-file.csv"}
+
+    @patch.object(DataService, "process_uploaded_file_async")
+    def test_queues_processing_of_uploaded_file(self, mock_process_uploaded_file_async):
+        mock_process_uploaded_file_async.return_value = UploadJob(
+            job_id="1234",
+            domain="domain",
+            dataset="dataset",
+            filename="2022-01-01T00:00:00-file.csv",
+        )
+
+        response = self.client.post(
+            "/datasets/domain/dataset/process/2022-01-01T00:00:00-file.csv?asynchronous=true",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_process_uploaded_file_async.assert_called_once_with(
+            RESOURCE_PREFIX, "domain", "dataset", "2022-01-01T00:00:00-file.csv", None
+        )
+        assert response.status_code == 202
+        assert response.json()["job_id"] == "1234"
+
+    @patch.object(DataService, "process_uploaded_file")
+    def test_returns_400_when_uploaded_file_is_invalid(
+        self, mock_process_uploaded_file
+    ):
+        mock_process_uploaded_file.side_effect = DatasetError("Invalid data")
+
+        response = self.client.post(
+            "/datasets/domain/dataset/process/2022-01-01T00:00:00-file.csv",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"details": "Invalid data"}
+
+
 class TestListDatasets(BaseClientTest):
     @patch.object(AWSResourceAdapter, "get_datasets_metadata")
     def test_returns_metadata_for_all_datasets(self, mock_get_datasets_metadata):
@@ -323,7 +707,7 @@ class TestDatasetInfo(BaseClientTest):
 
 
 class TestQuery(BaseClientTest):
-    @patch.object(AthenaAdapter, "query")
+    @patch.object(QueryService, "query")
     def test_call_service_with_only_domain_dataset_when_no_json_provided(
         self, mock_query_method
     ):
@@ -331,9 +715,11 @@ class TestQuery(BaseClientTest):
 
         self.client.post(query_url, headers={"Authorization": "Bearer test-token"})
 
-        mock_query_method.assert_called_once_with("mydomain", "mydataset", SQLQuery())
+        mock_query_method.assert_called_once_with(
+            "mydomain", "mydataset", SQLQuery(), False
+        )
 
-    @patch.object(AthenaAdapter, "query")
+    @patch.object(QueryService, "query")
     def test_call_service_with_sql_query_when_json_provided(self, mock_query_method):
         request_json = {"select_columns": ["column1"], "limit": "10"}
 
@@ -344,10 +730,13 @@ class TestQuery(BaseClientTest):
         )
 
         mock_query_method.assert_called_once_with(
-            "mydomain", "mydataset", SQLQuery(select_columns=["column1"], limit="10")
+            "mydomain",
+            "mydataset",
+            SQLQuery(select_columns=["column1"], limit="10"),
+            False,
         )
 
-    @patch.object(AthenaAdapter, "query")
+    @patch.object(QueryService, "query")
     def test_calls_service_with_sql_query_when_empty_json_values_provided(
         self, mock_query_method
     ):
@@ -373,9 +762,36 @@ class TestQuery(BaseClientTest):
                 aggregation_conditions="",
                 limit="10",
             ),
+            False,
         )
 
-    @patch.object(AthenaAdapter, "query")
+    @patch.object(QueryService, "query")
+    def test_call_service_with_unload_when_requested(self, mock_query_method):
+        mock_query_method.return_value = pd.DataFrame({"column1": [1]})
+
+        self.client.post(
+            "/datasets/mydomain/mydataset/query?unload=true",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_query_method.assert_called_once_with(
+            "mydomain", "mydataset", SQLQuery(), True
+        )
+
+    @patch.object(QueryService, "query_chunks")
+    def test_streams_unloaded_query_results_when_requested(self, mock_query_chunks):
+        mock_query_chunks.return_value = iter([pd.DataFrame({"column1": [1]})])
+
+        self.client.post(
+            "/datasets/mydomain/mydataset/query?stream=true&unload=true",
+            headers={"Authorization": "Bearer test-token", "Accept": "text/csv"},
+        )
+
+        mock_query_chunks.assert_called_once_with(
+            "mydomain", "mydataset", SQLQuery(), True
+        )
+
+    @patch.object(QueryService, "query")
     def test_returns_formatted_json_from_query_result(self, mock_query_method):
         mock_query_method.return_value = pd.DataFrame(
             {
@@ -402,7 +818,7 @@ class TestQuery(BaseClientTest):
             "1": {"column1": "2", "column2": "item2", "area": "area_2"},
         }
 
-    @patch.object(AthenaAdapter, "query")
+    @patch.object(QueryService, "query")
     def test_request_query_in_csv_is_successful(self, mock_query_method):
         mock_query_method.return_value = pd.DataFrame(
             {
@@ -421,7 +837,7 @@ class TestQuery(BaseClientTest):
 
         assert response.status_code == 200
 
-    @patch.object(AthenaAdapter, "query")
+    @patch.object(QueryService, "query")
     def test_returns_formatted_json_from_query_if_format_is_not_provided(
         self, mock_query_method
     ):
@@ -445,7 +861,7 @@ class TestQuery(BaseClientTest):
             "1": {"column1": "2", "column2": "item2", "area": "area_2"},
         }
 
-    @patch.object(AthenaAdapter, "query")
+    @patch.object(QueryService, "query")
     def test_returns_error_from_query_request_when_format_is_unsupported(
         self, mock_query_method
     ):
@@ -466,7 +882,136 @@ class TestQuery(BaseClientTest):
 
         assert response.status_code == 400
         assert response.json() == {
-            "details": "Provided value for Accept header parameter [text/plain] is not supported. Supported formats: application/json, text/csv"
+            "details": "Provided value for Accept header parameter [text/plain] is not supported. Supported formats: application/json, text/csv, application/x-ndjson, application/vnd.apache.arrow.stream, application/vnd.apache.parquet"
+        }
+
+    @patch.object(QueryService, "query_chunks")
+    def test_streams_query_results_as_csv(self, mock_query_chunks):
+        mock_query_chunks.return_value = iter(
+            [
+                pd.DataFrame({"column1": [1], "column2": ["item1"]}),
+                pd.DataFrame({"column1": [2], "column2": ["item2"]}),
+            ]
+        )
+
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/query?stream=true",
+            headers={"Authorization": "Bearer test-token", "Accept": "text/csv"},
+        )
+
+        mock_query_chunks.assert_called_once_with(
+            "mydomain", "mydataset", SQLQuery(), False
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text == (
+            '"","column1","column2"\n' '0,"1","item1"\n' '1,"2","item2"\n'
+        )
+
+    @patch.object(QueryService, "query_chunks")
+    def test_streams_query_results_as_ndjson(self, mock_query_chunks):
+        mock_query_chunks.return_value = iter(
+            [pd.DataFrame({"column1": [1, 2], "column2": ["item1", None]})]
+        )
+
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/query",
+            headers={
+                "Authorization": "Bearer test-token",
+                "Accept": "application/x-ndjson",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text == (
+            '{"column1":"1","column2":"item1"}\n' '{"column1":"2","column2":null}\n'
+        )
+
+    @patch.object(QueryService, "query")
+    def test_returns_typed_query_results_as_arrow_stream(self, mock_query_method):
+        mock_query_method.return_value = pd.DataFrame(
+            {"column1": [1, 2], "column2": ["item1", None]}
+        )
+
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/query",
+            headers={
+                "Authorization": "Bearer test-token",
+                "Accept": "application/vnd.apache.arrow.stream",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.schema.types == [pa.int64(), pa.string()]
+        assert table.to_pydict() == {"column1": [1, 2], "column2": ["item1", None]}
+
+    @patch.object(QueryService, "query")
+    def test_returns_typed_query_results_as_parquet(self, mock_query_method):
+        mock_query_method.return_value = pd.DataFrame(
+            {"column1": [1.5, 2.5], "column2": ["item1", "item2"]}
+        )
+
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/query",
+            headers={
+                "Authorization": "Bearer test-token",
+                "Accept": "application/vnd.apache.parquet",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.parquet"
+        table = pq.read_table(io.BytesIO(response.content))
+        assert table.schema.types == [pa.float64(), pa.string()]
+        assert table.to_pydict() == {
+            "column1": [1.5, 2.5],
+            "column2": ["item1", "item2"],
+        }
+
+    @patch.object(QueryService, "query_chunks")
+    def test_streams_query_results_as_arrow_record_batches(self, mock_query_chunks):
+        mock_query_chunks.return_value = iter(
+            [
+                pd.DataFrame({"column1": [1], "column2": ["item1"]}),
+                pd.DataFrame({"column1": [2], "column2": ["item2"]}),
+            ]
+        )
+
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/query?stream=true",
+            headers={
+                "Authorization": "Bearer test-token",
+                "Accept": "application/vnd.apache.arrow.stream",
+            },
+        )
+
+        mock_query_chunks.assert_called_once_with(
+            "mydomain", "mydataset", SQLQuery(), False
+        )
+        assert response.status_code == 200
+        reader = pa.ipc.open_stream(response.content)
+        assert reader.schema.types == [pa.int64(), pa.string()]
+        assert [batch.to_pydict() for batch in reader] == [
+            {"column1": [1], "column2": ["item1"]},
+            {"column1": [2], "column2": ["item2"]},
+        ]
+
+    @patch.object(QueryService, "query_chunks")
+    def test_returns_error_when_streaming_query_results_as_json(
+        self, mock_query_chunks
+    ):
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/query?stream=true",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_query_chunks.assert_not_called()
+        assert response.status_code == 400
+        assert response.json() == {
+            "details": "Query results can only be streamed as text/csv, application/x-ndjson, application/vnd.apache.arrow.stream or application/vnd.apache.parquet"
         }
 
     @pytest.mark.parametrize(
@@ -577,3 +1122,140 @@ class TestDeleteFiles(BaseClientTest):
 
         assert response.status_code == 400
         assert response.json() == {"details": "Some random message"}
+
+
+class TestCompactDataset(BaseClientTest):
+    @patch.object(CompactionService, "compact_dataset_async")
+    def test_starts_compaction_of_the_dataset(self, mock_compact_dataset_async):
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/compact",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_compact_dataset_async.assert_called_once_with("mydomain", "mydataset")
+
+        assert response.status_code == 202
+        assert response.json() == {"compacting": "mydomain/mydataset"}
+
+    @patch.object(CompactionService, "compact_dataset_async")
+    def test_returns_409_when_dataset_is_already_being_compacted(
+        self, mock_compact_dataset_async
+    ):
+        mock_compact_dataset_async.side_effect = ConflictError(
+            "The dataset [mydomain/mydataset] is being compacted"
+        )
+
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/compact",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 409
+        assert response.json() == {
+            "details": "The dataset [mydomain/mydataset] is being compacted"
+        }
+
+    @patch.object(CompactionService, "compact_dataset_async")
+    def test_returns_400_when_schema_does_not_exist(self, mock_compact_dataset_async):
+        mock_compact_dataset_async.side_effect = SchemaNotFoundError(
+            "Could not find schema related to the dataset [mydataset]"
+        )
+
+        response = self.client.post(
+            "/datasets/mydomain/mydataset/compact",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {
+            "details": "Could not find schema related to the dataset [mydataset]"
+        }
+
+
+class TestAsyncQuery(BaseClientTest):
+    @patch.object(QueryService, "submit_query")
+    def test_submits_query(self, mock_submit_query):
+        mock_submit_query.return_value = QueryExecution(
+            query_id="1234", status="QUEUED"
+        )
+
+        response = self.client.post(
+            "/datasets/domain/dataset/query/async",
+            headers={"Authorization": "Bearer test-token"},
+            json={"limit": "10"},
+        )
+
+        mock_submit_query.assert_called_once_with(
+            "domain", "dataset", SQLQuery(limit="10")
+        )
+        assert response.status_code == 202
+        assert response.json()["query_id"] == "1234"
+        assert response.json()["status"] == "QUEUED"
+
+    @patch.object(QueryService, "get_query_execution")
+    def test_gets_query_status(self, mock_get_query_execution):
+        mock_get_query_execution.return_value = QueryExecution(
+            query_id="1234", status="SUCCEEDED", scanned_bytes=1024
+        )
+
+        response = self.client.get(
+            "/datasets/domain/dataset/query/async/1234",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_get_query_execution.assert_called_once_with("domain", "dataset", "1234")
+        assert response.status_code == 200
+        assert response.json()["status"] == "SUCCEEDED"
+        assert response.json()["scanned_bytes"] == 1024
+
+    @patch.object(QueryService, "get_query_execution")
+    def test_returns_not_found_when_query_does_not_exist(
+        self, mock_get_query_execution
+    ):
+        mock_get_query_execution.side_effect = QueryJobNotFoundError("Query not found")
+
+        response = self.client.get(
+            "/datasets/domain/dataset/query/async/1234",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        assert response.status_code == 404
+        assert response.json() == {"details": "Query not found"}
+
+    @patch.object(QueryService, "get_query_results")
+    def test_gets_page_of_query_results(self, mock_get_query_results):
+        mock_get_query_results.return_value = QueryResultsPage(
+            columns=["colname1"], rows=[{"colname1": "value"}], next_page_token="next"
+        )
+
+        response = self.client.get(
+            "/datasets/domain/dataset/query/async/1234/results?page_size=10&page_token=token",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_get_query_results.assert_called_once_with(
+            "domain", "dataset", "1234", 10, "token"
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "columns": ["colname1"],
+            "rows": [{"colname1": "value"}],
+            "next_page_token": "next",
+        }
+
+    @patch.object(QueryService, "get_query_results")
+    def test_returns_conflict_when_query_results_are_not_available(
+        self, mock_get_query_results
+    ):
+        mock_get_query_results.side_effect = ConflictError("Not available")
+
+        response = self.client.get(
+            "/datasets/domain/dataset/query/async/1234/results",
+            headers={"Authorization": "Bearer test-token"},
+        )
+
+        mock_get_query_results.assert_called_once_with(
+            "domain", "dataset", "1234", 1000, None
+        )
+        assert response.status_code == 409
+        assert response.json() == {"details": "Not available"}
@@ -9,6 +9,7 @@ from api.common.custom_exceptions import (
     SchemaError,
     ConflictError,
     CrawlerCreateFailsError,
+    TableCreateFailsError,
     UserGroupCreationError,
     ProtectedDomainDoesNotExistError,
 )
@@ -113,6 +114,31 @@ class TestSchemaUpload(BaseClientTest):
         mock_delete_schema.assert_called_once_with("some", "thing", "PUBLIC")
         mock_delete_user_groups.assert_called_once_with("some", "thing")
 
+    @patch.object(CognitoAdapter, "delete_user_groups")
+    @patch.object(DeleteService, "delete_schema")
+    @patch.object(DataService, "upload_schema")
+    def test_returns_500_schema_deletion_if_table_creation_fails(
+        self,
+        mock_upload_schema,
+        mock_delete_schema,
+        mock_delete_user_groups,
+    ):
+        request_body, _ = self._generate_schema()
+
+        mock_upload_schema.side_effect = TableCreateFailsError(
+            "Failed to create table [some_thing]"
+        )
+
+        response = self.client.post(
+            "/schema", json=request_body, headers={"Authorization": "Bearer test-token"}
+        )
+
+        assert response.status_code == 500
+        assert response.json() == {"details": "Failed to create table [some_thing]"}
+
+        mock_delete_schema.assert_called_once_with("some", "thing", "PUBLIC")
+        mock_delete_user_groups.assert_called_once_with("some", "thing")
+
     @patch.object(DeleteService, "delete_schema")
     @patch.object(DataService, "upload_schema")
     def test_returns_500_schema_deletion_if_user_group_creation_fails(
@@ -0,0 +1,45 @@
+from api.domain.compaction_manifest import CompactedSource, CompactionManifest
+
+
+class TestCompactionManifest:
+    def setup_method(self):
+        self.manifest = CompactionManifest(
+            domain="domain",
+            dataset="dataset",
+            partition_path="year=2020/month=1",
+            filename="compacted-1234.csv",
+            sources=[
+                CompactedSource(filename="2022-01-01T00:00:00-a.csv", rows=2),
+                CompactedSource(filename="2022-01-02T00:00:00-b.csv", rows=3),
+            ],
+        )
+
+    def test_data_path(self):
+        assert (
+            self.manifest.data_path()
+            == "data/domain/dataset/year=2020/month=1/compacted-1234.csv"
+        )
+
+    def test_manifest_path(self):
+        assert (
+            self.manifest.manifest_path()
+            == "compaction_manifests/domain/dataset/year=2020/month=1/compacted-1234.csv.json"
+        )
+
+    def test_paths_of_unpartitioned_datasets(self):
+        self.manifest.partition_path = ""
+
+        assert self.manifest.data_path() == "data/domain/dataset/compacted-1234.csv"
+        assert (
+            self.manifest.manifest_path()
+            == "compaction_manifests/domain/dataset/compacted-1234.csv.json"
+        )
+
+    def test_source_row_ranges(self):
+        assert [
+            (source.filename, start, end)
+            for source, start, end in self.manifest.source_row_ranges()
+        ] == [
+            ("2022-01-01T00:00:00-a.csv", 0, 2),
+            ("2022-01-02T00:00:00-b.csv", 2, 5),
+        ]
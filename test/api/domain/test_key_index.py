@@ -0,0 +1,83 @@
+import pandas as pd
+
+from api.common.config.constants import KEY_INDEX_BUCKET_COUNT
+from api.domain.key_index import (
+    generate_key_buckets,
+    generate_keys,
+    key_index_path,
+    parse_partition_path,
+)
+from api.domain.schema import Schema, Column
+from api.domain.schema_metadata import SchemaMetadata
+
+
+class TestKeyIndex:
+    def setup_method(self):
+        self.schema = Schema(
+            metadata=SchemaMetadata(
+                domain="some", dataset="other", sensitivity="PUBLIC"
+            ),
+            columns=[
+                Column(
+                    name="year",
+                    partition_index=0,
+                    data_type="Int64",
+                    allow_null=False,
+                    primary_key=True,
+                ),
+                Column(
+                    name="id",
+                    partition_index=None,
+                    data_type="object",
+                    allow_null=False,
+                    primary_key=True,
+                ),
+                Column(
+                    name="value",
+                    partition_index=None,
+                    data_type="Float64",
+                    allow_null=True,
+                ),
+            ],
+        )
+
+    def test_key_index_path(self):
+        assert key_index_path("some", "other", 12) == "key_index/some/other/12.parquet"
+
+    def test_generate_keys_from_key_columns(self):
+        data = pd.DataFrame(
+            {
+                "year": pd.array([2020, 2021], dtype=pd.Int64Dtype()),
+                "id": ["a", "b"],
+                "value": pd.array([1.5, None], dtype=pd.Float64Dtype()),
+            }
+        )
+
+        assert generate_keys(self.schema, data, "").tolist() == [
+            "2020\x1fa",
+            "2021\x1fb",
+        ]
+
+    def test_generate_keys_of_partition_from_partition_path(self):
+        data = pd.DataFrame({"id": ["a", "b"], "value": ["1.5", None]})
+
+        assert generate_keys(self.schema, data, "year=2020").tolist() == [
+            "2020\x1fa",
+            "2020\x1fb",
+        ]
+
+    def test_generate_key_buckets_is_stable(self):
+        keys = pd.Series(["2020\x1fa", "2020\x1fb", "2020\x1fa"])
+
+        buckets = generate_key_buckets(keys)
+
+        assert buckets[0] == buckets[2]
+        assert buckets.between(0, KEY_INDEX_BUCKET_COUNT - 1).all()
+        assert buckets.tolist() == generate_key_buckets(keys.copy()).tolist()
+
+    def test_parse_partition_path(self):
+        assert parse_partition_path("year=2020/month=a=b") == {
+            "year": "2020",
+            "month": "a=b",
+        }
+        assert parse_partition_path("") == {}
@@ -14,6 +14,18 @@ class TestSchema:
         actual_output_type = MimeType.to_mimetype("text/csv")
         assert actual_output_type == MimeType.TEXT_CSV
 
+    @pytest.mark.parametrize(
+        "output_format, mime_type",
+        [
+            ("application/vnd.apache.arrow.stream", MimeType.APPLICATION_ARROW_STREAM),
+            ("application/vnd.apache.parquet", MimeType.APPLICATION_PARQUET),
+        ],
+    )
+    def test_sets_columnar_types(self, output_format: str, mime_type: MimeType):
+        actual_output_type = MimeType.to_mimetype(output_format)
+        assert actual_output_type == mime_type
+        assert actual_output_type.is_columnar()
+
     @pytest.mark.parametrize(
         "output_format", ["application/xml", "text/plain", "text/css"]
     )
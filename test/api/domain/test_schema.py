@@ -64,6 +64,14 @@ class TestSchema:
 
         assert actual_columns == expected_columns
 
+    def test_gets_non_partition_columns(self):
+        actual_columns = self.schema.get_non_partition_columns()
+
+        assert [column.name for column in actual_columns] == ["colname3"]
+
+    def test_gets_default_storage_format(self):
+        assert self.schema.get_storage_format() == "CSV"
+
     def test_gets_partition_numbers(self):
         expected_partitions_numbers = [0, 1]
 
@@ -78,6 +86,12 @@ class TestSchema:
 
         assert actual_data_types == expected_data_types
 
+    def test_orders_columns_by_name(self):
+        ordered_schema = self.schema.with_column_order(["colname3", "colname1"])
+
+        assert ordered_schema.get_column_names() == ["colname3", "colname1", "colname2"]
+        assert self.schema.get_column_names() == ["colname1", "colname2", "colname3"]
+
 
 class TestSchemaMetadata:
     def test_creates_metadata_from_s3_key(self):
@@ -143,3 +143,34 @@ class TestSQLQuery:
         )
 
         assert sql_query.to_sql("test_domain") == expected_sql
+
+    @pytest.mark.parametrize(
+        "select_columns, expected_column_names",
+        [
+            (None, ["col1", "col2"]),
+            (["", "col2"], ["col2"]),
+            (["col2", "*"], ["col2", "col1", "col2"]),
+            (['avg(col1) AS "Average"', "col2 as second"], ["average", "second"]),
+            (['"Col1"'], ["col1"]),
+            (["col1", "count(*)"], ["col1", "_col1"]),
+        ],
+    )
+    def test_result_column_names(self, select_columns, expected_column_names):
+        sql_query = SQLQuery(select_columns=select_columns)
+
+        assert sql_query.result_column_names(["col1", "col2"]) == expected_column_names
+
+    @pytest.mark.parametrize(
+        "select_columns, expected",
+        [
+            (None, False),
+            (["*", "col1", '"Col 2"'], False),
+            (["avg(col1) AS average", "count(*) as total"], False),
+            (["col1", "avg(col2)"], True),
+            (["count(*)"], True),
+        ],
+    )
+    def test_has_unnamed_columns(self, select_columns, expected):
+        sql_query = SQLQuery(select_columns=select_columns)
+
+        assert sql_query.has_unnamed_columns() is expected
@@ -1,5 +1,11 @@
+import re
+
 from api.common.config.aws import DATA_BUCKET
-from api.domain.storage_metadata import StorageMetaData
+from api.domain.storage_metadata import (
+    StorageMetaData,
+    data_filenames,
+    generate_generation_id,
+)
 
 
 class TestStorageMetaData:
@@ -26,3 +32,65 @@ class TestStorageMetaData:
             self.dataset_meta_data.s3_path()
             == f"s3://{DATA_BUCKET}/data/DOMAIN/DATASET/"
         )
+
+    def test_generation_location(self):
+        assert (
+            self.dataset_meta_data.generation_location("generation-1")
+            == "data/DOMAIN/DATASET/generation-1"
+        )
+
+    def test_generation_s3_path(self):
+        assert (
+            self.dataset_meta_data.generation_s3_path("generation-1")
+            == f"s3://{DATA_BUCKET}/data/DOMAIN/DATASET/generation-1/"
+        )
+
+    def test_generation_of_key(self):
+        assert (
+            self.dataset_meta_data.generation_of(
+                "data/DOMAIN/DATASET/generation-1/year=2020/file.csv"
+            )
+            == "generation-1"
+        )
+
+    def test_generation_of_s3_path(self):
+        assert (
+            self.dataset_meta_data.generation_of(
+                f"s3://{DATA_BUCKET}/data/DOMAIN/DATASET/generation-1/"
+            )
+            == "generation-1"
+        )
+
+    def test_no_generation_of_data_stored_in_dataset_location(self):
+        assert (
+            self.dataset_meta_data.generation_of(
+                "data/DOMAIN/DATASET/year=2020/file.csv"
+            )
+            is None
+        )
+        assert (
+            self.dataset_meta_data.generation_of(self.dataset_meta_data.s3_path())
+            is None
+        )
+
+
+def test_generate_generation_id():
+    generation = generate_generation_id()
+
+    assert re.fullmatch(r"generation-\d{8}T\d{6}-[0-9a-f]{8}", generation)
+    assert generation != generate_generation_id()
+
+
+def test_data_filenames_include_every_storage_format():
+    assert data_filenames("2022-01-01T12:00:00-data.parquet") == (
+        "2022-01-01T12:00:00-data.parquet",
+        "2022-01-01T12:00:00-data.csv",
+    )
+
+
+def test_data_filenames_of_compressed_raw_files():
+    assert data_filenames("2022-01-01T12:00:00-data.csv.gz") == (
+        "2022-01-01T12:00:00-data.csv.gz",
+        "2022-01-01T12:00:00-data.csv",
+        "2022-01-01T12:00:00-data.parquet",
+    )
@@ -0,0 +1,98 @@
+import pytest
+
+from api.domain.upload_format import (
+    Compression,
+    UploadFormat,
+    uncompressed_filename,
+    upload_filename,
+)
+
+
+class TestUploadFormat:
+    @pytest.mark.parametrize(
+        "filename, upload_format",
+        [
+            ("data.csv", UploadFormat.CSV),
+            ("data.parquet", UploadFormat.PARQUET),
+            ("data.PARQUET", UploadFormat.PARQUET),
+            ("data.arrows", UploadFormat.ARROW),
+            ("data", UploadFormat.CSV),
+            ("data.txt", UploadFormat.CSV),
+            ("data.csv.gz", UploadFormat.CSV),
+            ("data.parquet.zst", UploadFormat.PARQUET),
+        ],
+    )
+    def test_from_filename(self, filename: str, upload_format: UploadFormat):
+        assert UploadFormat.from_filename(filename) == upload_format
+
+    @pytest.mark.parametrize(
+        "mime_type, upload_format",
+        [
+            ("text/csv", UploadFormat.CSV),
+            ("application/vnd.apache.parquet", UploadFormat.PARQUET),
+            ("application/vnd.apache.arrow.stream", UploadFormat.ARROW),
+            ("application/octet-stream", None),
+            (None, None),
+        ],
+    )
+    def test_from_mime_type(self, mime_type: str, upload_format: UploadFormat):
+        assert UploadFormat.from_mime_type(mime_type) == upload_format
+
+    def test_file_extensions(self):
+        assert UploadFormat.file_extensions() == (".csv", ".parquet", ".arrows")
+
+
+class TestCompression:
+    @pytest.mark.parametrize(
+        "filename, compression",
+        [
+            ("data.csv.gz", Compression.GZIP),
+            ("data.csv.zst", Compression.ZSTD),
+            ("data.csv", None),
+            ("data", None),
+        ],
+    )
+    def test_from_filename(self, filename: str, compression: Compression):
+        assert Compression.from_filename(filename) == compression
+
+    @pytest.mark.parametrize(
+        "mime_type, compression",
+        [
+            ("application/gzip", Compression.GZIP),
+            ("application/zstd", Compression.ZSTD),
+            ("text/csv", None),
+        ],
+    )
+    def test_from_mime_type(self, mime_type: str, compression: Compression):
+        assert Compression.from_mime_type(mime_type) == compression
+
+    @pytest.mark.parametrize(
+        "filename, expected",
+        [
+            ("data.csv.gz", "data.csv"),
+            ("data.csv.zst", "data.csv"),
+            ("data.csv", "data.csv"),
+        ],
+    )
+    def test_uncompressed_filename(self, filename: str, expected: str):
+        assert uncompressed_filename(filename) == expected
+
+
+@pytest.mark.parametrize(
+    "filename, mime_type, expected",
+    [
+        ("data.csv", "text/csv", "data.csv"),
+        ("data.csv", None, "data.csv"),
+        ("data.parquet", "application/octet-stream", "data.parquet"),
+        ("data.parquet", "application/vnd.apache.parquet", "data.parquet"),
+        ("data", "application/vnd.apache.parquet", "data.parquet"),
+        ("data.csv", "application/vnd.apache.arrow.stream", "data.arrows"),
+        ("data.csv", "application/gzip", "data.csv.gz"),
+        ("data.csv.gz", "application/gzip", "data.csv.gz"),
+        ("data.csv.zst", "text/csv", "data.csv.zst"),
+    ],
+)
+def test_upload_filename_keeps_the_format_of_typed_files(
+    filename: str, mime_type: str, expected: str
+):
+    assert upload_filename(filename, mime_type) == expected
@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+import pytest
+
+from api.domain.upload_job import UploadJob, UploadJobStage
+
+
+class TestUploadJob:
+    def setup_method(self):
+        self.job = UploadJob(
+            domain="domain",
+            dataset="dataset",
+            filename="file.csv",
+            stage_started_at=100.0,
+        )
+
+    def test_initialises_queued_job_with_id(self):
+        assert self.job.stage == "QUEUED"
+        assert self.job.job_id
+        assert self.job.errors == []
+        assert self.job.timings == {}
+
+    @patch("api.domain.upload_job.time.time")
+    def test_records_time_spent_in_each_stage(self, mock_time):
+        mock_time.side_effect = [101.5, 104.0]
+
+        self.job.set_stage(UploadJobStage.VALIDATION)
+        self.job.set_stage(UploadJobStage.DATA_UPLOAD)
+
+        assert self.job.stage == "DATA_UPLOAD"
+        assert self.job.timings == {"QUEUED": 1.5, "VALIDATION": 2.5}
+
+    def test_records_chunk_progress(self):
+        self.job.record_chunk(100)
+        self.job.record_chunk(20)
+
+        assert self.job.chunks_uploaded == 2
+        assert self.job.rows_uploaded == 120
+
+    def test_completes_job(self):
+        self.job.complete("2022-01-01T12:00:00-file.csv")
+
+        assert self.job.stage == "COMPLETED"
+        assert self.job.uploaded_filename == "2022-01-01T12:00:00-file.csv"
+
+    def test_fails_job(self):
+        self.job.fail(["error 1", "error 2"])
+
+        assert self.job.stage == "FAILED"
+        assert self.job.errors == ["error 1", "error 2"]
+
+    @patch("api.domain.upload_job.time.time")
+    def test_records_heartbeat(self, mock_time):
+        mock_time.return_value = 200.0
+
+        self.job.heartbeat()
+
+        assert self.job.heartbeat_at == 200.0
+
+    @pytest.mark.parametrize(
+        "stage, heartbeat_at, expected",
+        [
+            ("QUEUED", 100.0, True),
+            ("DATA_UPLOAD", 100.0, True),
+            ("DATA_UPLOAD", 150.0, False),
+            ("COMPLETED", 100.0, False),
+            ("FAILED", 100.0, False),
+        ],
+    )
+    @patch("api.domain.upload_job.time.time")
+    def test_is_stale_when_unfinished_without_heartbeat_for_timeout(
+        self, mock_time, stage, heartbeat_at, expected
+    ):
+        mock_time.return_value = 200.0
+        self.job.stage = stage
+        self.job.heartbeat_at = heartbeat_at
+
+        assert self.job.is_stale(60) is expected
+
+    def test_job_path(self):
+        job = UploadJob(
+            job_id="1234", domain="domain", dataset="dataset", filename="file.csv"
+        )
+
+        assert job.job_path() == "upload_jobs/domain/dataset/1234.json"
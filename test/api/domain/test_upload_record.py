@@ -0,0 +1,52 @@
+import hashlib
+
+from api.domain.upload_record import (
+    UploadClaim,
+    UploadRecord,
+    content_hash_index_key,
+    idempotency_key_index_key,
+)
+
+
+class TestUploadRecord:
+    def test_record_paths_for_content_hash_only(self):
+        record = UploadRecord(
+            domain="domain",
+            dataset="dataset",
+            content_hash="abc123",
+            raw_filename="2022-01-01T12:00:00-file.csv",
+            uploaded_filename="2022-01-01T12:00:00-file.csv",
+        )
+
+        assert record.record_paths() == [
+            "upload_index/domain/dataset/sha256-abc123.json"
+        ]
+
+    def test_record_paths_include_idempotency_key(self):
+        record = UploadRecord(
+            domain="domain",
+            dataset="dataset",
+            content_hash="abc123",
+            idempotency_key="request-1",
+            raw_filename="2022-01-01T12:00:00-file.csv",
+            uploaded_filename="domain.csv",
+        )
+
+        assert record.record_paths() == [
+            "upload_index/domain/dataset/sha256-abc123.json",
+            f"upload_index/domain/dataset/key-{hashlib.sha256(b'request-1').hexdigest()}.json",
+        ]
+
+    def test_content_hash_index_key(self):
+        assert content_hash_index_key("abc123") == "sha256-abc123"
+
+    def test_idempotency_key_index_key_is_safe_for_object_paths(self):
+        index_key = idempotency_key_index_key("../some/key")
+
+        assert "/" not in index_key
+        assert index_key == idempotency_key_index_key("../some/key")
+
+    def test_claim_path(self):
+        claim = UploadClaim(domain="domain", dataset="dataset", index_key="sha256-abc")
+
+        assert claim.claim_path() == "upload_index/domain/dataset/sha256-abc.claim"
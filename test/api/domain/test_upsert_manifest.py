@@ -0,0 +1,18 @@
+from api.domain.upsert_manifest import UpsertManifest
+
+
+class TestUpsertManifest:
+    def test_manifest_path(self):
+        manifest = UpsertManifest(
+            domain="domain",
+            dataset="dataset",
+            filename="1-2022-01-01T12:00:00-file.csv",
+            written_files=[],
+            superseded_files=[],
+        )
+
+        assert (
+            manifest.manifest_path()
+            == "upsert_manifests/domain/dataset/1-2022-01-01T12:00:00-file.csv.json"
+        )
+        assert manifest.committed is False
@@ -0,0 +1,82 @@
+"""
+Compares the time taken to split a dataframe into partitions by grouping it, as
+partitioning used to, with splitting it into slices of the data sorted once.
+
+    python -m test.benchmark.benchmark_partitioning --rows 10000000 --partitions 10000
+"""
+import argparse
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from api.application.services.partitioning_service import (
+    drop_columns,
+    generate_path,
+    partitioned_dataframe,
+)
+
+
+def grouped_partitioned_dataframe(
+    df: pd.DataFrame, partitions: List[str]
+) -> List[Tuple[str, pd.DataFrame]]:
+    partitioned_data = []
+    for group_spec, group_data in df.groupby(by=partitions):
+        group_spec = (group_spec,) if len(partitions) == 1 else group_spec
+        cleaned_dataframe = drop_columns(df=group_data, columns=partitions).reset_index(
+            drop=True
+        )
+        partitioned_data.append(
+            (generate_path(partitions, group_spec), cleaned_dataframe)
+        )
+    return partitioned_data
+
+
+def generate_data(rows: int, partitions: int) -> pd.DataFrame:
+    generator = np.random.default_rng(0)
+    years = max(partitions // 100, 1)
+    return pd.DataFrame(
+        {
+            "year": pd.array(
+                generator.integers(2000, 2000 + years, rows), dtype="Int64"
+            ),
+            "region": generator.integers(0, partitions // years, rows).astype(str),
+            "count": pd.array(generator.integers(0, 1000, rows), dtype="Int64"),
+            "value": generator.random(rows),
+            "name": generator.choice(["a", "b", "c", "d"], rows),
+        }
+    )
+
+
+def time_partitioning(
+    partitioner: Callable, df: pd.DataFrame, partitions: List[str], repeats: int
+) -> Tuple[float, int]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        partitioned_data = partitioner(df, partitions)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(partitioned_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--partitions", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    df = generate_data(args.rows, args.partitions)
+    partitions = ["year", "region"]
+    print(f"{args.rows} rows, {df.groupby(partitions).ngroups} partitions")
+    for name, partitioner in [
+        ("groupby", grouped_partitioned_dataframe),
+        ("sorted slices", partitioned_dataframe),
+    ]:
+        seconds, count = time_partitioning(partitioner, df, partitions, args.repeats)
+        print(f"{name:>14}: {seconds:.2f}s for {count} partitions")
+
+
+if __name__ == "__main__":
+    main()